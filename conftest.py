@@ -0,0 +1,21 @@
+"""Shared pytest fixtures for the root-level tests."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import FileNumberGenerator  # noqa: E402
+
+
+@pytest.fixture
+def small_generator():
+    """Factory for generators small enough to run the full plan in a test"""
+    def make(numbers_per_year: int, records_per_group: int) -> FileNumberGenerator:
+        generator = FileNumberGenerator()
+        generator.numbers_per_year = numbers_per_year
+        generator.records_per_group = records_per_group
+        return generator
+    return make
@@ -3,11 +3,17 @@ Fast Database Update Script - Update all counter fields with progress tracking
 Updates: number, group, sys_batch_no, registry_batch_no for all 7.2M records
 """
 
+import os
+import sys
 import pyodbc
 import time
 from datetime import datetime
 from collections import defaultdict
 
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from metrics import LoadMetrics, flush_metrics, start_metrics_exporter
+
 class DatabaseUpdater:
     def __init__(self, connection_string):
         """Initialize database connection"""
@@ -15,6 +21,8 @@ class DatabaseUpdater:
         self.conn = None
         self.cursor = None
         self.records_per_group = 100
+        # Counters, gauges and latency histograms (exported with METRICS_FILE / METRICS_PORT)
+        self.metrics = LoadMetrics('database_updater')
         
     def connect(self):
         """Establish database connection"""
@@ -179,6 +187,7 @@ class DatabaseUpdater:
         """
 
         start_all = time.time()
+        self.metrics.planned(sum(registry_sizes.get(registry, 0) for registry in registry_order))
 
         for registry_idx, registry in enumerate(registry_order, 1):
             registry_size = registry_sizes.get(registry, 0)
@@ -205,6 +214,7 @@ class DatabaseUpdater:
                 group_end = min(registry_processed + 100, registry_size)
                 
                 try:
+                    batch_started = time.perf_counter()
                     self.cursor.execute(
                         group_sql,
                         registry,
@@ -214,8 +224,13 @@ class DatabaseUpdater:
                         group_start,
                         group_end
                     )
+                    self.metrics.round_trip('update')
                     rows = self.cursor.rowcount if self.cursor.rowcount > 0 else (group_end - group_start + 1)
+                    commit_started = time.perf_counter()
                     self.conn.commit()
+                    self.metrics.commit(time.perf_counter() - commit_started)
+                    self.metrics.batch(time.perf_counter() - batch_started, rows)
+                    self.metrics.updated(rows)
                 except Exception as e:
                     self.conn.rollback()
                     print(f"✗ Group {registry_group + 1} failed for registry '{registry}': {e}")
@@ -384,6 +399,7 @@ class DatabaseUpdater:
         
         if not self.connect():
             return False
+        start_metrics_exporter()
         
         try:
             # Show current state
@@ -440,6 +456,7 @@ class DatabaseUpdater:
             
         finally:
             self.disconnect()
+            flush_metrics()
 
 
 if __name__ == "__main__":
@@ -12,6 +12,7 @@ from datetime import datetime
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from production_insertion import ProductionInserter
+from generation_plan import GenerationPlan
 
 def run_production_with_monitoring():
     """Run production generation with enhanced monitoring"""
@@ -21,9 +22,14 @@ def run_production_with_monitoring():
     print("=" * 70)
     print()
     
+    plan = GenerationPlan()
+    categories = list(plan.category_totals)
+
     print("Configuration Summary:")
-    print("- Total Records: 7,200,000")
-    print("- Categories: 16 (RES, COM, IND, AG, RES-RC, COM-RC, IND-RC, AG-RC, CON-RES, CON-COM, CON-IND, CON-AG, CON-RES-RC, CON-COM-RC, CON-IND-RC, CON-AG-RC)")
+    print(f"- Total Records: {plan.total_records:,}")
+    for registry, count in plan.registry_totals.items():
+        print(f"  - Registry {registry}: {count:,}")
+    print(f"- Categories: {len(categories)} ({', '.join(categories)})")
     print("- Years: 1981-2025 (45 years)")
     print("- Numbers per year per category: 10,000")
     print("- Batch size: 1,000 records")
@@ -40,6 +46,7 @@ def run_production_with_monitoring():
     print("- Processing speed: ~1,800 records/second")
     print("- Estimated total time: ~65 minutes")
     print("- Memory usage: <500MB")
+    print("- Measure generator/insert throughput: python scripts/benchmark_throughput.py")
     print()
     
     # Confirm before starting
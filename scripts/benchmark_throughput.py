@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Generator and insert throughput benchmarks.
+
+Measures records/second, traced allocations and peak RSS for file number
+generation, tracking ID generation, record packing and an end-to-end insert
+into a local SQLite stand-in for [dbo].[grouping]. Results are saved as JSON
+so runs can be compared across commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+SRC_DIR = ROOT_DIR / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.append(str(SRC_DIR))
+
+import numpy as np
+
+from file_number_generator import FileNumberGenerator, GROUPING_INSERT_SQL, batch_rows, record_rows
+from tracking_ids import KeyedHashTrackingIdEngine, RandomTrackingIdEngine
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_RESULTS_DIR = ROOT_DIR / "benchmarks"
+BATCH_SIZE = 1000
+TRANSACTION_SIZE = 10000
+
+SQLITE_GROUPING_DDL = """
+CREATE TABLE dbo.[grouping] (
+    [id] INTEGER PRIMARY KEY,
+    [awaiting_fileno] TEXT, [created_by] TEXT, [number] INTEGER, [year] INTEGER,
+    [landuse] TEXT, [created_at] TEXT, [registry] TEXT, [mls_fileno] TEXT,
+    [mapping] INTEGER, [group] INTEGER, [sys_batch_no] INTEGER,
+    [registry_batch_no] INTEGER, [tracking_id] TEXT
+)
+"""
+
+# SQLite has no native datetime type; store created_at like SQL Server's text form
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" ", timespec="milliseconds"))
+
+
+def _records(generator: FileNumberGenerator, rows: int):
+    return itertools.islice(generator.generate_file_numbers(), rows)
+
+
+def _record_batches(generator: FileNumberGenerator, rows: int, batch_size: int = BATCH_SIZE):
+    records = _records(generator, rows)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def bench_generate_records(rows: int) -> int:
+    """Per-record dictionaries from generate_file_numbers."""
+    count = 0
+    for _ in _records(FileNumberGenerator(), rows):
+        count += 1
+    return count
+
+
+def bench_generate_batches(rows: int) -> int:
+    """Columnar blocks from generate_batches, packed into row tuples."""
+    count = 0
+    for batch in FileNumberGenerator().generate_batches(10000):
+        take = min(len(batch['awaiting_fileno']), rows - count)
+        count += len(batch_rows(batch)[:take])
+        if count >= rows:
+            break
+    return count
+
+
+def bench_tracking_ids_random(rows: int) -> int:
+    """Random tracking IDs, generated in batches."""
+    engine = RandomTrackingIdEngine()
+    count = 0
+    for start in range(0, rows, 10000):
+        count += len(engine.tracking_ids(range(start, min(start + 10000, rows))))
+    return count
+
+
+def bench_tracking_ids_keyed(rows: int) -> int:
+    """Keyed-hash tracking IDs, generated in vectorized batches."""
+    engine = KeyedHashTrackingIdEngine('benchmark')
+    count = 0
+    for start in range(0, rows, 10000):
+        count += len(engine.tracking_ids(np.arange(start, min(start + 10000, rows))))
+    return count
+
+
+def bench_pack_records(rows: int) -> Dict[str, Any]:
+    """Record-to-tuple packing as done by ProductionInserter.insert_batch (packing time only)."""
+    count = 0
+    packing_seconds = 0.0
+    for batch in _record_batches(FileNumberGenerator(), rows):
+        start = time.perf_counter()
+        count += len(record_rows(batch))
+        packing_seconds += time.perf_counter() - start
+    return {'rows': count, 'seconds': packing_seconds}
+
+
+def open_sqlite_standin(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open a SQLite database that accepts the production insert statement unchanged
+    Args:
+        path: Database file for the [dbo] schema (default: in memory)
+    Returns:
+        SQLite connection with an empty dbo.[grouping] table
+    """
+    connection = sqlite3.connect(":memory:")
+    connection.execute("ATTACH DATABASE ? AS dbo", (path or ":memory:",))
+    connection.execute("DROP TABLE IF EXISTS dbo.[grouping]")
+    connection.execute(SQLITE_GROUPING_DDL)
+    return connection
+
+
+def bench_insert_sqlite(rows: int) -> int:
+    """End-to-end generate, pack and executemany into the SQLite stand-in."""
+    connection = open_sqlite_standin(os.getenv('BENCHMARK_SQLITE_PATH'))
+    try:
+        cursor = connection.cursor()
+        pending = 0
+        for batch in _record_batches(FileNumberGenerator(), rows):
+            cursor.executemany(GROUPING_INSERT_SQL, record_rows(batch))
+            pending += len(batch)
+            if pending >= TRANSACTION_SIZE:
+                connection.commit()
+                pending = 0
+        connection.commit()
+        return connection.execute("SELECT COUNT(*) FROM dbo.[grouping]").fetchone()[0]
+    finally:
+        connection.close()
+
+
+BENCHMARKS: Dict[str, Callable[[int], Any]] = {
+    'generate_records': bench_generate_records,
+    'generate_batches': bench_generate_batches,
+    'tracking_ids_random': bench_tracking_ids_random,
+    'tracking_ids_keyed': bench_tracking_ids_keyed,
+    'pack_records': bench_pack_records,
+    'insert_sqlite': bench_insert_sqlite,
+}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+
+
+def run_case(name: str, rows: int, trace_allocations: bool = True) -> Dict[str, Any]:
+    """
+    Run one benchmark case in the current process
+    Args:
+        name: Key of BENCHMARKS
+        rows: Number of records to process
+        trace_allocations: Repeat the case under tracemalloc to record allocations
+    Returns:
+        Result dictionary for the case
+    """
+    benchmark = BENCHMARKS[name]
+
+    start = time.perf_counter()
+    outcome = benchmark(rows)
+    seconds = time.perf_counter() - start
+    if isinstance(outcome, dict):
+        processed, seconds = outcome['rows'], outcome['seconds']
+    else:
+        processed = outcome
+
+    result = {
+        'case': name,
+        'rows': processed,
+        'seconds': round(seconds, 4),
+        'records_per_second': round(processed / seconds) if seconds > 0 else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'alloc_peak_mb': None,
+        'alloc_blocks': None
+    }
+
+    if trace_allocations:
+        tracemalloc.start()
+        benchmark(rows)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['alloc_peak_mb'] = round(peak / (1024 * 1024), 2)
+        result['alloc_blocks'] = sum(stat.count for stat in snapshot.statistics('filename'))
+
+    if result['peak_rss_mb'] is not None:
+        result['peak_rss_mb'] = round(result['peak_rss_mb'], 1)
+    return result
+
+
+def run_isolated(name: str, rows: int, trace_allocations: bool) -> Dict[str, Any]:
+    """Run a case in a fresh interpreter so peak RSS belongs to that case alone."""
+    command = [sys.executable, str(Path(__file__).resolve()), '--case', name, '--rows', str(rows)]
+    if not trace_allocations:
+        command.append('--no-tracemalloc')
+    completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare records/second of matching cases between two result files
+    Args:
+        baseline: Earlier results document
+        current: New results document
+        threshold: Allowed slowdown as a fraction (0.10 = 10%)
+    Returns:
+        One entry per matching case with the relative change and a regression flag
+    """
+    previous = {(item['case'], item['rows']): item for item in baseline['results']}
+    comparison = []
+    for item in current['results']:
+        before = previous.get((item['case'], item['rows']))
+        if not before or not before.get('records_per_second') or not item.get('records_per_second'):
+            continue
+        change = item['records_per_second'] / before['records_per_second'] - 1
+        comparison.append({
+            'case': item['case'],
+            'rows': item['rows'],
+            'before': before['records_per_second'],
+            'after': item['records_per_second'],
+            'change': change,
+            'regression': change < -threshold
+        })
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generator and insert throughput")
+    parser.add_argument("--cases", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS),
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help="Row counts per benchmark (default: 10000 100000 1000000)")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/throughput_<time>_<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Slowdown fraction reported as a regression (default: %(default)s)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip the allocation tracing pass")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run every case in this process (peak RSS then covers all earlier cases)")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    trace_allocations = not args.no_tracemalloc
+
+    # Worker mode: run a single case and print its result as JSON
+    if args.case:
+        print(json.dumps(run_case(args.case, args.rows, trace_allocations)))
+        return 0
+
+    results = []
+    for name in args.cases:
+        for rows in args.sizes:
+            print(f"⏱️  {name} @ {rows:,} rows...", flush=True)
+            if args.in_process:
+                result = run_case(name, rows, trace_allocations)
+            else:
+                result = run_isolated(name, rows, trace_allocations)
+            results.append(result)
+            rss = f"{result['peak_rss_mb']:.1f} MB" if result['peak_rss_mb'] is not None else "n/a"
+            alloc = f"{result['alloc_peak_mb']:.2f} MB" if result['alloc_peak_mb'] is not None else "n/a"
+            print(f"   {result['records_per_second'] or 0:>12,} records/second | "
+                  f"{result['seconds']:.3f}s | peak RSS {rss} | traced peak {alloc}")
+
+    commit = git_commit()
+    document = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / (
+        f"throughput_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'nocommit'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2), encoding='utf-8')
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        comparison = compare_results(baseline, document, args.threshold)
+        print(f"\n📊 Compared with {args.compare} ({baseline.get('git_commit') or 'unknown commit'}):")
+        for item in comparison:
+            marker = "❌" if item['regression'] else "✅"
+            print(f"   {marker} {item['case']} @ {item['rows']:,}: "
+                  f"{item['before']:,} -> {item['after']:,} records/second ({item['change']:+.1%})")
+        if any(item['regression'] for item in comparison):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,7 @@ if str(SRC_DIR) not in sys.path:
     sys.path.append(str(SRC_DIR))
 
 from database_connection import DatabaseConnection
+from grouping_match_key import GroupingMatchKey
 
 BULK_INSERT_SQL = """
 DECLARE @control_tag NVARCHAR(100) = ?;
@@ -68,7 +69,7 @@ DROP TABLE #FileImport;
         p.*,
         g.tracking_id
     FROM #Prepared p
-    LEFT JOIN grouping g ON LTRIM(RTRIM(UPPER(g.awaiting_fileno))) = p.cleaned_mlsf
+    LEFT JOIN grouping g ON {grouping_key} = p.cleaned_mlsf
 )
 INSERT INTO dbo.fileNumber (
     kangisFileNo,
@@ -119,7 +120,7 @@ WITH grouping_matches AS (
         g.id,
         p.mlsfNo
     FROM #Prepared p
-    JOIN grouping g ON LTRIM(RTRIM(UPPER(g.awaiting_fileno))) = p.cleaned_mlsf
+    JOIN grouping g ON {grouping_key} = p.cleaned_mlsf
 )
 UPDATE g
 SET mapping = 1,
@@ -174,7 +175,11 @@ def run_bulk_insert(csv_server_path: str, control_tag: str) -> None:
         print("Database connection failed. Check .env settings.", file=sys.stderr)
         sys.exit(1)
 
-    sql = BULK_INSERT_SQL.format(csv_path=csv_server_path.replace("'", "''"))
+    # Seeks the indexed match key (see grouping_match_key) instead of scanning grouping
+    sql = BULK_INSERT_SQL.format(
+        csv_path=csv_server_path.replace("'", "''"),
+        grouping_key=GroupingMatchKey(conn, '[dbo].[grouping]').key_sql('g')
+    )
 
     try:
         cursor = conn.cursor()
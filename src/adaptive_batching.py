@@ -0,0 +1,348 @@
+"""
+Adaptive Batch Sizing
+Measures per-batch latency and throughput while a load runs and moves the
+batch size and commit interval towards the throughput plateau, backing off on
+latency spikes and transaction log pressure
+"""
+
+import os
+import logging
+import statistics
+from typing import Any, Dict, List, Optional
+
+LOG_USAGE_SQL = "SELECT used_log_space_in_percent FROM sys.dm_db_log_space_usage"
+
+logger = logging.getLogger(__name__)
+
+
+def adaptive_enabled() -> bool:
+    """Whether loads should size batches adaptively (ADAPTIVE_BATCHING environment flag)."""
+    return os.getenv('ADAPTIVE_BATCHING', '0').lower() in ('1', 'true', 'yes')
+
+
+def log_usage_percent(connection) -> Optional[float]:
+    """
+    Transaction log usage of the current database
+    Args:
+        connection: SQL Server connection
+    Returns:
+        Used log space in percent, or None when it cannot be read
+    """
+    try:
+        cursor = connection.cursor()
+        cursor.execute(LOG_USAGE_SQL)
+        row = cursor.fetchone()
+        cursor.close()
+    except Exception as e:
+        logger.debug(f"Log usage not available: {e}")
+        return None
+    if not row:
+        return None
+    value = row['used_log_space_in_percent'] if isinstance(row, dict) else row[0]
+    return float(value)
+
+
+class BatchSizeController:
+    """
+    Hill-climbing controller for batch size and commit interval
+
+    Batches are timed with record(); every `window` batches the measured
+    rows/second is compared with the previous window. The controller keeps
+    stepping in the same direction while throughput improves, holds on a
+    plateau, and reverts a step that made things worse. While holding it
+    re-probes every `reprobe_windows` windows. The commit interval keeps its
+    initial ratio to the batch size unless the transaction log fills up.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 1000,
+        transaction_size: int = 10000,
+        min_batch_size: int = 100,
+        max_batch_size: int = 20000,
+        max_transaction_size: Optional[int] = None,
+        adaptive: bool = True,
+        window: int = 5,
+        growth: float = 1.5,
+        tolerance: float = 0.05,
+        latency_spike_factor: float = 3.0,
+        max_batch_latency: Optional[float] = None,
+        log_used_limit: float = 70.0,
+        reprobe_windows: int = 20,
+        name: str = 'load'
+    ):
+        """
+        Args:
+            batch_size: Starting rows per batch
+            transaction_size: Starting rows per commit
+            min_batch_size: Lower batch size limit
+            max_batch_size: Upper batch size limit
+            max_transaction_size: Upper commit interval limit (default: 20 x max_batch_size)
+            adaptive: False keeps the starting sizes and only collects statistics
+            window: Batches measured per decision
+            growth: Factor applied per grow or shrink step
+            tolerance: Relative throughput change treated as noise
+            latency_spike_factor: Back off when a batch takes this many times its expected time
+            max_batch_latency: Back off when a batch takes longer than this many seconds
+            log_used_limit: Shorten the commit interval above this log usage percentage
+            reprobe_windows: Windows spent holding before probing again
+            name: Load name used in decision logs
+        """
+        self.min_batch_size = max(1, min_batch_size)
+        self.max_batch_size = max(self.min_batch_size, max_batch_size)
+        self.max_transaction_size = max_transaction_size or self.max_batch_size * 20
+        self.window = max(1, window)
+        self.growth = growth
+        self.tolerance = tolerance
+        self.latency_spike_factor = latency_spike_factor
+        self.max_batch_latency = max_batch_latency
+        self.log_used_limit = log_used_limit
+        self.reprobe_windows = reprobe_windows
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        self.batch_size = batch_size
+        self.transaction_size = transaction_size
+        # Commit interval as a multiple of the batch size (may be below 1)
+        self.initial_ratio = transaction_size / max(1, batch_size)
+        self.transaction_ratio = self.initial_ratio
+        self.adaptive = adaptive
+
+        self.direction = 1
+        self.steps = 0
+        self.reversed = False
+        self.previous_batch_size = None
+        self.last_throughput = None
+        self.best_throughput = 0.0
+        self.hold_windows = 0
+        self.samples: List[tuple] = []
+        self.commit_seconds = 0.0
+        self.seconds_per_row: List[float] = []
+        self.total_rows = 0
+        self.total_seconds = 0.0
+        self.decisions: List[Dict[str, Any]] = []
+
+    @property
+    def adaptive(self) -> bool:
+        return self._adaptive
+
+    @adaptive.setter
+    def adaptive(self, value: bool) -> None:
+        # Fixed mode uses the configured sizes as given; only tuning is held to the limits
+        self._adaptive = value
+        if value:
+            self.batch_size = self._clamp_batch(self.batch_size)
+            self.transaction_size = self._transaction_for(self.batch_size)
+
+    def _clamp_batch(self, size: float) -> int:
+        return int(min(self.max_batch_size, max(self.min_batch_size, round(size))))
+
+    def _transaction_for(self, batch_size: int) -> int:
+        return int(min(self.max_transaction_size, max(1, round(batch_size * self.transaction_ratio))))
+
+    def _decide(self, action: str, reason: str, batch_size: Optional[int] = None,
+                throughput: Optional[float] = None) -> None:
+        old_batch, old_transaction = self.batch_size, self.transaction_size
+        if batch_size is not None:
+            self.batch_size = self._clamp_batch(batch_size)
+        self.transaction_size = self._transaction_for(self.batch_size)
+        decision = {
+            'action': action,
+            'reason': reason,
+            'batch_size': self.batch_size,
+            'transaction_size': self.transaction_size,
+            'previous_batch_size': old_batch,
+            'previous_transaction_size': old_transaction,
+            'rows_per_second': throughput
+        }
+        self.decisions.append(decision)
+        rate = f", {throughput:.0f} rows/s" if throughput is not None else ""
+        self.logger.info(
+            f"[{self.name}] {action}: batch {old_batch} -> {self.batch_size}, "
+            f"commit every {old_transaction} -> {self.transaction_size} rows ({reason}{rate})"
+        )
+
+    def record(self, rows: int, seconds: float) -> None:
+        """
+        Record one batch and adjust sizes when a decision is due
+        Args:
+            rows: Rows in the batch
+            seconds: Time spent sending the batch
+        """
+        if rows <= 0:
+            return
+        self.total_rows += rows
+        self.total_seconds += seconds
+        if not self.adaptive:
+            return
+
+        if self._latency_spike(rows, seconds):
+            return
+        self.samples.append((rows, seconds))
+        if len(self.samples) >= self.window:
+            self._evaluate_window()
+
+    def record_commit(self, seconds: float) -> None:
+        """
+        Record commit time so window throughput includes it
+        Commits are not checked for latency spikes: with buffering insert
+        engines most of the work happens there.
+        Args:
+            seconds: Time spent flushing and committing
+        """
+        self.total_seconds += seconds
+        self.commit_seconds += seconds
+
+    def _latency_spike(self, rows: int, seconds: float) -> bool:
+        expected = statistics.median(self.seconds_per_row) * rows if self.seconds_per_row else None
+        reason = None
+        if self.max_batch_latency is not None and seconds > self.max_batch_latency:
+            reason = f"batch took {seconds:.2f}s, limit {self.max_batch_latency:.2f}s"
+        elif expected and seconds > expected * self.latency_spike_factor:
+            reason = f"batch took {seconds:.2f}s, expected {expected:.2f}s"
+        if reason is None:
+            return False
+
+        self._decide('latency_backoff', reason, self.batch_size / (self.growth * self.growth))
+        # Measure the new size from scratch and hold before probing again
+        self.samples = []
+        self.commit_seconds = 0.0
+        self.last_throughput = None
+        self.previous_batch_size = None
+        self.direction = 0
+        self.steps = 0
+        self.hold_windows = 0
+        return True
+
+    def _evaluate_window(self) -> None:
+        rows = sum(sample[0] for sample in self.samples)
+        batch_seconds = sum(sample[1] for sample in self.samples)
+        seconds = batch_seconds + self.commit_seconds
+        self.samples = []
+        self.commit_seconds = 0.0
+        if seconds <= 0:
+            return
+        throughput = rows / seconds
+        self.seconds_per_row = (self.seconds_per_row + [batch_seconds / rows])[-self.window * 4:]
+        self.best_throughput = max(self.best_throughput, throughput)
+
+        if self.direction == 0:
+            self.hold_windows += 1
+            if self.last_throughput is None:
+                # First window at a size set by a revert or back-off becomes the baseline
+                self.last_throughput = throughput
+                return
+            if self.hold_windows < self.reprobe_windows:
+                return
+            # Re-probe upwards from the current size
+            self.hold_windows = 0
+            self.direction = 1
+            self.steps = 0
+            self.reversed = False
+            self._step(throughput, 'probe', 'periodic re-probe')
+            return
+
+        if self.last_throughput is None:
+            self._step(throughput, 'grow' if self.direction > 0 else 'shrink', 'initial probe')
+            return
+
+        change = (throughput - self.last_throughput) / self.last_throughput
+        if change > self.tolerance:
+            self._step(throughput, 'grow' if self.direction > 0 else 'shrink', f"throughput {change:+.0%}")
+        elif change < -self.tolerance and self.previous_batch_size is not None:
+            if self.steps == 1 and not self.reversed:
+                # The very first step hurt: probe the other direction from the old size
+                self.direction = -self.direction
+                self.reversed = True
+                self.steps = 0
+            else:
+                self.direction = 0
+            self.last_throughput = None
+            self._decide('revert', f"throughput {change:+.0%}", self.previous_batch_size, throughput)
+        else:
+            self.direction = 0
+            self.last_throughput = throughput
+            self._decide('hold', f"plateau, throughput {change:+.0%}", throughput=throughput)
+
+    def _step(self, throughput: float, action: str, reason: str) -> None:
+        factor = self.growth if self.direction > 0 else 1 / self.growth
+        target = self._clamp_batch(self.batch_size * factor)
+        self.last_throughput = throughput
+        if target == self.batch_size:
+            self.direction = 0
+            self._decide('hold', f"{reason}, batch size limit reached", throughput=throughput)
+            return
+        self.previous_batch_size = self.batch_size
+        self.steps += 1
+        self._decide(action, reason, target, throughput)
+
+    def check_log(self, used_percent: Optional[float]) -> None:
+        """
+        Shorten the commit interval while the transaction log is filling up
+        Args:
+            used_percent: Used log space in percent (None when unknown)
+        """
+        if not self.adaptive or used_percent is None:
+            return
+        if used_percent >= self.log_used_limit:
+            reason = f"log {used_percent:.0f}% used, limit {self.log_used_limit:.0f}%"
+            floor = min(1.0, self.initial_ratio)
+            if self.transaction_ratio > floor:
+                self.transaction_ratio = max(self.transaction_ratio / 2, floor)
+                self._decide('log_backoff', reason)
+            elif self.batch_size > self.min_batch_size:
+                # Commits already follow every batch; make the batches smaller
+                self._decide('log_backoff', reason, self.batch_size / self.growth)
+        elif used_percent < self.log_used_limit / 2 and self.transaction_ratio < self.initial_ratio:
+            self.transaction_ratio = min(self.transaction_ratio * 2, self.initial_ratio)
+            self._decide('log_recover', f"log {used_percent:.0f}% used")
+
+    def summary(self) -> Dict[str, Any]:
+        """Final sizes, overall throughput and decision count"""
+        return {
+            'name': self.name,
+            'adaptive': self.adaptive,
+            'batch_size': self.batch_size,
+            'transaction_size': self.transaction_size,
+            'rows': self.total_rows,
+            'rows_per_second': self.total_rows / self.total_seconds if self.total_seconds > 0 else 0.0,
+            'best_window_rows_per_second': self.best_throughput,
+            'decisions': len(self.decisions)
+        }
+
+
+def create_batch_controller(
+    batch_size: int,
+    transaction_size: int,
+    name: str = 'load',
+    adaptive: Optional[bool] = None,
+    min_batch_size: Optional[int] = None,
+    max_batch_size: Optional[int] = None
+) -> BatchSizeController:
+    """
+    Create a controller configured from the environment
+    Args:
+        batch_size: Starting rows per batch
+        transaction_size: Starting rows per commit
+        name: Load name used in decision logs
+        adaptive: Override ADAPTIVE_BATCHING
+        min_batch_size: Override BATCH_SIZE_MIN
+        max_batch_size: Override BATCH_SIZE_MAX
+    Returns:
+        BatchSizeController (fixed sizes when adaptive batching is off)
+    """
+    max_latency = os.getenv('BATCH_LATENCY_MAX')
+    max_transaction = os.getenv('TRANSACTION_SIZE_MAX')
+    return BatchSizeController(
+        batch_size=batch_size,
+        transaction_size=transaction_size,
+        min_batch_size=min_batch_size or int(os.getenv('BATCH_SIZE_MIN', 100)),
+        max_batch_size=max_batch_size or int(os.getenv('BATCH_SIZE_MAX', 20000)),
+        max_transaction_size=int(max_transaction) if max_transaction else None,
+        adaptive=adaptive_enabled() if adaptive is None else adaptive,
+        latency_spike_factor=float(os.getenv('LATENCY_SPIKE_FACTOR', 3.0)),
+        max_batch_latency=float(max_latency) if max_latency else None,
+        log_used_limit=float(os.getenv('LOG_USED_LIMIT', 70)),
+        name=name
+    )
+
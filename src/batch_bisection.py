@@ -0,0 +1,127 @@
+"""
+Batch Bisection
+Set-based batch writes that isolate bad rows: a batch that fails is rolled back
+and split in halves until the failing rows are found; those rows are
+quarantined with the error and every other row is written
+"""
+
+import csv
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# DB-API errors raised by the data of a row (SQLSTATE classes 22 and 23)
+ROW_ERROR_NAMES = ('DataError', 'IntegrityError')
+
+logger = logging.getLogger(__name__)
+
+
+def is_row_error(exc: Exception) -> bool:
+    """
+    Whether an error is caused by the rows sent rather than the connection or statement
+    Args:
+        exc: Exception raised by the write
+    Returns:
+        True for constraint, conversion and truncation errors
+    """
+    if isinstance(exc, (TypeError, ValueError, OverflowError, UnicodeError)):
+        return True
+    return type(exc).__name__ in ROW_ERROR_NAMES
+
+
+def error_reason(exc: Exception) -> str:
+    """One-line description of an error for the quarantine file"""
+    return ' '.join(f"{type(exc).__name__}: {exc}".split())
+
+
+class BisectResult(NamedTuple):
+    written: int
+    failed: List[Tuple[Any, str]]
+    attempts: int
+    commit_seconds: float
+
+
+def bisect_insert(
+    connection,
+    rows: Sequence[Any],
+    write: Callable[[Any, Sequence[Any]], None],
+    on_written: Optional[Callable[[Sequence[Any]], None]] = None,
+    row_error: Callable[[Exception], bool] = is_row_error
+) -> BisectResult:
+    """
+    Write rows with one set-based statement and one commit, bisecting failures
+    Args:
+        connection: Open connection with autocommit off
+        rows: Rows to write, in order
+        write: Sends one set-based insert of the given rows (executemany, TVP, ...)
+        on_written: Called with each committed part, in row order
+        row_error: Decides whether an error is worth bisecting; others are re-raised
+    Returns:
+        BisectResult with rows written, (row, reason) pairs that failed alone,
+        write attempts made and total commit time
+    """
+    written = 0
+    failed: List[Tuple[Any, str]] = []
+    attempts = 0
+    commit_seconds = 0.0
+    # Stack of parts still to write; the left half is always on top so rows keep their order
+    pending = [list(rows)] if rows else []
+
+    while pending:
+        part = pending.pop()
+        attempts += 1
+        try:
+            write(connection, part)
+            started = time.perf_counter()
+            connection.commit()
+            commit_seconds += time.perf_counter() - started
+        except Exception as exc:
+            connection.rollback()
+            if not row_error(exc):
+                raise
+            if len(part) == 1:
+                failed.append((part[0], error_reason(exc)))
+                continue
+            middle = len(part) // 2
+            pending.append(part[middle:])
+            pending.append(part[:middle])
+            continue
+
+        written += len(part)
+        if on_written:
+            on_written(part)
+
+    return BisectResult(written, failed, attempts, commit_seconds)
+
+
+class QuarantineFile:
+    """CSV file of rows that could not be written, each with the reason"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.count = 0
+        self._handle = None
+        self._writer = None
+
+    def add(self, row: Dict[str, Any], reason: str) -> None:
+        """Append one row; the file and its header are created with the first row"""
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.path, 'w', encoding='utf-8', newline='')
+            self._writer = csv.DictWriter(
+                self._handle,
+                fieldnames=list(row) + ['quarantine_reason', 'quarantined_at'],
+                extrasaction='ignore'
+            )
+            self._writer.writeheader()
+        self._writer.writerow({**row, 'quarantine_reason': reason, 'quarantined_at': datetime.now().isoformat()})
+        self._handle.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            self._writer = None
@@ -0,0 +1,152 @@
+"""
+Load Checkpoint Store
+Persists the progress of the production load after every commit so an
+interrupted run can resume instead of starting over
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'checkpoints/production_load.json')
+DEFAULT_CHECKPOINT_TABLE = '[dbo].[grouping_load_checkpoint]'
+DEFAULT_CHECKPOINT_KEY = 'production_load'
+CHECKPOINT_STORES = ('file', 'table')
+
+logger = logging.getLogger(__name__)
+
+
+def plan_signature(generator) -> Dict[str, Any]:
+    """Configuration values that must match for a checkpoint to be resumable."""
+    return {
+        'start_year': generator.start_year,
+        'end_year': generator.end_year,
+        'numbers_per_year': generator.numbers_per_year,
+        'records_per_group': generator.records_per_group,
+        'categories': list(generator.categories)
+    }
+
+
+class FileCheckpointStore:
+    """
+    JSON checkpoint file replaced atomically on every save
+
+    Saved after the data commit, so a crash between the two can leave at most
+    one transaction of rows past the checkpoint; resume deletes those rows.
+    """
+
+    transactional = False
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        self.path = Path(path)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        if not self.path.exists():
+            return None
+        with open(self.path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def save(self, state: Dict[str, Any], connection=None) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump({**state, 'updated_at': datetime.now().isoformat()}, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self.path)
+
+    def clear(self, connection=None) -> None:
+        if self.path.exists():
+            self.path.unlink()
+
+    def describe(self) -> str:
+        return str(self.path)
+
+
+class TableCheckpointStore:
+    """
+    Checkpoint row in a SQL Server control table
+
+    Saved on the loading connection before the data commit, so the
+    checkpoint and the rows it describes commit in the same transaction.
+    """
+
+    transactional = True
+
+    def __init__(self, connection, table: str = DEFAULT_CHECKPOINT_TABLE, key: str = DEFAULT_CHECKPOINT_KEY):
+        self.connection = connection
+        self.table = table
+        self.key = key
+        self.ensure_table()
+
+    def ensure_table(self) -> None:
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            IF OBJECT_ID(N'{self.table}', N'U') IS NULL
+            CREATE TABLE {self.table} (
+                [checkpoint_key] NVARCHAR(100) NOT NULL PRIMARY KEY,
+                [state] NVARCHAR(MAX) NOT NULL,
+                [updated_at] DATETIME2(3) NOT NULL
+            )
+        """)
+        self.connection.commit()
+        cursor.close()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT [state] FROM {self.table} WHERE [checkpoint_key] = ?", (self.key,))
+        row = cursor.fetchone()
+        cursor.close()
+        if not row:
+            return None
+        value = row['state'] if isinstance(row, dict) else row[0]
+        return json.loads(value)
+
+    def save(self, state: Dict[str, Any], connection=None) -> None:
+        """Write the checkpoint without committing; the caller commits it with the data."""
+        connection = connection or self.connection
+        payload = json.dumps(state)
+        now = datetime.now()
+        cursor = connection.cursor()
+        cursor.execute(
+            f"UPDATE {self.table} SET [state] = ?, [updated_at] = ? WHERE [checkpoint_key] = ?",
+            (payload, now, self.key)
+        )
+        if cursor.rowcount == 0:
+            cursor.execute(
+                f"INSERT INTO {self.table} ([checkpoint_key], [state], [updated_at]) VALUES (?, ?, ?)",
+                (self.key, payload, now)
+            )
+        cursor.close()
+
+    def clear(self, connection=None) -> None:
+        connection = connection or self.connection
+        cursor = connection.cursor()
+        cursor.execute(f"DELETE FROM {self.table} WHERE [checkpoint_key] = ?", (self.key,))
+        connection.commit()
+        cursor.close()
+
+    def describe(self) -> str:
+        return f"{self.table} ({self.key})"
+
+
+def create_checkpoint_store(kind: str = 'file', connection=None, path: Optional[str] = None):
+    """
+    Create a checkpoint store
+    Args:
+        kind: 'file' for a local JSON file, 'table' for a control table
+        connection: Loading connection (required for 'table')
+        path: Checkpoint file path for 'file'
+    Returns:
+        Checkpoint store instance
+    """
+    if kind == 'file':
+        return FileCheckpointStore(path or DEFAULT_CHECKPOINT_PATH)
+    if kind == 'table':
+        if connection is None:
+            raise ValueError("Table checkpoints need the loading connection")
+        return TableCheckpointStore(connection)
+    raise ValueError(f"Unknown checkpoint store: {kind}")
@@ -4,7 +4,6 @@
 import os
 import sys
 import json
-import csv
 import copy
 import logging
 import threading
@@ -23,6 +22,8 @@ if str(BASE_DIR) not in sys.path:
     sys.path.append(str(BASE_DIR))
 
 from fast_csv_importer import FastCSVImporter
+from csv_stream import count_rows
+from tracking_key_store import refresh_shared_key_store
 
 # Configuration
 UPLOAD_DIR = PARENT_DIR / "uploads"
@@ -215,7 +216,10 @@ def process_job(job_id: str) -> None:
             active_importer = FastCSVImporter()
             active_importer.set_progress_callback(progress_callback)
 
-        success = active_importer.run_import(csv_path, job.get('control_tag') or 'PROD')
+        # The row count taken at upload spares the importer a second pass over the file
+        success = active_importer.run_import(
+            csv_path, job.get('control_tag') or 'PROD', total_records=job.get('row_count')
+        )
 
         stats = {
             'total_records': active_importer.total_records,
@@ -223,7 +227,8 @@ def process_job(job_id: str) -> None:
             'matched_records': active_importer.matched_records,
             'unmatched_records': active_importer.unmatched_records,
             'skipped_records': active_importer.skipped_records,
-            'duplicate_records': active_importer.duplicate_records
+            'duplicate_records': active_importer.duplicate_records,
+            'quarantined_records': active_importer.quarantined_records
         }
 
         if success:
@@ -283,26 +288,13 @@ def process_job(job_id: str) -> None:
         start_next_job()
 
 
-def count_rows(csv_path: Path) -> int:
-    """Return the number of non-empty data rows in the CSV file."""
-    encodings = ['utf-8-sig', 'utf-8', 'latin-1', 'cp1252']
-    for encoding in encodings:
-        try:
-            with csv_path.open('r', encoding=encoding, newline='') as handle:
-                reader = csv.reader(handle)
-                next(reader, None)  # skip header
-                return sum(1 for row in reader if any(cell.strip() for cell in row))
-        except UnicodeDecodeError:
-            continue
-    raise ValueError('Unable to decode CSV file with supported encodings')
-
-
 def validate_row_limit(csv_path: Path) -> int:
-    row_count = count_rows(csv_path)
+    # Streams the file and stops counting as soon as the limit is exceeded
+    row_count = count_rows(csv_path, limit=MAX_ROWS_PER_FILE)
     if row_count == 0:
         raise ValueError('CSV file does not contain any data rows')
     if row_count > MAX_ROWS_PER_FILE:
-        raise ValueError(f'CSV contains {row_count} rows. Maximum allowed is {MAX_ROWS_PER_FILE}.')
+        raise ValueError(f'CSV contains more than {MAX_ROWS_PER_FILE} rows. Maximum allowed is {MAX_ROWS_PER_FILE}.')
     return row_count
 
 
@@ -390,6 +382,8 @@ def handle_get_status():
 def main():
     logger.info("Starting CSV Import Web UI...")
     logger.info("Open your browser to http://localhost:5000")
+    # Bring the shared tracking key store up to date before the first job needs it
+    threading.Thread(target=refresh_shared_key_store, name='key-store-refresh', daemon=True).start()
     start_next_job()
     socketio.run(app, host='127.0.0.1', port=5000, debug=True, allow_unsafe_werkzeug=True)
 
@@ -0,0 +1,160 @@
+"""
+CSV Streaming
+Reads large CSV exports in fixed-size row chunks: the encoding is detected once
+from a sampled prefix (byte order marks first), then the file is decoded and
+parsed as a stream, so memory stays flat whatever the file size
+"""
+
+import io
+import os
+import csv
+import codecs
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+# Tried in order on the sample; latin-1 decodes any byte, so it is the last resort
+CSV_ENCODINGS = ('utf-8', 'cp1252', 'latin-1')
+DEFAULT_SAMPLE_BYTES = 1024 * 1024
+DEFAULT_CHUNK_ROWS = 5000
+
+# UTF-32 marks start with the UTF-16 ones, so they are checked first
+BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+)
+
+logger = logging.getLogger(__name__)
+
+
+def detect_encoding(sample: bytes, encodings: Sequence[str] = CSV_ENCODINGS) -> str:
+    """
+    Pick the encoding of a file from a prefix of its bytes
+    Args:
+        sample: First bytes of the file
+        encodings: Candidate encodings, tried in order
+    Returns:
+        Encoding name usable with open()
+    """
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if sample.startswith(mark):
+            return encoding
+    for encoding in encodings:
+        try:
+            # Incremental decoding tolerates a multi-byte character cut off at the end of the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError('Unable to decode CSV file with supported encodings')
+
+
+class CSVChunkReader:
+    """Stream the rows of a CSV file as dictionaries, in chunks"""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        chunk_rows: Optional[int] = None,
+        encoding: Optional[str] = None,
+        sample_bytes: int = DEFAULT_SAMPLE_BYTES,
+        skip_blank: bool = True
+    ):
+        """
+        Args:
+            path: CSV file with a header row
+            chunk_rows: Rows per chunk (default: CSV_CHUNK_ROWS env or 5000)
+            encoding: Encoding to use instead of detecting it
+            sample_bytes: Prefix size read for encoding detection
+            skip_blank: Drop rows whose cells are all empty
+        """
+        self.path = Path(path)
+        self.chunk_rows = max(1, chunk_rows or int(os.getenv('CSV_CHUNK_ROWS', DEFAULT_CHUNK_ROWS)))
+        self.encoding = encoding
+        self.sample_bytes = sample_bytes
+        self.skip_blank = skip_blank
+        self.size = 0
+        self.bytes_read = 0
+        self.rows_read = 0
+        self.fieldnames: Optional[List[str]] = None
+
+    @property
+    def progress(self) -> float:
+        """Share of the file consumed so far, in percent"""
+        if not self.size:
+            return 100.0 if self.bytes_read else 0.0
+        return min(100.0, self.bytes_read / self.size * 100)
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        """
+        Yield the data rows one at a time
+        Returns:
+            Iterator of dictionaries keyed by the header row
+        """
+        if not self.path.exists():
+            raise FileNotFoundError(f"CSV file not found: {self.path}")
+
+        self.size = self.path.stat().st_size
+        self.bytes_read = 0
+        self.rows_read = 0
+        with open(self.path, 'rb') as raw:
+            if self.encoding is None:
+                self.encoding = detect_encoding(raw.read(self.sample_bytes))
+                raw.seek(0)
+                logger.info(f"Detected {self.encoding} encoding for {self.path.name}")
+
+            with io.TextIOWrapper(raw, encoding=self.encoding, newline='') as text:
+                reader = csv.DictReader(text)
+                try:
+                    self.fieldnames = reader.fieldnames
+                    for row in reader:
+                        self.bytes_read = raw.tell()
+                        if self.skip_blank and not any((value or '').strip() for value in row.values()
+                                                       if isinstance(value, str)):
+                            continue
+                        self.rows_read += 1
+                        yield row
+                except UnicodeDecodeError as exc:
+                    raise ValueError(
+                        f"{self.path.name} is not valid {self.encoding} after row {self.rows_read} "
+                        f"({exc.reason}); pass the file's encoding explicitly"
+                    ) from exc
+        self.bytes_read = self.size
+
+    def chunks(self) -> Iterator[List[Dict[str, str]]]:
+        """
+        Yield the data rows in lists of at most chunk_rows
+        Returns:
+            Iterator of row lists
+        """
+        chunk: List[Dict[str, str]] = []
+        for row in self.rows():
+            chunk.append(row)
+            if len(chunk) >= self.chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def __iter__(self) -> Iterator[List[Dict[str, str]]]:
+        return self.chunks()
+
+
+def count_rows(csv_path: Union[str, Path], limit: Optional[int] = None) -> int:
+    """
+    Count the non-empty data rows of a CSV file without holding it in memory
+    Args:
+        csv_path: CSV file with a header row
+        limit: Stop counting once the count exceeds this many rows
+    Returns:
+        Row count (limit + 1 when the limit was exceeded)
+    """
+    count = 0
+    for _ in CSVChunkReader(csv_path).rows():
+        count += 1
+        if limit is not None and count > limit:
+            break
+    return count
@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
 from database_connection import DatabaseConnection
+from grouping_reset import GroupingReset, print_reset_progress
 
 def main():
     print("Deleting test records from database...")
@@ -28,12 +29,12 @@ def main():
         print(f"Found {count_before} test records to delete")
         
         if count_before > 0:
-            # Delete test records
-            cursor.execute("DELETE FROM [dbo].[grouping] WHERE [created_by] = 'Generated'")
-            deleted_count = cursor.rowcount
-            connection.commit()
+            # Delete test records (truncate, partition switch or chunked delete)
+            summary = GroupingReset(connection, progress_callback=print_reset_progress).reset()
+            print()
+            deleted_count = summary['deleted']
             
-            print(f"✅ Successfully deleted {deleted_count} test records")
+            print(f"✅ Successfully deleted {deleted_count} test records ({summary['strategy']})")
         else:
             print("✅ No test records found to delete")
         
@@ -10,8 +10,14 @@ import logging
 from pathlib import Path
 from typing import Callable, Optional
 from database_connection import DatabaseConnection
+from file_number_parser import clean_file_number, clean_many
+from tvp_insertion import FILE_NUMBER_TVP, insert_tvp, supports_tvp, tvp_enabled
+from grouping_match_key import GroupingMatchKey, match_key
+from tracking_key_store import shared_key_store
+from metrics import LoadMetrics, flush_metrics, start_metrics_exporter
 import sys
 import os
+import time
 
 # Setup logging
 logging.basicConfig(
@@ -62,6 +68,7 @@ class ExcelImporter:
                 self.max_rows = None if excel_name.lower().endswith("_pro.xlsx") else 10
 
         self.batch_size = 1000
+        self.use_tvp = tvp_enabled()
         self.total_records = 0
         self.processed_records = 0
         self.matched_records = 0
@@ -72,6 +79,11 @@ class ExcelImporter:
         self.grouping_missing_values = set()
         self.grouping_updates = []
         self.grouping_update_batch_size = int(os.getenv("GROUPING_UPDATE_BATCH", "500"))
+        # Local key store shared across imports (TRACKING_KEY_STORE); refreshed once per import
+        self.key_store = shared_key_store()
+        self.key_store_refreshed = False
+        # Counters, gauges and latency histograms (exported with METRICS_FILE / METRICS_PORT)
+        self.metrics = LoadMetrics('excel_import')
         self.progress_callback: Optional[Callable[[str, Optional[float]], None]] = None
         self.cancel_requested = False
         self.progress_stage_start = 0.0
@@ -87,21 +99,7 @@ class ExcelImporter:
         Returns:
             str: Cleaned mlsfNo for matching with awaiting_fileno
         """
-        if not mlsf_no:
-            return mlsf_no
-            
-        cleaned = str(mlsf_no).strip()
-        
-        # Remove 'AND EXTENSION' (case insensitive)
-        cleaned = cleaned.replace('AND EXTENSION', '').replace('and extension', '')
-        
-        # Remove '(TEMP)' (case insensitive)
-        cleaned = cleaned.replace('(TEMP)', '').replace('(temp)', '')
-        
-        # Clean up extra spaces
-        cleaned = ' '.join(cleaned.split())
-        
-        return cleaned.strip()
+        return clean_file_number(mlsf_no)
 
     def set_progress_callback(self, callback: Optional[Callable[[str, Optional[float]], None]]):
         """Register a callback to receive progress updates."""
@@ -137,39 +135,30 @@ class ExcelImporter:
         self.emit_progress("Cancellation requested by user.")
     
     def _fetch_tracking_id_from_db(self, cleaned_mlsf_no):
-        """Fetch a single tracking ID directly from the database."""
+        """Fetch a single tracking ID directly from the database (index seek on the match key)."""
+        if self.key_store is not None and self.key_store_refreshed:
+            return self.key_store.get(cleaned_mlsf_no)
         try:
             conn = self.db_connection.get_connection()
-            cursor = conn.cursor()
-            query = """
-                SELECT TOP 1 tracking_id 
-                FROM [dbo].[grouping]
-                WHERE LTRIM(RTRIM(awaiting_fileno)) = ?
-                ORDER BY id
-            """
-            cursor.execute(query, (cleaned_mlsf_no.strip(),))
-            result = cursor.fetchone()
-            if result:
-                return result[0]
-            return None
+            tracking_id = GroupingMatchKey(conn).fetch_tracking_id(cleaned_mlsf_no)
+            self.metrics.round_trip('select')
+            return tracking_id
         except Exception as e:
             logger.error(f"Error looking up tracking ID for {cleaned_mlsf_no}: {str(e)}")
             return None
         finally:
-            if 'cursor' in locals():
-                cursor.close()
-            if 'conn' in locals():
+            if 'conn' in locals() and conn is not None:
                 conn.close()
 
     def prefetch_grouping_lookup(self, cleaned_values):
-        """Bulk load grouping matches in manageable chunks to reduce lookup queries."""
-        values_to_lookup = [
-            value.strip()
-            for value in cleaned_values
-            if value
-            and value.strip() not in self.grouping_lookup_cache
-            and value.strip() not in self.grouping_missing_values
-        ]
+        """Bulk load grouping matches with one temp-table join on the indexed match key."""
+        values_to_lookup = sorted({
+            key
+            for key in (match_key(value) for value in cleaned_values)
+            if key
+            and key not in self.grouping_lookup_cache
+            and key not in self.grouping_missing_values
+        })
 
         if not values_to_lookup:
             logger.info("Grouping cache already primed; skipping prefetch")
@@ -178,82 +167,62 @@ class ExcelImporter:
         total_candidates = len(values_to_lookup)
         logger.info("Prefetching grouping matches for %d unique MLS numbers", total_candidates)
 
-        chunk_size = 500
-        total_matched = 0
-        total_processed = 0
+        if self.cancel_requested:
+            raise ImportCancelledError()
 
         try:
             conn = self.db_connection.get_connection()
-            cursor = conn.cursor()
-
-            for start in range(0, total_candidates, chunk_size):
-                if self.cancel_requested:
-                    raise ImportCancelledError()
-                chunk = values_to_lookup[start:start + chunk_size]
-                placeholders = ",".join(["?"] * len(chunk))
-                query = f"""
-                    SELECT LTRIM(RTRIM(awaiting_fileno)) AS awaiting_trim, tracking_id
-                    FROM [dbo].[grouping]
-                    WHERE LTRIM(RTRIM(awaiting_fileno)) IN ({placeholders})
-                    ORDER BY id
-                """
-                cursor.execute(query, tuple(chunk))
-                rows = cursor.fetchall()
-                chunk_matched_keys = set()
-
-                for awaiting_trim, tracking_id in rows:
-                    if awaiting_trim and awaiting_trim not in self.grouping_lookup_cache:
-                        self.grouping_lookup_cache[awaiting_trim] = tracking_id
-                        chunk_matched_keys.add(awaiting_trim)
-
-                total_matched += len(chunk_matched_keys)
-                unreturned = set(chunk) - chunk_matched_keys
-                self.grouping_missing_values.update(unreturned)
-
-                total_processed += len(chunk)
-                progress_percent = (total_processed / total_candidates) * 100
-                self.emit_progress(
-                    f"Prefetch progress: {total_processed}/{total_candidates} ({progress_percent:.1f}%)",
-                    progress_percent
-                )
-                logger.debug(
-                    "Prefetch progress: %d/%d candidates processed (%d matched in chunk)",
-                    total_processed,
-                    total_candidates,
-                    len(chunk_matched_keys)
-                )
+            matches = self._lookup_key_store(conn, values_to_lookup)
+            if matches is None:
+                matches = GroupingMatchKey(conn).fetch_tracking_ids(values_to_lookup)
+                self.metrics.round_trip('select')
+            self.grouping_lookup_cache.update(matches)
+            self.grouping_missing_values.update(key for key in values_to_lookup if key not in matches)
 
             logger.info(
                 "Grouping prefetch completed: %d matched, %d unmatched",
-                total_matched,
-                total_candidates - total_matched
+                len(matches),
+                total_candidates - len(matches)
             )
             self.emit_progress(
                 "Grouping prefetch completed.",
                 100.0
             )
 
-        except ImportCancelledError:
-            raise
         except Exception as e:
             logger.error("Error during grouping prefetch: %s", str(e))
         finally:
-            if 'cursor' in locals():
-                cursor.close()
-            if 'conn' in locals():
+            if 'conn' in locals() and conn is not None:
                 conn.close()
 
+    def _lookup_key_store(self, conn, keys):
+        """Resolve keys from the local tracking key store; None when it is disabled or unusable."""
+        if self.key_store is None:
+            return None
+        try:
+            if not self.key_store_refreshed:
+                self.key_store.refresh(conn)
+                self.key_store_refreshed = True
+            return self.key_store.lookup(keys)
+        except Exception as exc:
+            logger.warning("Tracking key store unavailable, using database lookups: %s", str(exc))
+            self.key_store = None
+            return None
+
     def lookup_tracking_id_from_grouping(self, cleaned_mlsf_no):
         """Return cached tracking ID or fall back to a direct lookup if needed."""
         if not cleaned_mlsf_no:
             return None
 
-        cleaned_value = cleaned_mlsf_no.strip()
+        cleaned_value = match_key(cleaned_mlsf_no)
         if cleaned_value in self.grouping_lookup_cache:
+            self.metrics.cache('grouping_lookup', hit=True)
             return self.grouping_lookup_cache[cleaned_value]
         if cleaned_value in self.grouping_missing_values:
+            self.metrics.cache('grouping_lookup', hit=True)
             return None
 
+        self.metrics.cache('grouping_lookup', hit=False)
         tracking_id = self._fetch_tracking_id_from_db(cleaned_value)
         if tracking_id:
             self.grouping_lookup_cache[cleaned_value] = tracking_id
@@ -280,8 +249,14 @@ class ExcelImporter:
             if hasattr(cursor, "fast_executemany"):
                 cursor.fast_executemany = True
             cursor.executemany(update_query, self.grouping_updates)
+            self.metrics.round_trip('update')
+            started = time.perf_counter()
             conn.commit()
+            self.metrics.commit(time.perf_counter() - started)
+            self.metrics.updated(len(self.grouping_updates))
             logger.info("Flushed %d grouping updates", len(self.grouping_updates))
+            if self.key_store is not None:
+                self.key_store.mark_mapped(tracking_id for _, _, tracking_id in self.grouping_updates)
         except Exception as exc:
             logger.error("Bulk grouping update failed: %s", str(exc))
             raise
@@ -366,6 +341,8 @@ class ExcelImporter:
         current_time = datetime.now()
         rows_to_process = []
         unique_cleaned_values = set()
+        # Clean the whole mlsfNo column in one vectorized pass
+        cleaned_column = clean_many(df['mlsfNo'])
 
         for index, row in df.iterrows():
             try:
@@ -374,7 +351,7 @@ class ExcelImporter:
                     logger.warning(f"Row {index}: No mlsfNo found, skipping record")
                     continue
 
-                cleaned_mlsf_no = self.clean_mlsf_no_for_matching(original_mlsf_no)
+                cleaned_mlsf_no = cleaned_column[index]
                 rows_to_process.append((index, row, original_mlsf_no, cleaned_mlsf_no))
                 if cleaned_mlsf_no:
                     unique_cleaned_values.add(cleaned_mlsf_no.strip())
@@ -544,8 +521,16 @@ class ExcelImporter:
                 )
                 batch_values.append(values)
             
-            cursor.executemany(insert_sql, batch_values)
+            if self.use_tvp and supports_tvp(conn):
+                # One table-valued parameter per batch instead of a parameter array
+                insert_tvp(conn, FILE_NUMBER_TVP, batch_values)
+            else:
+                cursor.executemany(insert_sql, batch_values)
+            self.metrics.round_trip('insert')
+            started = time.perf_counter()
             conn.commit()
+            self.metrics.commit(time.perf_counter() - started)
+            self.metrics.inserted(len(batch_values))
             
             return len(batch_values)
             
@@ -689,6 +674,8 @@ class ExcelImporter:
     def run_import(self):
         """Run the complete import process."""
         logger.info("Starting Excel import process...")
+        start_metrics_exporter()
+        self.key_store_refreshed = False
         self.emit_progress("Starting Excel import process...")
         self.set_progress_stage(*READ_STAGE)
         
@@ -721,6 +708,7 @@ class ExcelImporter:
                 return False
             
             # Step 5: Process in batches
+            self.metrics.planned(len(prepared_data))
             logger.info(f"Processing in batches of {self.batch_size}...")
             self.emit_progress(f"Processing in batches of {self.batch_size}...")
             self.set_progress_stage(*INSERT_STAGE)
@@ -738,7 +726,9 @@ class ExcelImporter:
                 )
                 
                 try:
+                    started = time.perf_counter()
                     inserted_count = self.insert_batch(batch)
+                    self.metrics.batch(time.perf_counter() - started, len(batch))
                     self.processed_records += inserted_count
                     
                     progress_percent = (self.processed_records / self.total_records) * 100
@@ -769,6 +759,8 @@ class ExcelImporter:
         except Exception as e:
             logger.error(f"Import process failed: {str(e)}")
             return False
+        finally:
+            flush_metrics()
 
 def main():
     """Main function to run the reimport."""
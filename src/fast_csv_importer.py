@@ -4,7 +4,6 @@ Fast CSV Importer with batch processing and optimized database operations.
 Supports both CLI and real-time UI progress callbacks.
 """
 
-import csv
 import logging
 from datetime import datetime
 from pathlib import Path
@@ -13,6 +12,7 @@ import threading
 from queue import Queue
 import sys
 import os
+import time
 
 # Add src directory to path if needed
 BASE_DIR = Path(__file__).parent
@@ -20,6 +20,14 @@ if str(BASE_DIR) not in sys.path:
     sys.path.insert(0, str(BASE_DIR))
 
 from database_connection import DatabaseConnection
+from file_number_parser import clean_file_number
+from adaptive_batching import create_batch_controller
+from csv_stream import CSVChunkReader, DEFAULT_CHUNK_ROWS
+from batch_bisection import QuarantineFile, bisect_insert
+from grouping_match_key import GroupingMatchKey, match_key
+from tracking_key_store import shared_key_store
+from tvp_insertion import FILE_NUMBER_TVP, insert_tvp, supports_tvp, tvp_enabled
+from metrics import LoadMetrics, flush_metrics, start_metrics_exporter
 
 # Setup logging
 logging.basicConfig(
@@ -32,6 +40,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+FILE_NUMBER_COLUMNS = (
+    'kangisFileNo', 'mlsfNo', 'NewKANGISFileNo', 'FileName', 'created_at',
+    'location', 'created_by', 'type', 'is_deleted',
+    'SOURCE', 'plot_no', 'tp_no', 'tracking_id', 'date_migrated',
+    'migrated_by', 'migration_source', 'test_control'
+)
+FILE_NUMBER_INSERT_SQL = """
+    INSERT INTO [dbo].[fileNumber] (
+        [kangisFileNo], [mlsfNo], [NewKANGISFileNo], [FileName], [created_at],
+        [location], [created_by], [type], [is_deleted],
+        [SOURCE], [plot_no], [tp_no], [tracking_id], [date_migrated],
+        [migrated_by], [migration_source], [test_control]
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Seconds between insert progress messages
+PROGRESS_INTERVAL = 0.5
+
 
 class ImportCancelledError(Exception):
     """Raised when the import process is cancelled by the user."""
@@ -45,7 +71,29 @@ class FastCSVImporter:
         """Initialize the CSV importer."""
         self.db_connection = DatabaseConnection()
         self.batch_size = 1000  # Smaller batches for faster commits
+        self.commit_interval = 10
         self.grouping_batch_size = 500
+        # Batches go out as one executemany (fast_executemany on pyodbc) or TVP call
+        self.fast_executemany = os.getenv('FAST_EXECUTEMANY', '1') not in ['0', 'false', 'False']
+        self.use_tvp = tvp_enabled()
+        self.insert_connection = None
+        # Rows that fail on their own are written here with the error (QUARANTINE_DIR)
+        self.quarantine_dir = Path(os.getenv('QUARANTINE_DIR', 'quarantine'))
+        # (created on the first quarantined row; run_import names one per import)
+        self.quarantine = QuarantineFile(self.quarantine_dir / 'fileNumber_quarantine.csv')
+        # Rows read, prepared and inserted per pass over the file (CSV_CHUNK_ROWS)
+        self.chunk_rows = int(os.getenv('CSV_CHUNK_ROWS', DEFAULT_CHUNK_ROWS))
+        # Starting sizes above; adjusted while importing when ADAPTIVE_BATCHING=1
+        self.batch_controller = create_batch_controller(
+            self.batch_size, self.commit_interval, name='csv_insert', min_batch_size=50, max_batch_size=5000
+        )
+        self.grouping_controller = create_batch_controller(
+            self.grouping_batch_size, self.grouping_batch_size, name='csv_grouping_update',
+            min_batch_size=50, max_batch_size=5000
+        )
+        
+        # Counters, gauges and latency histograms (exported with METRICS_FILE / METRICS_PORT)
+        self.metrics = LoadMetrics('csv_import')
         
         # Statistics
         self.total_records = 0
@@ -55,17 +103,25 @@ class FastCSVImporter:
         self.unmatched_records = 0
         self.skipped_records = 0
         self.duplicate_records = 0
+        self.quarantined_records = 0
         
         # State
         self.cancel_requested = False
         self.progress_callback: Optional[Callable[[str, Optional[float]], None]] = None
         self.progress_stage_start = 0.0
         self.progress_stage_span = 100.0
+        self.last_progress_at = 0.0
         
         # Cache for grouping lookups
         self.grouping_lookup_cache = {}
         self.grouping_missing_values = set()
         self.grouping_updates = []
+        # Local key store shared across imports (TRACKING_KEY_STORE); refreshed once per import
+        self.key_store = shared_key_store()
+        self.key_store_refreshed = False
+        
+        # MLS numbers already prepared from the current file, across chunks
+        self.seen_mls_numbers: Set[str] = set()
         
         # Control tag for tracking
         self.test_control_value = None
@@ -108,14 +164,7 @@ class FastCSVImporter:
     
     def clean_mlsf_no(self, mlsf_no: str) -> str:
         """Clean mlsfNo for matching by removing 'AND EXTENSION' and '(TEMP)'."""
-        if not mlsf_no:
-            return mlsf_no
-        
-        cleaned = str(mlsf_no).strip()
-        cleaned = cleaned.replace('AND EXTENSION', '').replace('and extension', '')
-        cleaned = cleaned.replace('(TEMP)', '').replace('(temp)', '')
-        cleaned = ' '.join(cleaned.split())
-        return cleaned.strip()
+        return clean_file_number(mlsf_no)
 
     def normalize_mls_number(self, mls_number: str) -> str:
         """Normalize MLS numbers for duplicate detection (trim spaces, uppercase)."""
@@ -150,6 +199,7 @@ class FastCSVImporter:
                     WHERE LTRIM(RTRIM(mlsfNo)) IN ({placeholders})
                 """
                 cursor.execute(query, tuple(chunk))
+                self.metrics.round_trip('select')
                 rows = cursor.fetchall()
                 for (trimmed_mls,) in rows:
                     if trimmed_mls:
@@ -164,14 +214,14 @@ class FastCSVImporter:
         return existing_numbers
     
     def prefetch_grouping_lookup(self, cleaned_values: List[str]) -> None:
-        """Bulk load grouping matches using indexed lookups."""
-        values_to_lookup = [
-            value.strip()
-            for value in cleaned_values
-            if value
-            and value.strip() not in self.grouping_lookup_cache
-            and value.strip() not in self.grouping_missing_values
-        ]
+        """Bulk load grouping matches with one temp-table join on the indexed match key."""
+        values_to_lookup = sorted({
+            key
+            for key in (match_key(value) for value in cleaned_values)
+            if key
+            and key not in self.grouping_lookup_cache
+            and key not in self.grouping_missing_values
+        })
         
         if not values_to_lookup:
             logger.info("Grouping cache already primed; skipping prefetch")
@@ -181,80 +231,60 @@ class FastCSVImporter:
         logger.info("Prefetching grouping matches for %d unique MLS numbers", total_candidates)
         self.emit_progress(f"Prefetching grouping data ({total_candidates} unique values)...")
         
-        chunk_size = 500  # smaller chunks for better performance
-        total_matched = 0
-        total_processed = 0
+        if self.cancel_requested:
+            raise ImportCancelledError()
         
         try:
             conn = self.db_connection.get_connection()
             if conn is None:
                 raise RuntimeError("Database connection failed")
             
-            cursor = conn.cursor()
-            
-            for start in range(0, total_candidates, chunk_size):
-                if self.cancel_requested:
-                    raise ImportCancelledError()
-                
-                chunk = values_to_lookup[start:start + chunk_size]
-                placeholders = ",".join(["?"] * len(chunk))
-                
-                # Use indexed lookup on awaiting_fileno with NOLOCK
-                query = f"""
-                    SELECT LTRIM(RTRIM(awaiting_fileno)) AS awaiting_trim, tracking_id
-                    FROM [dbo].[grouping] WITH (NOLOCK)
-                    WHERE LTRIM(RTRIM(awaiting_fileno)) IN ({placeholders})
-                """
-                
-                cursor.execute(query, tuple(chunk))
-                rows = cursor.fetchall()
-                chunk_matched_keys = set()
-                
-                for awaiting_trim, tracking_id in rows:
-                    if awaiting_trim and awaiting_trim not in self.grouping_lookup_cache:
-                        self.grouping_lookup_cache[awaiting_trim] = tracking_id
-                        chunk_matched_keys.add(awaiting_trim)
-                
-                total_matched += len(chunk_matched_keys)
-                unreturned = set(chunk) - chunk_matched_keys
-                self.grouping_missing_values.update(unreturned)
-                
-                total_processed += len(chunk)
-                progress_percent = (total_processed / total_candidates) * 100
-                self.emit_progress(
-                    f"Prefetch progress: {total_processed}/{total_candidates} ({progress_percent:.1f}%)",
-                    progress_percent
-                )
+            matches = self._lookup_key_store(conn, values_to_lookup)
+            if matches is None:
+                matches = GroupingMatchKey(conn).fetch_tracking_ids(values_to_lookup)
+                self.metrics.round_trip('select')
+            self.grouping_lookup_cache.update(matches)
+            self.grouping_missing_values.update(key for key in values_to_lookup if key not in matches)
             
             logger.info(
                 "Grouping prefetch completed: %d matched, %d unmatched",
-                total_matched,
-                total_candidates - total_matched
+                len(matches),
+                total_candidates - len(matches)
             )
             self.emit_progress("Grouping prefetch completed.", 100.0)
             
-        except ImportCancelledError:
-            raise
         except Exception as e:
             logger.error("Error during grouping prefetch: %s", str(e))
             raise
         finally:
-            if 'cursor' in locals():
-                cursor.close()
-            if 'conn' in locals():
+            if 'conn' in locals() and conn is not None:
                 conn.close()
     
+    def _lookup_key_store(self, conn, keys: List[str]) -> Optional[Dict[str, str]]:
+        """Resolve keys from the local tracking key store; None when it is disabled or unusable."""
+        if self.key_store is None:
+            return None
+        try:
+            if not self.key_store_refreshed:
+                self.key_store.refresh(conn)
+                self.key_store_refreshed = True
+            return self.key_store.lookup(keys)
+        except Exception as exc:
+            logger.warning("Tracking key store unavailable, using database lookups: %s", str(exc))
+            self.key_store = None
+            return None
+    
     def lookup_tracking_id(self, cleaned_mlsf_no: str) -> Optional[str]:
         """Get cached tracking ID or return None."""
         if not cleaned_mlsf_no:
             return None
         
-        cleaned_value = cleaned_mlsf_no.strip()
+        cleaned_value = match_key(cleaned_mlsf_no)
         if cleaned_value in self.grouping_lookup_cache:
+            self.metrics.cache('grouping_lookup', hit=True)
             return self.grouping_lookup_cache[cleaned_value]
-        if cleaned_value in self.grouping_missing_values:
-            return None
-        
+        # Known misses are answered by the cache as well
+        self.metrics.cache('grouping_lookup', hit=cleaned_value in self.grouping_missing_values)
         return None
     
     def stage_grouping_update(self, tracking_id: str, original_mlsf_no: str) -> None:
@@ -262,7 +292,7 @@ class FastCSVImporter:
         if not tracking_id:
             return
         self.grouping_updates.append((original_mlsf_no, self.test_control_value, tracking_id))
-        if len(self.grouping_updates) >= self.grouping_batch_size:
+        if len(self.grouping_updates) >= self.grouping_controller.batch_size:
             self._flush_grouping_updates()
     
     def _flush_grouping_updates(self) -> None:
@@ -283,10 +313,18 @@ class FastCSVImporter:
             if conn is None:
                 raise RuntimeError("Database connection failed")
             
+            started = time.perf_counter()
             cursor = conn.cursor()
             cursor.executemany(update_query, self.grouping_updates)
+            self.metrics.round_trip('update')
+            committed = time.perf_counter()
             conn.commit()
+            self.metrics.commit(time.perf_counter() - committed)
+            self.grouping_controller.record(len(self.grouping_updates), time.perf_counter() - started)
+            self.metrics.updated(len(self.grouping_updates))
             logger.info("Flushed %d grouping updates", len(self.grouping_updates))
+            if self.key_store is not None:
+                self.key_store.mark_mapped(tracking_id for _, _, tracking_id in self.grouping_updates)
             
         except Exception as exc:
             logger.error("Bulk grouping update failed: %s", str(exc))
@@ -298,50 +336,19 @@ class FastCSVImporter:
                 conn.close()
             self.grouping_updates.clear()
     
-    def read_csv_file(self, csv_path: Path) -> Optional[List[Dict[str, Any]]]:
-        """Read and parse CSV file with proper encoding detection."""
-        try:
-            logger.info(f"Reading CSV file: {csv_path}")
-            
-            if not csv_path.exists():
-                raise FileNotFoundError(f"CSV file not found: {csv_path}")
-            
-            records = []
-            
-            # Try multiple encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            csv_data = None
-            
-            for encoding in encodings:
-                try:
-                    with open(csv_path, 'r', encoding=encoding) as f:
-                        reader = csv.DictReader(f)
-                        csv_data = list(reader)
-                    logger.info(f"Successfully read CSV with {encoding} encoding")
-                    break
-                except (UnicodeDecodeError, UnicodeError):
-                    continue
-            
-            if csv_data is None:
-                raise RuntimeError("Could not read CSV file with any supported encoding")
-            
-            records = csv_data
-            self.total_records = len(records)
-            logger.info(f"Successfully read CSV file with {self.total_records} records")
-            self.emit_progress(f"CSV file loaded: {self.total_records} records", 100.0)
-            
-            return records
-            
-        except Exception as e:
-            logger.error(f"Error reading CSV file: {str(e)}")
-            self.emit_progress(f"Error reading CSV: {str(e)}")
-            return None
+    def open_csv_reader(self, csv_path: Path) -> CSVChunkReader:
+        """Open a streaming chunk reader; the encoding is detected once from the file's first bytes."""
+        logger.info(f"Reading CSV file: {csv_path}")
+        if not csv_path.exists():
+            raise FileNotFoundError(f"CSV file not found: {csv_path}")
+        return CSVChunkReader(csv_path, chunk_rows=self.chunk_rows)
     
     def prepare_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Prepare records for insertion with grouping lookups."""
         logger.info("Preparing records for database insertion...")
         self.emit_progress("Preparing records...")
-        self.set_progress_stage(5.0, 20.0)
+        # Sub-steps share the progress range the caller set for this stage
+        stage_start, stage_span = self.progress_stage_start, self.progress_stage_span
         
         prepared_data = []
         current_time = datetime.now()
@@ -381,14 +388,14 @@ class FastCSVImporter:
             raise ImportCancelledError()
         
         # Prefetch grouping data
-        self.set_progress_stage(5.0, 20.0)
+        self.set_progress_stage(stage_start, stage_span * 0.375)
         self.prefetch_grouping_lookup(list(unique_cleaned_values))
         
         if self.cancel_requested:
             raise ImportCancelledError()
 
         # Fetch existing MLS numbers to prevent duplicates
-        self.set_progress_stage(20.0, 5.0)
+        self.set_progress_stage(stage_start + stage_span * 0.375, stage_span * 0.125)
         self.emit_progress("Checking for existing MLS numbers...", 0.0)
         existing_mls_numbers = self.fetch_existing_mls_numbers(list(unique_trimmed_mls_values))
         if existing_mls_numbers:
@@ -396,10 +403,10 @@ class FastCSVImporter:
         self.emit_progress(f"Existing MLS numbers found: {len(existing_mls_numbers)}", 100.0)
         
         # Second pass: prepare records with tracking IDs
-        self.set_progress_stage(25.0, 20.0)
+        self.set_progress_stage(stage_start + stage_span * 0.5, stage_span * 0.5)
         progress_interval = max(1, total_to_process // 20)
         processed_count = 0
-        seen_in_current_file: Set[str] = set()
+        seen_in_current_file = self.seen_mls_numbers
         
         try:
             for index, row, original_mlsf_no, cleaned_mlsf_no, trimmed_mlsf_no, normalized_mlsf_no in rows_to_process:
@@ -493,111 +500,168 @@ class FastCSVImporter:
             f"Prepared {len(prepared_data)} records (matched: {self.matched_records}, unmatched: {self.unmatched_records}, skipped: {self.skipped_records}, duplicates: {self.duplicate_records})",
             100.0
         )
+        self.set_progress_stage(stage_start, stage_span)
         
         return prepared_data
     
+    def _get_insert_connection(self):
+        """Connection reused by every insert batch of the current import."""
+        if self.insert_connection is None:
+            self.insert_connection = self.db_connection.get_connection()
+            if self.insert_connection is None:
+                raise RuntimeError("Database connection failed")
+        return self.insert_connection
+    
+    def _close_insert_connection(self) -> None:
+        if self.insert_connection is not None:
+            try:
+                self.insert_connection.close()
+            finally:
+                self.insert_connection = None
+    
+    def _write_records(self, conn, records: List[Dict[str, Any]]) -> None:
+        """Send records as one set-based insert (TVP or executemany); the caller commits."""
+        values = [tuple(record[column] for column in FILE_NUMBER_COLUMNS) for record in records]
+        if self.use_tvp and supports_tvp(conn):
+            insert_tvp(conn, FILE_NUMBER_TVP, values)
+        else:
+            cursor = conn.cursor()
+            try:
+                if self.fast_executemany and hasattr(cursor, 'fast_executemany'):
+                    cursor.fast_executemany = True
+                cursor.executemany(FILE_NUMBER_INSERT_SQL, values)
+            finally:
+                cursor.close()
+        self.metrics.round_trip('insert')
+    
     def insert_batch(self, batch_data: List[Dict[str, Any]], batch_num: int = 0, total_batches: int = 0) -> int:
-        """Insert a batch of records into the database with per-row progress."""
-        insert_sql = """
-        INSERT INTO [dbo].[fileNumber] (
-            [kangisFileNo], [mlsfNo], [NewKANGISFileNo], [FileName], [created_at],
-            [location], [created_by], [type], [is_deleted],
-            [SOURCE], [plot_no], [tp_no], [tracking_id], [date_migrated],
-            [migrated_by], [migration_source], [test_control]
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
+        Insert a batch with one set-based statement and one commit.
+        
+        A failing batch is bisected down to the rows that fail on their own; those
+        are written to the quarantine file with the error and the rest are inserted.
+        """
+        if self.cancel_requested:
+            raise ImportCancelledError()
+        
+        batch_inserted = 0
+        
+        def report_progress(part: List[Dict[str, Any]]) -> None:
+            # Sampled: at most one progress message per PROGRESS_INTERVAL seconds, plus the batch end
+            nonlocal batch_inserted
+            batch_inserted += len(part)
+            self.processed_records += len(part)
+            now = time.monotonic()
+            if now - self.last_progress_at < PROGRESS_INTERVAL and batch_inserted < len(batch_data):
+                return
+            self.last_progress_at = now
+            progress_in_batch = (batch_inserted / len(batch_data)) * 100
+            # Share of the batches planned for the current stage
+            current_progress = (
+                (max(0, batch_num - 1) + batch_inserted / len(batch_data)) / total_batches * 100
+            ) if total_batches > 0 else progress_in_batch
+            mlsf_no = part[-1].get('mlsfNo', 'N/A')
+            allottee = (part[-1].get('FileName') or '')[:30]
+            msg = f"Inserting: {mlsf_no} - {allottee} | Batch {batch_num}/{total_batches} ({progress_in_batch:.0f}%) | Total: {self.processed_records}/{self.total_records}"
+            self.emit_progress(msg, current_progress)
         
         try:
-            conn = self.db_connection.get_connection()
-            if conn is None:
-                raise RuntimeError("Database connection failed")
-            
-            cursor = conn.cursor()
-            
-            # Insert each record individually to provide per-row progress
-            inserted_count = 0
-            for idx, record in enumerate(batch_data):
-                if self.cancel_requested:
-                    raise ImportCancelledError()
-                
-                values = (
-                    record['kangisFileNo'],
-                    record['mlsfNo'],
-                    record['NewKANGISFileNo'],
-                    record['FileName'],
-                    record['created_at'],
-                    record['location'],
-                    record['created_by'],
-                    record['type'],
-                    record['is_deleted'],
-                    record['SOURCE'],
-                    record['plot_no'],
-                    record['tp_no'],
-                    record['tracking_id'],
-                    record['date_migrated'],
-                    record['migrated_by'],
-                    record['migration_source'],
-                    record['test_control']
-                )
-                
-                try:
-                    cursor.execute(insert_sql, values)
-                    inserted_count += 1
-                    self.processed_records += 1
-                    
-                    # Commit every 10 records for better performance
-                    if inserted_count % 10 == 0:
-                        conn.commit()
-                    
-                    # Emit per-row progress every 5 records
-                    if inserted_count % 5 == 0:
-                        progress_in_batch = (inserted_count / len(batch_data)) * 100
-                        current_progress = ((self.processed_records / self.total_records) * 100) if self.total_records > 0 else 0
-                        
-                        mlsf_no = record.get('mlsfNo', 'N/A')
-                        allottee = record.get('FileName', '')[:30]
-                        
-                        msg = f"Inserting: {mlsf_no} - {allottee} | Batch {batch_num}/{total_batches} ({progress_in_batch:.0f}%) | Total: {self.processed_records}/{self.total_records}"
-                        self.emit_progress(msg, current_progress)
-                    
-                except Exception as row_error:
-                    logger.warning(f"Error inserting row {idx}: {str(row_error)}")
-                    continue
-            
-            # Final commit
-            if inserted_count % 10 != 0:
-                conn.commit()
-            
-            return inserted_count
-            
+            conn = self._get_insert_connection()
+            result = bisect_insert(conn, batch_data, self._write_records, on_written=report_progress)
         except ImportCancelledError:
             raise
         except Exception as e:
             logger.error(f"Error inserting batch: {str(e)}")
-            if 'conn' in locals():
-                conn.rollback()
+            self._close_insert_connection()
             raise
-        finally:
-            if 'cursor' in locals():
-                cursor.close()
-            if 'conn' in locals():
-                conn.close()
+        
+        self.metrics.commit(result.commit_seconds)
+        self.metrics.inserted(result.written)
+        if result.failed:
+            logger.warning(
+                "Batch %s: %d rows quarantined after %d attempts", batch_num, len(result.failed), result.attempts
+            )
+            for record, reason in result.failed:
+                logger.warning(f"Quarantined {record.get('mlsfNo', 'N/A')}: {reason}")
+                self.quarantine.add(record, reason)
+            self.quarantined_records += len(result.failed)
+        
+        return result.written
     
-    def run_import(self, csv_path: Path, control_tag: str = "PROD") -> bool:
-        """Run the complete CSV import process."""
+    def insert_prepared(self, prepared_data: List[Dict[str, Any]], chunk_number: int = 1, inserted_before: int = 0) -> int:
+        """Insert prepared records in adaptive batches; returns the number inserted."""
+        logger.info(f"Inserting {len(prepared_data)} records in batches of {self.batch_controller.batch_size}...")
+        
+        total_inserted = 0
+        i = 0
+        batch_number = 0
+        while i < len(prepared_data):
+            if self.cancel_requested:
+                raise ImportCancelledError()
+            
+            batch_size = self.batch_controller.batch_size
+            batch = prepared_data[i:i + batch_size]
+            batch_number += 1
+            total_batches = batch_number + (len(prepared_data) - i - len(batch) + batch_size - 1) // batch_size
+            
+            logger.info(f"Processing chunk {chunk_number} batch {batch_number}/{total_batches} ({len(batch)} records)...")
+            self.emit_progress(
+                f"Processing chunk {chunk_number} batch {batch_number}/{total_batches} ({len(batch)} records)...",
+                (i / len(prepared_data)) * 100
+            )
+            
+            try:
+                started = time.perf_counter()
+                inserted_count = self.insert_batch(batch, batch_number, total_batches)
+                self.batch_controller.record(len(batch), time.perf_counter() - started)
+                self.metrics.batch(time.perf_counter() - started, len(batch))
+                total_inserted += inserted_count
+                i += len(batch)
+                
+                progress_percent = (i / len(prepared_data)) * 100
+                elapsed = (datetime.now() - self.start_time).total_seconds()
+                rate = (inserted_before + total_inserted) / elapsed if elapsed > 0 else 0
+                
+                self.emit_progress(
+                    f"Batch {batch_number} complete: {inserted_before + total_inserted} records inserted - {rate:.0f} rec/sec",
+                    progress_percent
+                )
+                
+            except ImportCancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to insert batch {batch_number} of chunk {chunk_number}: {str(e)}")
+                raise
+        
+        return total_inserted
+    
+    def run_import(self, csv_path: Path, control_tag: str = "PROD", total_records: Optional[int] = None) -> bool:
+        """
+        Run the complete CSV import process, streaming the file chunk by chunk.
+        
+        total_records, when the caller already counted the rows (the upload server
+        does), only sharpens the progress messages; the file is never read twice.
+        """
         self.test_control_value = control_tag if control_tag else None
         self.start_time = datetime.now()
         self.cancel_requested = False
-        self.total_records = 0
+        self.total_records = total_records or 0
         self.processed_records = 0
         self.inserted_records = 0
         self.matched_records = 0
         self.unmatched_records = 0
         self.skipped_records = 0
         self.duplicate_records = 0
+        self.quarantined_records = 0
+        self.quarantine = QuarantineFile(
+            self.quarantine_dir / f"{csv_path.stem}_{self.start_time.strftime('%Y%m%d_%H%M%S')}_quarantine.csv"
+        )
         self.grouping_lookup_cache.clear()
         self.grouping_missing_values.clear()
         self.grouping_updates.clear()
+        self.seen_mls_numbers.clear()
+        self.key_store_refreshed = False
+        start_metrics_exporter()
         
         logger.info("="*70)
         logger.info("Starting CSV import process...")
@@ -614,55 +678,46 @@ class FastCSVImporter:
             conn.close()
             self.emit_progress("Database connection successful", 100.0)
             
-            # Read CSV file
-            self.set_progress_stage(0.0, 5.0)
-            records = self.read_csv_file(csv_path)
-            if records is None or len(records) == 0:
-                logger.error("Failed to read CSV file or file is empty")
-                return False
-            
-            # Prepare records with grouping lookups
-            self.set_progress_stage(5.0, 40.0)
-            prepared_data = self.prepare_records(records)
-            if not prepared_data:
-                logger.warning("No data prepared for insertion")
-                return False
-            
-            # Insert records in batches
-            logger.info(f"Inserting {len(prepared_data)} records in batches of {self.batch_size}...")
-            self.set_progress_stage(45.0, 50.0)
-            
+            # Stream the CSV file: each chunk is prepared and inserted before the next is read
+            reader = self.open_csv_reader(csv_path)
             total_inserted = 0
-            for i in range(0, len(prepared_data), self.batch_size):
+            total_prepared = 0
+            chunk_number = 0
+            previous_progress = 0.0
+            for chunk in reader.chunks():
                 if self.cancel_requested:
                     raise ImportCancelledError()
                 
-                batch = prepared_data[i:i + self.batch_size]
-                batch_number = (i // self.batch_size) + 1
-                total_batches = (len(prepared_data) + self.batch_size - 1) // self.batch_size
+                chunk_number += 1
+                if not total_records:
+                    self.total_records = reader.rows_read
+                # Each chunk owns the slice of the 5-95% range its bytes cover
+                chunk_start = 5.0 + 0.9 * previous_progress
+                chunk_end = 5.0 + 0.9 * reader.progress
+                previous_progress = reader.progress
+                logger.info(f"Read chunk {chunk_number}: {len(chunk)} rows ({reader.encoding}, {reader.progress:.1f}% of file)")
                 
-                logger.info(f"Processing batch {batch_number}/{total_batches} ({len(batch)} records)...")
-                self.emit_progress(
-                    f"Processing batch {batch_number}/{total_batches} ({len(batch)} records)...",
-                    (i / len(prepared_data)) * 100
-                )
+                # Lookups are per chunk, so the caches stay as small as the chunk
+                self.grouping_lookup_cache.clear()
+                self.grouping_missing_values.clear()
                 
-                try:
-                    inserted_count = self.insert_batch(batch, batch_number, total_batches)
-                    total_inserted += inserted_count
-                    
-                    progress_percent = (total_inserted / len(prepared_data)) * 100
-                    elapsed = (datetime.now() - self.start_time).total_seconds()
-                    rate = total_inserted / elapsed if elapsed > 0 else 0
-                    
-                    self.emit_progress(
-                        f"Batch {batch_number} complete: {total_inserted}/{len(prepared_data)} records - {rate:.0f} rec/sec",
-                        progress_percent
-                    )
-                    
-                except Exception as e:
-                    logger.error(f"Failed to insert batch {batch_number}: {str(e)}")
-                    return False
+                # Prepare records with grouping lookups
+                self.set_progress_stage(chunk_start, (chunk_end - chunk_start) * 0.45)
+                prepared_data = self.prepare_records(chunk)
+                if not prepared_data:
+                    continue
+                
+                total_prepared += len(prepared_data)
+                self.metrics.planned(total_prepared)
+                self.set_progress_stage(chunk_start + (chunk_end - chunk_start) * 0.45, (chunk_end - chunk_start) * 0.55)
+                total_inserted += self.insert_prepared(prepared_data, chunk_number, total_inserted)
+            
+            if chunk_number == 0:
+                logger.error("Failed to read CSV file or file is empty")
+                return False
+            if total_prepared == 0:
+                logger.warning("No data prepared for insertion")
+                return False
             
             self.inserted_records = total_inserted
             
@@ -677,6 +732,8 @@ class FastCSVImporter:
             logger.info(f"Skipped records: {self.skipped_records}")
             logger.info(f"Duplicate records skipped: {self.duplicate_records}")
             logger.info(f"Records inserted: {total_inserted}")
+            if self.quarantined_records:
+                logger.info(f"Records quarantined: {self.quarantined_records} ({self.quarantine.path})")
             logger.info(f"Matched groupings: {self.matched_records}")
             logger.info(f"Unmatched groupings: {self.unmatched_records}")
             logger.info(f"Elapsed time: {elapsed:.2f} seconds")
@@ -684,7 +741,8 @@ class FastCSVImporter:
             logger.info("="*70)
             
             self.emit_progress(
-                f"✓ Import complete! {total_inserted} records inserted at {rate:.0f} rec/sec (duplicates skipped: {self.duplicate_records})",
+                f"✓ Import complete! {total_inserted} records inserted at {rate:.0f} rec/sec "
+                f"(duplicates skipped: {self.duplicate_records}, quarantined: {self.quarantined_records})",
                 100.0
             )
             
@@ -698,6 +756,10 @@ class FastCSVImporter:
             logger.error(f"Import process failed: {str(e)}")
             self.emit_progress(f"Error: {str(e)}")
             return False
+        finally:
+            self._close_insert_connection()
+            self.quarantine.close()
+            flush_metrics()
 
 
 def main():
@@ -707,11 +769,15 @@ def main():
     parser = argparse.ArgumentParser(description="Fast CSV importer for file numbers")
     parser.add_argument("--csv", default="FileNos_PRO.csv", help="Path to CSV file")
     parser.add_argument("--control-tag", default="PROD", help="Control tag for tracking")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help=f"Rows read and imported per chunk (default: CSV_CHUNK_ROWS or {DEFAULT_CHUNK_ROWS})")
     args = parser.parse_args()
     
     csv_path = Path(args.csv).expanduser().resolve()
     
     importer = FastCSVImporter()
+    if args.chunk_rows:
+        importer.chunk_rows = args.chunk_rows
     importer.set_progress_callback(lambda msg, pct: print(f"{msg} ({pct:.1f}%)" if pct else msg))
     
     success = importer.run_import(csv_path, args.control_tag)
@@ -0,0 +1,341 @@
+"""
+File Number Exporter
+Streams the generated file number set straight to CSV, SQL Server BCP
+character files or Parquet, without building per-record dictionaries
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+import functools
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from file_number_generator import FileNumberGenerator, GROUPING_COLUMNS
+from sharded_generation import run_sharded_generation
+
+EXPORT_FORMATS = ('csv', 'bcp', 'parquet')
+FILE_SUFFIXES = {'csv': '.csv', 'bcp': '.dat', 'parquet': '.parquet'}
+WRITE_BUFFER_SIZE = 1 << 20
+BCP_FIELD_TERMINATOR = '\t'
+BCP_ROW_TERMINATOR = '\n'
+BCP_FORMAT_VERSION = '14.0'
+# [dbo].[grouping] ordinals of GROUPING_COLUMNS; column 1 is the id IDENTITY, which exports leave out
+GROUPING_COLUMN_IDS = tuple(range(2, len(GROUPING_COLUMNS) + 2))
+
+logger = logging.getLogger(__name__)
+
+
+def _format_timestamps(values: List[datetime]) -> List[str]:
+    """Format datetimes once per distinct value (a batch shares one timestamp)."""
+    formatted: Dict[datetime, str] = {}
+    result = []
+    for value in values:
+        text = formatted.get(value)
+        if text is None:
+            text = value.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+            formatted[value] = text
+        result.append(text)
+    return result
+
+
+def _text_columns(batch: Dict[str, Any]) -> List[List[Any]]:
+    """Return the grouping columns of a batch ready for a delimited writer."""
+    columns = []
+    for column in GROUPING_COLUMNS:
+        values = batch[column]
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        elif column == 'created_at':
+            values = _format_timestamps(values)
+        columns.append(values)
+    return columns
+
+
+class DelimitedBatchWriter:
+    """Buffered CSV / BCP character-mode writer for columnar batches"""
+
+    def __init__(self, path: Path, export_format: str = 'csv', include_header: bool = True):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows_written = 0
+        self._handle = open(self.path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE)
+        if export_format == 'bcp':
+            self._writer = csv.writer(
+                self._handle,
+                delimiter=BCP_FIELD_TERMINATOR,
+                lineterminator=BCP_ROW_TERMINATOR,
+                quoting=csv.QUOTE_NONE,
+                escapechar=None
+            )
+        else:
+            self._writer = csv.writer(self._handle, lineterminator='\n')
+            if include_header:
+                self._writer.writerow(GROUPING_COLUMNS)
+
+    def write(self, batch: Dict[str, Any]) -> int:
+        columns = _text_columns(batch)
+        self._writer.writerows(zip(*columns))
+        written = len(columns[0])
+        self.rows_written += written
+        return written
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ParquetBatchWriter:
+    """Parquet writer for columnar batches (requires pyarrow)"""
+
+    def __init__(self, path: Path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from exc
+
+        self._pa = pa
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows_written = 0
+        self._schema = pa.schema([
+            ('awaiting_fileno', pa.string()),
+            ('created_by', pa.string()),
+            ('number', pa.int64()),
+            ('year', pa.int64()),
+            ('landuse', pa.string()),
+            ('created_at', pa.timestamp('ms')),
+            ('registry', pa.string()),
+            ('mls_fileno', pa.string()),
+            ('mapping', pa.int64()),
+            ('group', pa.int64()),
+            ('sys_batch_no', pa.int64()),
+            ('registry_batch_no', pa.int64()),
+            ('tracking_id', pa.string())
+        ])
+        self._writer = pq.ParquetWriter(str(self.path), self._schema)
+
+    def write(self, batch: Dict[str, Any]) -> int:
+        arrays = [
+            self._pa.array(batch[field.name], type=field.type)
+            for field in self._schema
+        ]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        written = len(batch['awaiting_fileno'])
+        self.rows_written += written
+        return written
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_batch_writer(path: Path, export_format: str, include_header: bool = True):
+    """Create the writer for an export format."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    if export_format == 'parquet':
+        return ParquetBatchWriter(path)
+    return DelimitedBatchWriter(path, export_format, include_header)
+
+
+def write_batches(batches: Iterable[Dict[str, Any]], path: Path, export_format: str = 'csv') -> int:
+    """
+    Stream columnar batches into a single export file
+    Args:
+        batches: Blocks from FileNumberGenerator.generate_batches or generate_shard_batches
+        path: Output file path
+        export_format: 'csv', 'bcp' or 'parquet'
+    Returns:
+        Number of rows written
+    """
+    with open_batch_writer(path, export_format) as writer:
+        for batch in batches:
+            writer.write(batch)
+        return writer.rows_written
+
+
+def shard_part_path(output_path: Path, shard_id: int) -> Path:
+    """Path of the part file written for one shard."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.part{shard_id:03d}{output_path.suffix}")
+
+
+def export_shard(
+    generator: FileNumberGenerator,
+    shard: Dict[str, Any],
+    batch_size: int,
+    export_format: str,
+    output_path: str
+) -> Dict[str, Any]:
+    """Shard worker that writes one shard to its own part file."""
+    start = time.perf_counter()
+    part_path = shard_part_path(Path(output_path), shard['shard_id'])
+    with open_batch_writer(part_path, export_format, include_header=shard['shard_id'] == 0) as writer:
+        for batch in generator.generate_shard_batches(shard, batch_size):
+            writer.write(batch)
+        rows = writer.rows_written
+    return {
+        'shard_id': shard['shard_id'],
+        'path': str(part_path),
+        'rows': rows,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def write_bcp_format_file(path: Path, column_ids: Sequence[int] = GROUPING_COLUMN_IDS) -> Path:
+    """
+    Write a non-XML format file mapping the BCP character export onto [dbo].[grouping]
+
+    Host field n loads server column column_ids[n - 1]. No field maps to the
+    id IDENTITY, so BULK INSERT leaves it to the server; an XML format file
+    cannot skip a leading table column when loading the table directly.
+    Args:
+        path: Target .fmt path
+        column_ids: Table ordinals of GROUPING_COLUMNS (default: id first, then the export columns)
+    Returns:
+        Path of the written format file
+    """
+    lines = [BCP_FORMAT_VERSION, str(len(GROUPING_COLUMNS))]
+    for index, (column, column_id) in enumerate(zip(GROUPING_COLUMNS, column_ids), 1):
+        terminator = '\\n' if index == len(GROUPING_COLUMNS) else '\\t'
+        lines.append(f'{index}\tSQLCHAR\t0\t255\t"{terminator}"\t{column_id}\t{column}\t""')
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return path
+
+
+def build_grouping_bulk_insert_sql(data_path: str, format_path: str, batch_size: Optional[int] = None,
+                                   table: str = '[dbo].[grouping]') -> str:
+    """BULK INSERT statement loading a BCP character export into [dbo].[grouping] (or a staging copy)."""
+    options = [
+        f"FORMATFILE = '{format_path.replace(chr(39), chr(39) * 2)}'",
+        "CODEPAGE = '65001'",
+        "KEEPNULLS",
+        "TABLOCK"
+    ]
+    if batch_size:
+        options.append(f"BATCHSIZE = {batch_size}")
+    options_sql = ",\n    ".join(options)
+    return (
+        f"BULK INSERT {table}\n"
+        f"FROM '{data_path.replace(chr(39), chr(39) * 2)}'\n"
+        f"WITH (\n    {options_sql}\n);"
+    )
+
+
+class FileNumberExporter:
+    """Export the generated file number set to files"""
+
+    def __init__(self, generator: Optional[FileNumberGenerator] = None, batch_size: int = 50000):
+        self.generator = generator or FileNumberGenerator()
+        self.batch_size = batch_size
+
+    def export(
+        self,
+        output_path: Path,
+        export_format: str = 'csv',
+        processes: int = 1,
+        years_per_shard: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Export the full generation run
+        Args:
+            output_path: Target file; parallel runs write <stem>.partNNN<suffix> files
+            export_format: 'csv', 'bcp' or 'parquet'
+            processes: 1 writes a single file, more writes one part file per shard in parallel
+            years_per_shard: Year-range length of each shard for parallel runs
+        Returns:
+            Summary with written files, row count and timing
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+
+        output_path = Path(output_path)
+        start = time.perf_counter()
+
+        if processes == 1:
+            rows = write_batches(
+                self.generator.generate_batches(self.batch_size), output_path, export_format
+            )
+            files = [str(output_path)]
+        else:
+            worker = functools.partial(
+                export_shard, export_format=export_format, output_path=str(output_path)
+            )
+            results = run_sharded_generation(
+                worker,
+                processes=processes,
+                years_per_shard=years_per_shard,
+                batch_size=self.batch_size,
+                generator=self.generator
+            )
+            rows = sum(result['rows'] for result in results)
+            files = [result['path'] for result in results]
+
+        summary = {
+            'format': export_format,
+            'files': files,
+            'rows': rows,
+            'seconds': time.perf_counter() - start
+        }
+        if export_format == 'bcp':
+            summary['format_file'] = str(write_bcp_format_file(output_path.with_suffix('.fmt')))
+
+        logger.info("Exported %d records to %d file(s) in %.2fs", rows, len(files), summary['seconds'])
+        return summary
+
+
+def main():
+    """CLI entry point for file number export"""
+    parser = argparse.ArgumentParser(description="Stream generated file numbers to CSV, BCP or Parquet")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default='csv', help="Export format (default: %(default)s)")
+    parser.add_argument("--output", default=None, help="Output file (default: exports/grouping.<ext>)")
+    parser.add_argument("--processes", type=int, default=1, help="Parallel shard writers (default: %(default)s)")
+    parser.add_argument("--years-per-shard", type=int, default=None, help="Split shards into year ranges of this length")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows per generated block (default: %(default)s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    output_path = Path(args.output or f"exports/grouping{FILE_SUFFIXES[args.format]}")
+
+    exporter = FileNumberExporter(batch_size=args.batch_size)
+    summary = exporter.export(output_path, args.format, args.processes, args.years_per_shard)
+
+    rate = summary['rows'] / summary['seconds'] if summary['seconds'] > 0 else 0
+    print(f"Exported {summary['rows']:,} records in {summary['seconds']:.2f} seconds ({rate:,.0f} records/second)")
+    for file_name in summary['files'][:5]:
+        print(f"  {file_name}")
+    if len(summary['files']) > 5:
+        print(f"  ... {len(summary['files']) - 5} more part files")
+
+    if args.format == 'bcp':
+        print("\nLoad into SQL Server with (paths as seen by the server):")
+        for file_name in summary['files']:
+            print(build_grouping_bulk_insert_sql(str(Path(file_name).resolve()), str(Path(summary['format_file']).resolve())))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,77 @@ Generates file numbers for all configured categories with proper registry assign
 """
 
 import os
+import bisect
+import operator
 import random
 import string
 from datetime import datetime
-from typing import List, Dict, Any, Generator, Optional, Iterable
+from typing import List, Dict, Any, Generator, Optional, Iterable, Tuple
 import logging
+import numpy as np
 from dotenv import load_dotenv
 
+from tracking_ids import create_tracking_id_engine, find_duplicates
+from file_number_parser import (
+    CONSOLIDATED_REGISTRY, category_info, category_of, is_consolidated, land_use_of, registry_for
+)
+
 # Load environment variables
 load_dotenv()
 
+# Column order of the [dbo].[grouping] insert statement
+GROUPING_COLUMNS = (
+    'awaiting_fileno', 'created_by', 'number', 'year', 'landuse',
+    'created_at', 'registry', 'mls_fileno', 'mapping', 'group',
+    'sys_batch_no', 'registry_batch_no', 'tracking_id'
+)
+
+
+def grouping_insert_sql(table: str = '[dbo].[grouping]') -> str:
+    """Parameterized INSERT of GROUPING_COLUMNS into a grouping-shaped table."""
+    return (
+        f"INSERT INTO {table} ("
+        + ", ".join(f"[{column}]" for column in GROUPING_COLUMNS)
+        + ") VALUES ("
+        + ", ".join("?" for _ in GROUPING_COLUMNS)
+        + ")"
+    )
+
+
+GROUPING_INSERT_SQL = grouping_insert_sql()
+
+
+def record_rows(records: Iterable[Dict[str, Any]], columns: Iterable[str] = GROUPING_COLUMNS) -> List[Tuple[Any, ...]]:
+    """
+    Convert record dictionaries into row tuples for executemany
+    Args:
+        records: Records yielded by FileNumberGenerator.generate_file_numbers
+        columns: Column order of the target statement
+    Returns:
+        List of row tuples
+    """
+    row_of = operator.itemgetter(*columns)
+    return [row_of(record) for record in records]
+
+
+def batch_rows(batch: Dict[str, Any], columns: Iterable[str] = GROUPING_COLUMNS) -> List[Tuple[Any, ...]]:
+    """
+    Convert a columnar batch into row tuples for executemany
+    Args:
+        batch: Columnar block yielded by FileNumberGenerator.generate_batches
+        columns: Column order of the target statement
+    Returns:
+        List of row tuples holding native Python values
+    """
+    column_values = []
+    for column in columns:
+        values = batch[column]
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        column_values.append(values)
+    return list(zip(*column_values))
+
+
 class FileNumberGenerator:
     """Generate file numbers with proper categorization and registry assignment"""
     
@@ -50,6 +111,10 @@ class FileNumberGenerator:
         self.numbers_per_year = int(os.getenv('NUMBERS_PER_YEAR', 10000))
         self.records_per_group = int(os.getenv('RECORDS_PER_GROUP', 100))
 
+        # Tracking ID engine (TRACKING_ID_MODE=random|keyed, TRACKING_ID_SEED for keyed)
+        self.tracking_id_engine = create_tracking_id_engine()
+        self.check_tracking_ids = os.getenv('TRACKING_ID_CHECK', '0') not in ['0', 'false', 'False']
+
         # Registry year ranges (inclusive)
         self.registry_year_ranges = {
             '1': (1981, 1991),
@@ -63,10 +128,32 @@ class FileNumberGenerator:
         # Initialize internal counters that can persist across generator calls
         self.reset_counters()
 
+        # Offset table over the canonical load order, built on first random-access lookup
+        self._slice_table: Optional[Dict[str, Any]] = None
+        self._slice_table_key: Optional[Tuple[Any, ...]] = None
+
     def reset_counters(self) -> None:
         """Reset global record and registry counters."""
         self._global_record_count = 0
         self._registry_counts: Dict[str, int] = {}
+
+    def counter_state(self) -> Dict[str, Any]:
+        """Snapshot of the live counters, restorable with restore_counters."""
+        return {
+            'global_count': self._global_record_count,
+            'registry_counts': dict(self._registry_counts)
+        }
+
+    def restore_counters(self, state: Dict[str, Any]) -> None:
+        """
+        Restore counters captured by counter_state
+        Args:
+            state: Dictionary with global_count and registry_counts
+        """
+        self._global_record_count = int(state['global_count'])
+        self._registry_counts = {
+            str(registry): int(count) for registry, count in state['registry_counts'].items()
+        }
         
     def extract_land_use(self, file_number: str) -> str:
         """
@@ -76,16 +163,8 @@ class FileNumberGenerator:
         Returns:
             Full land use name (Residential, Commercial, or Agriculture)
         """
-        if 'RES' in file_number:
-            return 'Residential'
-        elif 'COM' in file_number:
-            return 'Commercial'
-        elif 'IND' in file_number:
-            return 'Industrial'
-        elif 'AG' in file_number:
-            return 'Agriculture'
-        else:
-            return 'UNKNOWN'
+        info = category_info(file_number)
+        return info.land_use if info is not None else land_use_of(file_number)
     
     def assign_registry(self, file_number: str, year: int) -> str:
         """
@@ -96,20 +175,11 @@ class FileNumberGenerator:
         Returns:
             Registry assignment (1, 2, or 3)
         """
-        # Registry 3: Any file number containing "CON" (overrides year rules)
-        if 'CON' in file_number:
-            return '3'
-        
-        start_1, end_1 = self.registry_year_ranges['1']
-        if start_1 <= year <= end_1:
-            return '1'
-
-        start_2, end_2 = self.registry_year_ranges['2']
-        if start_2 <= year <= end_2:
-            return '2'
-        
-        # Default fallback
-        return '2'
+        # Registry 3: Any CON category (overrides year rules)
+        info = category_info(file_number)
+        if info.consolidated if info is not None else is_consolidated(file_number):
+            return CONSOLIDATED_REGISTRY
+        return registry_for(file_number, year, self.registry_year_ranges)
     
     def generate_tracking_id(self) -> str:
         """
@@ -148,78 +218,501 @@ class FileNumberGenerator:
             category_filter = {category.upper() for category in categories}
 
         category_counts: Dict[str, int] = {}
-        
+
         for sequence in self.registry_sequences:
-            seq_start, seq_end = sequence['year_range']
-            seq_start = max(seq_start, self.start_year)
-            seq_end = min(seq_end, self.end_year)
-            if seq_start > seq_end:
+            if max(sequence['year_range'][0], self.start_year) <= min(sequence['year_range'][1], self.end_year):
+                self._registry_counts.setdefault(sequence['registry'], 0)
+
+        for category, seq_start, seq_end in self._category_year_ranges():
+            if category_filter and category not in category_filter:
                 continue
-            registry_id = sequence.get('registry')
-            if registry_id is not None and registry_id not in self._registry_counts:
-                self._registry_counts[registry_id] = 0
 
-            for category in sequence['categories']:
-                if category_filter and category not in category_filter:
-                    continue
+            category_counts.setdefault(category, 0)
+            generated_before = category_counts[category]
+
+            self.logger.info(
+                f"Generating file numbers for category: {category} (Years {seq_start}-{seq_end})"
+            )
+
+            # Land use and registry are constant over a (category, year) slice
+            land_use = self.extract_land_use(category)
+            for year in range(seq_start, seq_end + 1):
+                if max_per_category:
+                    remaining = max_per_category - category_counts[category]
+                    if remaining <= 0:
+                        break
+                    number_cap = min(self.numbers_per_year, remaining)
+                else:
+                    number_cap = self.numbers_per_year
+
+                registry = self.assign_registry(f"{category}-{year}-1", year)
+                self._registry_counts.setdefault(registry, 0)
+                for number in range(1, number_cap + 1):
+                    self._global_record_count += 1
+                    category_counts[category] += 1
+
+                    file_number = f"{category}-{year}-{number}"
+                    group_number = ((self._global_record_count - 1) // self.records_per_group) + 1
+                    batch_number = group_number
 
-                category_counts.setdefault(category, 0)
-                generated_before = category_counts[category]
-
-                self.logger.info(
-                    f"Generating file numbers for category: {category} (Years {seq_start}-{seq_end})"
-                )
-
-                for year in range(seq_start, seq_end + 1):
-                    if max_per_category:
-                        remaining = max_per_category - category_counts[category]
-                        if remaining <= 0:
-                            break
-                        number_cap = min(self.numbers_per_year, remaining)
-                    else:
-                        number_cap = self.numbers_per_year
-
-                    for number in range(1, number_cap + 1):
-                        self._global_record_count += 1
-                        category_counts[category] += 1
-
-                        file_number = f"{category}-{year}-{number}"
-                        group_number = ((self._global_record_count - 1) // self.records_per_group) + 1
-                        batch_number = group_number
-
-                        land_use = self.extract_land_use(file_number)
-                        registry = self.assign_registry(file_number, year)
-                        self._registry_counts.setdefault(registry, 0)
-                        self._registry_counts[registry] += 1
-                        registry_batch_no = ((self._registry_counts[registry] - 1) // self.records_per_group) + 1
-                        tracking_id = self.generate_tracking_id()
-
-                        yield {
-                            'awaiting_fileno': file_number,
-                            'created_by': 'Generated',
-                            'number': self._global_record_count,
-                            'year': year,
-                            'landuse': land_use,
-                            'created_at': datetime.now(),
-                            'registry': registry,
-                            'mls_fileno': None,
-                            'mapping': 0,
-                            'group': group_number,
-                            'sys_batch_no': batch_number,
-                            'registry_batch_no': registry_batch_no,
-                            'tracking_id': tracking_id,
-                            'category': category
-                        }
-
-                        if max_per_category and category_counts[category] >= max_per_category:
-                            break
+                    self._registry_counts[registry] += 1
+                    registry_batch_no = ((self._registry_counts[registry] - 1) // self.records_per_group) + 1
+                    tracking_id = self.tracking_id_engine.tracking_id(self._global_record_count - 1)
+
+                    yield {
+                        'awaiting_fileno': file_number,
+                        'created_by': 'Generated',
+                        'number': self._global_record_count,
+                        'year': year,
+                        'landuse': land_use,
+                        'created_at': datetime.now(),
+                        'registry': registry,
+                        'mls_fileno': None,
+                        'mapping': 0,
+                        'group': group_number,
+                        'sys_batch_no': batch_number,
+                        'registry_batch_no': registry_batch_no,
+                        'tracking_id': tracking_id,
+                        'category': category
+                    }
 
                     if max_per_category and category_counts[category] >= max_per_category:
                         break
 
-                generated_now = category_counts[category] - generated_before
-                self.logger.info(f"Generated {generated_now} records for {category}")
-    
+                if max_per_category and category_counts[category] >= max_per_category:
+                    break
+
+            generated_now = category_counts[category] - generated_before
+            self.logger.info(f"Generated {generated_now} records for {category}")
+
+    def _category_year_ranges(self) -> Generator[Tuple[str, int, int], None, None]:
+        """
+        Walk the (category, year range) runs in the canonical load order
+        Categories come first, in self.categories order, and each category runs
+        through its registries' year ranges. This is the order
+        ProductionInserter loads category by category, so every generator
+        mode, offset table and loader numbers rows the same way.
+        Yields:
+            Tuple of (category, first year, last year) clipped to start_year..end_year
+        """
+        for category in self.categories:
+            for sequence in self.registry_sequences:
+                if category not in sequence['categories']:
+                    continue
+                seq_start = max(sequence['year_range'][0], self.start_year)
+                seq_end = min(sequence['year_range'][1], self.end_year)
+                if seq_start <= seq_end:
+                    yield category, seq_start, seq_end
+
+    def iter_slices(
+        self,
+        categories: Optional[Iterable[str]] = None,
+        max_per_category: Optional[int] = None
+    ) -> Generator[Tuple[str, str, int, int], None, None]:
+        """
+        Walk the (registry, category, year) slices in the canonical load order
+        Args:
+            categories: List of categories to include (default: all configured categories)
+            max_per_category: Maximum records per category (default: all years/numbers)
+        Yields:
+            Tuple of (registry, category, year, record count)
+        """
+        category_filter = None
+        if categories is not None:
+            category_filter = {category.upper() for category in categories}
+
+        category_counts: Dict[str, int] = {}
+
+        for category, seq_start, seq_end in self._category_year_ranges():
+            if category_filter and category not in category_filter:
+                continue
+
+            category_counts.setdefault(category, 0)
+            for year in range(seq_start, seq_end + 1):
+                count = self.numbers_per_year
+                if max_per_category:
+                    count = min(count, max_per_category - category_counts[category])
+                    if count <= 0:
+                        break
+                category_counts[category] += count
+                registry = self.assign_registry(f"{category}-{year}-1", year)
+                yield registry, category, year, count
+
+    def generate_batches(
+        self,
+        batch_size: int = 10000,
+        categories: Optional[Iterable[str]] = None,
+        max_per_category: Optional[int] = None,
+        *,
+        reset_counters: bool = True
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Generate file numbers as columnar blocks instead of per-record dicts
+        Args:
+            batch_size: Maximum number of rows per block
+            categories: List of categories to generate (default: all configured categories)
+            max_per_category: Maximum records per category (default: all years/numbers)
+        Yields:
+            Dictionary mapping each grouping column (plus 'category') to a NumPy
+            array for numeric columns or a list for text columns, all of equal length
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+        if reset_counters:
+            self.reset_counters()
+
+        for sequence in self.registry_sequences:
+            if max(sequence['year_range'][0], self.start_year) <= min(sequence['year_range'][1], self.end_year):
+                self._registry_counts.setdefault(sequence['registry'], 0)
+
+        yield from self._batches_from_runs(
+            self._counted_runs(categories, max_per_category), batch_size
+        )
+
+    def _counted_runs(
+        self,
+        categories: Optional[Iterable[str]],
+        max_per_category: Optional[int]
+    ) -> Generator[Tuple[str, str, int, int, int, int], None, None]:
+        """Yield slice runs starting at the live counters and advance them."""
+        current_category = None
+        for registry, category, year, count in self.iter_slices(categories, max_per_category):
+            if category != current_category:
+                current_category = category
+                self.logger.info(f"Generating file number batches for category: {category}")
+
+            self._registry_counts.setdefault(registry, 0)
+            yield registry, category, year, count, self._global_record_count, self._registry_counts[registry]
+            self._global_record_count += count
+            self._registry_counts[registry] += count
+
+    def _batches_from_runs(
+        self,
+        runs: Iterable[Tuple[str, str, int, int, int, int]],
+        batch_size: int
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Cut slice runs into columnar blocks of batch_size rows
+        Args:
+            runs: Tuples of (registry, category, year, count, global_start, registry_start)
+            batch_size: Maximum number of rows per block
+        Yields:
+            Columnar blocks as described in generate_batches
+        """
+        pieces: List[Dict[str, Any]] = []
+        pending_rows = 0
+
+        for registry, category, year, count, global_start, registry_start in runs:
+            land_use = self.extract_land_use(category)
+            offset = 0
+            while offset < count:
+                take = min(count - offset, batch_size - pending_rows)
+                pieces.append(self._build_slice_columns(
+                    category, year, registry, land_use, offset + 1, take,
+                    global_start + offset, registry_start + offset
+                ))
+                offset += take
+                pending_rows += take
+
+                if pending_rows >= batch_size:
+                    yield self._merge_slice_columns(pieces)
+                    pieces = []
+                    pending_rows = 0
+
+        if pieces:
+            yield self._merge_slice_columns(pieces)
+
+    def plan_shards(self, years_per_shard: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Split the full generation run into independent shards
+        Args:
+            years_per_shard: Split each (registry, category) run into year ranges
+                of this length (default: one shard per registry/category)
+        Returns:
+            Ordered list of shard dictionaries carrying their exact global and
+            registry offsets, so each shard can be generated on its own
+        """
+        if years_per_shard is not None and years_per_shard <= 0:
+            raise ValueError("years_per_shard must be positive")
+
+        slices = self._get_slice_table()['slices']
+        shards: List[Dict[str, Any]] = []
+        start = 0
+        while start < len(slices):
+            first = slices[start]
+            end = start
+            while (
+                end + 1 < len(slices)
+                and slices[end + 1]['registry'] == first['registry']
+                and slices[end + 1]['category'] == first['category']
+                and (years_per_shard is None or end + 1 - start < years_per_shard)
+            ):
+                end += 1
+
+            last = slices[end]
+            shards.append({
+                'shard_id': len(shards),
+                'registry': first['registry'],
+                'category': first['category'],
+                'start_year': first['year'],
+                'end_year': last['year'],
+                'global_offset': first['global_offset'],
+                'registry_offset': first['registry_offset'],
+                'count': last['global_offset'] + last['count'] - first['global_offset'],
+                'slice_range': (start, end + 1)
+            })
+            start = end + 1
+
+        return shards
+
+    def generate_shard_batches(
+        self,
+        shard: Dict[str, Any],
+        batch_size: int = 10000
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Generate one shard from plan_shards without touching the live counters
+        Args:
+            shard: Shard dictionary returned by plan_shards
+            batch_size: Maximum number of rows per block
+        Yields:
+            Columnar blocks identical to the matching rows of a sequential run
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+        slice_start, slice_end = shard['slice_range']
+        runs = (
+            (item['registry'], item['category'], item['year'], item['count'],
+             item['global_offset'], item['registry_offset'])
+            for item in self._get_slice_table()['slices'][slice_start:slice_end]
+        )
+        yield from self._batches_from_runs(runs, batch_size)
+
+    def iter_extension_slices(
+        self,
+        new_end_year: int,
+        existing_years: Optional[Iterable[Tuple[str, int]]] = None
+    ) -> Generator[Tuple[str, str, int, int], None, None]:
+        """
+        Walk the slices added by extending open registries past end_year
+        Args:
+            new_end_year: Last year to include in the extension
+            existing_years: (registry, year) pairs already loaded, which are skipped
+        Yields:
+            Tuple of (registry, category, year, record count) in generation order:
+            year by year, so extending one year at a time numbers rows the same
+            as one extension over all the years
+        """
+        skip = set(existing_years or [])
+        # Only registries that run up to the configured end year stay open
+        open_sequences = [
+            sequence for sequence in self.registry_sequences
+            if sequence['year_range'][1] >= self.end_year
+        ]
+        for year in range(self.end_year + 1, new_end_year + 1):
+            for category in self.categories:
+                if not any(category in sequence['categories'] for sequence in open_sequences):
+                    continue
+                registry = self.assign_registry(f"{category}-{year}-1", year)
+                if (registry, year) in skip:
+                    continue
+                yield registry, category, year, self.numbers_per_year
+
+    def generate_extension_batches(
+        self,
+        new_end_year: int,
+        global_start: int,
+        registry_starts: Dict[str, int],
+        batch_size: int = 10000,
+        existing_years: Optional[Iterable[Tuple[str, int]]] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Generate only the new years, continuing counters from high-water marks
+        Args:
+            new_end_year: Last year to include in the extension
+            global_start: Records already numbered globally (highest 'number')
+            registry_starts: Records already counted per registry
+            batch_size: Maximum number of rows per block
+            existing_years: (registry, year) pairs already loaded, which are skipped
+        Yields:
+            Columnar blocks as described in generate_batches
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+        def runs():
+            global_offset = global_start
+            registry_offsets = dict(registry_starts)
+            for registry, category, year, count in self.iter_extension_slices(new_end_year, existing_years):
+                registry_offset = registry_offsets.get(registry, 0)
+                yield registry, category, year, count, global_offset, registry_offset
+                global_offset += count
+                registry_offsets[registry] = registry_offset + count
+
+        yield from self._batches_from_runs(runs(), batch_size)
+
+    def _get_slice_table(self) -> Dict[str, Any]:
+        """
+        Build (once per configuration) the offset table over the canonical load order
+        Returns:
+            Dictionary with the ordered slices, their global start offsets and
+            a (category, year) index into the slice list
+        """
+        key = (self.start_year, self.end_year, self.numbers_per_year, self.records_per_group)
+        if self._slice_table is not None and self._slice_table_key == key:
+            return self._slice_table
+
+        slices: List[Dict[str, Any]] = []
+        starts: List[int] = []
+        by_key: Dict[Tuple[str, int], int] = {}
+        global_offset = 0
+        registry_offsets: Dict[str, int] = {}
+
+        for registry, category, year, count in self.iter_slices():
+            registry_offset = registry_offsets.get(registry, 0)
+            by_key[(category, year)] = len(slices)
+            starts.append(global_offset)
+            slices.append({
+                'registry': registry,
+                'category': category,
+                'year': year,
+                'count': count,
+                'global_offset': global_offset,
+                'registry_offset': registry_offset,
+                'landuse': self.extract_land_use(category)
+            })
+            global_offset += count
+            registry_offsets[registry] = registry_offset + count
+
+        self._slice_table = {
+            'slices': slices,
+            'starts': starts,
+            'by_key': by_key,
+            'total': global_offset,
+            'registry_totals': registry_offsets
+        }
+        self._slice_table_key = key
+        return self._slice_table
+
+    def slices(self) -> List[Dict[str, Any]]:
+        """
+        List the (registry, category, year) slices of the full run in write order
+        Returns:
+            Copies of the slice dictionaries (registry, category, year, count,
+            global_offset, registry_offset, landuse), in canonical load order
+        """
+        return [dict(info) for info in self._get_slice_table()['slices']]
+
+    def record_at(self, global_index: int) -> Dict[str, Any]:
+        """
+        Compute the record at a position of the full generation run without iterating
+        Args:
+            global_index: Zero-based position in the full run ('number' is global_index + 1)
+        Returns:
+            Dictionary with file number, category, year, counters, registry and land use
+        """
+        table = self._get_slice_table()
+        if global_index < 0 or global_index >= table['total']:
+            raise IndexError(f"global_index {global_index} outside 0..{table['total'] - 1}")
+
+        slice_info = table['slices'][bisect.bisect_right(table['starts'], global_index) - 1]
+        position = global_index - slice_info['global_offset']
+        registry_position = slice_info['registry_offset'] + position
+        group_number = global_index // self.records_per_group + 1
+
+        return {
+            'global_index': global_index,
+            'awaiting_fileno': f"{slice_info['category']}-{slice_info['year']}-{position + 1}",
+            'category': slice_info['category'],
+            'year': slice_info['year'],
+            'serial': position + 1,
+            'number': global_index + 1,
+            'group': group_number,
+            'sys_batch_no': group_number,
+            'registry_batch_no': registry_position // self.records_per_group + 1,
+            'registry': slice_info['registry'],
+            'landuse': slice_info['landuse']
+        }
+
+    def index_of(self, file_number: str) -> int:
+        """
+        Find the position of a file number in the full generation run
+        Args:
+            file_number: Generated file number (e.g., 'CON-RES-RC-1999-42')
+        Returns:
+            Zero-based global index, usable with record_at
+        """
+        try:
+            category, year_text, serial_text = file_number.strip().upper().rsplit('-', 2)
+            year = int(year_text)
+            serial = int(serial_text)
+        except (AttributeError, ValueError):
+            raise ValueError(f"Not a generated file number: {file_number!r}")
+
+        table = self._get_slice_table()
+        slice_index = table['by_key'].get((category, year))
+        if slice_index is None:
+            raise ValueError(f"File number {file_number!r} is outside the generation plan")
+
+        slice_info = table['slices'][slice_index]
+        if serial < 1 or serial > slice_info['count']:
+            raise ValueError(f"File number {file_number!r} is outside the generation plan")
+        return slice_info['global_offset'] + serial - 1
+
+    def _build_slice_columns(
+        self,
+        category: str,
+        year: int,
+        registry: str,
+        land_use: str,
+        first_serial: int,
+        size: int,
+        global_start: int,
+        registry_start: int
+    ) -> Dict[str, Any]:
+        """Compute the counter columns for a contiguous run of one slice."""
+        number = np.arange(global_start + 1, global_start + size + 1, dtype=np.int64)
+        group = (number - 1) // self.records_per_group + 1
+        registry_position = np.arange(registry_start, registry_start + size, dtype=np.int64)
+        prefix = f"{category}-{year}-"
+        return {
+            'awaiting_fileno': [f"{prefix}{serial}" for serial in range(first_serial, first_serial + size)],
+            'number': number,
+            'year': np.full(size, year, dtype=np.int64),
+            'landuse': [land_use] * size,
+            'registry': [registry] * size,
+            'group': group,
+            'sys_batch_no': group,
+            'registry_batch_no': registry_position // self.records_per_group + 1,
+            'category': [category] * size
+        }
+
+    def _merge_slice_columns(self, pieces: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Join slice pieces into one block and fill the per-batch columns."""
+        if len(pieces) == 1:
+            batch = dict(pieces[0])
+        else:
+            batch = {}
+            for column, first in pieces[0].items():
+                if isinstance(first, np.ndarray):
+                    batch[column] = np.concatenate([piece[column] for piece in pieces])
+                else:
+                    batch[column] = [value for piece in pieces for value in piece[column]]
+
+        size = len(batch['awaiting_fileno'])
+        batch['created_by'] = ['Generated'] * size
+        batch['created_at'] = [datetime.now()] * size
+        batch['mls_fileno'] = [None] * size
+        batch['mapping'] = np.zeros(size, dtype=np.int64)
+        batch['tracking_id'] = self.tracking_id_engine.tracking_ids(batch['number'] - 1)
+        if self.check_tracking_ids:
+            duplicates = find_duplicates(batch['tracking_id'])
+            if duplicates:
+                raise ValueError(f"Duplicate tracking IDs generated: {duplicates[:5]}")
+        return batch
+
     def generate_sample_data(
         self,
         records_per_category: int = 10,
@@ -269,15 +762,7 @@ class FileNumberGenerator:
         
         # Count by category, registry, land use
         for record in records:
-            # Extract category from file number
-            fileno_parts = record['awaiting_fileno'].split('-')
-            category = fileno_parts[0]
-
-            if category == 'CON':
-                if len(fileno_parts) >= 3:
-                    category = '-'.join(fileno_parts[:3]) if fileno_parts[2] == 'RC' else '-'.join(fileno_parts[:2])
-            elif len(fileno_parts) >= 2 and fileno_parts[1] == 'RC':
-                category = '-'.join(fileno_parts[:2])
+            category = category_of(record['awaiting_fileno']) or record['awaiting_fileno']
             
             stats['categories'][category] = stats['categories'].get(category, 0) + 1
             stats['registries'][record['registry']] = stats['registries'].get(record['registry'], 0) + 1
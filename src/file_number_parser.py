@@ -0,0 +1,214 @@
+"""
+File Number Parser
+Decodes file numbers such as 'CON-RES-RC-1999-42' into category, land use,
+registry, year and serial using a precompiled lookup table, one value at a
+time or for a whole column in one call
+"""
+
+import re
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+LAND_USES = {
+    'RES': 'Residential',
+    'COM': 'Commercial',
+    'IND': 'Industrial',
+    'AG': 'Agriculture'
+}
+
+# Registry year ranges (inclusive); consolidated (CON) files always go to registry 3
+REGISTRY_YEAR_RANGES = {
+    '1': (1981, 1991),
+    '2': (1992, 2025)
+}
+CONSOLIDATED_REGISTRY = '3'
+DEFAULT_REGISTRY = '2'
+
+
+class CategoryInfo(NamedTuple):
+    """Static attributes of a file number category"""
+    land_use: str
+    consolidated: bool
+    recertified: bool
+
+
+def _build_category_table() -> Dict[str, CategoryInfo]:
+    table = {}
+    for prefix in ('', 'CON-'):
+        for code, land_use in LAND_USES.items():
+            for suffix in ('', '-RC'):
+                table[f"{prefix}{code}{suffix}"] = CategoryInfo(land_use, bool(prefix), bool(suffix))
+    return table
+
+
+CATEGORY_TABLE = _build_category_table()
+
+FILE_NUMBER_PATTERN = re.compile(
+    r'^(?P<category>(?:CON-)?(?:RES|COM|IND|AG)(?:-RC)?)-(?P<year>\d{4})-(?P<serial>\d+)$'
+)
+_CLEANUP_PATTERN = re.compile(r'AND EXTENSION|and extension|\(TEMP\)|\(temp\)')
+
+
+class ParsedFileNumber(NamedTuple):
+    """Decoded parts of a generated-style file number"""
+    category: str
+    land_use: str
+    registry: str
+    year: int
+    serial: int
+
+
+def clean_file_number(value: Any) -> Any:
+    """
+    Clean an mlsfNo for matching against awaiting_fileno
+    Removes 'AND EXTENSION' and '(TEMP)' and collapses whitespace
+    Args:
+        value: Raw file number (falsy values are returned unchanged)
+    Returns:
+        Cleaned file number string
+    """
+    if not value:
+        return value
+    cleaned = _CLEANUP_PATTERN.sub('', str(value).strip())
+    return ' '.join(cleaned.split())
+
+
+def registry_for(category: str, year: int, year_ranges: Optional[Dict[str, Tuple[int, int]]] = None) -> str:
+    """Registry of a category/year pair using the CON override and year ranges."""
+    info = CATEGORY_TABLE.get(category)
+    if info is not None and info.consolidated:
+        return CONSOLIDATED_REGISTRY
+    for registry, (start, end) in (year_ranges or REGISTRY_YEAR_RANGES).items():
+        if start <= year <= end:
+            return registry
+    return DEFAULT_REGISTRY
+
+
+def parse_file_number(
+    value: Any,
+    year_ranges: Optional[Dict[str, Tuple[int, int]]] = None
+) -> Optional[ParsedFileNumber]:
+    """
+    Decode one file number
+    Args:
+        value: File number such as 'CON-RES-RC-1999-42' (cleaned and upper-cased first)
+        year_ranges: Registry year ranges (default: REGISTRY_YEAR_RANGES)
+    Returns:
+        ParsedFileNumber, or None when the value is not a generated-style number
+    """
+    if not value:
+        return None
+    match = FILE_NUMBER_PATTERN.match(clean_file_number(value).upper())
+    if match is None:
+        return None
+    category = match.group('category')
+    year = int(match.group('year'))
+    return ParsedFileNumber(
+        category,
+        CATEGORY_TABLE[category].land_use,
+        registry_for(category, year, year_ranges),
+        year,
+        int(match.group('serial'))
+    )
+
+
+def category_info(value: str) -> Optional[CategoryInfo]:
+    """
+    Table entry of a category code or generated file number by direct prefix lookup
+    Args:
+        value: Category code or clean file number such as 'CON-RES-RC-1999-42'
+    Returns:
+        CategoryInfo, or None when the prefix is not a category (use category_of for raw values)
+    """
+    info = CATEGORY_TABLE.get(value)
+    if info is None and isinstance(value, str):
+        info = CATEGORY_TABLE.get(value.rsplit('-', 2)[0])
+    return info
+
+
+def category_of(value: str) -> Optional[str]:
+    """Category of a bare category code or a full file number."""
+    if value in CATEGORY_TABLE:
+        return value
+    # Generated numbers are already clean: split off '-year-serial' and look the prefix up
+    parts = value.rsplit('-', 2) if isinstance(value, str) else ()
+    if (len(parts) == 3 and parts[0] in CATEGORY_TABLE
+            and len(parts[1]) == 4 and parts[1].isdigit() and parts[2].isdigit()):
+        return parts[0]
+    parsed = parse_file_number(value)
+    return parsed.category if parsed else None
+
+
+def land_use_of(value: str) -> str:
+    """
+    Land use of a category code or file number
+    Falls back to a substring scan for values outside the category table
+    """
+    category = category_of(value)
+    if category is not None:
+        return CATEGORY_TABLE[category].land_use
+    for code in ('RES', 'COM', 'IND', 'AG'):
+        if code in value:
+            return LAND_USES[code]
+    return 'UNKNOWN'
+
+
+def is_consolidated(value: str) -> bool:
+    """Whether a category code or file number belongs to the CON registry."""
+    category = category_of(value)
+    if category is not None:
+        return CATEGORY_TABLE[category].consolidated
+    return 'CON' in value
+
+
+def clean_many(values: Iterable[Any]):
+    """
+    Vectorized clean_file_number over a whole column
+    Args:
+        values: pandas Series, NumPy array or list of file numbers
+    Returns:
+        pandas string Series aligned with the input (missing values stay missing)
+    """
+    import pandas as pd
+
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    text = series.astype('string').str.strip()
+    return text.str.replace(_CLEANUP_PATTERN, '', regex=True).str.split().str.join(' ')
+
+
+def parse_many(values: Iterable[Any], year_ranges: Optional[Dict[str, Tuple[int, int]]] = None):
+    """
+    Decode a whole column of file numbers in one vectorized pass
+    Args:
+        values: pandas Series, NumPy array or list of file numbers
+        year_ranges: Registry year ranges (default: REGISTRY_YEAR_RANGES)
+    Returns:
+        pandas DataFrame aligned with the input, with columns cleaned, category,
+        land_use, registry, year and serial (missing values where unparseable)
+    """
+    import pandas as pd
+
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    cleaned = clean_many(series)
+    parts = cleaned.str.upper().str.extract(FILE_NUMBER_PATTERN)
+
+    year = pd.to_numeric(parts['year'], errors='coerce').astype('Int64')
+    category = parts['category']
+    info = category.map(CATEGORY_TABLE)
+    parsed = category.notna()
+    consolidated = info.map(lambda item: isinstance(item, CategoryInfo) and item.consolidated).astype(bool)
+
+    registry = pd.Series(pd.NA, index=series.index, dtype='string')
+    registry[parsed] = DEFAULT_REGISTRY
+    for registry_id, (start, end) in (year_ranges or REGISTRY_YEAR_RANGES).items():
+        in_range = ((year >= start) & (year <= end)).fillna(False).astype(bool)
+        registry[parsed & in_range] = registry_id
+    registry[consolidated] = CONSOLIDATED_REGISTRY
+
+    return pd.DataFrame({
+        'cleaned': cleaned,
+        'category': category.astype('string'),
+        'land_use': info.map(lambda item: item.land_use if isinstance(item, CategoryInfo) else None).astype('string'),
+        'registry': registry,
+        'year': year,
+        'serial': pd.to_numeric(parts['serial'], errors='coerce').astype('Int64')
+    }, index=series.index)
@@ -0,0 +1,159 @@
+"""
+Generation Plan
+Exact totals and counter boundaries of a generation run, computed from the
+generator configuration without producing any records
+"""
+
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from file_number_generator import FileNumberGenerator
+
+
+def _batches_for(count: int, per_batch: int) -> int:
+    return (count + per_batch - 1) // per_batch
+
+
+class GenerationPlan:
+    """Analytical description of everything a generator run will produce"""
+
+    def __init__(
+        self,
+        generator: Optional[FileNumberGenerator] = None,
+        years_per_shard: Optional[int] = None
+    ):
+        self.generator = generator or FileNumberGenerator()
+        self.records_per_group = self.generator.records_per_group
+
+        self.slice_totals: Dict[Tuple[str, str, int], int] = {}
+        self.registry_totals: Dict[str, int] = {}
+        self.category_totals: Dict[str, int] = {}
+        self.year_totals: Dict[int, int] = {}
+        self.land_use_totals: Dict[str, int] = {}
+
+        for registry, category, year, count in self.generator.iter_slices():
+            self.slice_totals[(registry, category, year)] = count
+            self.registry_totals[registry] = self.registry_totals.get(registry, 0) + count
+            self.category_totals[category] = self.category_totals.get(category, 0) + count
+            self.year_totals[year] = self.year_totals.get(year, 0) + count
+            land_use = self.generator.extract_land_use(category)
+            self.land_use_totals[land_use] = self.land_use_totals.get(land_use, 0) + count
+
+        self.total_records = sum(self.registry_totals.values())
+        self.shards = self._describe_shards(self.generator.plan_shards(years_per_shard))
+
+    def _describe_shards(self, shards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach first/last file numbers and counter ranges to each shard."""
+        described = []
+        for shard in shards:
+            first = self.generator.record_at(shard['global_offset'])
+            last = self.generator.record_at(shard['global_offset'] + shard['count'] - 1)
+            described.append({
+                **shard,
+                'first_file_number': first['awaiting_fileno'],
+                'last_file_number': last['awaiting_fileno'],
+                'number_range': (first['number'], last['number']),
+                'group_range': (first['group'], last['group']),
+                'registry_batch_range': (first['registry_batch_no'], last['registry_batch_no'])
+            })
+        return described
+
+    @property
+    def group_count(self) -> int:
+        """Number of global groups (and sys_batch_no values)."""
+        return _batches_for(self.total_records, self.records_per_group)
+
+    def registry_boundaries(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Counter boundaries of each registry in the sequential run
+        Registries interleave in the load order (each category runs through
+        registries 1 and 2), so the number and group ranges span from the
+        registry's first row to its last one.
+        Returns:
+            Dictionary keyed by registry with number, group and registry batch ranges
+        """
+        number_ranges: Dict[str, Tuple[int, int]] = {}
+        for info in self.generator.slices():
+            first, last = info['global_offset'] + 1, info['global_offset'] + info['count']
+            low, high = number_ranges.get(info['registry'], (first, last))
+            number_ranges[info['registry']] = (min(low, first), max(high, last))
+
+        boundaries = {}
+        for registry, count in self.registry_totals.items():
+            first_number, last_number = number_ranges[registry]
+            boundaries[registry] = {
+                'records': count,
+                'number_range': (first_number, last_number),
+                'group_range': (
+                    (first_number - 1) // self.records_per_group + 1,
+                    (last_number - 1) // self.records_per_group + 1
+                ),
+                'registry_batch_range': (1, _batches_for(count, self.records_per_group))
+            }
+        return boundaries
+
+    def expected_statistics(self) -> Dict[str, Any]:
+        """
+        Expected statistics in the same shape as FileNumberGenerator.get_category_stats
+        Returns:
+            Statistics dictionary
+        """
+        years = sorted(self.year_totals)
+        return {
+            'total_records': self.total_records,
+            'categories': dict(self.category_totals),
+            'registries': dict(self.registry_totals),
+            'land_uses': dict(self.land_use_totals),
+            'year_range': {
+                'min': years[0] if years else None,
+                'max': years[-1] if years else None
+            },
+            'groups': {
+                'min': 1 if self.total_records else None,
+                'max': self.group_count if self.total_records else None,
+                'count': self.group_count
+            }
+        }
+
+    def progress_percent(self, processed_records: int) -> float:
+        """Share of the plan covered by processed_records."""
+        if self.total_records == 0:
+            return 100.0
+        return min(100.0, processed_records / self.total_records * 100)
+
+
+def main():
+    """Print the generation plan for the current configuration"""
+    plan = GenerationPlan()
+
+    print("Generation Plan")
+    print("=" * 50)
+    print(f"Total Records: {plan.total_records:,}")
+    print(f"Groups: 1 - {plan.group_count:,}")
+
+    print("\nBy Registry:")
+    for registry, info in plan.registry_boundaries().items():
+        print(
+            f"  {registry}: {info['records']:,} records | numbers {info['number_range'][0]:,}-{info['number_range'][1]:,}"
+            f" | groups {info['group_range'][0]:,}-{info['group_range'][1]:,}"
+            f" | registry batches {info['registry_batch_range'][1]:,}"
+        )
+
+    print("\nBy Category:")
+    for category, count in plan.category_totals.items():
+        print(f"  {category}: {count:,} records")
+
+    print("\nShards:")
+    for shard in plan.shards:
+        print(
+            f"  #{shard['shard_id']:>2} Registry {shard['registry']} {shard['category']:<11}"
+            f" {shard['first_file_number']} .. {shard['last_file_number']} ({shard['count']:,})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Grouping Match Key
+Normalized awaiting_fileno kept as a persisted, indexed computed column, so
+importers can seek on it instead of scanning the grouping table through
+LTRIM(RTRIM(...)); lookups for a whole import go through one temp-table join
+"""
+
+import os
+import sys
+import argparse
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from sql_helpers import GROUPING_TABLE, quote_name, row_values, sql_literal
+
+MATCH_KEY_COLUMN = 'match_key'
+MATCH_KEY_INDEX = 'IX_grouping_match_key'
+# Same normalization as match_key(); UPPER, LTRIM and RTRIM are deterministic, so it can be persisted
+MATCH_KEY_EXPRESSION = 'UPPER(LTRIM(RTRIM([awaiting_fileno])))'
+# Longer keys cannot match awaiting_fileno (NVARCHAR(50)) but must not fail the temp table insert
+KEY_TABLE_LENGTH = 255
+
+logger = logging.getLogger(__name__)
+
+
+def match_key(value: Any) -> Optional[str]:
+    """
+    Normalized key of a file number, as stored in [match_key]
+    Args:
+        value: awaiting_fileno or cleaned mlsfNo
+    Returns:
+        Trimmed, upper-case key (None for empty values)
+    """
+    if value is None:
+        return None
+    key = str(value).strip(' ').upper()
+    return key or None
+
+
+class GroupingMatchKey:
+    """Creates the match key column and index, and resolves keys with indexed seeks"""
+
+    def __init__(self, connection, table: str = GROUPING_TABLE):
+        """
+        Args:
+            connection: SQL Server connection (pyodbc)
+            table: Grouping table
+        """
+        self.connection = connection
+        self.table = table
+        self.logger = logging.getLogger(__name__)
+        self._column_exists: Optional[bool] = None
+        self._warned = False
+
+    def _scalar(self, sql: str):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql)
+            row = cursor.fetchone()
+            return row_values(row)[0] if row else None
+        finally:
+            cursor.close()
+
+    def column_exists(self) -> bool:
+        """Whether the match key column exists (cached per instance)"""
+        if self._column_exists is None:
+            self._column_exists = self._scalar(
+                f"SELECT COL_LENGTH({sql_literal(self.table)}, {sql_literal(MATCH_KEY_COLUMN)})"
+            ) is not None
+        return self._column_exists
+
+    def index_exists(self) -> bool:
+        return bool(self._scalar(f"""
+            SELECT COUNT(*) FROM sys.indexes
+            WHERE object_id = OBJECT_ID({sql_literal(self.table)}) AND name = {sql_literal(MATCH_KEY_INDEX)}
+        """))
+
+    def key_sql(self, alias: str = '') -> str:
+        """
+        Expression to match keys on: the indexed column, or the normalization
+        itself (a scan) until setup has run
+        """
+        prefix = f"{alias}." if alias else ''
+        if self.column_exists():
+            return f"{prefix}{quote_name(MATCH_KEY_COLUMN)}"
+        if not self._warned:
+            self._warned = True
+            self.logger.warning(
+                f"{self.table} has no {MATCH_KEY_COLUMN} column; lookups scan the table "
+                f"until 'python src/grouping_match_key.py --setup' is run"
+            )
+        return MATCH_KEY_EXPRESSION.replace('[awaiting_fileno]', f"{prefix}[awaiting_fileno]")
+
+    def setup_sql(self) -> List[str]:
+        """Statements creating whatever part of the column and index is missing"""
+        statements = []
+        if not self.column_exists():
+            # Persisting computes the key for every existing row once
+            statements.append(
+                f"ALTER TABLE {self.table} ADD {quote_name(MATCH_KEY_COLUMN)} AS {MATCH_KEY_EXPRESSION} PERSISTED"
+            )
+        if not self.column_exists() or not self.index_exists():
+            statements.append(
+                f"CREATE NONCLUSTERED INDEX {quote_name(MATCH_KEY_INDEX)} "
+                f"ON {self.table} ({quote_name(MATCH_KEY_COLUMN)}) "
+                f"INCLUDE ([tracking_id], [mapping]) WITH (SORT_IN_TEMPDB = ON)"
+            )
+        return statements
+
+    def setup(self) -> List[str]:
+        """
+        Create the match key column and its index if missing
+        Returns:
+            Statements that were run
+        """
+        statements = self.setup_sql()
+        cursor = self.connection.cursor()
+        try:
+            for statement in statements:
+                self.logger.info(f"Running: {statement}")
+                cursor.execute(statement)
+                self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+            self._column_exists = None
+        return statements
+
+    def fetch_tracking_ids(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Resolve many keys with one indexed join
+        The keys are loaded into a session temp table with a single executemany;
+        the join then seeks [match_key] once per key.
+        Args:
+            keys: Values to match (normalized with match_key)
+        Returns:
+            Dictionary of matched key to tracking_id (the lowest id wins on duplicates)
+        """
+        unique_keys = sorted({key for key in (match_key(value) for value in keys) if key})
+        if not unique_keys:
+            return {}
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"""
+                IF OBJECT_ID('tempdb..#import_keys') IS NOT NULL DROP TABLE #import_keys;
+                CREATE TABLE #import_keys ([key] NVARCHAR({KEY_TABLE_LENGTH}) COLLATE DATABASE_DEFAULT PRIMARY KEY)
+            """)
+            if hasattr(cursor, 'fast_executemany'):
+                cursor.fast_executemany = True
+            cursor.executemany("INSERT INTO #import_keys ([key]) VALUES (?)", [(key,) for key in unique_keys])
+            cursor.execute(f"""
+                SELECT k.[key], g.[tracking_id]
+                FROM #import_keys k
+                INNER JOIN {self.table} g WITH (NOLOCK) ON {self.key_sql('g')} = k.[key]
+                ORDER BY g.[id]
+            """)
+            matches: Dict[str, Any] = {}
+            for key, tracking_id in (row_values(row) for row in cursor.fetchall()):
+                matches.setdefault(key, tracking_id)
+            cursor.execute("DROP TABLE #import_keys")
+            return matches
+        finally:
+            cursor.close()
+
+    def fetch_tracking_id(self, key: str) -> Optional[Any]:
+        """Resolve a single key with an index seek"""
+        value = match_key(key)
+        if not value:
+            return None
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT TOP 1 [tracking_id] FROM {self.table} WHERE {self.key_sql()} = ? ORDER BY [id]",
+                (value,)
+            )
+            row = cursor.fetchone()
+            return row_values(row)[0] if row else None
+        finally:
+            cursor.close()
+
+
+def main():
+    """Create or check the grouping match key from the command line"""
+    from database_connection import DatabaseConnection
+
+    parser = argparse.ArgumentParser(description="Indexed match key on the grouping table")
+    parser.add_argument("--setup", action="store_true",
+                        help="Add the persisted computed column and its index when missing")
+    parser.add_argument("--table", default=GROUPING_TABLE, help="Grouping table (default: %(default)s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    connection = DatabaseConnection().get_connection()
+    if not connection:
+        print("❌ Could not establish database connection")
+        return False
+
+    try:
+        keys = GroupingMatchKey(connection, args.table)
+        if args.setup:
+            statements = keys.setup()
+            print(f"✅ Match key ready ({len(statements)} statements run)")
+        print(f"Column {MATCH_KEY_COLUMN}: {'present' if keys.column_exists() else 'missing'}")
+        print(f"Index {MATCH_KEY_INDEX}: {'present' if keys.index_exists() else 'missing'}")
+        return True
+    except Exception as e:
+        print(f"❌ Match key setup failed: {e}")
+        return False
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,610 @@
+"""
+Grouping Table Partitioning
+Partitions [dbo].[grouping] by registry (or registry and year) and loads it
+partition by partition: each worker fills a staging heap for one partition,
+indexes it and switches it in as a metadata-only operation
+"""
+
+import os
+import sys
+import time
+import bisect
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from file_number_generator import FileNumberGenerator, batch_rows
+from grouping_reset import copy_indexes, create_table_copy, partition_filegroup, read_partitioning
+from index_maintenance import IndexMaintenance
+from insert_engines import create_insert_engine
+from sql_helpers import GROUPING_TABLE, quote_name, row_values, scalar, sql_literal
+
+PARTITION_SCHEMES = ('registry', 'registry_year')
+DEFAULT_TABLE = GROUPING_TABLE
+REGISTRY_YEAR_COLUMN = 'registry_year'
+# Deterministic, so it can be persisted and used as the partitioning column
+REGISTRY_YEAR_DEFINITION = (
+    "(CONVERT(NVARCHAR(20), [registry]) + N'|' + RIGHT(N'0000' + CONVERT(NVARCHAR(4), [year]), 4))"
+)
+
+ConnectionFactory = Callable[[], Any]
+ProgressCallback = Callable[[int, str], None]
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionLayout:
+    """Partition boundaries derived from FileNumberGenerator.registry_sequences"""
+
+    def __init__(self, generator: Optional[FileNumberGenerator] = None, scheme: str = 'registry'):
+        """
+        Args:
+            generator: Generator whose registry sequences and years define the layout
+            scheme: 'registry' (one partition per registry) or 'registry_year'
+                (one partition per registry and year)
+        """
+        if scheme not in PARTITION_SCHEMES:
+            raise ValueError(f"Unknown partition scheme: {scheme}")
+        self.generator = generator or FileNumberGenerator()
+        self.scheme = scheme
+        self.column = 'registry' if scheme == 'registry' else REGISTRY_YEAR_COLUMN
+        self.function_name = f"pf_grouping_{scheme}"
+        self.scheme_name = f"ps_grouping_{scheme}"
+
+    def _sequences(self):
+        for sequence in self.generator.registry_sequences:
+            start = max(sequence['year_range'][0], self.generator.start_year)
+            end = min(sequence['year_range'][1], self.generator.end_year)
+            if start <= end:
+                yield sequence['registry'], start, end
+
+    @staticmethod
+    def key(registry: str, year: int) -> str:
+        """Partitioning value for a registry and year under 'registry_year'"""
+        return f"{registry}|{int(year):04d}"
+
+    def value_of(self, registry: str, year: int) -> str:
+        return registry if self.scheme == 'registry' else self.key(registry, year)
+
+    def boundaries(self) -> List[str]:
+        """RANGE RIGHT boundary values: each one starts a partition"""
+        values = set()
+        for registry, start, end in self._sequences():
+            if self.scheme == 'registry':
+                values.add(registry)
+            else:
+                values.update(self.key(registry, year) for year in range(start, end + 1))
+        return sorted(values)
+
+    def partition_number(self, value: str) -> int:
+        """Partition holding a value (RANGE RIGHT: values below the first boundary go to partition 1)"""
+        return bisect.bisect_right(self.boundaries(), value) + 1
+
+    def check_constraint(self, partition_number: int) -> str:
+        """CHECK predicate a staging table needs to be switched into a partition"""
+        boundaries = self.boundaries()
+        column = quote_name(self.column)
+        lower = boundaries[partition_number - 2] if partition_number >= 2 else None
+        upper = boundaries[partition_number - 1] if partition_number <= len(boundaries) else None
+        if lower is None:
+            return f"({column} < {sql_literal(upper)} OR {column} IS NULL)"
+        predicate = f"{column} IS NOT NULL AND {column} >= {sql_literal(lower)}"
+        if upper is not None:
+            predicate += f" AND {column} < {sql_literal(upper)}"
+        return predicate
+
+    def shards_by_partition(self) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Plan shards grouped by target partition
+        Returns:
+            Partition number -> shards from FileNumberGenerator.plan_shards, in plan order
+        """
+        shards = self.generator.plan_shards(None if self.scheme == 'registry' else 1)
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for shard in shards:
+            value = self.value_of(shard['registry'], shard['start_year'])
+            groups.setdefault(self.partition_number(value), []).append(shard)
+        return groups
+
+
+class GroupingPartitioner:
+    """Create and maintain the partition function, scheme and aligned indexes of grouping"""
+
+    def __init__(self, connection, layout: PartitionLayout, table: str = DEFAULT_TABLE, filegroup: str = 'PRIMARY'):
+        """
+        Args:
+            connection: SQL Server connection
+            layout: Partition layout
+            table: Table to partition
+            filegroup: Filegroup for all partitions
+        """
+        self.connection = connection
+        self.layout = layout
+        self.table = table
+        self.filegroup = filegroup
+        self.logger = logging.getLogger(__name__)
+
+    def _query(self, sql: str):
+        cursor = self.connection.cursor()
+        cursor.execute(sql)
+        value = scalar(cursor)
+        cursor.close()
+        return value
+
+    def _rows(self, sql: str) -> List[tuple]:
+        cursor = self.connection.cursor()
+        cursor.execute(sql)
+        rows = [row_values(row) for row in cursor.fetchall()]
+        cursor.close()
+        return rows
+
+    def _execute(self, statements: List[str]) -> None:
+        cursor = self.connection.cursor()
+        for statement in statements:
+            self.logger.info(f"Partitioning: {' '.join(statement.split())}")
+            cursor.execute(statement)
+        self.connection.commit()
+        cursor.close()
+
+    def column_type(self) -> Optional[str]:
+        """SQL type of the partitioning column, or None if the column does not exist yet"""
+        row = self._rows(f"""
+            SELECT t.name, c.max_length, c.precision, c.scale
+            FROM sys.columns c
+            INNER JOIN sys.types t ON t.user_type_id = c.user_type_id
+            WHERE c.object_id = OBJECT_ID({sql_literal(self.table)}) AND c.name = {sql_literal(self.layout.column)}
+        """)
+        if not row:
+            return None
+        name, max_length, precision, scale = row[0]
+        name = name.upper()
+        if name in ('NVARCHAR', 'NCHAR'):
+            if max_length == -1:
+                raise ValueError(f"{self.layout.column} is {name}(MAX), which cannot be partitioned on")
+            return f"{name}({max_length // 2})"
+        if name in ('VARCHAR', 'CHAR', 'VARBINARY', 'BINARY'):
+            return f"{name}({max_length})"
+        if name in ('DECIMAL', 'NUMERIC'):
+            return f"{name}({precision}, {scale})"
+        return name
+
+    def setup_sql(self, column_type: str) -> List[str]:
+        """Partition function and scheme DDL (skipped when they already exist)"""
+        boundaries = ', '.join(sql_literal(value) for value in self.layout.boundaries())
+        return [
+            f"IF NOT EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = {sql_literal(self.layout.function_name)}) "
+            f"CREATE PARTITION FUNCTION {quote_name(self.layout.function_name)} ({column_type}) "
+            f"AS RANGE RIGHT FOR VALUES ({boundaries})",
+            f"IF NOT EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = {sql_literal(self.layout.scheme_name)}) "
+            f"CREATE PARTITION SCHEME {quote_name(self.layout.scheme_name)} "
+            f"AS PARTITION {quote_name(self.layout.function_name)} ALL TO ({quote_name(self.filegroup)})"
+        ]
+
+    def create(self) -> None:
+        """Add the partitioning column if needed, then create function and scheme"""
+        if self.column_type() is None:
+            if self.layout.column != REGISTRY_YEAR_COLUMN:
+                raise RuntimeError(f"{self.table} has no {self.layout.column} column")
+            self._execute([
+                f"ALTER TABLE {self.table} ADD {quote_name(REGISTRY_YEAR_COLUMN)} AS {REGISTRY_YEAR_DEFINITION} PERSISTED"
+            ])
+        self._execute(self.setup_sql(self.column_type()))
+
+    def partition_table_sql(self) -> List[str]:
+        """
+        Statements moving the table and its indexes onto the partition scheme
+        The primary key becomes nonclustered and gains the partitioning
+        column, and the clustered index leads with it, so every index is
+        aligned (a SWITCH requirement). Unique indexes get the column too.
+        """
+        if self._query(
+            f"SELECT TOP (1) 1 FROM sys.foreign_keys WHERE referenced_object_id = OBJECT_ID({sql_literal(self.table)})"
+        ) is not None:
+            raise RuntimeError(f"Foreign keys reference {self.table}; drop them before partitioning")
+
+        column = self.layout.column
+        on_scheme = f"ON {quote_name(self.layout.scheme_name)}({quote_name(column)})"
+        statements = []
+
+        primary_key = self._rows(f"""
+            SELECT kc.name, i.type_desc, c.name
+            FROM sys.key_constraints kc
+            INNER JOIN sys.indexes i ON i.object_id = kc.parent_object_id AND i.index_id = kc.unique_index_id
+            INNER JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+            INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+            WHERE kc.parent_object_id = OBJECT_ID({sql_literal(self.table)}) AND kc.type = 'PK'
+            ORDER BY ic.key_ordinal
+        """)
+        pk_columns = [row[2] for row in primary_key]
+        if primary_key:
+            statements.append(f"ALTER TABLE {self.table} DROP CONSTRAINT {quote_name(primary_key[0][0])}")
+
+        clustered = self._rows(f"""
+            SELECT i.name, c.name
+            FROM sys.indexes i
+            INNER JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+            INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+            WHERE i.object_id = OBJECT_ID({sql_literal(self.table)}) AND i.index_id = 1
+              AND i.is_primary_key = 0 AND ic.key_ordinal > 0
+            ORDER BY ic.key_ordinal
+        """)
+        if clustered:
+            keys = [row[1] for row in clustered]
+            keys = keys if column in keys else [column] + keys
+            statements.append(
+                f"CREATE CLUSTERED INDEX {quote_name(clustered[0][0])} ON {self.table} "
+                f"({', '.join(quote_name(key) for key in keys)}) WITH (DROP_EXISTING = ON) {on_scheme}"
+            )
+        else:
+            keys = [column] + [key for key in pk_columns if key != column]
+            statements.append(
+                f"CREATE CLUSTERED INDEX [CIX_grouping_{self.layout.scheme}] ON {self.table} "
+                f"({', '.join(quote_name(key) for key in keys)}) {on_scheme}"
+            )
+
+        if primary_key:
+            keys = pk_columns if column in pk_columns else pk_columns + [column]
+            statements.append(
+                f"ALTER TABLE {self.table} ADD CONSTRAINT {quote_name(primary_key[0][0])} PRIMARY KEY NONCLUSTERED "
+                f"({', '.join(quote_name(key) for key in keys)}) {on_scheme}"
+            )
+
+        indexes = IndexMaintenance(self.connection, table=self.table)
+        for index in indexes.read_indexes():
+            if index['is_unique'] and not any(key.startswith(quote_name(column) + ' ') for key in index['key_columns']):
+                index['key_columns'] = index['key_columns'] + [f"{quote_name(column)} ASC"]
+            statements.append(f"{indexes.create_statement(index)} WITH (DROP_EXISTING = ON) {on_scheme}")
+        return statements
+
+    def partition_table(self) -> bool:
+        """
+        Rebuild the table onto the partition scheme
+        Returns:
+            False when the table already uses the scheme
+        """
+        current = read_partitioning(self.connection, self.table)
+        if current and current['scheme'] == self.layout.scheme_name:
+            return False
+        self._execute(self.partition_table_sql())
+        return True
+
+    def existing_boundaries(self) -> List[str]:
+        rows = self._rows(f"""
+            SELECT CONVERT(NVARCHAR(100), prv.value)
+            FROM sys.partition_range_values prv
+            INNER JOIN sys.partition_functions pf ON pf.function_id = prv.function_id
+            WHERE pf.name = {sql_literal(self.layout.function_name)}
+            ORDER BY prv.boundary_id
+        """)
+        return [row[0] for row in rows]
+
+    def maintain(self) -> List[str]:
+        """
+        Split in boundaries for registries or years added to the plan (e.g. a later END_YEAR)
+        Returns:
+            Boundary values added
+        """
+        existing = set(self.existing_boundaries())
+        added = [value for value in self.layout.boundaries() if value not in existing]
+        statements = []
+        for value in added:
+            statements.append(
+                f"ALTER PARTITION SCHEME {quote_name(self.layout.scheme_name)} NEXT USED {quote_name(self.filegroup)}"
+            )
+            statements.append(
+                f"ALTER PARTITION FUNCTION {quote_name(self.layout.function_name)}() SPLIT RANGE ({sql_literal(value)})"
+            )
+        if statements:
+            self._execute(statements)
+        return added
+
+    def partition_rows(self) -> Dict[int, int]:
+        """Rows per partition number from partition metadata"""
+        rows = self._rows(f"""
+            SELECT partition_number, SUM(row_count)
+            FROM sys.dm_db_partition_stats
+            WHERE object_id = OBJECT_ID({sql_literal(self.table)}) AND index_id IN (0, 1)
+            GROUP BY partition_number
+        """)
+        return {int(number): int(count) for number, count in rows}
+
+
+class StagingSwitchLoader:
+    """Load each partition through its own staging heap and switch it in"""
+
+    def __init__(
+        self,
+        connection_factory: ConnectionFactory,
+        layout: PartitionLayout,
+        table: str = DEFAULT_TABLE,
+        workers: int = 4,
+        batch_size: int = 10000,
+        transaction_size: int = 100000,
+        insert_engine: Optional[str] = None
+    ):
+        """
+        Args:
+            connection_factory: Callable returning a new SQL Server connection per worker
+            layout: Partition layout of the (already partitioned) table
+            table: Partitioned target table
+            workers: Partitions loaded at once
+            batch_size: Rows per insert call
+            transaction_size: Rows per commit while filling a staging heap
+            insert_engine: Insert engine name (default: INSERT_ENGINE or auto)
+        """
+        self.connection_factory = connection_factory
+        self.layout = layout
+        self.table = table
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.transaction_size = transaction_size
+        self.insert_engine = insert_engine
+        self.logger = logging.getLogger(__name__)
+
+    def staging_table(self, partition_number: int) -> str:
+        schema, name = self.table.split('.')
+        return f"{schema}.[{name.strip('[]')}_stage_p{partition_number}]"
+
+    def identity_base(self, connection) -> Optional[int]:
+        """
+        Highest identity value the target table has used
+        Returns:
+            The larger of MAX(identity column) and the current identity value,
+            or None when the table has no IDENTITY column
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT name, CONVERT(BIGINT, last_value) FROM sys.identity_columns
+                WHERE object_id = OBJECT_ID({sql_literal(self.table)})
+            """)
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            column, last_value = row_values(row)
+            cursor.execute(f"SELECT MAX({quote_name(column)}) FROM {self.table}")
+            highest = scalar(cursor)
+        finally:
+            cursor.close()
+        return max(int(last_value or 0), int(highest or 0))
+
+    @staticmethod
+    def identity_starts(groups: Dict[int, List[Dict[str, Any]]], base: int) -> Dict[int, int]:
+        """
+        First identity value of each partition: the partitions take consecutive
+        ranges after base, sized by their planned rows, so staging heaps never
+        number the same id twice
+        Args:
+            groups: Shards by partition (PartitionLayout.shards_by_partition)
+            base: Highest identity value already used by the target table
+        Returns:
+            Partition number -> first identity value
+        """
+        starts = {}
+        offset = base
+        for number, shards in sorted(groups.items()):
+            starts[number] = offset + 1
+            offset += sum(shard['count'] for shard in shards)
+        return starts
+
+    def reseed_identity(self) -> None:
+        """Move the target's current identity past the ids switched in (SWITCH does not advance it)"""
+        connection = self.connection_factory()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"DBCC CHECKIDENT ({sql_literal(self.table)}, RESEED) WITH NO_INFOMSGS")
+            connection.commit()
+            cursor.close()
+        finally:
+            connection.close()
+
+    def load(self, progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Load every partition of the plan
+        Args:
+            progress_callback: Called as progress_callback(rows, label) after each commit
+        Returns:
+            Summary with success flag, rows, seconds, records/second, per-partition
+            statistics and errors
+        """
+        groups = self.layout.shards_by_partition()
+        connection = self.connection_factory()
+        try:
+            base = self.identity_base(connection)
+        finally:
+            connection.close()
+        first_ids = self.identity_starts(groups, base) if base is not None else {}
+
+        start = time.perf_counter()
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [
+                pool.submit(self.load_partition, number, shards, progress_callback, first_ids.get(number))
+                for number, shards in sorted(groups.items())
+            ]
+            for future in as_completed(futures):
+                results.append(future.result())
+        if first_ids and any(stats['switched'] for stats in results):
+            self.reseed_identity()
+        seconds = time.perf_counter() - start
+
+        results.sort(key=lambda stats: stats['partition'])
+        rows = sum(stats['rows'] for stats in results if stats['switched'])
+        errors = [f"partition {stats['partition']}: {stats['error']}" for stats in results if stats['error']]
+        self.logger.info(f"Switch load: {rows} rows into {len(results)} partitions in {seconds:.1f}s, {len(errors)} error(s)")
+        return {
+            'success': not errors,
+            'partitions': results,
+            'rows': rows,
+            'seconds': seconds,
+            'records_per_second': rows / seconds if seconds > 0 else 0.0,
+            'errors': errors
+        }
+
+    def load_partition(self, partition_number: int, shards: List[Dict[str, Any]],
+                       progress_callback: Optional[ProgressCallback] = None,
+                       first_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fill, index, constrain and switch in one partition on its own connection
+        Args:
+            partition_number: Target partition
+            shards: Plan shards of the partition
+            progress_callback: Called as progress_callback(rows, label) after each commit
+            first_id: Identity value of the partition's first row (see identity_starts;
+                default: the staging heap keeps the seed of the target table)
+        Returns:
+            Partition statistics (rows, seconds per phase, switched flag, error)
+        """
+        stage = self.staging_table(partition_number)
+        label = f"{self.layout.column}={self.layout.value_of(shards[0]['registry'], shards[0]['start_year'])}"
+        stats = {'partition': partition_number, 'label': label, 'rows': 0, 'first_id': first_id, 'load_seconds': 0.0,
+                 'index_seconds': 0.0, 'switch_seconds': 0.0, 'switched': False, 'error': None}
+        connection = None
+        engine = None
+        try:
+            connection = self.connection_factory()
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT COALESCE(SUM(row_count), 0) FROM sys.dm_db_partition_stats
+                WHERE object_id = OBJECT_ID({sql_literal(self.table)}) AND index_id IN (0, 1)
+                  AND partition_number = {int(partition_number)}
+            """)
+            existing = int(scalar(cursor) or 0)
+            cursor.close()
+            if existing:
+                raise RuntimeError(f"target partition holds {existing} rows; reset it before loading")
+
+            filegroup = partition_filegroup(connection, self.table, partition_number)
+            create_table_copy(connection, self.table, stage, filegroup, identity_seed=first_id)
+
+            started = time.perf_counter()
+            engine = create_insert_engine(self.insert_engine, connection, table=stage)
+            pending = 0
+            for shard in shards:
+                for batch in self.layout.generator.generate_shard_batches(shard, self.batch_size):
+                    rows = batch_rows(batch)
+                    engine.insert_rows(connection, rows)
+                    stats['rows'] += len(rows)
+                    pending += len(rows)
+                    if pending >= self.transaction_size:
+                        engine.flush(connection)
+                        connection.commit()
+                        if progress_callback:
+                            progress_callback(pending, label)
+                        pending = 0
+            engine.flush(connection)
+            connection.commit()
+            if progress_callback and pending:
+                progress_callback(pending, label)
+            stats['load_seconds'] = time.perf_counter() - started
+
+            # Indexes are built once over the loaded heap, then the CHECK proves the partition range
+            started = time.perf_counter()
+            copy_indexes(connection, self.table, stage, filegroup)
+            cursor = connection.cursor()
+            cursor.execute(
+                f"ALTER TABLE {stage} WITH CHECK ADD CONSTRAINT [CK_{stage.split('.')[-1].strip('[]')}_range] "
+                f"CHECK ({self.layout.check_constraint(partition_number)})"
+            )
+            connection.commit()
+            stats['index_seconds'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            cursor.execute(f"ALTER TABLE {stage} SWITCH TO {self.table} PARTITION {int(partition_number)}")
+            cursor.execute(f"DROP TABLE {stage}")
+            connection.commit()
+            cursor.close()
+            stats['switch_seconds'] = time.perf_counter() - started
+            stats['switched'] = True
+        except Exception as e:
+            stats['error'] = str(e)
+            self.logger.error(f"Partition {partition_number} ({label}) failed: {e}")
+            if connection is not None:
+                connection.rollback()
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute(f"IF OBJECT_ID({sql_literal(stage)}, N'U') IS NOT NULL DROP TABLE {stage}")
+                    connection.commit()
+                    cursor.close()
+                except Exception as cleanup_error:
+                    self.logger.warning(f"Could not drop {stage}: {cleanup_error}")
+        finally:
+            if engine is not None:
+                engine.close()
+            if connection is not None:
+                connection.close()
+        return stats
+
+
+def main():
+    """Create, maintain and load the partitioned grouping table"""
+    from database_connection import DatabaseConnection
+    from parallel_insertion import DriverConnectionFactory
+
+    parser = argparse.ArgumentParser(description="Partitioned grouping table tooling")
+    parser.add_argument("action", choices=['plan', 'create', 'maintain', 'stats', 'load'],
+                        help="plan shows the layout; create partitions the table; maintain adds new "
+                             "boundaries; stats shows rows per partition; load runs a staging-and-switch load")
+    parser.add_argument("--scheme", choices=PARTITION_SCHEMES, default=os.getenv('PARTITION_SCHEME', 'registry'))
+    parser.add_argument("--filegroup", default='PRIMARY')
+    parser.add_argument("--workers", type=int, default=4, help="Partitions loaded at once (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--engine", default=None, help="Insert engine for staging heaps (default: INSERT_ENGINE or auto)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    layout = PartitionLayout(scheme=args.scheme)
+    if args.action == 'plan':
+        groups = layout.shards_by_partition()
+        print(f"📐 {args.scheme}: {len(layout.boundaries())} boundaries, {len(groups)} loaded partitions")
+        for number, shards in sorted(groups.items()):
+            rows = sum(shard['count'] for shard in shards)
+            print(f"   • partition {number}: {len(shards)} shard(s), {rows:,} rows "
+                  f"[{layout.check_constraint(number)}]")
+        return True
+
+    db = DatabaseConnection()
+    test_results = db.test_connection()
+    driver = test_results['preferred']
+    connection = db.get_connection(driver) if driver else None
+    if not connection:
+        print("❌ Could not establish database connection")
+        return False
+
+    try:
+        partitioner = GroupingPartitioner(connection, layout, filegroup=args.filegroup)
+        if args.action == 'create':
+            partitioner.create()
+            changed = partitioner.partition_table()
+            print("✅ Table partitioned" if changed else "ℹ️  Table already uses this partition scheme")
+        elif args.action == 'maintain':
+            added = partitioner.maintain()
+            print(f"✅ Added {len(added)} boundaries: {', '.join(added)}" if added else "✅ Boundaries up to date")
+        elif args.action == 'stats':
+            for number, count in sorted(partitioner.partition_rows().items()):
+                print(f"   • partition {number}: {count:,} rows")
+        else:
+            loader = StagingSwitchLoader(
+                DriverConnectionFactory(driver), layout, workers=args.workers,
+                batch_size=args.batch_size, insert_engine=args.engine
+            )
+            summary = loader.load()
+            for stats in summary['partitions']:
+                status = "✅" if stats['switched'] else f"❌ {stats['error']}"
+                print(f"   • partition {stats['partition']} ({stats['label']}): {stats['rows']:,} rows, "
+                      f"load {stats['load_seconds']:.1f}s, index {stats['index_seconds']:.1f}s, "
+                      f"switch {stats['switch_seconds']:.2f}s {status}")
+            print(f"{'✅' if summary['success'] else '❌'} {summary['rows']:,} rows at "
+                  f"{summary['records_per_second']:.0f} records/second")
+            return summary['success']
+        return True
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""
+Grouping Reset
+Removes generated rows from the grouping table without one huge logged
+DELETE: TRUNCATE when only generated rows exist, a partition switch-out when
+the table is partitioned by source, otherwise chunked DELETE TOP (n) paced by
+transaction log usage
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+from typing import Any, Callable, Dict, Optional
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from adaptive_batching import log_usage_percent
+from index_maintenance import IndexMaintenance
+from sql_helpers import GROUPING_TABLE, quote_name, row_values, scalar, sql_literal
+
+RESET_STRATEGIES = ('auto', 'truncate', 'switch', 'chunked')
+DEFAULT_TABLE = GROUPING_TABLE
+DEFAULT_SOURCE = 'Generated'
+
+ResetProgress = Callable[[int, int], None]
+
+logger = logging.getLogger(__name__)
+
+
+def _split_name(table: str):
+    schema, name = table.split('.') if '.' in table else ('[dbo]', table)
+    return schema.strip('[]'), name.strip('[]')
+
+
+def read_partitioning(connection, table: str) -> Optional[Dict[str, Any]]:
+    """
+    Partition function, scheme and column of a table
+    Args:
+        connection: SQL Server connection
+        table: Table name
+    Returns:
+        Dictionary with function, scheme and column, or None when not partitioned
+    """
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        SELECT pf.name, ps.name, c.name
+        FROM sys.indexes i
+        INNER JOIN sys.partition_schemes ps ON ps.data_space_id = i.data_space_id
+        INNER JOIN sys.partition_functions pf ON pf.function_id = ps.function_id
+        INNER JOIN sys.index_columns ic
+            ON ic.object_id = i.object_id AND ic.index_id = i.index_id AND ic.partition_ordinal = 1
+        INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+        WHERE i.object_id = OBJECT_ID({sql_literal(table)}) AND i.index_id IN (0, 1)
+    """)
+    row = cursor.fetchone()
+    cursor.close()
+    if not row:
+        return None
+    function, scheme, column = row_values(row)
+    return {'function': function, 'scheme': scheme, 'column': column}
+
+
+def partition_filegroup(connection, table: str, partition_number: int) -> str:
+    """Filegroup hosting one partition of a partitioned table (PRIMARY when not partitioned)."""
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        SELECT TOP (1) fg.name
+        FROM sys.indexes i
+        INNER JOIN sys.partition_schemes ps ON ps.data_space_id = i.data_space_id
+        INNER JOIN sys.destination_data_spaces dds
+            ON dds.partition_scheme_id = ps.data_space_id AND dds.destination_id = {int(partition_number)}
+        INNER JOIN sys.filegroups fg ON fg.data_space_id = dds.data_space_id
+        WHERE i.object_id = OBJECT_ID({sql_literal(table)}) AND i.index_id IN (0, 1)
+    """)
+    filegroup = scalar(cursor)
+    cursor.close()
+    return filegroup or 'PRIMARY'
+
+
+def create_table_copy(
+    connection, table: str, target: str, filegroup: str = 'PRIMARY', identity_seed: Optional[int] = None
+) -> None:
+    """
+    Create an empty heap with the columns of a table
+    Computed columns are re-created with their definitions, which SWITCH
+    requires; like on the source they must be the trailing columns.
+    Args:
+        connection: SQL Server connection
+        table: Source table
+        target: New table name (dropped first if it exists)
+        filegroup: Filegroup for the copy
+        identity_seed: Identity value of the first row inserted into the copy
+            (default: the copy keeps the seed of the source's IDENTITY column)
+    """
+    cursor = connection.cursor()
+    cursor.execute(f"IF OBJECT_ID({sql_literal(target)}, N'U') IS NOT NULL DROP TABLE {target}")
+    cursor.execute(f"SELECT TOP (0) * INTO {target} ON {quote_name(filegroup)} FROM {table}")
+    cursor.execute(f"""
+        SELECT name, definition, is_persisted FROM sys.computed_columns
+        WHERE object_id = OBJECT_ID({sql_literal(table)})
+        ORDER BY column_id
+    """)
+    for name, definition, is_persisted in [row_values(row) for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {target} DROP COLUMN {quote_name(name)}")
+        cursor.execute(
+            f"ALTER TABLE {target} ADD {quote_name(name)} AS {definition}{' PERSISTED' if is_persisted else ''}"
+        )
+    if identity_seed is not None:
+        # The copy has never held a row, so its first insert takes the reseed value itself
+        cursor.execute(f"DBCC CHECKIDENT ({sql_literal(target)}, RESEED, {int(identity_seed)}) WITH NO_INFOMSGS")
+    connection.commit()
+    cursor.close()
+
+
+def copy_indexes(connection, table: str, target: str, filegroup: str = 'PRIMARY', nonclustered: bool = True) -> None:
+    """
+    Build the clustered index (and optionally the nonclustered indexes) of a table on a copy
+    Args:
+        connection: SQL Server connection
+        table: Source table
+        target: Copy created by create_table_copy
+        filegroup: Filegroup for the indexes
+        nonclustered: Also copy the nonclustered indexes
+    """
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        SELECT i.name, i.is_unique, c.name, ic.is_descending_key
+        FROM sys.indexes i
+        INNER JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+        INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+        WHERE i.object_id = OBJECT_ID({sql_literal(table)}) AND i.index_id = 1 AND ic.key_ordinal > 0
+        ORDER BY ic.key_ordinal
+    """)
+    clustered = [row_values(row) for row in cursor.fetchall()]
+    if clustered:
+        name, is_unique = clustered[0][0], clustered[0][1]
+        keys = ', '.join(
+            f"{quote_name(column)} {'DESC' if descending else 'ASC'}" for _, _, column, descending in clustered)
+        cursor.execute(
+            f"CREATE {'UNIQUE ' if is_unique else ''}CLUSTERED INDEX {quote_name(name)} ON {target} ({keys}) "
+            f"ON {quote_name(filegroup)}"
+        )
+
+    if nonclustered:
+        source_indexes = IndexMaintenance(connection, table=table)
+        target_indexes = IndexMaintenance(connection, table=target)
+        for index in source_indexes.read_indexes():
+            cursor.execute(f"{target_indexes.create_statement(index)} ON {quote_name(filegroup)}")
+    connection.commit()
+    cursor.close()
+
+
+def create_switch_table(connection, table: str, target: str, partition_number: Optional[int] = None,
+                        with_indexes: bool = True) -> None:
+    """
+    Create an empty table with the structure SWITCH needs to match
+    Args:
+        connection: SQL Server connection
+        table: Source table
+        target: New table name (dropped first if it exists)
+        partition_number: Partition whose filegroup hosts the copy (default: PRIMARY)
+        with_indexes: Also copy the nonclustered indexes
+    """
+    filegroup = partition_filegroup(connection, table, partition_number) if partition_number is not None else 'PRIMARY'
+    create_table_copy(connection, table, target, filegroup)
+    copy_indexes(connection, table, target, filegroup, with_indexes)
+
+
+class GroupingReset:
+    """Remove generated rows with the cheapest applicable strategy"""
+
+    def __init__(
+        self,
+        connection,
+        table: str = DEFAULT_TABLE,
+        source: str = DEFAULT_SOURCE,
+        chunk_size: Optional[int] = None,
+        log_used_limit: Optional[float] = None,
+        max_log_wait: float = 300.0,
+        progress_callback: Optional[ResetProgress] = None
+    ):
+        """
+        Args:
+            connection: SQL Server connection
+            table: Grouping table
+            source: created_by value of the rows to remove
+            chunk_size: Rows per DELETE TOP (n) transaction (default: RESET_CHUNK_SIZE or 50000)
+            log_used_limit: Pause chunked deletes above this log usage percentage
+                (default: LOG_USED_LIMIT or 70)
+            max_log_wait: Longest pause in seconds waiting for log space
+            progress_callback: Called as progress_callback(deleted, total) after each chunk
+        """
+        self.connection = connection
+        self.table = table
+        self.source = source
+        self.chunk_size = chunk_size or int(os.getenv('RESET_CHUNK_SIZE', 50000))
+        self.log_used_limit = log_used_limit or float(os.getenv('LOG_USED_LIMIT', 70))
+        self.max_log_wait = max_log_wait
+        self.progress_callback = progress_callback
+        schema, name = _split_name(table)
+        self.switch_table = f"[{schema}].[{name}_switch_out]"
+        self.logger = logging.getLogger(__name__)
+
+    def _query(self, sql: str):
+        cursor = self.connection.cursor()
+        cursor.execute(sql)
+        value = scalar(cursor)
+        cursor.close()
+        return value
+
+    def _source_filter(self) -> str:
+        return f"[created_by] = {sql_literal(self.source)}"
+
+    def total_rows(self) -> int:
+        """Row count from partition metadata (no scan)"""
+        return int(self._query(f"""
+            SELECT COALESCE(SUM(row_count), 0) FROM sys.dm_db_partition_stats
+            WHERE object_id = OBJECT_ID({sql_literal(self.table)}) AND index_id IN (0, 1)
+        """) or 0)
+
+    def source_rows(self) -> int:
+        return int(self._query(f"SELECT COUNT_BIG(*) FROM {self.table} WHERE {self._source_filter()}") or 0)
+
+    def has_other_rows(self) -> bool:
+        return self._query(
+            f"SELECT TOP (1) 1 FROM {self.table} WHERE NOT ({self._source_filter()}) OR [created_by] IS NULL"
+        ) is not None
+
+    def is_referenced(self) -> bool:
+        """Foreign keys pointing at the table block TRUNCATE"""
+        return self._query(
+            f"SELECT TOP (1) 1 FROM sys.foreign_keys WHERE referenced_object_id = OBJECT_ID({sql_literal(self.table)})"
+        ) is not None
+
+    def source_partition(self) -> Optional[int]:
+        """
+        Partition holding exactly the source rows, when partitioned by created_by
+        Returns:
+            Partition number, or None when no partition can be switched out
+        """
+        partitioning = read_partitioning(self.connection, self.table)
+        if not partitioning or partitioning['column'].lower() != 'created_by':
+            return None
+        partition = self._query(f"SELECT $PARTITION.{quote_name(partitioning['function'])}({sql_literal(self.source)})")
+        if partition is None:
+            return None
+        # RANGE partitions can hold neighbouring values too
+        other = self._query(f"""
+            SELECT TOP (1) 1 FROM {self.table}
+            WHERE $PARTITION.{quote_name(partitioning['function'])}([created_by]) = {int(partition)}
+              AND NOT ({self._source_filter()})
+        """)
+        return None if other is not None else int(partition)
+
+    def choose_strategy(self) -> Dict[str, Any]:
+        """
+        Pick the cheapest strategy for the current table
+        Returns:
+            Dictionary with strategy, reason and the partition number for 'switch'
+        """
+        if not self.has_other_rows() and not self.is_referenced():
+            return {'strategy': 'truncate', 'reason': f"only {self.source} rows present"}
+        partition = self.source_partition()
+        if partition is not None:
+            return {'strategy': 'switch', 'reason': f"partition {partition} holds only {self.source} rows",
+                    'partition': partition}
+        return {'strategy': 'chunked', 'reason': "table holds other rows and is not partitioned by source"}
+
+    def reset(self, strategy: str = 'auto') -> Dict[str, Any]:
+        """
+        Remove the source rows
+        Args:
+            strategy: 'auto', 'truncate', 'switch' or 'chunked'
+        Returns:
+            Summary with strategy, reason, deleted rows, chunks and seconds
+        """
+        if strategy not in RESET_STRATEGIES:
+            raise ValueError(f"Unknown reset strategy: {strategy}")
+        start = time.perf_counter()
+        if strategy == 'auto':
+            choice = self.choose_strategy()
+        elif strategy == 'switch':
+            choice = {'strategy': 'switch', 'reason': 'requested', 'partition': self.source_partition()}
+            if choice['partition'] is None:
+                raise ValueError(f"{self.table} has no partition holding only {self.source} rows")
+        elif strategy == 'truncate':
+            # TRUNCATE empties the whole table, so it is only safe with nothing but source rows
+            if self.has_other_rows():
+                choice = {'strategy': 'chunked', 'reason': f"truncate requested, but {self.table} holds other rows"}
+            elif self.is_referenced():
+                choice = {'strategy': 'chunked', 'reason': f"truncate requested, but foreign keys reference {self.table}"}
+            else:
+                choice = {'strategy': 'truncate', 'reason': 'requested'}
+            if choice['strategy'] == 'chunked':
+                self.logger.warning(f"Not truncating {self.table}: {choice['reason']}")
+        else:
+            choice = {'strategy': strategy, 'reason': 'requested'}
+        self.logger.info(f"Reset of {self.table}: {choice['strategy']} ({choice['reason']})")
+
+        summary = {**choice, 'deleted': 0, 'chunks': 0}
+        try:
+            if choice['strategy'] == 'truncate':
+                summary['deleted'] = self.truncate()
+            elif choice['strategy'] == 'switch':
+                summary['deleted'] = self.switch_out(choice['partition'])
+        except Exception as e:
+            # Metadata-only paths need ALTER permission and matching structures; chunked always works
+            self.connection.rollback()
+            self.logger.warning(f"{choice['strategy']} reset failed, falling back to chunked delete: {e}")
+            summary.update({'strategy': 'chunked', 'reason': f"{choice['strategy']} failed: {e}"})
+        if summary['strategy'] == 'chunked':
+            summary['deleted'], summary['chunks'] = self.chunked_delete()
+
+        summary['seconds'] = time.perf_counter() - start
+        self.logger.info(f"Reset removed {summary['deleted']} rows in {summary['seconds']:.1f}s ({summary['strategy']})")
+        return summary
+
+    def truncate(self) -> int:
+        """TRUNCATE the whole table (reset() only calls this when no other rows exist)"""
+        rows = self.total_rows()
+        cursor = self.connection.cursor()
+        cursor.execute(f"TRUNCATE TABLE {self.table}")
+        self.connection.commit()
+        cursor.close()
+        self._report(rows, rows)
+        return rows
+
+    def switch_out(self, partition: int) -> int:
+        """Switch one partition into an empty copy of the table and drop the copy"""
+        rows = int(self._query(f"""
+            SELECT COALESCE(SUM(row_count), 0) FROM sys.dm_db_partition_stats
+            WHERE object_id = OBJECT_ID({sql_literal(self.table)}) AND index_id IN (0, 1)
+              AND partition_number = {int(partition)}
+        """) or 0)
+        create_switch_table(self.connection, self.table, self.switch_table, partition)
+        cursor = self.connection.cursor()
+        cursor.execute(f"ALTER TABLE {self.table} SWITCH PARTITION {int(partition)} TO {self.switch_table}")
+        cursor.execute(f"DROP TABLE {self.switch_table}")
+        self.connection.commit()
+        cursor.close()
+        self._report(rows, rows)
+        return rows
+
+    def chunked_delete(self) -> tuple:
+        """
+        DELETE TOP (n) in separate transactions, pausing while the log is full
+        Returns:
+            Tuple of (deleted rows, chunks)
+        """
+        total = self.source_rows()
+        deleted = 0
+        chunks = 0
+        chunk_size = self.chunk_size
+        while True:
+            cursor = self.connection.cursor()
+            cursor.execute(f"DELETE TOP ({int(chunk_size)}) FROM {self.table} WHERE {self._source_filter()}")
+            count = cursor.rowcount
+            self.connection.commit()
+            cursor.close()
+            if count <= 0:
+                break
+            deleted += count
+            chunks += 1
+            self._report(deleted, total)
+            if count < chunk_size:
+                break
+            chunk_size = self._pace(chunk_size)
+        return deleted, chunks
+
+    def _pace(self, chunk_size: int) -> int:
+        """Wait for log space when usage is over the limit; halve the chunk while it is."""
+        used = log_usage_percent(self.connection)
+        if used is None or used < self.log_used_limit:
+            if used is not None and chunk_size < self.chunk_size and used < self.log_used_limit / 2:
+                return min(self.chunk_size, chunk_size * 2)
+            return chunk_size
+
+        chunk_size = max(1000, chunk_size // 2)
+        self.logger.info(f"Log {used:.0f}% used, pausing deletes (chunk size now {chunk_size})")
+        waited = 0.0
+        pause = 1.0
+        while used is not None and used >= self.log_used_limit and waited < self.max_log_wait:
+            if self._query("SELECT recovery_model_desc FROM sys.databases WHERE name = DB_NAME()") == 'SIMPLE':
+                # Lets SIMPLE recovery truncate the inactive log; FULL waits for log backups
+                cursor = self.connection.cursor()
+                cursor.execute("CHECKPOINT")
+                cursor.close()
+            time.sleep(pause)
+            waited += pause
+            pause = min(pause * 2, 30.0)
+            used = log_usage_percent(self.connection)
+        return chunk_size
+
+    def _report(self, deleted: int, total: int) -> None:
+        if self.progress_callback:
+            self.progress_callback(deleted, total)
+
+
+def print_reset_progress(deleted: int, total: int) -> None:
+    """Progress callback printing a one-line counter"""
+    percent = (deleted / total * 100) if total else 100.0
+    print(f"\r🧹 Deleted {deleted:,}/{total:,} ({percent:.1f}%)", end="", flush=True)
+
+
+def main():
+    """Reset generated grouping rows from the command line"""
+    from database_connection import DatabaseConnection
+
+    parser = argparse.ArgumentParser(description="Remove generated rows from the grouping table")
+    parser.add_argument("--strategy", choices=RESET_STRATEGIES, default='auto',
+                        help="Reset strategy (default: %(default)s picks the cheapest)")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="created_by value to remove (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Rows per chunked DELETE")
+    parser.add_argument("--dry-run", action="store_true", help="Only show the strategy that would be used")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = DatabaseConnection()
+    connection = db.get_connection('pyodbc') or db.get_connection('pymssql')
+    if not connection:
+        print("❌ Could not establish database connection")
+        return False
+
+    try:
+        reset = GroupingReset(connection, source=args.source, chunk_size=args.chunk_size,
+                              progress_callback=print_reset_progress)
+        if args.dry_run:
+            choice = reset.choose_strategy()
+            print(f"Strategy: {choice['strategy']} ({choice['reason']})")
+            return True
+        summary = reset.reset(args.strategy)
+        print()
+        print(f"✅ Removed {summary['deleted']:,} rows using {summary['strategy']} in {summary['seconds']:.1f}s")
+        return True
+    except Exception as e:
+        print(f"❌ Reset failed: {e}")
+        return False
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
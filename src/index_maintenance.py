@@ -0,0 +1,280 @@
+"""
+Index Maintenance for Bulk Loads
+Disables the non-unique nonclustered indexes of a table for the duration of a
+load and rebuilds them afterwards, keeping a state file so indexes left
+disabled by a crashed run can be restored
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from sql_helpers import GROUPING_TABLE, quote_name, row_values, sql_literal
+
+DEFAULT_TABLE = GROUPING_TABLE
+DEFAULT_STATE_PATH = os.getenv('INDEX_STATE_PATH', 'checkpoints/disabled_indexes.json')
+
+logger = logging.getLogger(__name__)
+
+
+class IndexMaintenance:
+    """Disable and rebuild the nonclustered indexes of one table"""
+
+    def __init__(
+        self,
+        connection,
+        table: str = DEFAULT_TABLE,
+        state_path: str = DEFAULT_STATE_PATH,
+        maxdop: Optional[int] = None,
+        parallel_rebuilds: int = 1,
+        connection_factory: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Args:
+            connection: Connection used to read metadata, disable and rebuild
+            table: Target table
+            state_path: JSON file recording the indexes this tool disabled
+            maxdop: MAXDOP option for each rebuild (default: server setting)
+            parallel_rebuilds: Indexes rebuilt at once, each on its own connection
+            connection_factory: Opens the extra connections for parallel rebuilds
+        """
+        self.connection = connection
+        self.table = table
+        self.state_path = Path(state_path)
+        self.maxdop = maxdop
+        self.parallel_rebuilds = max(1, parallel_rebuilds)
+        self.connection_factory = connection_factory
+        self.disabled: List[Dict[str, Any]] = []
+        self.logger = logging.getLogger(__name__)
+
+    def read_indexes(self) -> List[Dict[str, Any]]:
+        """
+        Read nonclustered index definitions (constraint-backing indexes excluded)
+        Returns:
+            One dictionary per index with name, flags, columns and CREATE statement
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            SELECT i.index_id, i.name, i.is_unique, i.is_disabled, i.filter_definition
+            FROM sys.indexes i
+            WHERE i.object_id = OBJECT_ID({sql_literal(self.table)})
+              AND i.type = 2
+              AND i.is_primary_key = 0
+              AND i.is_unique_constraint = 0
+            ORDER BY i.index_id
+        """)
+        indexes = {}
+        for row in cursor.fetchall():
+            index_id, name, is_unique, is_disabled, filter_definition = row_values(row)
+            indexes[index_id] = {
+                'name': name,
+                'is_unique': bool(is_unique),
+                'is_disabled': bool(is_disabled),
+                'filter_definition': filter_definition,
+                'key_columns': [],
+                'included_columns': []
+            }
+
+        cursor.execute(f"""
+            SELECT ic.index_id, c.name, ic.is_descending_key, ic.is_included_column
+            FROM sys.index_columns ic
+            INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+            WHERE ic.object_id = OBJECT_ID({sql_literal(self.table)})
+            ORDER BY ic.index_id, ic.key_ordinal, ic.index_column_id
+        """)
+        for row in cursor.fetchall():
+            index_id, column, is_descending, is_included = row_values(row)
+            if index_id not in indexes:
+                continue
+            if is_included:
+                indexes[index_id]['included_columns'].append(column)
+            else:
+                indexes[index_id]['key_columns'].append(f"{quote_name(column)} {'DESC' if is_descending else 'ASC'}")
+        cursor.close()
+
+        for index in indexes.values():
+            index['definition'] = self.create_statement(index)
+        return list(indexes.values())
+
+    def create_statement(self, index: Dict[str, Any]) -> str:
+        """CREATE INDEX statement reproducing a recorded definition."""
+        statement = (
+            f"CREATE {'UNIQUE ' if index['is_unique'] else ''}NONCLUSTERED INDEX {quote_name(index['name'])} "
+            f"ON {self.table} ({', '.join(index['key_columns'])})"
+        )
+        if index['included_columns']:
+            statement += f" INCLUDE ({', '.join(quote_name(column) for column in index['included_columns'])})"
+        if index['filter_definition']:
+            statement += f" WHERE {index['filter_definition']}"
+        return statement
+
+    def _load_state(self) -> Dict[str, Any]:
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def _save_state(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'table': self.table,
+                'disabled_at': datetime.now().isoformat(),
+                'indexes': self.disabled
+            }, handle, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Indexes recorded as disabled in the state file (e.g. by a crashed run)."""
+        state = self._load_state()
+        return state.get('indexes', []) if state.get('table') == self.table else []
+
+    def disable(self) -> List[Dict[str, Any]]:
+        """
+        Record and disable every enabled non-unique nonclustered index
+        Unique indexes stay enabled: a disabled one no longer rejects duplicate
+        keys, and the rebuild would fail after the load instead.
+        Indexes already listed in the state file (left by a crashed run) are
+        kept on the list so the next rebuild restores them too.
+        Returns:
+            Definitions of the indexes that will be rebuilt
+        """
+        carried = self.pending()
+        carried_names = {index['name'] for index in carried}
+
+        indexes = self.read_indexes()
+        to_disable = [
+            index for index in indexes
+            if not index['is_disabled'] and not index['is_unique'] and index['name'] not in carried_names
+        ]
+        self.disabled = carried + to_disable
+        # Record before disabling, so a crash at any later point can be recovered
+        self._save_state()
+
+        cursor = self.connection.cursor()
+        for index in to_disable:
+            cursor.execute(f"ALTER INDEX {quote_name(index['name'])} ON {self.table} DISABLE")
+            self.logger.info(f"Disabled index {index['name']} on {self.table}")
+        self.connection.commit()
+        cursor.close()
+        return self.disabled
+
+    def _rebuild_sql(self, name: str) -> str:
+        sql = f"ALTER INDEX {quote_name(name)} ON {self.table} REBUILD"
+        if self.maxdop:
+            sql += f" WITH (MAXDOP = {int(self.maxdop)})"
+        return sql
+
+    def _rebuild_one(self, name: str, connection=None) -> Dict[str, Any]:
+        own_connection = connection is None
+        connection = connection or self.connection_factory()
+        start = time.perf_counter()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(self._rebuild_sql(name))
+            connection.commit()
+            cursor.close()
+            result = {'name': name, 'seconds': time.perf_counter() - start, 'error': None}
+            self.logger.info(f"Rebuilt index {name} in {result['seconds']:.1f}s")
+        except Exception as e:
+            connection.rollback()
+            result = {'name': name, 'seconds': time.perf_counter() - start, 'error': str(e)}
+            self.logger.error(f"Rebuild of index {name} failed: {e}")
+        finally:
+            if own_connection:
+                connection.close()
+        return result
+
+    def rebuild(self) -> List[Dict[str, Any]]:
+        """
+        Rebuild every index recorded by disable() (or by a crashed run)
+        The state file is removed only when all rebuilds succeed.
+        Returns:
+            One result per index with name, seconds and error
+        """
+        if not self.disabled:
+            self.disabled = self.pending()
+        names = [index['name'] for index in self.disabled]
+        if not names:
+            return []
+
+        if self.parallel_rebuilds > 1 and self.connection_factory and len(names) > 1:
+            with ThreadPoolExecutor(max_workers=self.parallel_rebuilds) as pool:
+                results = list(pool.map(self._rebuild_one, names))
+        else:
+            results = [self._rebuild_one(name, self.connection) for name in names]
+
+        failed = {result['name'] for result in results if result['error']}
+        self.disabled = [index for index in self.disabled if index['name'] in failed]
+        if self.disabled:
+            self._save_state()
+        elif self.state_path.exists():
+            self.state_path.unlink()
+        return results
+
+    def __enter__(self):
+        self.disable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        results = self.rebuild()
+        failed = [result['name'] for result in results if result['error']]
+        if failed and exc_type is None:
+            raise RuntimeError(f"Index rebuild failed for: {', '.join(failed)} (see {self.state_path})")
+        return False
+
+
+def main():
+    """Inspect or recover nonclustered indexes of the grouping table"""
+    from database_connection import DatabaseConnection
+
+    parser = argparse.ArgumentParser(description="Disable / rebuild nonclustered indexes around bulk loads")
+    parser.add_argument("action", choices=['status', 'disable', 'rebuild'],
+                        help="status lists indexes, rebuild restores indexes recorded in the state file")
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    parser.add_argument("--state-path", default=DEFAULT_STATE_PATH)
+    parser.add_argument("--maxdop", type=int, default=None, help="MAXDOP for each rebuild")
+    parser.add_argument("--parallel", type=int, default=1, help="Indexes rebuilt at once (default: %(default)s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = DatabaseConnection()
+    connection = db.get_connection('pyodbc') or db.get_connection('pymssql')
+    if not connection:
+        print("❌ Could not establish database connection")
+        return False
+
+    factory = (lambda: db.get_connection('pyodbc') or db.get_connection('pymssql'))
+    maintenance = IndexMaintenance(
+        connection, args.table, args.state_path, args.maxdop, args.parallel, factory
+    )
+    try:
+        if args.action == 'status':
+            for index in maintenance.read_indexes():
+                status = "DISABLED" if index['is_disabled'] else "enabled"
+                print(f"   • {index['name']} ({status}): {index['definition']}")
+        elif args.action == 'disable':
+            for index in maintenance.disable():
+                print(f"   ⏸️  {index['name']}")
+        else:
+            for result in maintenance.rebuild():
+                marker = "❌" if result['error'] else "✅"
+                print(f"   {marker} {result['name']} ({result['seconds']:.1f}s) {result['error'] or ''}")
+        return True
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
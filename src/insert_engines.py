@@ -0,0 +1,361 @@
+"""
+Grouping Insert Engines
+Interchangeable ways of loading packed grouping rows into SQL Server:
+parameter-array executemany, pymssql bulk copy (BCP protocol), BULK INSERT
+from a staged character file and table-valued parameters
+"""
+
+import os
+import sys
+import csv
+import time
+import uuid
+import argparse
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from file_number_generator import GROUPING_COLUMNS, GROUPING_INSERT_SQL, grouping_insert_sql
+from tvp_insertion import GROUPING_TVP, insert_tvp, supports_tvp
+from file_number_exporter import (
+    BCP_FIELD_TERMINATOR, BCP_ROW_TERMINATOR, WRITE_BUFFER_SIZE,
+    build_grouping_bulk_insert_sql, write_bcp_format_file
+)
+
+INSERT_ENGINES = ('auto', 'executemany', 'bulk_copy', 'bulk_insert', 'tvp')
+GROUPING_TABLE = '[dbo].[grouping]'
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutemanyInsertEngine:
+    """cursor.executemany with pyodbc fast_executemany when the driver supports it"""
+
+    name = 'executemany'
+
+    def __init__(self, insert_sql: str = GROUPING_INSERT_SQL, fast_executemany: bool = True):
+        self.insert_sql = insert_sql
+        self.fast_executemany = fast_executemany
+        self.fast_executemany_enabled = False
+        self._warned = False
+
+    def insert_rows(self, connection, rows: Sequence[tuple]) -> int:
+        cursor = connection.cursor()
+        if self.fast_executemany and hasattr(cursor, 'fast_executemany'):
+            cursor.fast_executemany = True
+            self.fast_executemany_enabled = True
+        elif self.fast_executemany and not self._warned:
+            logger.info("fast_executemany not available for this driver; using standard executemany")
+            self._warned = True
+        cursor.executemany(self.insert_sql, rows)
+        cursor.close()
+        return len(rows)
+
+    def flush(self, connection) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+class BulkCopyInsertEngine:
+    """
+    pymssql Connection.bulk_copy (TDS bulk load)
+
+    Rows are sent with the BCP protocol as they arrive. Each bulk_copy call
+    finishes its own bulk load, so rows are durable before the next commit.
+    """
+
+    name = 'bulk_copy'
+
+    def __init__(self, table: str = GROUPING_TABLE, columns: Sequence[str] = GROUPING_COLUMNS,
+                 tablock: bool = True, batch_size: int = 10000):
+        self.table = table
+        self.columns = tuple(columns)
+        self.tablock = tablock
+        self.batch_size = batch_size
+        self._column_ids: Optional[List[int]] = None
+
+    @staticmethod
+    def supports(connection) -> bool:
+        return hasattr(connection, 'bulk_copy')
+
+    def column_ids(self, connection) -> List[int]:
+        """Target table ordinals of the inserted columns (bulk_copy addresses columns by position)."""
+        if self._column_ids is None:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT [name], [column_id] FROM sys.columns WHERE [object_id] = OBJECT_ID(%s)",
+                (self.table,)
+            )
+            ordinals = {}
+            for row in cursor.fetchall():
+                name, column_id = (row['name'], row['column_id']) if isinstance(row, dict) else row
+                ordinals[name.lower()] = column_id
+            cursor.close()
+            missing = [column for column in self.columns if column.lower() not in ordinals]
+            if missing:
+                raise RuntimeError(f"{self.table} has no column(s): {', '.join(missing)}")
+            self._column_ids = [ordinals[column.lower()] for column in self.columns]
+        return self._column_ids
+
+    def insert_rows(self, connection, rows: Sequence[tuple]) -> int:
+        if not rows:
+            return 0
+        connection.bulk_copy(
+            self.table,
+            rows,
+            column_ids=self.column_ids(connection),
+            batch_size=self.batch_size,
+            tablock=self.tablock
+        )
+        return len(rows)
+
+    def flush(self, connection) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+class BulkInsertFileEngine:
+    """
+    Stage rows in a tab-delimited file and load them with BULK INSERT ... WITH (TABLOCK)
+
+    Rows accumulate in the staging file until flush(), which runs before
+    every commit. SQL Server reads the file itself, so staging_dir must be
+    reachable by the server; server_dir is the same directory as the
+    server sees it (e.g. a UNC share) when the paths differ.
+    """
+
+    name = 'bulk_insert'
+
+    def __init__(self, staging_dir: str, server_dir: Optional[str] = None, batch_size: Optional[int] = None,
+                 table: str = GROUPING_TABLE):
+        self.staging_dir = Path(staging_dir)
+        self.table = table
+        self.server_dir = server_dir
+        self.batch_size = batch_size
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        self.format_path = write_bcp_format_file(self.staging_dir / 'grouping_format.fmt')
+        self._path: Optional[Path] = None
+        self._handle = None
+        self._writer = None
+        self._pending = 0
+        self._last_timestamp = None
+        self._last_timestamp_text = None
+
+    def _server_path(self, path: Path) -> str:
+        if self.server_dir:
+            separator = '\\' if '\\' in self.server_dir else '/'
+            return self.server_dir.rstrip('\\/') + separator + path.name
+        return str(path.resolve())
+
+    def _format_row(self, row: tuple) -> tuple:
+        values = list(row)
+        for index, value in enumerate(values):
+            if isinstance(value, datetime):
+                if value != self._last_timestamp:
+                    self._last_timestamp = value
+                    self._last_timestamp_text = value.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+                values[index] = self._last_timestamp_text
+        return values
+
+    def insert_rows(self, connection, rows: Sequence[tuple]) -> int:
+        if self._handle is None:
+            self._path = self.staging_dir / f"grouping_{os.getpid()}_{uuid.uuid4().hex}.dat"
+            self._handle = open(self._path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE)
+            self._writer = csv.writer(
+                self._handle,
+                delimiter=BCP_FIELD_TERMINATOR,
+                lineterminator=BCP_ROW_TERMINATOR,
+                quoting=csv.QUOTE_NONE,
+                escapechar=None
+            )
+        self._writer.writerows(self._format_row(row) for row in rows)
+        self._pending += len(rows)
+        return len(rows)
+
+    def flush(self, connection) -> int:
+        """Load the staged file into the table on this connection (not committed)."""
+        if self._handle is None:
+            return 0
+        self._handle.close()
+        self._handle = None
+        path, loaded = self._path, self._pending
+        self._pending = 0
+        try:
+            if loaded:
+                cursor = connection.cursor()
+                cursor.execute(build_grouping_bulk_insert_sql(
+                    self._server_path(path), self._server_path(self.format_path), self.batch_size, self.table
+                ))
+                cursor.close()
+        finally:
+            path.unlink(missing_ok=True)
+        return loaded
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+            self._path.unlink(missing_ok=True)
+            self._pending = 0
+
+
+class TvpInsertEngine:
+    """One table-valued parameter and one set-based INSERT per batch (pyodbc only)"""
+
+    name = 'tvp'
+
+    def __init__(self, target=GROUPING_TVP):
+        self.target = target
+
+    def insert_rows(self, connection, rows: Sequence[tuple]) -> int:
+        return insert_tvp(connection, self.target, rows)
+
+    def flush(self, connection) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+def create_insert_engine(
+    name: Optional[str] = None,
+    connection=None,
+    insert_sql: str = GROUPING_INSERT_SQL,
+    fast_executemany: bool = True,
+    table: str = GROUPING_TABLE
+):
+    """
+    Create an insert engine
+    Args:
+        name: 'auto', 'executemany', 'bulk_copy', 'bulk_insert' or 'tvp' (default: INSERT_ENGINE env, then 'auto').
+            'auto' uses bulk_copy on pymssql connections, bulk_insert when
+            BULK_STAGING_DIR is set, and executemany otherwise.
+        connection: Connection the engine will be used with (needed for 'auto')
+        insert_sql: INSERT statement for the executemany engine
+        fast_executemany: Enable pyodbc fast_executemany in the executemany engine
+        table: Target table with the grouping columns (e.g. a staging copy)
+    Returns:
+        Insert engine instance
+    """
+    name = (name or os.getenv('INSERT_ENGINE', 'auto')).lower()
+    if table != GROUPING_TABLE and insert_sql == GROUPING_INSERT_SQL:
+        insert_sql = grouping_insert_sql(table)
+    staging_dir = os.getenv('BULK_STAGING_DIR')
+
+    if name == 'auto':
+        if connection is not None and BulkCopyInsertEngine.supports(connection):
+            name = 'bulk_copy'
+        elif staging_dir:
+            name = 'bulk_insert'
+        else:
+            name = 'executemany'
+
+    if name == 'executemany':
+        return ExecutemanyInsertEngine(insert_sql, fast_executemany)
+    if name == 'bulk_copy':
+        if connection is not None and not BulkCopyInsertEngine.supports(connection):
+            raise ValueError("bulk_copy needs a pymssql connection")
+        return BulkCopyInsertEngine(table)
+    if name == 'bulk_insert':
+        if not staging_dir:
+            raise ValueError("bulk_insert needs BULK_STAGING_DIR (a directory SQL Server can read)")
+        return BulkInsertFileEngine(staging_dir, os.getenv('BULK_STAGING_SERVER_DIR'), table=table)
+    if name == 'tvp':
+        if connection is not None and not supports_tvp(connection):
+            raise ValueError("tvp needs a pyodbc connection")
+        if table != GROUPING_TABLE:
+            raise ValueError("tvp only loads [dbo].[grouping]")
+        return TvpInsertEngine()
+    raise ValueError(f"Unknown insert engine: {name}")
+
+
+def compare_engines(engines: Sequence[str], rows: int = 100000, batch_size: int = 10000) -> List[Dict[str, Any]]:
+    """
+    Load the same generated rows with each engine and report throughput
+    Rows are inserted with created_by 'EngineBenchmark' and deleted afterwards.
+    Args:
+        engines: Engine names to compare
+        rows: Rows loaded per engine
+        batch_size: Rows per insert_rows call
+    Returns:
+        One result dictionary per engine
+    """
+    from database_connection import DatabaseConnection
+    from file_number_generator import FileNumberGenerator, batch_rows
+
+    created_by_index = GROUPING_COLUMNS.index('created_by')
+    db = DatabaseConnection()
+    results = []
+    for engine_name in engines:
+        for driver in ('pyodbc', 'pymssql'):
+            connection = db.get_connection(driver)
+            if not connection:
+                continue
+            try:
+                engine = create_insert_engine(engine_name, connection)
+            except ValueError as e:
+                connection.close()
+                results.append({'engine': engine_name, 'driver': driver, 'error': str(e)})
+                continue
+
+            loaded = 0
+            start = time.perf_counter()
+            try:
+                for batch in FileNumberGenerator().generate_batches(batch_size):
+                    packed = batch_rows(batch)[:rows - loaded]
+                    packed = [row[:created_by_index] + ('EngineBenchmark',) + row[created_by_index + 1:] for row in packed]
+                    loaded += engine.insert_rows(connection, packed)
+                    if loaded >= rows:
+                        break
+                engine.flush(connection)
+                connection.commit()
+                seconds = time.perf_counter() - start
+                results.append({
+                    'engine': engine.name,
+                    'driver': driver,
+                    'rows': loaded,
+                    'seconds': seconds,
+                    'records_per_second': loaded / seconds if seconds > 0 else 0.0
+                })
+            except Exception as e:
+                connection.rollback()
+                results.append({'engine': engine_name, 'driver': driver, 'error': str(e)})
+            finally:
+                engine.close()
+                cursor = connection.cursor()
+                cursor.execute("DELETE FROM [dbo].[grouping] WHERE [created_by] = 'EngineBenchmark'")
+                connection.commit()
+                cursor.close()
+                connection.close()
+    return results
+
+
+def main():
+    """Compare insert engines against the configured database"""
+    parser = argparse.ArgumentParser(description="Compare grouping insert engines side by side")
+    parser.add_argument("--engines", nargs="+", choices=INSERT_ENGINES[1:], default=list(INSERT_ENGINES[1:]))
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per engine (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per insert call (default: %(default)s)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print("🏁 INSERT ENGINE COMPARISON")
+    print("=" * 60)
+    for result in compare_engines(args.engines, args.rows, args.batch_size):
+        if 'error' in result:
+            print(f"   ❌ {result['engine']:<12} {result['driver']:<8} {result['error']}")
+        else:
+            print(f"   ✅ {result['engine']:<12} {result['driver']:<8} {result['rows']:,} rows in "
+                  f"{result['seconds']:.2f}s ({result['records_per_second']:,.0f} records/second)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""
+Load Validation
+Checks a finished load in one pass: every aggregate comes from a single grouped
+scan of [dbo].[grouping] (or from an indexed view kept by SQL Server) and is
+compared against the exact figures the generator configuration implies, slice
+by slice (registry, category, year)
+"""
+
+import os
+import sys
+import argparse
+import logging
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from file_number_generator import FileNumberGenerator
+from grouping_reset import DEFAULT_SOURCE
+from sql_helpers import GROUPING_TABLE, row_values, sql_literal
+
+VALIDATION_SOURCES = ('scan', 'view')
+VALIDATION_DIALECTS = ('sqlserver', 'sqlite')
+DEFAULT_VIEW = '[dbo].[grouping_slice_stats]'
+
+# Category of a generated file number: awaiting_fileno without its '-year-serial' tail
+CATEGORY_SQL = (
+    "LEFT([awaiting_fileno], LEN([awaiting_fileno]) - "
+    "CHARINDEX('-', REVERSE([awaiting_fileno]), CHARINDEX('-', REVERSE([awaiting_fileno])) + 1))"
+)
+# SQLite has no REVERSE or CHARINDEX: drop the serial digits, then the '-year-' before them
+SQLITE_CATEGORY_SQL = (
+    "SUBSTR([awaiting_fileno], 1, LENGTH(RTRIM([awaiting_fileno], '0123456789')) - 6)"
+)
+
+# Aggregates compared per slice; the indexed view can only keep COUNT_BIG and SUM
+SCAN_FIELDS = (
+    'rows', 'number_min', 'number_max', 'number_sum',
+    'group_min', 'group_max', 'registry_batch_min', 'registry_batch_max'
+)
+VIEW_FIELDS = ('rows', 'number_sum')
+
+# Diff kinds, in the order they are reported
+DIFF_KINDS = ('missing', 'unexpected', 'landuse', 'count', 'numbers', 'groups')
+FIELD_KINDS = {
+    'rows': 'count',
+    'number_min': 'numbers', 'number_max': 'numbers', 'number_sum': 'numbers',
+    'group_min': 'groups', 'group_max': 'groups',
+    'registry_batch_min': 'groups', 'registry_batch_max': 'groups'
+}
+
+SliceKey = Tuple[str, str, int]
+
+logger = logging.getLogger(__name__)
+
+
+def _slice_figures(
+    landuse: str, count: int, global_offset: int, registry_offset: int, per_group: int
+) -> Dict[str, Any]:
+    first, last = global_offset + 1, global_offset + count
+    return {
+        'landuse': landuse,
+        'rows': count,
+        'number_min': first,
+        'number_max': last,
+        'number_sum': count * (first + last) // 2,
+        'group_min': (first - 1) // per_group + 1,
+        'group_max': (last - 1) // per_group + 1,
+        'registry_batch_min': registry_offset // per_group + 1,
+        'registry_batch_max': (registry_offset + count - 1) // per_group + 1
+    }
+
+
+def expected_slices(
+    generator: FileNumberGenerator,
+    extend_to: Optional[int] = None
+) -> Dict[SliceKey, Dict[str, Any]]:
+    """
+    Exact per-slice figures of a full generation run, computed from the offset table
+    Args:
+        generator: Generator whose configuration was loaded
+        extend_to: Last year appended by incremental extensions (--extend-to), if any
+    Returns:
+        Dictionary keyed by (registry, category, year)
+    """
+    per_group = generator.records_per_group
+    expected = {}
+    global_offset = 0
+    registry_offsets: Dict[str, int] = {}
+    for info in generator.slices():
+        count = info['count']
+        global_offset = info['global_offset'] + count
+        registry_offsets[info['registry']] = info['registry_offset'] + count
+        if count <= 0:
+            continue
+        expected[(info['registry'], info['category'], info['year'])] = _slice_figures(
+            info['landuse'], count, info['global_offset'], info['registry_offset'], per_group)
+
+    # Extensions continue both counters from the end of the full run
+    if extend_to is not None and extend_to > generator.end_year:
+        for registry, category, year, count in generator.iter_extension_slices(extend_to):
+            registry_offset = registry_offsets.get(registry, 0)
+            expected[(registry, category, year)] = _slice_figures(
+                generator.extract_land_use(category), count, global_offset, registry_offset, per_group)
+            global_offset += count
+            registry_offsets[registry] = registry_offset + count
+    return expected
+
+
+def expected_from_records(records: Iterable[Dict[str, Any]]) -> Dict[SliceKey, Dict[str, Any]]:
+    """
+    Per-slice figures of an explicit record list (sample and test loads)
+    Args:
+        records: Generated records with category, registry, year and counters
+    Returns:
+        Dictionary keyed by (registry, category, year)
+    """
+    expected: Dict[SliceKey, Dict[str, Any]] = {}
+    for record in records:
+        key = (str(record['registry']), record['category'], int(record['year']))
+        entry = expected.get(key)
+        number, group, batch = int(record['number']), int(record['group']), int(record['registry_batch_no'])
+        if entry is None:
+            expected[key] = {
+                'landuse': record['landuse'], 'rows': 1,
+                'number_min': number, 'number_max': number, 'number_sum': number,
+                'group_min': group, 'group_max': group,
+                'registry_batch_min': batch, 'registry_batch_max': batch
+            }
+            continue
+        entry['rows'] += 1
+        entry['number_min'] = min(entry['number_min'], number)
+        entry['number_max'] = max(entry['number_max'], number)
+        entry['number_sum'] += number
+        entry['group_min'] = min(entry['group_min'], group)
+        entry['group_max'] = max(entry['group_max'], group)
+        entry['registry_batch_min'] = min(entry['registry_batch_min'], batch)
+        entry['registry_batch_max'] = max(entry['registry_batch_max'], batch)
+    return expected
+
+
+def _rollup(slices: Dict[SliceKey, Dict[str, Any]], key_of) -> Dict[Any, int]:
+    totals: Dict[Any, int] = {}
+    for key, entry in slices.items():
+        name = key_of(key, entry)
+        totals[name] = totals.get(name, 0) + entry['rows']
+    return totals
+
+
+def _side_by_side(expected: Dict[Any, int], actual: Dict[Any, int]) -> Dict[Any, Tuple[int, int]]:
+    names = sorted(set(expected) | set(actual), key=str)
+    return {name: (expected.get(name, 0), actual.get(name, 0)) for name in names}
+
+
+def _range(slices: Dict[SliceKey, Dict[str, Any]], low: str, high: str) -> Tuple[Any, Any]:
+    lows = [entry[low] for entry in slices.values() if entry.get(low) is not None]
+    highs = [entry[high] for entry in slices.values() if entry.get(high) is not None]
+    return (min(lows) if lows else None, max(highs) if highs else None)
+
+
+def _year_range(slices: Dict[SliceKey, Dict[str, Any]]) -> Tuple[Any, Any]:
+    years = [key[2] for key in slices if key[2] is not None]
+    return (min(years) if years else None, max(years) if years else None)
+
+
+def compare(
+    expected: Dict[SliceKey, Dict[str, Any]],
+    actual: Dict[SliceKey, Dict[str, Any]],
+    fields: Iterable[str] = SCAN_FIELDS
+) -> Dict[str, Any]:
+    """
+    Diff actual slice aggregates against the expected figures
+    Args:
+        expected: Expected slices (expected_slices or expected_from_records)
+        actual: Slices read from the database
+        fields: Aggregates the actual source provides
+    Returns:
+        Report with totals, slice diffs and per registry/category/land use/year rollups
+    """
+    fields = tuple(fields)
+    diffs: List[Dict[str, Any]] = []
+
+    for key in sorted(set(expected) | set(actual), key=lambda k: (k[0], k[2] or 0, k[1])):
+        registry, category, year = key
+        want, have = expected.get(key), actual.get(key)
+        if have is None:
+            diffs.append({'registry': registry, 'category': category, 'year': year, 'kind': 'missing',
+                          'field': 'rows', 'expected': want['rows'], 'actual': 0})
+            continue
+        if want is None:
+            diffs.append({'registry': registry, 'category': category, 'year': year, 'kind': 'unexpected',
+                          'field': 'rows', 'expected': 0, 'actual': have['rows']})
+            continue
+        if have.get('landuse') != want['landuse']:
+            diffs.append({'registry': registry, 'category': category, 'year': year, 'kind': 'landuse',
+                          'field': 'landuse', 'expected': want['landuse'], 'actual': have.get('landuse')})
+        for field in fields:
+            if have.get(field) != want[field]:
+                diffs.append({'registry': registry, 'category': category, 'year': year,
+                              'kind': FIELD_KINDS[field], 'field': field,
+                              'expected': want[field], 'actual': have.get(field)})
+
+    diffs.sort(key=lambda diff: DIFF_KINDS.index(diff['kind']))
+    expected_total = sum(entry['rows'] for entry in expected.values())
+    actual_total = sum(entry['rows'] for entry in actual.values())
+    report = {
+        'match': not diffs,
+        'expected_total': expected_total,
+        'actual_total': actual_total,
+        'slices': {'expected': len(expected), 'actual': len(actual)},
+        'fields': fields,
+        'diffs': diffs,
+        'registry': _side_by_side(
+            _rollup(expected, lambda k, e: k[0]), _rollup(actual, lambda k, e: k[0])),
+        'category': _side_by_side(
+            _rollup(expected, lambda k, e: k[1]), _rollup(actual, lambda k, e: k[1])),
+        'landuse': _side_by_side(
+            _rollup(expected, lambda k, e: e['landuse']), _rollup(actual, lambda k, e: e.get('landuse'))),
+        'year': _side_by_side(
+            _rollup(expected, lambda k, e: k[2]), _rollup(actual, lambda k, e: k[2])),
+        'year_range': {
+            'expected': _year_range(expected),
+            'actual': _year_range(actual)
+        }
+    }
+    if 'group_min' in fields:
+        report['group_range'] = {
+            'expected': _range(expected, 'group_min', 'group_max'),
+            'actual': _range(actual, 'group_min', 'group_max')
+        }
+    return report
+
+
+class LoadValidator:
+    """Single-pass validation of generated rows in the grouping table"""
+
+    def __init__(
+        self,
+        connection,
+        generator: Optional[FileNumberGenerator] = None,
+        table: str = GROUPING_TABLE,
+        source: str = 'scan',
+        view: str = DEFAULT_VIEW,
+        created_by: str = DEFAULT_SOURCE,
+        dialect: str = 'sqlserver'
+    ):
+        """
+        Args:
+            connection: Open database connection (pyodbc, pymssql or sqlite3)
+            generator: Generator whose configuration was loaded
+            table: Table the rows were loaded into
+            source: 'scan' (one grouped scan) or 'view' (indexed view, counts and sums only)
+            view: Indexed view read by the 'view' source
+            created_by: created_by value of the generated rows
+            dialect: 'sqlserver', or 'sqlite' for a database written by the sqlite sink
+        """
+        if source not in VALIDATION_SOURCES:
+            raise ValueError(f"Unknown validation source: {source}")
+        if dialect not in VALIDATION_DIALECTS:
+            raise ValueError(f"Unknown validation dialect: {dialect}")
+        if dialect == 'sqlite' and source == 'view':
+            raise ValueError("The indexed view source needs SQL Server")
+        self.connection = connection
+        self.generator = generator or FileNumberGenerator()
+        self.table = table
+        self.source = source
+        self.view = view
+        self.created_by = created_by
+        self.dialect = dialect
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return VIEW_FIELDS if self.source == 'view' else SCAN_FIELDS
+
+    def scan_sql(self) -> str:
+        """Every per-slice aggregate in one grouped scan"""
+        created_by = sql_literal(self.created_by)
+        if self.dialect == 'sqlite':
+            # No N'' literals or COUNT_BIG in SQLite
+            category_sql, count_sql, created_by = SQLITE_CATEGORY_SQL, 'COUNT(*)', created_by[1:]
+        else:
+            category_sql, count_sql = CATEGORY_SQL, 'COUNT_BIG(*)'
+        return f"""
+            SELECT [registry], {category_sql} AS [category], [year], [landuse],
+                   {count_sql},
+                   MIN(CAST([number] AS BIGINT)), MAX(CAST([number] AS BIGINT)), SUM(CAST([number] AS BIGINT)),
+                   MIN([group]), MAX([group]),
+                   MIN([registry_batch_no]), MAX([registry_batch_no])
+            FROM {self.table}
+            WHERE [created_by] = {created_by}
+            GROUP BY [registry], {category_sql}, [year], [landuse]
+        """
+
+    def view_sql(self) -> str:
+        return f"""
+            SELECT [registry], [category], [year], [landuse], [rows], [number_sum]
+            FROM {self.view} WITH (NOEXPAND)
+        """
+
+    def create_view_sql(self) -> List[str]:
+        """
+        Schema-bound view with a unique clustered index; SQL Server keeps its
+        counts and sums current as rows are loaded
+        """
+        index_name = '[IX_' + self.view.split('.')[-1].strip('[]') + ']'
+        return [
+            f"""
+            CREATE VIEW {self.view} WITH SCHEMABINDING AS
+            SELECT [registry], {CATEGORY_SQL} AS [category], [year], [landuse],
+                   COUNT_BIG(*) AS [rows],
+                   SUM(ISNULL(CAST([number] AS BIGINT), 0)) AS [number_sum]
+            FROM {self.table}
+            WHERE [created_by] = {sql_literal(self.created_by)}
+            GROUP BY [registry], {CATEGORY_SQL}, [year], [landuse]
+            """,
+            f"CREATE UNIQUE CLUSTERED INDEX {index_name} ON {self.view} ([registry], [category], [year], [landuse])"
+        ]
+
+    def create_indexed_view(self) -> None:
+        """Create the indexed view read by the 'view' source"""
+        cursor = self.connection.cursor()
+        try:
+            for statement in self.create_view_sql():
+                cursor.execute(statement)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+        self.logger.info(f"Created indexed view {self.view}")
+
+    def actual_slices(self) -> Dict[SliceKey, Dict[str, Any]]:
+        """
+        Read the per-slice aggregates from the database
+        Returns:
+            Dictionary keyed by (registry, category, year)
+        """
+        fields = self.fields
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(self.view_sql() if self.source == 'view' else self.scan_sql())
+            rows = [row_values(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+        actual: Dict[SliceKey, Dict[str, Any]] = {}
+        for registry, category, year, landuse, *aggregates in rows:
+            key = (str(registry), category, int(year) if year is not None else None)
+            values = dict(zip(fields, (int(value) if value is not None else None for value in aggregates)))
+            entry = actual.get(key)
+            if entry is None:
+                actual[key] = {'landuse': landuse, **values}
+                continue
+            # A slice stored under several land uses is merged and reported as a land use diff
+            landuses = set(str(entry['landuse']).split(' / ')) | {str(landuse)}
+            entry['landuse'] = ' / '.join(sorted(landuses))
+            entry['rows'] += values['rows']
+            entry['number_sum'] += values['number_sum']
+            for field in fields:
+                if field.endswith('_min'):
+                    entry[field] = min(entry[field], values[field])
+                elif field.endswith('_max'):
+                    entry[field] = max(entry[field], values[field])
+        return actual
+
+    def validate(self, expected: Optional[Dict[SliceKey, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Compare the loaded rows with the expected figures
+        Args:
+            expected: Expected slices (default: the full run of the generator configuration,
+                extended up to the last year found after END_YEAR)
+        Returns:
+            Report from compare(), plus the source used
+        """
+        actual = self.actual_slices()
+        if expected is None:
+            last_year = max((key[2] for key in actual if key[2] is not None), default=None)
+            expected = expected_slices(self.generator, last_year)
+        report = compare(expected, actual, self.fields)
+        report['source'] = self.source
+        self.logger.info(
+            f"Validation ({self.source}): {report['actual_total']} of {report['expected_total']} rows, "
+            f"{len(report['diffs'])} differences"
+        )
+        return report
+
+
+def print_report(report: Dict[str, Any], limit: int = 20) -> None:
+    """
+    Print a validation report
+    Args:
+        report: Report from LoadValidator.validate or compare
+        limit: Slice differences printed at most
+    """
+    marker = '✅' if report['match'] else '❌'
+    print(f"{marker} Total Records: {report['actual_total']:,} (Expected: {report['expected_total']:,})")
+    years = report['year_range']
+    print(f"   Year Range: {years['actual'][0]} - {years['actual'][1]} (Expected: {years['expected'][0]} - {years['expected'][1]})")
+    if 'group_range' in report:
+        groups = report['group_range']
+        print(f"   Groups: {groups['actual'][0]} - {groups['actual'][1]} (Expected: {groups['expected'][0]} - {groups['expected'][1]})")
+
+    for title, name in (('Registry', 'registry'), ('Land Use', 'landuse'), ('Category', 'category')):
+        print(f"\n📊 {title} Distribution:")
+        for value, (expected, actual) in report[name].items():
+            flag = '✅' if expected == actual else '❌'
+            print(f"   {flag} {value}: {actual:,} (Expected: {expected:,})")
+
+    off_years = {year: counts for year, counts in report['year'].items() if counts[0] != counts[1]}
+    if off_years:
+        print(f"\n📊 Years with differences:")
+        for year, (expected, actual) in off_years.items():
+            print(f"   ❌ {year}: {actual:,} (Expected: {expected:,})")
+
+    if report['diffs']:
+        print(f"\n❌ {len(report['diffs']):,} slice differences:")
+        for diff in report['diffs'][:limit]:
+            print(
+                f"   • Registry {diff['registry']} {diff['category']} {diff['year']}: "
+                f"{diff['kind']} {diff['field']} expected {diff['expected']}, got {diff['actual']}"
+            )
+        if len(report['diffs']) > limit:
+            print(f"   ... {len(report['diffs']) - limit:,} more")
+    else:
+        print(f"\n✅ All {report['slices']['expected']:,} slices match ({', '.join(report['fields'])})")
+
+
+def main():
+    """Validate the generated rows in the grouping table against the generator configuration"""
+    parser = argparse.ArgumentParser(description="Single-pass validation of generated grouping rows")
+    parser.add_argument("--view", action="store_true",
+                        help=f"Read counts and sums from the indexed view {DEFAULT_VIEW} instead of scanning")
+    parser.add_argument("--create-view", action="store_true",
+                        help="Create the indexed view before validating")
+    parser.add_argument("--limit", type=int, default=20,
+                        help="Slice differences printed at most (default: %(default)s)")
+    parser.add_argument("--sqlite", metavar="PATH", default=None,
+                        help="Validate a database written by the sqlite sink instead of SQL Server")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        connection = sqlite3.connect(args.sqlite)
+        try:
+            print("🔍 VALIDATING GENERATED ROWS...")
+            report = LoadValidator(connection, table='[grouping]', dialect='sqlite').validate()
+            print_report(report, args.limit)
+            return report['match']
+        finally:
+            connection.close()
+
+    from database_connection import DatabaseConnection
+
+    db = DatabaseConnection()
+    driver = db.test_connection()['preferred']
+    connection = db.get_connection(driver) if driver else None
+    if not connection:
+        print("❌ Could not connect to database")
+        return False
+
+    try:
+        validator = LoadValidator(connection, source='view' if args.view else 'scan')
+        if args.create_view:
+            validator.create_indexed_view()
+            print(f"✅ Created indexed view {validator.view}")
+        print("🔍 VALIDATING GENERATED ROWS...")
+        report = validator.validate()
+        print_report(report, args.limit)
+        return report['match']
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Load Metrics
+Counters, gauges and latency histograms shared by the loaders and importers,
+exposed in the Prometheus text format over HTTP (METRICS_PORT) and/or as a
+file rewritten every few seconds (METRICS_FILE)
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return '\n'.join(lines)
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonic total (rows, round trips, cache hits)"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Current value (queue depth, batch size, planned rows)"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Latency distribution in cumulative buckets, plus count and sum"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels) -> Dict[str, object]:
+        """Count, sum and cumulative bucket counts for one label set"""
+        state = self._values.get(self._key(labels)) or {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        cumulative, running = [], 0
+        for count in state['counts']:
+            running += count
+            cumulative.append(running)
+        return {'count': state['count'], 'sum': state['sum'], 'buckets': dict(zip(self.buckets, cumulative))}
+
+    def _samples(self, key, value):
+        labels = self._labels(key)
+        lines, running = [], 0
+        for bound, count in zip(self.buckets, value['counts']):
+            running += count
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {running}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {value['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics, created on first use and rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, labelnames: Sequence[str], **options) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **options)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return ''.join(metric.render() + '\n' for metric in metrics)
+
+    def write(self, path: str) -> None:
+        """Replace a metrics file atomically, so readers never see half a scrape"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + '.tmp')
+        temporary.write_text(self.render(), encoding='utf-8')
+        os.replace(temporary, path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class LoadMetrics:
+    """
+    The metric set of one loader or importer
+
+    Every component records into the same metric names with its own
+    `component` label, so long loads and importer runs can be graphed
+    and compared side by side.
+    """
+
+    def __init__(self, component: str, registry: MetricsRegistry = REGISTRY):
+        """
+        Args:
+            component: Label value, e.g. 'production' or 'csv_import'
+            registry: Registry the metrics live in
+        """
+        self.component = component
+        self.registry = registry
+        self.rows_generated = registry.counter(
+            'filenogen_rows_generated_total', 'Rows produced by the file number generator', ('component',))
+        self.rows_inserted = registry.counter(
+            'filenogen_rows_inserted_total', 'Rows written to the target', ('component',))
+        self.rows_updated = registry.counter(
+            'filenogen_rows_updated_total', 'Existing rows updated', ('component',))
+        self.rows_planned = registry.gauge(
+            'filenogen_rows_planned', 'Rows the current run expects to write', ('component',))
+        self.batch_seconds = registry.histogram(
+            'filenogen_batch_seconds', 'Time to send one batch', ('component',))
+        self.commit_seconds = registry.histogram(
+            'filenogen_commit_seconds', 'Time to commit one transaction', ('component',))
+        self.batch_size = registry.gauge(
+            'filenogen_batch_size_rows', 'Current rows per batch', ('component',))
+        self.queue_depth = registry.gauge(
+            'filenogen_queue_depth', 'Items waiting in a pipeline queue', ('component', 'queue'))
+        self.cache_requests = registry.counter(
+            'filenogen_cache_requests_total', 'Cache lookups by result (hit or miss)', ('component', 'cache', 'result'))
+        self.round_trips = registry.counter(
+            'filenogen_db_round_trips_total', 'Statements sent to the database', ('component', 'operation'))
+
+    def generated(self, rows: int) -> None:
+        self.rows_generated.inc(rows, component=self.component)
+
+    def inserted(self, rows: int) -> None:
+        self.rows_inserted.inc(rows, component=self.component)
+
+    def updated(self, rows: int) -> None:
+        self.rows_updated.inc(rows, component=self.component)
+
+    def planned(self, rows: int) -> None:
+        self.rows_planned.set(rows, component=self.component)
+
+    def batch(self, seconds: float, batch_size: Optional[int] = None) -> None:
+        self.batch_seconds.observe(seconds, component=self.component)
+        if batch_size is not None:
+            self.batch_size.set(batch_size, component=self.component)
+
+    def commit(self, seconds: float) -> None:
+        self.commit_seconds.observe(seconds, component=self.component)
+
+    def queue(self, name: str, depth: int) -> None:
+        self.queue_depth.set(depth, component=self.component, queue=name)
+
+    def cache(self, name: str, hit: bool, count: int = 1) -> None:
+        self.cache_requests.inc(count, component=self.component, cache=name, result='hit' if hit else 'miss')
+
+    def round_trip(self, operation: str, count: int = 1) -> None:
+        self.round_trips.inc(count, component=self.component, operation=operation)
+
+    def cache_hit_ratio(self, name: str) -> Optional[float]:
+        hits = self.cache_requests.value(component=self.component, cache=name, result='hit')
+        misses = self.cache_requests.value(component=self.component, cache=name, result='miss')
+        return hits / (hits + misses) if hits + misses else None
+
+
+class MetricsExporter:
+    """Serve a registry on /metrics and/or rewrite a metrics file periodically"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, path: Optional[str] = None,
+                 port: Optional[int] = None, interval: float = 5.0, host: str = '0.0.0.0'):
+        """
+        Args:
+            registry: Registry to expose
+            path: Metrics file (Prometheus text, e.g. for node_exporter's textfile collector)
+            port: HTTP port serving /metrics (0 picks a free port)
+            interval: Seconds between file rewrites
+            host: Address the HTTP server binds to
+        """
+        self.registry = registry
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self.host = host
+        self.server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self) -> 'MetricsExporter':
+        if self.port is not None:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ('/', '/metrics'):
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', CONTENT_TYPE)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self.port = self.server.server_address[1]
+            self._threads.append(threading.Thread(target=self.server.serve_forever, name='metrics-http', daemon=True))
+            logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+        if self.path:
+            self._threads.append(threading.Thread(target=self._write_loop, name='metrics-file', daemon=True))
+            logger.info(f"Writing metrics to {self.path} every {self.interval:g}s")
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _write_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the metrics file now (e.g. at the end of a run)"""
+        if not self.path:
+            return
+        try:
+            self.registry.write(self.path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics file {self.path}: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.flush()
+
+
+_exporter: Optional[MetricsExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def start_metrics_exporter(registry: MetricsRegistry = REGISTRY) -> Optional[MetricsExporter]:
+    """
+    Start the process-wide exporter configured by METRICS_FILE / METRICS_PORT
+    Safe to call from every entry point: the exporter is started once and
+    shared. Returns None when neither variable is set.
+    """
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            path = os.getenv('METRICS_FILE') or None
+            port = int(os.getenv('METRICS_PORT', 0)) or None
+            if not path and not port:
+                return None
+            _exporter = MetricsExporter(
+                registry, path=path, port=port, interval=float(os.getenv('METRICS_INTERVAL', 5))
+            ).start()
+        return _exporter
+
+
+def flush_metrics() -> None:
+    """Write the metrics file of the running exporter, if any"""
+    if _exporter is not None:
+        _exporter.flush()
@@ -0,0 +1,365 @@
+"""
+Parallel File Number Insertion
+Feeds generated batches to several worker connections that insert and commit
+independently, using threads (one producer, shared queue) or processes
+(one shard at a time per process)
+"""
+
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from file_number_generator import FileNumberGenerator, GROUPING_INSERT_SQL, batch_rows
+from sharded_generation import build_generator, generator_settings
+from insert_engines import create_insert_engine
+
+WORKER_MODES = ('threads', 'processes')
+
+ConnectionFactory = Callable[[], Any]
+ProgressCallback = Callable[[int, str], None]
+
+logger = logging.getLogger(__name__)
+
+
+class DriverConnectionFactory:
+    """Picklable factory opening a new SQL Server connection per worker"""
+
+    def __init__(self, driver: str):
+        self.driver = driver
+
+    def __call__(self):
+        from database_connection import DatabaseConnection
+
+        connection = DatabaseConnection().get_connection(self.driver)
+        if not connection:
+            raise ConnectionError(f"Could not open a {self.driver} connection")
+        return connection
+
+
+def _worker_stats(name: str) -> Dict[str, Any]:
+    return {'worker': name, 'rows': 0, 'batches': 0, 'commits': 0, 'seconds': 0.0, 'error': None}
+
+
+def _finish_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    stats['records_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    return stats
+
+
+def insert_shard(
+    generator: FileNumberGenerator,
+    shard: Dict[str, Any],
+    batch_size: int,
+    connection_factory: ConnectionFactory,
+    transaction_size: int = 10000,
+    insert_sql: str = GROUPING_INSERT_SQL,
+    fast_executemany: bool = True,
+    insert_engine: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Shard worker: generate one shard and insert it over its own connection
+    Args:
+        generator: Generator configured like the planning process
+        shard: Shard dictionary from FileNumberGenerator.plan_shards
+        batch_size: Rows per insert call
+        connection_factory: Picklable callable returning a new DB-API connection
+        transaction_size: Rows per commit
+        insert_sql: Parameterized INSERT statement in GROUPING_COLUMNS order
+        fast_executemany: Enable pyodbc fast_executemany when available
+        insert_engine: Insert engine name (see insert_engines.create_insert_engine)
+    Returns:
+        Worker statistics for the shard
+    """
+    stats = _worker_stats(f"pid-{os.getpid()}")
+    stats['shard_id'] = shard['shard_id']
+    start = time.perf_counter()
+    connection = None
+    engine = None
+    pending = 0
+    try:
+        connection = connection_factory()
+        engine = create_insert_engine(insert_engine, connection, insert_sql, fast_executemany)
+        for batch in generator.generate_shard_batches(shard, batch_size):
+            rows = batch_rows(batch)
+            engine.insert_rows(connection, rows)
+            stats['rows'] += len(rows)
+            stats['batches'] += 1
+            pending += len(rows)
+            if pending >= transaction_size:
+                engine.flush(connection)
+                connection.commit()
+                stats['commits'] += 1
+                pending = 0
+        engine.flush(connection)
+        connection.commit()
+        stats['commits'] += 1
+    except Exception as e:
+        stats['error'] = str(e)
+        stats['rows'] -= pending
+        if connection is not None:
+            connection.rollback()
+    finally:
+        if engine is not None:
+            engine.close()
+        if connection is not None:
+            connection.close()
+    stats['seconds'] = time.perf_counter() - start
+    return _finish_stats(stats)
+
+
+class ParallelInserter:
+    """Insert the generation plan over several independent connections"""
+
+    def __init__(
+        self,
+        connection_factory: ConnectionFactory,
+        workers: int = 4,
+        batch_size: int = 1000,
+        transaction_size: int = 10000,
+        generator: Optional[FileNumberGenerator] = None,
+        mode: str = 'threads',
+        insert_sql: str = GROUPING_INSERT_SQL,
+        fast_executemany: bool = True,
+        queue_depth: Optional[int] = None,
+        insert_engine: Optional[str] = None
+    ):
+        """
+        Args:
+            connection_factory: Callable returning a new DB-API connection; must be
+                picklable in 'processes' mode (e.g. DriverConnectionFactory)
+            workers: Number of worker threads or processes, each with its own connection
+            batch_size: Rows per insert call
+            transaction_size: Rows each worker inserts between commits
+            generator: Generator whose configuration defines the plan
+            mode: 'threads' or 'processes'
+            insert_sql: Parameterized INSERT statement in GROUPING_COLUMNS order
+            fast_executemany: Enable pyodbc fast_executemany when available
+            queue_depth: Batches buffered between producer and workers (default: 2 per worker)
+            insert_engine: Insert engine name used by every worker (default: INSERT_ENGINE or auto)
+        """
+        if mode not in WORKER_MODES:
+            raise ValueError(f"Unknown worker mode: {mode}")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.connection_factory = connection_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.transaction_size = transaction_size
+        self.generator = generator or FileNumberGenerator()
+        self.mode = mode
+        self.insert_sql = insert_sql
+        self.fast_executemany = fast_executemany
+        self.queue_depth = queue_depth or workers * 2
+        self.insert_engine = insert_engine
+        self.logger = logging.getLogger(__name__)
+
+    def run(
+        self,
+        progress_callback: Optional[ProgressCallback] = None,
+        categories: Optional[Iterable[str]] = None,
+        max_per_category: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate and insert the plan
+        Args:
+            progress_callback: Called as progress_callback(rows, category) after each batch
+            categories: Limit threads mode to these categories (default: all)
+            max_per_category: Cap records per category in threads mode
+        Returns:
+            Summary with success flag, total rows, elapsed seconds, aggregate
+            records/second, per-worker statistics and (processes mode) per-shard statistics
+        """
+        start = time.perf_counter()
+        shard_stats = None
+        if self.mode == 'processes':
+            if categories is not None or max_per_category is not None:
+                raise ValueError("categories and max_per_category are only supported in threads mode")
+            shard_stats = self._run_processes(progress_callback)
+            worker_stats = merge_worker_stats(shard_stats)
+        else:
+            worker_stats = self._run_threads(progress_callback, categories, max_per_category)
+        seconds = time.perf_counter() - start
+
+        rows = sum(stats['rows'] for stats in worker_stats)
+        errors = [stats['error'] for stats in worker_stats if stats['error']]
+        summary = {
+            'success': not errors,
+            'mode': self.mode,
+            'workers': worker_stats,
+            'shards': shard_stats,
+            'rows': rows,
+            'seconds': seconds,
+            'records_per_second': rows / seconds if seconds > 0 else 0.0,
+            'errors': errors
+        }
+        self.logger.info(
+            f"Parallel insertion ({self.mode}, {self.workers} workers): "
+            f"{rows} rows in {seconds:.1f}s, {len(errors)} worker error(s)"
+        )
+        return summary
+
+    def _run_threads(
+        self,
+        progress_callback: Optional[ProgressCallback],
+        categories: Optional[Iterable[str]],
+        max_per_category: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """One producer thread (the caller) feeding a bounded queue of packed batches."""
+        batches: "queue.Queue[Optional[Tuple[str, List[tuple]]]]" = queue.Queue(maxsize=self.queue_depth)
+        failed = threading.Event()
+        progress_lock = threading.Lock()
+        worker_stats = [_worker_stats(f"thread-{index + 1}") for index in range(self.workers)]
+
+        def report(rows: int, category: str) -> None:
+            if progress_callback:
+                with progress_lock:
+                    progress_callback(rows, category)
+
+        threads = [
+            threading.Thread(
+                target=self._thread_worker,
+                args=(batches, stats, failed, report),
+                name=stats['worker'],
+                daemon=True
+            )
+            for stats in worker_stats
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for batch in self.generator.generate_batches(
+                self.batch_size, categories=categories, max_per_category=max_per_category
+            ):
+                item = (batch['category'][0], batch_rows(batch))
+                if not self._put(batches, item, failed):
+                    break
+        finally:
+            for _ in threads:
+                self._put(batches, None, failed, give_up_on_failure=False)
+            for thread in threads:
+                thread.join()
+
+        return [_finish_stats(stats) for stats in worker_stats]
+
+    @staticmethod
+    def _put(batches: queue.Queue, item, failed: threading.Event, give_up_on_failure: bool = True) -> bool:
+        """Put with periodic failure checks so a dead worker pool cannot block the producer."""
+        while True:
+            if give_up_on_failure and failed.is_set():
+                return False
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+
+    def _thread_worker(
+        self,
+        batches: queue.Queue,
+        stats: Dict[str, Any],
+        failed: threading.Event,
+        report: ProgressCallback
+    ) -> None:
+        connection = None
+        engine = None
+        pending = 0
+        try:
+            connection = self.connection_factory()
+            engine = create_insert_engine(self.insert_engine, connection, self.insert_sql, self.fast_executemany)
+            while True:
+                item = batches.get()
+                if item is None:
+                    break
+                if failed.is_set():
+                    continue
+
+                category, rows = item
+                started = time.perf_counter()
+                engine.insert_rows(connection, rows)
+                stats['rows'] += len(rows)
+                stats['batches'] += 1
+                pending += len(rows)
+                if pending >= self.transaction_size:
+                    engine.flush(connection)
+                    connection.commit()
+                    stats['commits'] += 1
+                    pending = 0
+                stats['seconds'] += time.perf_counter() - started
+                report(len(rows), category)
+
+            # Commit what this worker inserted even if another worker failed
+            started = time.perf_counter()
+            engine.flush(connection)
+            connection.commit()
+            stats['commits'] += 1
+            stats['seconds'] += time.perf_counter() - started
+        except Exception as e:
+            failed.set()
+            stats['error'] = str(e)
+            stats['rows'] -= pending
+            self.logger.error(f"Worker {stats['worker']} failed: {e}")
+            if connection is not None:
+                connection.rollback()
+            # Keep draining so the producer's final sentinels are consumed
+            while batches.get() is not None:
+                pass
+        finally:
+            if engine is not None:
+                engine.close()
+            if connection is not None:
+                connection.close()
+
+    def _run_processes(self, progress_callback: Optional[ProgressCallback]) -> List[Dict[str, Any]]:
+        """Each process generates and inserts whole shards over its own connection."""
+        settings = generator_settings(self.generator)
+        shards = self.generator.plan_shards()
+        results = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(
+                    _run_insert_shard, settings, shard, self.batch_size, self.connection_factory,
+                    self.transaction_size, self.insert_sql, self.fast_executemany, self.insert_engine
+                ): shard
+                for shard in shards
+            }
+            for future in as_completed(futures):
+                shard = futures[future]
+                stats = future.result()
+                results.append(stats)
+                if stats['error']:
+                    self.logger.error(f"Shard {shard['shard_id']} failed: {stats['error']}")
+                if progress_callback:
+                    progress_callback(stats['rows'], shard['category'])
+
+        return sorted(results, key=lambda stats: stats['shard_id'])
+
+
+def _run_insert_shard(settings: Dict[str, Any], shard: Dict[str, Any], *args) -> Dict[str, Any]:
+    """Process-pool entry point for insert_shard."""
+    return insert_shard(build_generator(settings), shard, *args)
+
+
+def merge_worker_stats(worker_stats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Combine per-shard statistics of the same process into one entry per worker
+    Args:
+        worker_stats: Statistics returned in ParallelInserter.run()['workers']
+    Returns:
+        One statistics dictionary per worker name
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for stats in worker_stats:
+        entry = merged.setdefault(stats['worker'], _worker_stats(stats['worker']))
+        for key in ('rows', 'batches', 'commits', 'seconds'):
+            entry[key] += stats[key]
+        entry['error'] = entry['error'] or stats['error']
+    return [_finish_stats(entry) for entry in merged.values()]
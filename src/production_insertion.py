@@ -6,7 +6,9 @@ Generates and inserts all 7.2M file numbers with real-time progress tracking
 import os
 import sys
 import time
+import argparse
 import threading
+import itertools
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import logging
@@ -15,7 +17,20 @@ import logging
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
 from database_connection import DatabaseConnection
-from file_number_generator import FileNumberGenerator
+from file_number_generator import FileNumberGenerator, GROUPING_INSERT_SQL, batch_rows, record_rows
+from generation_plan import GenerationPlan
+from insert_engines import INSERT_ENGINES
+from checkpoint_store import CHECKPOINT_STORES, create_checkpoint_store, plan_signature
+from index_maintenance import IndexMaintenance
+from grouping_reset import RESET_STRATEGIES, print_reset_progress
+from adaptive_batching import create_batch_controller, log_usage_percent
+from staged_pipeline import StagedPipeline, combine_stage_stats, format_stage_stats
+from parallel_insertion import DriverConnectionFactory, ParallelInserter, WORKER_MODES
+from grouping_partitioning import PARTITION_SCHEMES, PartitionLayout, StagingSwitchLoader
+from load_validation import LoadValidator, print_report
+from sinks import SINKS, create_sink
+from sql_helpers import row_values
+from metrics import LoadMetrics, flush_metrics, start_metrics_exporter
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -33,16 +48,34 @@ class ProductionInserter:
         self.transaction_size = int(os.getenv('TRANSACTION_SIZE', 10000))
         self.records_per_group = int(os.getenv('RECORDS_PER_GROUP', 100))
         self.enable_fast_executemany = os.getenv('FAST_EXECUTEMANY', '1') not in ['0', 'false', 'False']
-        self._fast_executemany_enabled = False
-        self._fast_executemany_warned = False
-        self.insert_sql = (
-            """
-                INSERT INTO [dbo].[grouping] 
-                ([awaiting_fileno], [created_by], [number], [year], [landuse], 
-                 [created_at], [registry], [mls_fileno], [mapping], [group], [sys_batch_no], [registry_batch_no], [tracking_id])
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-        )
+        self.insert_engine_name = os.getenv('INSERT_ENGINE', 'auto')
+        self.insert_sql = GROUPING_INSERT_SQL
+        # Where rows go (SINK: sqlserver, sqlite, file or null; SINK_PATH for sqlite/file)
+        self.sink_name = os.getenv('SINK', 'sqlserver')
+        self.sink_path = os.getenv('SINK_PATH')
+        self.sink = None
+        # Batch and commit sizes used by the sequential load (adaptive with ADAPTIVE_BATCHING=1)
+        self.batch_controller = create_batch_controller(self.batch_size, self.transaction_size, name='production')
+
+        # How clear_existing_data removes generated rows (auto, truncate, switch, chunked)
+        self.reset_strategy = os.getenv('RESET_STRATEGY', 'auto')
+
+        # Overlap generation, packing and sending (STAGED_PIPELINE=0 runs them inline)
+        self.staged_pipeline = os.getenv('STAGED_PIPELINE', '1').lower() not in ('0', 'false', 'no')
+        self.pipeline_depth = int(os.getenv('PIPELINE_DEPTH', 2))
+        self.pipeline_stats = []
+
+        # Counters, gauges and latency histograms (exported with METRICS_FILE / METRICS_PORT)
+        self.metrics = LoadMetrics('production')
+        self.metrics_exporter = start_metrics_exporter()
+
+        # Index-off load: disable nonclustered indexes while loading, rebuild afterwards
+        self.index_off_load = os.getenv('INDEX_OFF_LOAD', '0').lower() in ('1', 'true', 'yes')
+        self.rebuild_maxdop = int(os.getenv('REBUILD_MAXDOP', 0)) or None
+        self.parallel_rebuilds = int(os.getenv('PARALLEL_REBUILDS', 1))
+
+        # Layout of a partitioned grouping table for switch loads (see grouping_partitioning)
+        self.partition_scheme = os.getenv('PARTITION_SCHEME', 'registry')
         
         # Progress tracking
         self.start_time = None
@@ -52,6 +85,11 @@ class ProductionInserter:
         self.categories_completed = 0
         self.total_categories = len(self.generator.categories)
         self._generator_initialized = False
+        self.plan = None
+
+        # Crash-safe resume (see checkpoint_store)
+        self.checkpoint_store = None
+        self.resumed_records = 0
         
         # Performance metrics
         self.records_per_second = 0
@@ -80,11 +118,9 @@ class ProductionInserter:
         )
     
     def calculate_total_records(self) -> int:
-        """Calculate total records to be generated"""
-        years = self.generator.end_year - self.generator.start_year + 1
-        numbers_per_year = self.generator.numbers_per_year
-        categories = len(self.generator.categories)
-        return years * numbers_per_year * categories
+        """Calculate total records to be generated from the registry-constrained plan"""
+        self.plan = GenerationPlan(self.generator)
+        return self.plan.total_records
     
     def display_progress(self):
         """Display real-time progress in a separate thread"""
@@ -96,7 +132,7 @@ class ProductionInserter:
                 
                 # Calculate rate and ETA
                 if elapsed_time.total_seconds() > 0:
-                    self.records_per_second = self.processed_records / elapsed_time.total_seconds()
+                    self.records_per_second = (self.processed_records - self.resumed_records) / elapsed_time.total_seconds()
                     if self.records_per_second > 0:
                         remaining_records = self.total_records - self.processed_records
                         eta_seconds = remaining_records / self.records_per_second
@@ -130,101 +166,168 @@ class ProductionInserter:
             self.progress_thread.join(timeout=2)
         print()  # New line after progress bar
     
-    def clear_existing_data(self, connection) -> int:
-        """Clear any existing generated data"""
+    def open_sink(self):
+        """
+        Open the sink this run writes through (see sinks.create_sink)
+        Returns:
+            Open sink, or None when it could not be opened
+        """
+        self.sink = create_sink(
+            self.sink_name,
+            self.sink_path,
+            db=self.db,
+            insert_engine=self.insert_engine_name,
+            insert_sql=self.insert_sql,
+            fast_executemany=self.enable_fast_executemany,
+            reset_strategy=self.reset_strategy,
+            progress_callback=print_reset_progress
+        )
+        if self.sink.name == 'sqlserver':
+            print("🔗 Testing database connection...")
+        if not self.sink.open():
+            print("❌ Could not establish database connection")
+            self.sink = None
+            return None
+        print(f"✅ Writing to {self.sink.describe()}")
+        return self.sink
+
+    def open_sql_server_sink(self):
+        """Open the sink for modes that load SQL Server over several connections"""
+        if self.sink_name != 'sqlserver':
+            print(f"❌ This mode loads SQL Server directly and cannot write to the {self.sink_name} sink")
+            return None
+        return self.open_sink()
+
+    def clear_existing_data(self) -> int:
+        """Clear any existing generated data (strategy chosen by GroupingReset on SQL Server)"""
         try:
-            cursor = connection.cursor()
-            cursor.execute("DELETE FROM [dbo].[grouping] WHERE [created_by] = 'Generated'")
-            deleted_count = cursor.rowcount
-            connection.commit()
-            cursor.close()
-            
-            self.logger.info(f"Cleared {deleted_count} existing records")
+            deleted_count = self.sink.clear()
+            print()
             return deleted_count
             
         except Exception as e:
             self.logger.error(f"Error clearing existing data: {e}")
-            connection.rollback()
+            self.sink.rollback()
             return 0
     
-    def insert_batch(self, connection, records: List[Dict[str, Any]]) -> bool:
+    def insert_batch(self, records: List[Dict[str, Any]]) -> bool:
         """Insert a batch of records"""
+        return self.insert_rows(record_rows(records))
+
+    def insert_rows(self, rows: List[tuple]) -> bool:
+        """Insert pre-packed row tuples in GROUPING_COLUMNS order"""
         try:
-            cursor = connection.cursor()
-            if self.enable_fast_executemany and hasattr(cursor, 'fast_executemany'):
-                cursor.fast_executemany = True
-                self._fast_executemany_enabled = True
-            elif self.enable_fast_executemany and not self._fast_executemany_warned:
-                self.logger.info("fast_executemany not available for this driver; using standard executemany")
-                self._fast_executemany_warned = True
-            
-            # Prepare batch data
-            batch_data = []
-            for record in records:
-                batch_data.append((
-                    record['awaiting_fileno'],
-                    record['created_by'],
-                    record['number'],
-                    record['year'],
-                    record['landuse'],
-                    record['created_at'],
-                    record['registry'],
-                    record['mls_fileno'],
-                    record['mapping'],
-                    record['group'],
-                    record['sys_batch_no'],
-                    record['registry_batch_no'],
-                    record['tracking_id']
-                ))
-            
-            # Execute batch insert
-            cursor.executemany(self.insert_sql, batch_data)
-            cursor.close()
+            started = time.perf_counter()
+            self.sink.insert_rows(rows)
+            self.metrics.batch(time.perf_counter() - started, self.batch_controller.batch_size)
+            self.metrics.inserted(len(rows))
+            if self.sink.connection is not None:
+                self.metrics.round_trip('insert')
             return True
             
         except Exception as e:
             self.logger.error(f"Error inserting batch: {e}")
             return False
     
-    def process_category(self, connection, category: str) -> bool:
+    def commit_with_checkpoint(self, state: Dict[str, Any]) -> None:
+        """Commit the current transaction and record the checkpoint describing it"""
+        started = time.perf_counter()
+        store = self.checkpoint_store
+        if store is None:
+            self.sink.commit()
+        elif store.transactional:
+            store.save(state, self.sink.connection)
+            self.sink.commit()
+        else:
+            self.sink.commit()
+            store.save(state)
+        self.metrics.commit(time.perf_counter() - started)
+
+    def _checkpoint_state(self, category_index: int, category: str, committed: int,
+                          category_start: Dict[str, Any], counters: Dict[str, Any] = None) -> Dict[str, Any]:
+        return {
+            'plan': plan_signature(self.generator),
+            'category_index': category_index,
+            'category': category,
+            'category_committed': committed,
+            'category_start': category_start,
+            # The pipeline generates ahead of the sender, so callers pass the counters of the last sent batch
+            'counters': counters or self.generator.counter_state()
+        }
+
+    def process_category(self, category: str, category_index: int = 0,
+                         resume_state: Dict[str, Any] = None) -> bool:
         """Process a single category with batch processing"""
         self.current_category = category
         self.logger.info(f"Starting category: {category}")
         
         try:
-            batch_records = []
             transaction_records = 0
             
             # Generate records for this category
-            reset_flag = not self._generator_initialized
-            record_iter = self.generator.generate_file_numbers([category], reset_counters=reset_flag)
+            if resume_state:
+                # Rebuild the category from its starting counters and skip the committed prefix
+                category_start = resume_state['category_start']
+                self.generator.restore_counters(category_start)
+                record_iter = self.generator.generate_file_numbers([category], reset_counters=False)
+                committed = resume_state['category_committed']
+                for _ in itertools.islice(record_iter, committed):
+                    pass
+                if self.generator.counter_state()['global_count'] != resume_state['counters']['global_count']:
+                    raise RuntimeError("Checkpoint counters do not match the regenerated category")
+                self.logger.info(f"Resuming category {category} after {committed} committed records")
+            else:
+                reset_flag = not self._generator_initialized
+                if reset_flag:
+                    self.generator.reset_counters()
+                category_start = self.generator.counter_state()
+                record_iter = self.generator.generate_file_numbers([category], reset_counters=False)
+                committed = 0
             self._generator_initialized = True
 
-            for record in record_iter:
-                batch_records.append(record)
-                
-                # Process batch when it reaches batch_size
-                if len(batch_records) >= self.batch_size:
-                    if not self.insert_batch(connection, batch_records):
+            controller = self.batch_controller
+            pipeline = StagedPipeline(
+                record_iter,
+                record_rows,
+                lambda: controller.batch_size,
+                queue_depth=self.pipeline_depth,
+                snapshot=self.generator.counter_state,
+                threaded=self.staged_pipeline
+            )
+            try:
+                for batch in pipeline:
+                    self.metrics.generated(len(batch.rows))
+                    for name, depth in pipeline.queue_depths().items():
+                        self.metrics.queue(name, depth)
+                    started = time.perf_counter()
+                    if not self.insert_rows(batch.rows):
                         return False
-                    
-                    self.processed_records += len(batch_records)
-                    transaction_records += len(batch_records)
-                    batch_records = []
-                    
-                    # Commit transaction when it reaches transaction_size
-                    if transaction_records >= self.transaction_size:
-                        connection.commit()
+                    controller.record(len(batch.rows), time.perf_counter() - started)
+
+                    self.processed_records += len(batch.rows)
+                    transaction_records += len(batch.rows)
+
+                    # Commit transaction when it reaches the current transaction size
+                    if transaction_records >= controller.transaction_size:
+                        committed += transaction_records
+                        started = time.perf_counter()
+                        self.commit_with_checkpoint(
+                            self._checkpoint_state(category_index, category, committed, category_start, batch.state)
+                        )
+                        controller.record_commit(time.perf_counter() - started)
+                        if controller.adaptive and self.sink.connection is not None:
+                            controller.check_log(log_usage_percent(self.sink.connection))
                         transaction_records = 0
+            finally:
+                pipeline.close()
+                stats = pipeline.stats()
+                self.pipeline_stats.append(stats)
+                self.logger.info(f"Pipeline {category}: {format_stage_stats(stats)}")
             
-            # Process remaining records in final batch
-            if batch_records:
-                if not self.insert_batch(connection, batch_records):
-                    return False
-                self.processed_records += len(batch_records)
-            
-            # Final commit for this category
-            connection.commit()
+            # Final commit for this category; the checkpoint points at the next category
+            self.commit_with_checkpoint(
+                self._checkpoint_state(category_index + 1, None, 0, self.generator.counter_state())
+            )
             self.categories_completed += 1
             
             self.logger.info(f"Completed category: {category}")
@@ -232,16 +335,97 @@ class ProductionInserter:
             
         except Exception as e:
             self.logger.error(f"Error processing category {category}: {e}")
-            connection.rollback()
+            self.sink.rollback()
             return False
     
-    def run_production_insertion(self) -> bool:
-        """Run the complete production insertion"""
+    def load_resume_state(self) -> Dict[str, Any]:
+        """
+        Read the checkpoint and remove rows committed after it
+        Returns:
+            Checkpoint state, or None when there is nothing to resume
+        """
+        state = self.checkpoint_store.load()
+        if not state:
+            return None
+        if state['plan'] != plan_signature(self.generator):
+            raise RuntimeError("Checkpoint was written for a different generation plan; run without --resume")
+
+        # Rows past the checkpoint come from a commit whose checkpoint was never written
+        orphaned = self.sink.delete_after(state['counters']['global_count'])
+        if orphaned:
+            self.logger.info(f"Removed {orphaned} rows committed after the last checkpoint")
+        return state
+
+    def start_index_maintenance(self, connection, driver: str):
+        """
+        Disable non-unique nonclustered indexes for an index-off load
+        Indexes left disabled by an earlier failed run are rebuilt first when
+        index-off loading is not requested.
+        Args:
+            connection: Loading connection
+            driver: Driver used for the extra parallel-rebuild connections
+        Returns:
+            IndexMaintenance to pass to finish_index_maintenance, or None
+        """
+        maintenance = IndexMaintenance(
+            connection,
+            maxdop=self.rebuild_maxdop,
+            parallel_rebuilds=self.parallel_rebuilds,
+            connection_factory=DriverConnectionFactory(driver)
+        )
+        if not self.index_off_load:
+            if maintenance.pending():
+                print("♻️  Rebuilding indexes left disabled by an earlier run...")
+                self.finish_index_maintenance(maintenance)
+            return None
+
+        try:
+            disabled = maintenance.disable()
+        except Exception:
+            # Re-enable whatever was disabled before the failure
+            self.finish_index_maintenance(maintenance)
+            raise
+        print(f"⏸️  Disabled {len(disabled)} nonclustered index(es) for the load")
+        for index in disabled:
+            self.logger.info(f"Index-off load: {index['definition']}")
+        return maintenance
+
+    def finish_index_maintenance(self, maintenance: IndexMaintenance) -> bool:
+        """
+        Rebuild the indexes disabled by start_index_maintenance
+        Returns:
+            True if every index was rebuilt
+        """
+        print("🔧 Rebuilding nonclustered indexes...")
+        results = maintenance.rebuild()
+        for result in results:
+            if result['error']:
+                print(f"   ❌ {result['name']}: {result['error']}")
+            else:
+                print(f"   ✅ {result['name']} ({result['seconds']:.1f}s)")
+        failed = [result['name'] for result in results if result['error']]
+        if failed:
+            print(f"⚠️  Indexes still disabled, run 'python src/index_maintenance.py rebuild': {', '.join(failed)}")
+            self.logger.error(f"Index rebuild failed for: {failed}")
+        return not failed
+
+    def run_production_insertion(self, resume: bool = False, checkpoint: str = 'file',
+                                 checkpoint_path: str = None) -> bool:
+        """
+        Run the complete production insertion
+        Args:
+            resume: Continue from the last checkpoint instead of clearing existing data
+            checkpoint: 'file', 'table' or None to disable checkpoints
+            checkpoint_path: Checkpoint file for the 'file' store
+        Returns:
+            True if all categories were inserted
+        """
         print("🚀 PRODUCTION FILE NUMBER INSERTION")
         print("=" * 60)
         
         # Calculate totals
         self.total_records = self.calculate_total_records()
+        self.metrics.planned(self.total_records)
         
         print(f"📊 INSERTION PLAN:")
         print(f"   • Total Records: {self.total_records:,}")
@@ -250,27 +434,51 @@ class ProductionInserter:
         print(f"   • Numbers per Year: {self.generator.numbers_per_year:,}")
         print(f"   • Batch Size: {self.batch_size:,}")
         print(f"   • Transaction Size: {self.transaction_size:,}")
+        print(f"   • Adaptive Batching: {'Yes' if self.batch_controller.adaptive else 'No'}")
+        print(f"   • Index-off Load: {'Yes' if self.index_off_load else 'No'}")
+        print(f"   • Sink: {self.sink_name}")
         print("=" * 60)
         
-        # Test database connection
-        print("🔗 Testing database connection...")
-        test_results = self.db.test_connection()
-        if not test_results['preferred']:
-            print("❌ Database connection failed")
+        sink = self.open_sink()
+        if sink is None:
             return False
-        
-        connection = self.db.get_connection(test_results['preferred'])
-        if not connection:
-            print("❌ Could not establish database connection")
+        if resume and not sink.resumable:
+            print(f"❌ The {sink.name} sink cannot resume a load")
+            sink.close()
             return False
         
-        print(f"✅ Connected using {test_results['preferred'].upper()}")
-        
+        maintenance = None
         try:
-            # Clear existing data
-            print("\n🧹 Clearing existing test data...")
-            cleared_count = self.clear_existing_data(connection)
-            print(f"✅ Cleared {cleared_count} existing records")
+            if sink.connection is not None:
+                maintenance = self.start_index_maintenance(sink.connection, sink.driver)
+            resume_state = None
+            first_category = 0
+            if checkpoint:
+                self.checkpoint_store = create_checkpoint_store(checkpoint, sink.connection, checkpoint_path)
+                print(f"💾 Checkpoints: {self.checkpoint_store.describe()}")
+
+            if resume and self.checkpoint_store:
+                resume_state = self.load_resume_state()
+                if resume_state is None:
+                    print("ℹ️  No checkpoint found, starting from the beginning")
+
+            if resume_state:
+                first_category = resume_state['category_index']
+                self.processed_records = self.resumed_records = resume_state['counters']['global_count']
+                self.categories_completed = first_category
+                self.generator.restore_counters(resume_state['counters'])
+                self._generator_initialized = True
+                print(f"\n♻️  Resuming at category {first_category + 1}/{self.total_categories} "
+                      f"after {self.processed_records:,} committed records")
+                if resume_state['category_committed'] == 0:
+                    resume_state = None
+            else:
+                # Clear existing data
+                print("\n🧹 Clearing existing test data...")
+                cleared_count = self.clear_existing_data()
+                print(f"✅ Cleared {cleared_count} existing records")
+                if self.checkpoint_store:
+                    self.checkpoint_store.clear(sink.connection)
             
             # Start timing and progress tracking
             self.start_time = datetime.now()
@@ -281,13 +489,20 @@ class ProductionInserter:
             
             # Process each category
             success = True
-            for category in self.generator.categories:
-                if not self.process_category(connection, category):
+            for category_index in range(first_category, len(self.generator.categories)):
+                category = self.generator.categories[category_index]
+                category_resume = resume_state if category_index == first_category else None
+                if not self.process_category(category, category_index, category_resume):
                     success = False
                     break
             
             # Stop progress display
             self.stop_progress_display()
+
+            if maintenance is not None:
+                if not self.finish_index_maintenance(maintenance):
+                    success = False
+                maintenance = None
             
             if success:
                 # Calculate final statistics
@@ -304,8 +519,16 @@ class ProductionInserter:
                 print(f"   • End Time: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
                 print(f"   • Total Duration: {str(total_duration).split('.')[0]}")
                 print(f"   • Average Rate: {self.processed_records/total_duration.total_seconds():.0f} records/second")
+                if self.pipeline_stats:
+                    print(f"   • Pipeline: {format_stage_stats(combine_stage_stats(self.pipeline_stats))}")
+                if self.batch_controller.adaptive:
+                    sizing = self.batch_controller.summary()
+                    print(f"   • Final Batch Size: {sizing['batch_size']:,} "
+                          f"(commit every {sizing['transaction_size']:,}, {sizing['decisions']} sizing decisions)")
                 print("=" * 60)
                 
+                if self.checkpoint_store:
+                    self.checkpoint_store.clear(sink.connection)
                 self.logger.info("Production insertion completed successfully")
                 return True
             else:
@@ -319,78 +542,353 @@ class ProductionInserter:
             self.logger.error(f"Critical error in production insertion: {e}")
             return False
         finally:
-            connection.close()
+            if maintenance is not None:
+                # Put the indexes back even after a failure
+                self.finish_index_maintenance(maintenance)
+            sink.close()
     
-    def validate_final_results(self) -> Dict[str, Any]:
-        """Validate the final insertion results"""
-        print("\n🔍 VALIDATING FINAL RESULTS...")
-        
-        connection = self.db.get_connection('pyodbc')
-        if not connection:
-            return {'error': 'Could not connect to database for validation'}
-        
+    def _record_parallel_progress(self, rows: int, category: str) -> None:
+        """Progress callback for ParallelInserter workers"""
+        self.processed_records += rows
+        self.metrics.generated(rows)
+        self.metrics.inserted(rows)
+        self.current_category = category
+
+    def run_parallel_insertion(self, workers: int, mode: str = 'threads') -> bool:
+        """
+        Run the complete insertion over several connections at once
+        Args:
+            workers: Worker threads or processes, each with its own connection
+            mode: 'threads' (one producer feeding a queue) or 'processes' (one shard per task)
+        Returns:
+            True if every worker finished without errors
+        """
+        print("🚀 PARALLEL PRODUCTION FILE NUMBER INSERTION")
+        print("=" * 60)
+
+        self.total_records = self.calculate_total_records()
+        self.metrics.planned(self.total_records)
+        print(f"📊 INSERTION PLAN:")
+        print(f"   • Total Records: {self.total_records:,}")
+        print(f"   • Workers: {workers} ({mode})")
+        print(f"   • Batch Size: {self.batch_size:,}")
+        print(f"   • Transaction Size: {self.transaction_size:,} per worker")
+        print(f"   • Index-off Load: {'Yes' if self.index_off_load else 'No'}")
+        print("=" * 60)
+
+        sink = self.open_sql_server_sink()
+        if sink is None:
+            return False
+        connection, driver = sink.connection, sink.driver
+
+        # The control connection stays open to rebuild indexes after the workers finish
+        maintenance = None
+        try:
+            maintenance = self.start_index_maintenance(connection, driver)
+            print("\n🧹 Clearing existing test data...")
+            cleared_count = self.clear_existing_data()
+            print(f"✅ Cleared {cleared_count} existing records")
+            summary = self._run_parallel_workers(driver, workers, mode)
+            if maintenance is not None:
+                if not self.finish_index_maintenance(maintenance):
+                    summary['success'] = False
+                maintenance = None
+        except Exception as e:
+            self.stop_progress_display()
+            print(f"\n❌ Critical error: {e}")
+            self.logger.error(f"Critical error in parallel insertion: {e}")
+            return False
+        finally:
+            if maintenance is not None:
+                # Put the indexes back even after a failure
+                self.finish_index_maintenance(maintenance)
+            sink.close()
+
+        if summary['success']:
+            self.logger.info("Parallel production insertion completed successfully")
+        else:
+            self.logger.error(f"Parallel production insertion failed: {summary['errors']}")
+        return summary['success']
+
+    def _run_parallel_workers(self, driver: str, workers: int, mode: str) -> Dict[str, Any]:
+        """Run ParallelInserter with progress display and print its summary"""
+        inserter = ParallelInserter(
+            DriverConnectionFactory(driver),
+            workers=workers,
+            batch_size=self.batch_size,
+            transaction_size=self.transaction_size,
+            generator=self.generator,
+            mode=mode,
+            insert_sql=self.insert_sql,
+            fast_executemany=self.enable_fast_executemany,
+            insert_engine=self.insert_engine_name
+        )
+
+        self.start_time = datetime.now()
+        print(f"\n⏰ Started at: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        self.start_progress_display()
+        summary = inserter.run(progress_callback=self._record_parallel_progress)
+        self.stop_progress_display()
+
+        print("\n" + "=" * 60)
+        print("🎉 PARALLEL INSERTION COMPLETED SUCCESSFULLY!" if summary['success'] else "❌ PARALLEL INSERTION FAILED!")
+        print("=" * 60)
+        print(f"📊 FINAL STATISTICS:")
+        print(f"   • Total Records Inserted: {summary['rows']:,}")
+        print(f"   • Total Duration: {timedelta(seconds=int(summary['seconds']))}")
+        print(f"   • Aggregate Rate: {summary['records_per_second']:.0f} records/second")
+        for stats in summary['workers']:
+            status = f" ❌ {stats['error']}" if stats['error'] else ""
+            print(f"   • {stats['worker']}: {stats['rows']:,} records, {stats['commits']} commits, "
+                  f"{stats['records_per_second']:.0f} records/second{status}")
+        print("=" * 60)
+        return summary
+
+    def run_switch_load(self, workers: int) -> bool:
+        """
+        Load a partitioned grouping table one partition at a time through staging heaps
+        Args:
+            workers: Partitions loaded at once, each on its own connection
+        Returns:
+            True if every partition was switched in
+        """
+        print("🚀 PARTITION SWITCH FILE NUMBER INSERTION")
+        print("=" * 60)
+
+        layout = PartitionLayout(self.generator, self.partition_scheme)
+        self.total_records = self.calculate_total_records()
+        self.metrics.planned(self.total_records)
+        print(f"📊 INSERTION PLAN:")
+        print(f"   • Total Records: {self.total_records:,}")
+        print(f"   • Partitioning: {self.partition_scheme} ({len(layout.shards_by_partition())} partitions to load)")
+        print(f"   • Workers: {workers}")
+        print(f"   • Batch Size: {self.batch_size:,}")
+        print("=" * 60)
+
+        sink = self.open_sql_server_sink()
+        if sink is None:
+            return False
+        try:
+            print("\n🧹 Clearing existing test data...")
+            cleared_count = self.clear_existing_data()
+            print(f"✅ Cleared {cleared_count} existing records")
+        finally:
+            sink.close()
+
+        loader = StagingSwitchLoader(
+            DriverConnectionFactory(sink.driver),
+            layout,
+            workers=workers,
+            batch_size=self.batch_size,
+            transaction_size=self.transaction_size,
+            insert_engine=self.insert_engine_name
+        )
+        self.start_time = datetime.now()
+        print(f"\n⏰ Started at: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        self.start_progress_display()
+        summary = loader.load(progress_callback=self._record_parallel_progress)
+        self.stop_progress_display()
+
+        print("\n" + "=" * 60)
+        print("🎉 SWITCH LOAD COMPLETED SUCCESSFULLY!" if summary['success'] else "❌ SWITCH LOAD FAILED!")
+        print("=" * 60)
+        print(f"📊 FINAL STATISTICS:")
+        print(f"   • Total Records Switched In: {summary['rows']:,}")
+        print(f"   • Total Duration: {timedelta(seconds=int(summary['seconds']))}")
+        print(f"   • Aggregate Rate: {summary['records_per_second']:.0f} records/second")
+        for stats in summary['partitions']:
+            status = f" ❌ {stats['error']}" if stats['error'] else ""
+            print(f"   • partition {stats['partition']} ({stats['label']}): {stats['rows']:,} records, "
+                  f"load {stats['load_seconds']:.1f}s, index {stats['index_seconds']:.1f}s, "
+                  f"switch {stats['switch_seconds']:.2f}s{status}")
+        print("=" * 60)
+
+        if not summary['success']:
+            self.logger.error(f"Switch load failed: {summary['errors']}")
+        return summary['success']
+
+    def read_high_water_marks(self, connection) -> Dict[str, Any]:
+        """
+        Read the counters an extension must continue from
+        Args:
+            connection: Database connection
+        Returns:
+            Dictionary with the highest global number and group, per-registry
+            record counts and highest registry_batch_no, and loaded (registry, year) pairs
+        """
+        cursor = connection.cursor()
         try:
-            cursor = connection.cursor()
-            results = {}
-            
-            # Total count
-            cursor.execute("SELECT COUNT(*) FROM [dbo].[grouping] WHERE [created_by] = 'Generated'")
-            results['total_count'] = cursor.fetchone()[0]
-            
-            # Registry distribution
-            cursor.execute("""
-                SELECT [registry], COUNT(*) 
-                FROM [dbo].[grouping] 
-                WHERE [created_by] = 'Generated'
-                GROUP BY [registry]
-                ORDER BY [registry]
-            """)
-            results['registry_distribution'] = dict(cursor.fetchall())
-            
-            # Land use distribution
             cursor.execute("""
-                SELECT [landuse], COUNT(*) 
-                FROM [dbo].[grouping] 
+                SELECT MAX(CAST([number] AS BIGINT)), MAX(CAST([group] AS BIGINT))
+                FROM [dbo].[grouping]
                 WHERE [created_by] = 'Generated'
-                GROUP BY [landuse]
-                ORDER BY [landuse]
             """)
-            results['landuse_distribution'] = dict(cursor.fetchall())
-            
-            # Year range
+            max_number, max_group = row_values(cursor.fetchone())
+
             cursor.execute("""
-                SELECT MIN([year]), MAX([year]) 
-                FROM [dbo].[grouping] 
+                SELECT [registry], COUNT(*), MAX(CAST([registry_batch_no] AS BIGINT))
+                FROM [dbo].[grouping]
                 WHERE [created_by] = 'Generated'
+                GROUP BY [registry]
             """)
-            year_range = cursor.fetchone()
-            results['year_range'] = {'min': year_range[0], 'max': year_range[1]}
-            
-            # Group statistics
+            registry_counts = {}
+            registry_batches = {}
+            for row in cursor.fetchall():
+                registry, count, max_batch = row_values(row)
+                registry_counts[str(registry)] = int(count)
+                registry_batches[str(registry)] = int(max_batch or 0)
+
             cursor.execute("""
-                SELECT MIN([group]), MAX([group]), COUNT(DISTINCT [group])
-                FROM [dbo].[grouping] 
-                WHERE [created_by] = 'Generated'
-            """)
-            group_info = cursor.fetchone()
-            results['group_info'] = {'min': group_info[0], 'max': group_info[1], 'distinct_count': group_info[2]}
-            
+                SELECT DISTINCT [registry], [year]
+                FROM [dbo].[grouping]
+                WHERE [created_by] = 'Generated' AND [year] > ?
+            """, (self.generator.end_year,))
+            existing_years = {
+                (str(registry), int(year))
+                for registry, year in (row_values(row) for row in cursor.fetchall())
+            }
+        finally:
             cursor.close()
-            
-            # Display validation results
-            print(f"✅ Total Records: {results['total_count']:,}")
-            print(f"✅ Year Range: {results['year_range']['min']} - {results['year_range']['max']}")
-            print(f"✅ Groups: {results['group_info']['min']} - {results['group_info']['max']} ({results['group_info']['distinct_count']:,} groups)")
-            
-            print(f"\n📊 Registry Distribution:")
-            for registry, count in results['registry_distribution'].items():
-                print(f"   • {registry}: {count:,} records")
-            
-            print(f"\n📊 Land Use Distribution:")
-            for landuse, count in results['landuse_distribution'].items():
-                print(f"   • {landuse}: {count:,} records")
-            
-            return results
+
+        return {
+            'number': int(max_number or 0),
+            'group': int(max_group or 0),
+            'registry_counts': registry_counts,
+            'registry_batches': registry_batches,
+            'existing_years': existing_years
+        }
+
+    def plan_high_water_marks(self) -> Dict[str, Any]:
+        """High-water marks of a complete load of the configured plan, without a database"""
+        plan = GenerationPlan(self.generator)
+        return {
+            'number': plan.total_records,
+            'group': plan.group_count,
+            'registry_counts': dict(plan.registry_totals),
+            'registry_batches': {
+                registry: info['registry_batch_range'][1]
+                for registry, info in plan.registry_boundaries().items()
+            },
+            'existing_years': set()
+        }
+
+    def run_incremental_extension(self, new_end_year: int, marks_source: str = 'database') -> bool:
+        """
+        Append only the years after END_YEAR, continuing the existing counters
+        Args:
+            new_end_year: Last year to add (e.g., 2026)
+            marks_source: 'database' to read high-water marks from grouping,
+                'plan' to assume a complete load of the configured plan
+        Returns:
+            True if the extension was inserted successfully
+        """
+        print("🚀 INCREMENTAL YEAR EXTENSION")
+        print("=" * 60)
+
+        if new_end_year <= self.generator.end_year:
+            print(f"❌ Extension year must be after END_YEAR ({self.generator.end_year})")
+            return False
+
+        sink = self.open_sink()
+        if sink is None:
+            return False
+
+        try:
+            if marks_source == 'plan':
+                marks = self.plan_high_water_marks()
+            elif sink.connection is None:
+                print(f"❌ The {sink.name} sink has no high-water marks to read; use --marks plan")
+                return False
+            else:
+                marks = self.read_high_water_marks(sink.connection)
+
+            slices = list(self.generator.iter_extension_slices(new_end_year, marks['existing_years']))
+            self.total_records = sum(count for _, _, _, count in slices)
+            self.metrics.planned(self.total_records)
+
+            print(f"📊 EXTENSION PLAN:")
+            print(f"   • Years: {self.generator.end_year + 1}-{new_end_year}")
+            print(f"   • Continuing from number {marks['number']:,} (group {marks['group']:,})")
+            for registry, count in sorted(marks['registry_counts'].items()):
+                print(f"   • Registry {registry}: {count:,} records, last registry batch {marks['registry_batches'].get(registry, 0):,}")
+            print(f"   • New Records: {self.total_records:,}")
+            if marks['existing_years']:
+                print(f"   • Skipping already loaded: {sorted(marks['existing_years'])}")
+            print("=" * 60)
+
+            if self.total_records == 0:
+                print("✅ Nothing to add")
+                return True
+
+            self.start_time = datetime.now()
+            transaction_records = 0
+            batches = self.generator.generate_extension_batches(
+                new_end_year,
+                marks['number'],
+                marks['registry_counts'],
+                batch_size=self.batch_size,
+                existing_years=marks['existing_years']
+            )
+            for batch in batches:
+                self.current_category = batch['category'][0]
+                self.metrics.generated(len(batch['awaiting_fileno']))
+                if not self.insert_rows(batch_rows(batch)):
+                    sink.rollback()
+                    print("\n❌ EXTENSION FAILED!")
+                    return False
+
+                self.processed_records += len(batch['awaiting_fileno'])
+                transaction_records += len(batch['awaiting_fileno'])
+                if transaction_records >= self.transaction_size:
+                    started = time.perf_counter()
+                    sink.commit()
+                    self.metrics.commit(time.perf_counter() - started)
+                    transaction_records = 0
+
+            sink.commit()
+            duration = datetime.now() - self.start_time
+            print(f"✅ Appended {self.processed_records:,} records in {str(duration).split('.')[0]}")
+            self.logger.info(f"Incremental extension to {new_end_year} completed: {self.processed_records} records")
+            return True
+
+        except Exception as e:
+            sink.rollback()
+            print(f"\n❌ Critical error: {e}")
+            self.logger.error(f"Critical error in incremental extension: {e}")
+            return False
+        finally:
+            sink.close()
+
+    def validate_final_results(self) -> Dict[str, Any]:
+        """
+        Validate the final insertion results in one grouped scan against the generation plan
+        Returns:
+            Report from LoadValidator.validate, or a dictionary with 'error'
+        """
+        print("\n🔍 VALIDATING FINAL RESULTS...")
+
+        if self.sink_name == 'sqlite':
+            # Dry runs are checked in the local copy the sqlite sink wrote
+            sink = create_sink('sqlite', self.sink_path)
+            sink.open()
+            try:
+                validator = LoadValidator(sink.database, self.generator, table='[grouping]', dialect='sqlite')
+                report = validator.validate()
+                print_report(report)
+                return report
+            except Exception as e:
+                return {'error': str(e)}
+            finally:
+                sink.close()
+
+        connection = self.db.get_connection('pyodbc')
+        if not connection:
+            return {'error': 'Could not connect to database for validation'}
+        
+        try:
+            report = LoadValidator(connection, self.generator).validate()
+            print_report(report)
+            return report
             
         except Exception as e:
             return {'error': str(e)}
@@ -400,30 +898,102 @@ class ProductionInserter:
 
 def main():
     """Run the production insertion"""
+    parser = argparse.ArgumentParser(description="Production file number insertion")
+    parser.add_argument("--extend-to", type=int, default=None,
+                        help="Append only the years after END_YEAR up to this year")
+    parser.add_argument("--marks", choices=['database', 'plan'], default='database',
+                        help="Where --extend-to reads counter high-water marks (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted load from its last checkpoint instead of clearing data")
+    parser.add_argument("--checkpoint", choices=CHECKPOINT_STORES + ('none',), default='file',
+                        help="Where commits are checkpointed (default: %(default)s)")
+    parser.add_argument("--checkpoint-path", default=None,
+                        help="Checkpoint file for --checkpoint file (default: CHECKPOINT_PATH or checkpoints/production_load.json)")
+    parser.add_argument("--engine", choices=INSERT_ENGINES, default=None,
+                        help="Insert engine (default: INSERT_ENGINE or auto)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parallel insert connections; more than 1 enables the pipeline mode (default: %(default)s)")
+    parser.add_argument("--worker-mode", choices=WORKER_MODES, default='threads',
+                        help="Run pipeline workers as threads or processes (default: %(default)s)")
+    parser.add_argument("--reset-strategy", choices=RESET_STRATEGIES, default=None,
+                        help="How existing generated rows are cleared (default: RESET_STRATEGY or auto)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Tune batch size and commit interval while loading (or ADAPTIVE_BATCHING=1)")
+    parser.add_argument("--index-off", action="store_true",
+                        help="Disable non-unique nonclustered indexes during the load and rebuild them afterwards (or INDEX_OFF_LOAD=1)")
+    parser.add_argument("--rebuild-maxdop", type=int, default=None,
+                        help="MAXDOP for each index rebuild (default: REBUILD_MAXDOP or server setting)")
+    parser.add_argument("--parallel-rebuilds", type=int, default=None,
+                        help="Indexes rebuilt at once on separate connections (default: PARALLEL_REBUILDS or 1)")
+    parser.add_argument("--sink", choices=SINKS, default=None,
+                        help="Where rows are written: sqlserver, sqlite, file (CSV, or BCP for a .dat path) "
+                             "or null to profile generation alone (default: SINK or sqlserver)")
+    parser.add_argument("--sink-path", default=None,
+                        help="Database or output file for the sqlite and file sinks (default: SINK_PATH)")
+    parser.add_argument("--switch-load", action="store_true",
+                        help="Load a partitioned grouping table through per-partition staging heaps "
+                             "(uses --workers; see grouping_partitioning)")
+    parser.add_argument("--partition-scheme", choices=PARTITION_SCHEMES, default=None,
+                        help="Partitioning of the grouping table for --switch-load (default: PARTITION_SCHEME or registry)")
+    args = parser.parse_args()
+
     inserter = ProductionInserter()
+    if args.engine:
+        inserter.insert_engine_name = args.engine
+    if args.reset_strategy:
+        inserter.reset_strategy = args.reset_strategy
+    if args.adaptive:
+        inserter.batch_controller.adaptive = True
+    if args.index_off:
+        inserter.index_off_load = True
+    if args.rebuild_maxdop is not None:
+        inserter.rebuild_maxdop = args.rebuild_maxdop or None
+    if args.parallel_rebuilds is not None:
+        inserter.parallel_rebuilds = args.parallel_rebuilds
+    if args.partition_scheme:
+        inserter.partition_scheme = args.partition_scheme
+    if args.sink:
+        inserter.sink_name = args.sink
+    if args.sink_path:
+        inserter.sink_path = args.sink_path
+
+    if args.extend_to is not None:
+        success = inserter.run_incremental_extension(args.extend_to, args.marks)
+        flush_metrics()
+        return success
     
-    # Confirmation prompt
-    print("⚠️  WARNING: This will insert 5.4 MILLION records into the database!")
-    print("   This process will take 2-4 hours to complete.")
-    print("   Make sure you have:")
-    print("   • Database backup completed")
-    print("   • Sufficient disk space")
-    print("   • Stable network connection")
-    print("   • No other processes using the database")
-    print()
-    
-    confirm = input("Do you want to proceed? (type 'YES' to confirm): ").strip()
-    
-    if confirm.upper() != 'YES':
-        print("❌ Insertion cancelled by user")
-        return False
+    # Confirmation prompt (dry-run sinks never touch the database)
+    if inserter.sink_name == 'sqlserver':
+        planned_records = inserter.calculate_total_records()
+        print(f"⚠️  WARNING: This will insert {planned_records:,} records into the database!")
+        print("   This process will take 2-4 hours to complete.")
+        print("   Make sure you have:")
+        print("   • Database backup completed")
+        print("   • Sufficient disk space")
+        print("   • Stable network connection")
+        print("   • No other processes using the database")
+        print()
+        
+        confirm = input("Do you want to proceed? (type 'YES' to confirm): ").strip()
+        
+        if confirm.upper() != 'YES':
+            print("❌ Insertion cancelled by user")
+            return False
     
     # Run the production insertion
-    success = inserter.run_production_insertion()
+    if args.switch_load:
+        success = inserter.run_switch_load(max(1, args.workers))
+    elif args.workers > 1:
+        success = inserter.run_parallel_insertion(args.workers, args.worker_mode)
+    else:
+        checkpoint = None if args.checkpoint == 'none' else args.checkpoint
+        success = inserter.run_production_insertion(args.resume, checkpoint, args.checkpoint_path)
+    flush_metrics()
     
     if success:
         # Validate results
-        inserter.validate_final_results()
+        if inserter.sink_name in ('sqlserver', 'sqlite'):
+            inserter.validate_final_results()
         print("\n🏆 PRODUCTION INSERTION COMPLETED SUCCESSFULLY!")
         return True
     else:
@@ -12,6 +12,7 @@ from datetime import datetime
 import pandas as pd
 
 from database_connection import DatabaseConnection
+from tvp_insertion import RACK_SHELF_TVP, insert_tvp, supports_tvp, tvp_enabled
 
 # Configure logging
 logging.basicConfig(
@@ -35,6 +36,7 @@ class RackShelfImporter:
         self.connection = None
         self.total_records = 0
         self.successful_imports = 0
+        self.use_tvp = tvp_enabled()
         
     def validate_csv_file(self):
         """Validate that the CSV file exists and has the expected structure."""
@@ -158,6 +160,7 @@ class RackShelfImporter:
             """
             
             total_batches = (len(df) + batch_size - 1) // batch_size
+            use_tvp = self.use_tvp and supports_tvp(self.connection)
             
             for batch_num in range(total_batches):
                 start_idx = batch_num * batch_size
@@ -179,7 +182,10 @@ class RackShelfImporter:
                     ))
                 
                 # Execute batch insert
-                cursor.executemany(insert_query, batch_data)
+                if use_tvp:
+                    insert_tvp(self.connection, RACK_SHELF_TVP, batch_data)
+                else:
+                    cursor.executemany(insert_query, batch_data)
                 self.connection.commit()
                 
                 self.successful_imports += len(batch_data)
@@ -0,0 +1,130 @@
+"""
+Sharded File Number Generation
+Generates independent shards of the file number plan in parallel worker processes
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from file_number_generator import FileNumberGenerator
+
+# Generator attributes copied into worker processes
+GENERATOR_SETTINGS = (
+    'start_year', 'end_year', 'numbers_per_year', 'records_per_group', 'tracking_id_engine'
+)
+
+ShardWorker = Callable[[FileNumberGenerator, Dict[str, Any], int], Any]
+
+
+def generator_settings(generator: FileNumberGenerator) -> Dict[str, Any]:
+    """Capture the configuration a worker needs to rebuild the same plan."""
+    return {name: getattr(generator, name) for name in GENERATOR_SETTINGS}
+
+
+def build_generator(settings: Optional[Dict[str, Any]] = None) -> FileNumberGenerator:
+    """Create a generator and apply captured configuration overrides."""
+    generator = FileNumberGenerator()
+    for name, value in (settings or {}).items():
+        setattr(generator, name, value)
+    return generator
+
+
+def count_shard_rows(generator: FileNumberGenerator, shard: Dict[str, Any], batch_size: int) -> Dict[str, Any]:
+    """
+    Default shard worker: generate a shard and report its size and timing
+    Args:
+        generator: Generator configured like the planning process
+        shard: Shard dictionary from FileNumberGenerator.plan_shards
+        batch_size: Rows per generated block
+    Returns:
+        Dictionary with shard id, generated rows and elapsed seconds
+    """
+    start = time.perf_counter()
+    rows = 0
+    for batch in generator.generate_shard_batches(shard, batch_size):
+        rows += len(batch['awaiting_fileno'])
+    return {
+        'shard_id': shard['shard_id'],
+        'rows': rows,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def _run_shard(
+    shard_worker: ShardWorker,
+    settings: Dict[str, Any],
+    shard: Dict[str, Any],
+    batch_size: int
+) -> Any:
+    """Process-pool entry point for a single shard."""
+    return shard_worker(build_generator(settings), shard, batch_size)
+
+
+def run_sharded_generation(
+    shard_worker: ShardWorker = count_shard_rows,
+    processes: Optional[int] = None,
+    years_per_shard: Optional[int] = None,
+    batch_size: int = 10000,
+    generator: Optional[FileNumberGenerator] = None
+) -> List[Any]:
+    """
+    Generate every shard of the plan, in parallel when processes > 1
+    Args:
+        shard_worker: Top-level function called as shard_worker(generator, shard, batch_size)
+        processes: Worker process count (default: CPU count, 1 runs in-process)
+        years_per_shard: Year-range length of each shard (default: one per registry/category)
+        batch_size: Rows per generated block
+        generator: Generator whose configuration defines the plan
+    Returns:
+        Worker results in shard order
+    """
+    generator = generator or FileNumberGenerator()
+    shards = generator.plan_shards(years_per_shard)
+    settings = generator_settings(generator)
+
+    if processes == 1:
+        return [shard_worker(generator, shard, batch_size) for shard in shards]
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(_run_shard, shard_worker, settings, shard, batch_size)
+            for shard in shards
+        ]
+        return [future.result() for future in futures]
+
+
+def main():
+    """Generate the full plan across worker processes and report throughput"""
+    parser = argparse.ArgumentParser(description="Parallel sharded file number generation")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--years-per-shard", type=int, default=None, help="Split shards into year ranges of this length")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per generated block")
+    args = parser.parse_args()
+
+    generator = FileNumberGenerator()
+    shards = generator.plan_shards(args.years_per_shard)
+    print(f"Generating {len(shards)} shards with {args.processes} processes...")
+
+    start = time.perf_counter()
+    results = run_sharded_generation(
+        processes=args.processes,
+        years_per_shard=args.years_per_shard,
+        batch_size=args.batch_size,
+        generator=generator
+    )
+    elapsed = time.perf_counter() - start
+
+    total_rows = sum(result['rows'] for result in results)
+    print(f"Generated {total_rows:,} records in {elapsed:.2f} seconds "
+          f"({total_rows / elapsed:,.0f} records/second)")
+
+
+if __name__ == "__main__":
+    main()
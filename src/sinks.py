@@ -0,0 +1,357 @@
+"""
+Load Sinks
+Destinations a load writes [dbo].[grouping] rows through: SQL Server, a local
+SQLite database, a CSV/BCP file, or nothing at all (generator-bound profiling)
+"""
+
+import os
+import sys
+import csv
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from file_number_generator import GROUPING_COLUMNS, GROUPING_INSERT_SQL, grouping_insert_sql
+from file_number_exporter import BCP_FIELD_TERMINATOR, BCP_ROW_TERMINATOR, WRITE_BUFFER_SIZE
+
+SINKS = ('sqlserver', 'sqlite', 'file', 'null')
+DEFAULT_SQLITE_PATH = 'exports/grouping.sqlite3'
+DEFAULT_FILE_PATH = 'exports/grouping.csv'
+
+SQLITE_GROUPING_DDL = """
+CREATE TABLE IF NOT EXISTS [grouping] (
+    [id] INTEGER PRIMARY KEY,
+    [awaiting_fileno] TEXT, [created_by] TEXT, [number] INTEGER, [year] INTEGER,
+    [landuse] TEXT, [created_at] TEXT, [registry] TEXT, [mls_fileno] TEXT,
+    [mapping] INTEGER, [group] INTEGER, [sys_batch_no] INTEGER,
+    [registry_batch_no] INTEGER, [tracking_id] TEXT
+)
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp_text(value: datetime) -> str:
+    # Same text form SQL Server returns for DATETIME
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+sqlite3.register_adapter(datetime, _timestamp_text)
+
+
+class NullSink:
+    """Counts and discards rows, so a run measures generation and packing only"""
+
+    name = 'null'
+    # Sinks without a SQL Server connection skip index maintenance, table checkpoints and log checks
+    connection = None
+    resumable = True
+
+    def __init__(self):
+        self.rows_written = 0
+        self.rows_committed = 0
+
+    def open(self) -> bool:
+        return True
+
+    def describe(self) -> str:
+        return "null sink (rows are discarded)"
+
+    def insert_rows(self, rows: Sequence[tuple]) -> int:
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def commit(self) -> None:
+        self.rows_committed = self.rows_written
+
+    def rollback(self) -> None:
+        self.rows_written = self.rows_committed
+
+    def clear(self) -> int:
+        cleared = self.rows_committed
+        self.rows_written = self.rows_committed = 0
+        return cleared
+
+    def delete_after(self, global_count: int) -> int:
+        """Remove generated rows numbered past a checkpoint (nothing is kept here)"""
+        return 0
+
+    def count(self) -> int:
+        return self.rows_committed
+
+    def close(self) -> None:
+        pass
+
+
+class FileSink:
+    """
+    Append rows to a CSV file or a SQL Server BCP character file
+
+    commit() flushes the file and remembers its size; rollback() cuts the
+    file back to the last commit, so a failed batch never leaves half a
+    transaction behind. A '.dat' path selects the BCP format.
+    """
+
+    name = 'file'
+    connection = None
+    # Rows carry no position in the file, so a checkpoint cannot be rolled back to
+    resumable = False
+
+    def __init__(self, path: str = DEFAULT_FILE_PATH, export_format: Optional[str] = None):
+        self.path = Path(path)
+        self.export_format = export_format or ('bcp' if self.path.suffix == '.dat' else 'csv')
+        if self.export_format not in ('csv', 'bcp'):
+            raise ValueError(f"File sink writes csv or bcp, not {self.export_format}")
+        self.rows_written = 0
+        self.rows_committed = 0
+        self._committed_size = 0
+        self._handle = None
+        self._writer = None
+
+    def open(self) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = open(self.path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE)
+        if self.export_format == 'bcp':
+            self._writer = csv.writer(
+                self._handle,
+                delimiter=BCP_FIELD_TERMINATOR,
+                lineterminator=BCP_ROW_TERMINATOR,
+                quoting=csv.QUOTE_NONE,
+                escapechar=None
+            )
+        else:
+            self._writer = csv.writer(self._handle, lineterminator='\n')
+        self._start()
+        return True
+
+    def _start(self) -> None:
+        if self.export_format == 'csv':
+            self._writer.writerow(GROUPING_COLUMNS)
+        self._handle.flush()
+        self._committed_size = self._handle.tell()
+
+    def describe(self) -> str:
+        return f"{self.export_format} file {self.path}"
+
+    def insert_rows(self, rows: Sequence[tuple]) -> int:
+        self._writer.writerows(
+            tuple(_timestamp_text(value) if isinstance(value, datetime) else value for value in row)
+            for row in rows
+        )
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def commit(self) -> None:
+        self._handle.flush()
+        self._committed_size = self._handle.tell()
+        self.rows_committed = self.rows_written
+
+    def rollback(self) -> None:
+        self._handle.flush()
+        self._handle.seek(self._committed_size)
+        self._handle.truncate()
+        self.rows_written = self.rows_committed
+
+    def clear(self) -> int:
+        cleared = self.rows_committed
+        self._handle.seek(0)
+        self._handle.truncate()
+        self.rows_written = self.rows_committed = 0
+        self._start()
+        return cleared
+
+    def delete_after(self, global_count: int) -> int:
+        raise RuntimeError("The file sink cannot resume; run without --resume")
+
+    def count(self) -> int:
+        return self.rows_committed
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class SQLiteSink:
+    """Local SQLite copy of the grouping table, for testing load logic without a server"""
+
+    name = 'sqlite'
+    connection = None
+    resumable = True
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, insert_sql: str = None):
+        self.path = path
+        self.insert_sql = insert_sql or grouping_insert_sql('[grouping]')
+        self.database = None
+
+    def open(self) -> bool:
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.database = sqlite3.connect(self.path)
+        self.database.execute("PRAGMA journal_mode=WAL")
+        self.database.execute("PRAGMA synchronous=NORMAL")
+        self.database.execute(SQLITE_GROUPING_DDL)
+        self.database.commit()
+        return True
+
+    def describe(self) -> str:
+        return f"SQLite database {self.path}"
+
+    def insert_rows(self, rows: Sequence[tuple]) -> int:
+        self.database.executemany(self.insert_sql, rows)
+        return len(rows)
+
+    def commit(self) -> None:
+        self.database.commit()
+
+    def rollback(self) -> None:
+        self.database.rollback()
+
+    def clear(self) -> int:
+        cursor = self.database.execute("DELETE FROM [grouping] WHERE [created_by] = 'Generated'")
+        self.database.commit()
+        return cursor.rowcount
+
+    def delete_after(self, global_count: int) -> int:
+        cursor = self.database.execute(
+            "DELETE FROM [grouping] WHERE [created_by] = 'Generated' AND [number] > ?", (global_count,)
+        )
+        self.database.commit()
+        return cursor.rowcount
+
+    def count(self) -> int:
+        return self.database.execute(
+            "SELECT COUNT(*) FROM [grouping] WHERE [created_by] = 'Generated'"
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        if self.database is not None:
+            self.database.close()
+            self.database = None
+
+
+class SqlServerSink:
+    """[dbo].[grouping] on SQL Server through the configured insert engine"""
+
+    name = 'sqlserver'
+    resumable = True
+
+    def __init__(
+        self,
+        db=None,
+        insert_engine: Optional[str] = None,
+        insert_sql: str = GROUPING_INSERT_SQL,
+        fast_executemany: bool = True,
+        reset_strategy: str = 'auto',
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ):
+        """
+        Args:
+            db: DatabaseConnection (default: a new one from the environment)
+            insert_engine: Insert engine name (see insert_engines.create_insert_engine)
+            insert_sql: INSERT statement for the executemany engine
+            fast_executemany: Enable pyodbc fast_executemany in the executemany engine
+            reset_strategy: GroupingReset strategy used by clear()
+            progress_callback: Reset progress callback, called as (deleted, total)
+        """
+        self.db = db
+        self.insert_engine_name = insert_engine
+        self.insert_sql = insert_sql
+        self.fast_executemany = fast_executemany
+        self.reset_strategy = reset_strategy
+        self.progress_callback = progress_callback
+        self.driver = None
+        self.connection = None
+        self.engine = None
+
+    def open(self) -> bool:
+        from database_connection import DatabaseConnection
+        from insert_engines import create_insert_engine
+
+        self.db = self.db or DatabaseConnection()
+        self.driver = self.db.test_connection()['preferred']
+        if not self.driver:
+            return False
+        self.connection = self.db.get_connection(self.driver)
+        if not self.connection:
+            return False
+        self.engine = create_insert_engine(
+            self.insert_engine_name, self.connection, self.insert_sql, self.fast_executemany
+        )
+        logger.info(f"Using insert engine: {self.engine.name}")
+        return True
+
+    def describe(self) -> str:
+        return f"SQL Server via {self.driver.upper()} ({self.engine.name} engine)"
+
+    def insert_rows(self, rows: Sequence[tuple]) -> int:
+        return self.engine.insert_rows(self.connection, rows)
+
+    def commit(self) -> None:
+        # Rows buffered by the insert engine belong to this transaction
+        self.engine.flush(self.connection)
+        self.connection.commit()
+
+    def rollback(self) -> None:
+        self.connection.rollback()
+
+    def clear(self) -> int:
+        from grouping_reset import GroupingReset
+
+        summary = GroupingReset(self.connection, progress_callback=self.progress_callback).reset(self.reset_strategy)
+        logger.info(f"Cleared {summary['deleted']} existing records ({summary['strategy']})")
+        return summary['deleted']
+
+    def delete_after(self, global_count: int) -> int:
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "DELETE FROM [dbo].[grouping] WHERE [created_by] = 'Generated' AND CAST([number] AS BIGINT) > ?",
+            (global_count,)
+        )
+        deleted = cursor.rowcount
+        self.connection.commit()
+        cursor.close()
+        return deleted
+
+    def count(self) -> int:
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM [dbo].[grouping] WHERE [created_by] = 'Generated'")
+        row = cursor.fetchone()
+        cursor.close()
+        return list(row.values())[0] if isinstance(row, dict) else row[0]
+
+    def close(self) -> None:
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def create_sink(name: Optional[str] = None, path: Optional[str] = None, **options: Any):
+    """
+    Create a load sink
+    Args:
+        name: 'sqlserver', 'sqlite', 'file' or 'null' (default: SINK env, then 'sqlserver')
+        path: Database or output file for the sqlite and file sinks (default: SINK_PATH env)
+        options: SqlServerSink keyword arguments
+    Returns:
+        Unopened sink; call open() before writing
+    """
+    name = (name or os.getenv('SINK', 'sqlserver')).lower()
+    path = path or os.getenv('SINK_PATH')
+    if name == 'sqlserver':
+        return SqlServerSink(**options)
+    if name == 'sqlite':
+        return SQLiteSink(path or DEFAULT_SQLITE_PATH)
+    if name == 'file':
+        return FileSink(path or DEFAULT_FILE_PATH)
+    if name == 'null':
+        return NullSink()
+    raise ValueError(f"Unknown sink: {name}")
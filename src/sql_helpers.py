@@ -0,0 +1,29 @@
+"""
+SQL Helpers
+Small T-SQL text and result-row helpers shared by the grouping tools
+"""
+
+GROUPING_TABLE = '[dbo].[grouping]'
+
+
+def row_values(row) -> tuple:
+    """Row values for both pyodbc rows and pymssql dict rows"""
+    if isinstance(row, dict):
+        return tuple(row.values())
+    return tuple(row)
+
+
+def scalar(cursor):
+    """First column of the next row of a cursor, or None when there is no row"""
+    row = cursor.fetchone()
+    return row_values(row)[0] if row else None
+
+
+def sql_literal(text: str) -> str:
+    """N'...' string literal"""
+    return "N'" + text.replace("'", "''") + "'"
+
+
+def quote_name(name: str) -> str:
+    """[bracketed] identifier"""
+    return '[' + name.replace(']', ']]') + ']'
@@ -0,0 +1,293 @@
+"""
+Staged Load Pipeline
+Overlaps record generation, tuple packing and sending: generator and packer
+run on their own threads, joined to the sending thread by bounded queues
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+STAGES = ('generate', 'pack', 'send')
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class PipelineBatch(NamedTuple):
+    """Packed rows plus the state snapshot taken right after their last record was generated"""
+    rows: List[tuple]
+    state: Any
+
+
+class _StageClock:
+    """Busy / starved / blocked time of one stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.rows = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+
+    def as_dict(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            'stage': self.name,
+            'items': self.items,
+            'rows': self.rows,
+            'busy_seconds': self.busy,
+            'starved_seconds': self.starved,
+            'blocked_seconds': self.blocked,
+            'utilization': self.busy / elapsed if elapsed > 0 else 0.0
+        }
+
+
+class StagedPipeline:
+    """
+    generate -> pack -> send, iterated by the sending thread
+
+    Each queue holds `queue_depth` batches (2 = double buffering: while one
+    batch is being sent the next is packed and the one after is generated).
+    A full queue blocks its producer, which is the backpressure between
+    stages. The send stage is the caller's loop body; the time the caller
+    spends between batches counts as send time.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[Dict[str, Any]],
+        pack: Callable[[List[Dict[str, Any]]], List[tuple]],
+        batch_size: Union[int, Callable[[], int]],
+        queue_depth: int = 2,
+        snapshot: Optional[Callable[[], Any]] = None,
+        threaded: bool = True
+    ):
+        """
+        Args:
+            records: Record iterator (consumed on the generator thread)
+            pack: Turns a list of records into row tuples
+            batch_size: Rows per batch, or a callable read before each batch (adaptive sizing)
+            queue_depth: Batches buffered between neighbouring stages
+            snapshot: Called on the generator thread after each batch, e.g. generator.counter_state
+            threaded: False runs all stages inline on the caller's thread
+        """
+        self.records = records
+        self.pack = pack
+        self.batch_size = batch_size if callable(batch_size) else (lambda: batch_size)
+        self.queue_depth = max(1, queue_depth)
+        self.snapshot = snapshot or (lambda: None)
+        self.threaded = threaded
+        self.clocks = {name: _StageClock(name) for name in STAGES}
+        self.started = None
+        self.finished = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._queues: Dict[str, queue.Queue] = {}
+        self._error: Optional[BaseException] = None
+
+    def _next_records(self, iterator: Iterator) -> List[Dict[str, Any]]:
+        size = max(1, int(self.batch_size()))
+        batch = []
+        for record in iterator:
+            batch.append(record)
+            if len(batch) >= size:
+                break
+        return batch
+
+    def __iter__(self) -> Iterator[PipelineBatch]:
+        self.started = time.perf_counter()
+        try:
+            if self.threaded:
+                yield from self._iter_threaded()
+            else:
+                yield from self._iter_inline()
+        finally:
+            self.close()
+
+    def _iter_inline(self) -> Iterator[PipelineBatch]:
+        iterator = iter(self.records)
+        generate, pack, send = self.clocks['generate'], self.clocks['pack'], self.clocks['send']
+        while True:
+            started = time.perf_counter()
+            records = self._next_records(iterator)
+            state = self.snapshot()
+            generate.busy += time.perf_counter() - started
+            if not records:
+                return
+            generate.items += 1
+            generate.rows += len(records)
+
+            started = time.perf_counter()
+            rows = self.pack(records)
+            pack.busy += time.perf_counter() - started
+            pack.items += 1
+            pack.rows += len(rows)
+
+            started = time.perf_counter()
+            yield PipelineBatch(rows, state)
+            send.busy += time.perf_counter() - started
+            send.items += 1
+            send.rows += len(rows)
+
+    def _put(self, target: queue.Queue, item, clock: _StageClock) -> bool:
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    target.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            clock.blocked += time.perf_counter() - started
+
+    def _get(self, source: queue.Queue, clock: _StageClock):
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    return source.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+            return _DONE
+        finally:
+            clock.starved += time.perf_counter() - started
+
+    def _fail(self, error: BaseException) -> None:
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _generate(self, output: queue.Queue) -> None:
+        clock = self.clocks['generate']
+        try:
+            iterator = iter(self.records)
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                records = self._next_records(iterator)
+                state = self.snapshot()
+                clock.busy += time.perf_counter() - started
+                if not records:
+                    break
+                clock.items += 1
+                clock.rows += len(records)
+                if not self._put(output, (records, state), clock):
+                    return
+        except BaseException as e:
+            self._fail(e)
+            return
+        self._put(output, _DONE, clock)
+
+    def _pack(self, source: queue.Queue, output: queue.Queue) -> None:
+        clock = self.clocks['pack']
+        try:
+            while True:
+                item = self._get(source, clock)
+                if item is _DONE:
+                    break
+                records, state = item
+                started = time.perf_counter()
+                rows = self.pack(records)
+                clock.busy += time.perf_counter() - started
+                clock.items += 1
+                clock.rows += len(rows)
+                if not self._put(output, PipelineBatch(rows, state), clock):
+                    return
+        except BaseException as e:
+            self._fail(e)
+            return
+        self._put(output, _DONE, clock)
+
+    def _iter_threaded(self) -> Iterator[PipelineBatch]:
+        generated: queue.Queue = queue.Queue(maxsize=self.queue_depth)
+        packed: queue.Queue = queue.Queue(maxsize=self.queue_depth)
+        self._queues = {'generated': generated, 'packed': packed}
+        self._threads = [
+            threading.Thread(target=self._generate, args=(generated,), name='pipeline-generate', daemon=True),
+            threading.Thread(target=self._pack, args=(generated, packed), name='pipeline-pack', daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        send = self.clocks['send']
+        while True:
+            item = self._get(packed, send)
+            if item is _DONE:
+                break
+            started = time.perf_counter()
+            yield item
+            send.busy += time.perf_counter() - started
+            send.items += 1
+            send.rows += len(item.rows)
+
+        if self._error is not None:
+            raise self._error
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Batches currently waiting between stages (empty when running inline)"""
+        return {name: buffer.qsize() for name, buffer in self._queues.items()}
+
+    def close(self) -> None:
+        """Stop the stage threads (also called when the sender stops early)."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.finished is None and self.started is not None:
+            self.finished = time.perf_counter()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Per-stage utilization
+        Returns:
+            Elapsed seconds, one entry per stage and the busiest (bottleneck) stage
+        """
+        end = self.finished or time.perf_counter()
+        elapsed = end - self.started if self.started is not None else 0.0
+        stages = [self.clocks[name].as_dict(elapsed) for name in STAGES]
+        return {
+            'seconds': elapsed,
+            'stages': stages,
+            'bottleneck': max(stages, key=lambda stage: stage['busy_seconds'])['stage'] if elapsed else None
+        }
+
+
+def combine_stage_stats(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Add up StagedPipeline.stats() of several runs (e.g. one per category)
+    Args:
+        runs: Stats dictionaries
+    Returns:
+        Stats dictionary in the same shape covering all runs
+    """
+    seconds = sum(run['seconds'] for run in runs)
+    totals = {name: _StageClock(name) for name in STAGES}
+    for run in runs:
+        for stage in run['stages']:
+            clock = totals[stage['stage']]
+            clock.items += stage['items']
+            clock.rows += stage['rows']
+            clock.busy += stage['busy_seconds']
+            clock.starved += stage['starved_seconds']
+            clock.blocked += stage['blocked_seconds']
+    stages = [totals[name].as_dict(seconds) for name in STAGES]
+    return {
+        'seconds': seconds,
+        'stages': stages,
+        'bottleneck': max(stages, key=lambda stage: stage['busy_seconds'])['stage'] if seconds else None
+    }
+
+
+def format_stage_stats(stats: Dict[str, Any]) -> str:
+    """One-line utilization summary, e.g. for logs."""
+    parts = [
+        f"{stage['stage']} {stage['utilization']:.0%} busy"
+        f" (starved {stage['starved_seconds']:.1f}s, blocked {stage['blocked_seconds']:.1f}s)"
+        for stage in stats['stages']
+    ]
+    return f"{', '.join(parts)}; bottleneck: {stats['bottleneck']}"
@@ -16,6 +16,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__)))
 
 from database_connection import DatabaseConnection
 from file_number_generator import FileNumberGenerator
+from grouping_reset import GroupingReset
+from load_validation import LoadValidator, compare, expected_from_records, print_report
 
 # Load environment variables
 load_dotenv()
@@ -41,13 +43,10 @@ class DatabaseInserter:
             Number of records deleted
         """
         try:
-            cursor = connection.cursor()
-            cursor.execute("DELETE FROM [dbo].[grouping] WHERE [created_by] = 'Generated'")
-            deleted_count = cursor.rowcount
-            connection.commit()
-            cursor.close()
+            summary = GroupingReset(connection).reset()
+            deleted_count = summary['deleted']
             
-            self.logger.info(f"Cleared {deleted_count} existing test records")
+            self.logger.info(f"Cleared {deleted_count} existing test records ({summary['strategy']})")
             return deleted_count
             
         except Exception as e:
@@ -108,82 +107,30 @@ class DatabaseInserter:
             connection.rollback()
             return False
     
-    def validate_inserted_data(self, connection, expected_count: int) -> Dict[str, Any]:
+    def validate_inserted_data(self, connection, records: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Validate the inserted data
+        Validate the inserted data against the inserted records in one grouped scan
         Args:
             connection: Database connection
-            expected_count: Expected number of records
+            records: Records that were inserted
         Returns:
             Validation results dictionary
         """
         try:
-            cursor = connection.cursor()
-            results = {}
-            
-            # Check total count
-            cursor.execute("SELECT COUNT(*) FROM [dbo].[grouping] WHERE [created_by] = 'Generated'")
-            actual_count = cursor.fetchone()[0]
-            results['total_count'] = {'expected': expected_count, 'actual': actual_count, 'match': actual_count == expected_count}
-            
-            # Check registry distribution
-            cursor.execute("""
-                SELECT [registry], COUNT(*) 
-                FROM [dbo].[grouping] 
-                WHERE [created_by] = 'Generated'
-                GROUP BY [registry]
-                ORDER BY [registry]
-            """)
-            registry_counts = dict(cursor.fetchall())
-            results['registry_distribution'] = registry_counts
-            
-            # Check land use distribution
-            cursor.execute("""
-                SELECT [landuse], COUNT(*) 
-                FROM [dbo].[grouping] 
-                WHERE [created_by] = 'Generated'
-                GROUP BY [landuse]
-                ORDER BY [landuse]
-            """)
-            landuse_counts = dict(cursor.fetchall())
-            results['landuse_distribution'] = landuse_counts
-            
-            # Check year range
-            cursor.execute("""
-                SELECT MIN([year]), MAX([year]) 
-                FROM [dbo].[grouping] 
-                WHERE [created_by] = 'Generated'
-            """)
-            year_range = cursor.fetchone()
-            results['year_range'] = {'min': year_range[0], 'max': year_range[1]}
-            
-            # Check group range
-            cursor.execute("""
-                SELECT MIN([group]), MAX([group]), COUNT(DISTINCT [group])
-                FROM [dbo].[grouping] 
-                WHERE [created_by] = 'Generated'
-            """)
-            group_info = cursor.fetchone()
-            results['group_info'] = {'min': group_info[0], 'max': group_info[1], 'distinct_count': group_info[2]}
+            validator = LoadValidator(connection, self.generator)
+            actual = validator.actual_slices()
+            report = compare(expected_from_records(records), actual, validator.fields)
+            results = {'report': report}
+            results['total_count'] = {
+                'expected': report['expected_total'],
+                'actual': report['actual_total'],
+                'match': report['actual_total'] == report['expected_total']
+            }
             
             # Check CON registry assignments
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM [dbo].[grouping] 
-                WHERE [created_by] = 'Generated' 
-                AND [awaiting_fileno] LIKE '%CON%' 
-                AND [registry] = '3'
-            """)
-            con_registry3_count = cursor.fetchone()[0]
-            
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM [dbo].[grouping] 
-                WHERE [created_by] = 'Generated' 
-                AND [awaiting_fileno] LIKE '%CON%'
-            """)
-            total_con_count = cursor.fetchone()[0]
-            
+            con_counts = {key: entry['rows'] for key, entry in actual.items() if key[1].startswith('CON')}
+            con_registry3_count = sum(count for (registry, _, _), count in con_counts.items() if registry == '3')
+            total_con_count = sum(con_counts.values())
             results['con_registry_check'] = {
                 'total_con': total_con_count,
                 'registry3_con': con_registry3_count,
@@ -191,6 +138,7 @@ class DatabaseInserter:
             }
             
             # Sample records
+            cursor = connection.cursor()
             cursor.execute("""
                 SELECT TOP 5 [awaiting_fileno], [registry], [group], [registry_batch_no], [landuse], [year]
                 FROM [dbo].[grouping] 
@@ -261,7 +209,7 @@ class DatabaseInserter:
             
             # Step 4: Validate data
             print(f"\nStep 4: Validating inserted data...")
-            validation_results = self.validate_inserted_data(connection, len(test_records))
+            validation_results = self.validate_inserted_data(connection, test_records)
             
             if 'error' in validation_results:
                 print(f"❌ Validation error: {validation_results['error']}")
@@ -269,18 +217,7 @@ class DatabaseInserter:
                 
             # Print validation results
             print(f"\n📊 Validation Results:")
-            print(f"Total Records: {validation_results['total_count']['actual']} (Expected: {validation_results['total_count']['expected']}) {'✅' if validation_results['total_count']['match'] else '❌'}")
-            
-            print(f"\nRegistry Distribution:")
-            for registry, count in validation_results['registry_distribution'].items():
-                print(f"  {registry}: {count} records")
-            
-            print(f"\nLand Use Distribution:")
-            for landuse, count in validation_results['landuse_distribution'].items():
-                print(f"  {landuse}: {count} records")
-            
-            print(f"\nYear Range: {validation_results['year_range']['min']} - {validation_results['year_range']['max']}")
-            print(f"Groups: {validation_results['group_info']['min']} - {validation_results['group_info']['max']} ({validation_results['group_info']['distinct_count']} distinct)")
+            print_report(validation_results['report'])
             
             print(f"\nCON Registry Check:")
             con_check = validation_results['con_registry_check']
@@ -295,7 +232,7 @@ class DatabaseInserter:
             
             # Overall test result
             all_checks_passed = (
-                validation_results['total_count']['match'] and
+                validation_results['report']['match'] and
                 validation_results['con_registry_check']['all_con_in_registry3']
             )
             
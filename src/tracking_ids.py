@@ -0,0 +1,157 @@
+"""
+Tracking ID Engines
+Pluggable generators for TRK-XXXXXXXX-XXXXX tracking IDs
+"""
+
+import os
+import random
+import string
+import hashlib
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+ALPHABET = string.ascii_uppercase + string.digits
+ID_DIGITS = 13  # 8 + 5 characters; 36**13 > 2**64 so every 64-bit value fits
+MASK_64 = (1 << 64) - 1
+
+# SplitMix64 constants (odd multipliers keep every step a bijection on 64 bits)
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+MIX_MULTIPLIER_1 = 0xBF58476D1CE4E5B9
+MIX_MULTIPLIER_2 = 0x94D049BB133111EB
+
+_ALPHABET_BYTES = np.frombuffer(ALPHABET.encode('ascii'), dtype=np.uint8)
+
+
+def _format_tracking_id(characters: str) -> str:
+    return f"TRK-{characters[:8]}-{characters[8:]}"
+
+
+def find_duplicates(tracking_ids: Iterable[str]) -> List[str]:
+    """Return tracking IDs that occur more than once."""
+    seen = set()
+    duplicates = []
+    for tracking_id in tracking_ids:
+        if tracking_id in seen:
+            duplicates.append(tracking_id)
+        seen.add(tracking_id)
+    return duplicates
+
+
+class RandomTrackingIdEngine:
+    """Unseeded random tracking IDs (original behaviour)"""
+
+    name = 'random'
+
+    def tracking_id(self, global_index: int) -> str:
+        """Generate a random tracking ID; the index is ignored."""
+        return _format_tracking_id(''.join(random.choices(ALPHABET, k=ID_DIGITS)))
+
+    def tracking_ids(self, global_indices: Sequence[int]) -> List[str]:
+        """Generate one random tracking ID per index."""
+        characters = ''.join(random.choices(ALPHABET, k=ID_DIGITS * len(global_indices)))
+        return [
+            _format_tracking_id(characters[offset:offset + ID_DIGITS])
+            for offset in range(0, len(characters), ID_DIGITS)
+        ]
+
+
+class KeyedHashTrackingIdEngine:
+    """
+    Counter-based tracking IDs derived from (seed, global index)
+
+    The index is pushed through a keyed chain of 64-bit bijections and the
+    result written as 13 base-36 digits, so distinct indices always give
+    distinct IDs and any ID can be recomputed from its index alone.
+    """
+
+    name = 'keyed'
+
+    def __init__(self, seed: Union[int, str]):
+        digest = hashlib.blake2b(str(seed).encode('utf-8'), digest_size=16).digest()
+        self.seed = seed
+        self._key_add = int.from_bytes(digest[:8], 'little')
+        self._key_xor = int.from_bytes(digest[8:], 'little')
+
+    def _mix(self, value: int) -> int:
+        value = (value * GOLDEN_GAMMA + self._key_add) & MASK_64
+        value ^= value >> 30
+        value = (value * MIX_MULTIPLIER_1) & MASK_64
+        value ^= value >> 27
+        value = (value * MIX_MULTIPLIER_2) & MASK_64
+        value ^= value >> 31
+        value ^= self._key_xor
+        value = (value * MIX_MULTIPLIER_1) & MASK_64
+        value ^= value >> 29
+        return value
+
+    def _mix_array(self, values: np.ndarray) -> np.ndarray:
+        values = values.astype(np.uint64) * np.uint64(GOLDEN_GAMMA) + np.uint64(self._key_add)
+        values ^= values >> np.uint64(30)
+        values *= np.uint64(MIX_MULTIPLIER_1)
+        values ^= values >> np.uint64(27)
+        values *= np.uint64(MIX_MULTIPLIER_2)
+        values ^= values >> np.uint64(31)
+        values ^= np.uint64(self._key_xor)
+        values *= np.uint64(MIX_MULTIPLIER_1)
+        values ^= values >> np.uint64(29)
+        return values
+
+    def tracking_id(self, global_index: int) -> str:
+        """
+        Derive the tracking ID for a single global index
+        Args:
+            global_index: Zero-based position of the record in the generation run
+        Returns:
+            Tracking ID string
+        """
+        value = self._mix(global_index)
+        characters = []
+        for _ in range(ID_DIGITS):
+            value, digit = divmod(value, 36)
+            characters.append(ALPHABET[digit])
+        return _format_tracking_id(''.join(reversed(characters)))
+
+    def tracking_ids(self, global_indices: Union[Sequence[int], np.ndarray]) -> List[str]:
+        """
+        Derive tracking IDs for many global indices in one vectorized pass
+        Args:
+            global_indices: Zero-based positions of the records
+        Returns:
+            List of tracking ID strings in index order
+        """
+        values = self._mix_array(np.asarray(global_indices, dtype=np.int64))
+        size = len(values)
+        encoded = np.empty((size, 18), dtype=np.uint8)
+        encoded[:, :4] = np.frombuffer(b'TRK-', dtype=np.uint8)
+        encoded[:, 12] = ord('-')
+        columns = list(range(4, 12)) + list(range(13, 18))
+        base = np.uint64(36)
+        for column in reversed(columns):
+            encoded[:, column] = _ALPHABET_BYTES[values % base]
+            values //= base
+        return encoded.view('S18').ravel().astype('U18').tolist()
+
+    def verify(self, global_index: int, tracking_id: str) -> bool:
+        """Check that a stored tracking ID belongs to the given global index."""
+        return self.tracking_id(global_index) == tracking_id
+
+
+def create_tracking_id_engine(mode: Optional[str] = None, seed: Optional[str] = None):
+    """
+    Build the tracking ID engine selected by arguments or environment
+    Args:
+        mode: 'random' or 'keyed' (default: TRACKING_ID_MODE, else 'random')
+        seed: Key for keyed mode (default: TRACKING_ID_SEED)
+    Returns:
+        Tracking ID engine instance
+    """
+    mode = (mode or os.getenv('TRACKING_ID_MODE', 'random')).strip().lower()
+    if mode == 'random':
+        return RandomTrackingIdEngine()
+    if mode == 'keyed':
+        seed = seed if seed is not None else os.getenv('TRACKING_ID_SEED')
+        if seed is None or str(seed).strip() == '':
+            raise ValueError("TRACKING_ID_SEED is required for keyed tracking IDs")
+        return KeyedHashTrackingIdEngine(seed)
+    raise ValueError(f"Unknown tracking ID mode: {mode}")
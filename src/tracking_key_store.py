@@ -0,0 +1,368 @@
+"""
+Tracking Key Store
+Local SQLite copy of the grouping match keys (normalized awaiting_fileno to
+tracking_id and mapping status), refreshed incrementally from the grouping.id
+high-water mark, so importers resolve keys without a database round trip.
+One store file is shared by the CSV importer, the Excel importer and the
+import server
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# Add src directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from grouping_match_key import GroupingMatchKey, match_key
+from sql_helpers import GROUPING_TABLE, row_values
+
+DEFAULT_STORE_PATH = 'checkpoints/tracking_keys.sqlite3'
+DEFAULT_PAGE_ROWS = 50000
+# Ids below the high-water mark re-read on every refresh, for rows whose
+# identity was allocated before, but committed after, the last refresh
+DEFAULT_OVERLAP_IDS = 1000
+# Keys per SELECT ... IN (...), below SQLite's bound parameter limit
+LOOKUP_CHUNK = 500
+SCHEMA_VERSION = '1'
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class TrackingKeyStore:
+    """Persistent key to tracking_id map with incremental refresh from SQL Server"""
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_STORE_PATH,
+        table: str = GROUPING_TABLE,
+        source: Optional[str] = None,
+        page_rows: int = DEFAULT_PAGE_ROWS,
+        overlap_ids: int = DEFAULT_OVERLAP_IDS
+    ):
+        """
+        Args:
+            path: SQLite file (created with its directory when missing)
+            table: Grouping table the keys come from
+            source: Label of the server and database the keys belong to; a store
+                built from another source is rebuilt (default: DB_SQLSRV_HOST/DB_SQLSRV_DATABASE)
+            page_rows: Grouping rows read per round trip while refreshing
+            overlap_ids: Ids below the high-water mark re-read on each refresh
+        """
+        self.path = Path(path)
+        self.table = table
+        if source is None:
+            source = f"{os.getenv('DB_SQLSRV_HOST', '')}/{os.getenv('DB_SQLSRV_DATABASE', '')}"
+        self.source = f"{source}/{table}"
+        self.page_rows = max(1, page_rows)
+        self.overlap_ids = max(0, overlap_ids)
+        self.logger = logging.getLogger(__name__)
+        # One connection shared by the threads of a process; WAL lets other processes read meanwhile
+        self._lock = threading.RLock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=600, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self._lock:
+            # WITHOUT ROWID keeps the rows in key order: a lookup is one B-tree seek
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS keys (
+                    key TEXT PRIMARY KEY,
+                    id INTEGER NOT NULL,
+                    tracking_id TEXT,
+                    mapping INTEGER
+                ) WITHOUT ROWID
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_keys_tracking_id ON keys (tracking_id)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID")
+
+    def _meta(self) -> Dict[str, str]:
+        return dict(self._db.execute("SELECT name, value FROM meta").fetchall())
+
+    def _set_meta(self, **values: Any) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+            [(name, None if value is None else str(value)) for name, value in values.items()]
+        )
+
+    @property
+    def high_water(self) -> int:
+        """Highest grouping.id copied into the store"""
+        with self._lock:
+            return int(self._meta().get('high_water') or 0)
+
+    def _server_state(self, cursor, high_water: int) -> Tuple[int, Any]:
+        """MAX(id) of the grouping table and the tracking_id now stored at the high-water id"""
+        cursor.execute(
+            f"SELECT MAX([id]), (SELECT [tracking_id] FROM {self.table} WHERE [id] = ?) FROM {self.table}",
+            (high_water,)
+        )
+        row = cursor.fetchone()
+        max_id, anchor = row_values(row) if row else (None, None)
+        return int(max_id or 0), anchor
+
+    def _needs_rebuild(self, meta: Dict[str, str], max_id: int, anchor: Any) -> Optional[str]:
+        """Reason the stored keys can no longer be extended, if any"""
+        if not meta:
+            return 'new store'
+        if meta.get('schema') != SCHEMA_VERSION or meta.get('source') != self.source:
+            return 'different source'
+        high_water = int(meta.get('high_water') or 0)
+        if not high_water:
+            return None
+        if max_id < high_water:
+            return 'ids went backwards (table truncated)'
+        # The row at the high-water mark is deleted or replaced when the table was reset and reloaded
+        if (None if anchor is None else str(anchor)) != meta.get('anchor_tracking_id'):
+            return 'high-water row changed (table reset)'
+        return None
+
+    def refresh(self, connection, full: bool = False) -> Dict[str, Any]:
+        """
+        Copy grouping rows added since the last refresh
+        Runs in one SQLite transaction: other readers see the previous keys until
+        it commits, and concurrent refreshes from other processes wait their turn.
+        Args:
+            connection: SQL Server connection (pyodbc)
+            full: Rebuild the store from the first row
+        Returns:
+            Dictionary with rows read, the high-water mark and whether the store was rebuilt
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            cursor = connection.cursor()
+            try:
+                meta = self._meta()
+                high_water = int(meta.get('high_water') or 0)
+                max_id, anchor = self._server_state(cursor, high_water)
+                reason = 'requested' if full else self._needs_rebuild(meta, max_id, anchor)
+                if reason:
+                    self.logger.info(f"Rebuilding tracking key store {self.path} ({reason})")
+                    self._db.execute("DELETE FROM keys")
+                    high_water = 0
+
+                key_sql = GroupingMatchKey(connection, self.table).key_sql()
+                page_sql = (
+                    f"SELECT TOP ({self.page_rows}) [id], {key_sql}, [tracking_id], [mapping] "
+                    f"FROM {self.table} WHERE [id] > ? AND [id] <= ? ORDER BY [id]"
+                )
+                position = max(0, high_water - self.overlap_ids) if high_water else 0
+                rows_read = 0
+                while position < max_id:
+                    cursor.execute(page_sql, (position, max_id))
+                    rows = [row_values(row) for row in cursor.fetchall()]
+                    if not rows:
+                        break
+                    # Lowest id wins for duplicate keys, as in GroupingMatchKey.fetch_tracking_ids
+                    self._db.executemany("""
+                        INSERT INTO keys (key, id, tracking_id, mapping) VALUES (?, ?, ?, ?)
+                        ON CONFLICT (key) DO UPDATE SET
+                            id = excluded.id, tracking_id = excluded.tracking_id, mapping = excluded.mapping
+                        WHERE excluded.id <= keys.id
+                    """, [
+                        (key, row_id, None if tracking_id is None else str(tracking_id), int(mapping or 0))
+                        for row_id, key, tracking_id, mapping in rows
+                        if key
+                    ])
+                    rows_read += len(rows)
+                    position = int(rows[-1][0])
+
+                if max_id != high_water:
+                    anchor = self._server_state(cursor, max_id)[1]
+                    high_water = max_id
+                self._set_meta(
+                    schema=SCHEMA_VERSION,
+                    source=self.source,
+                    high_water=high_water,
+                    anchor_tracking_id=anchor,
+                    refreshed_at=datetime.now().isoformat()
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            finally:
+                cursor.close()
+
+        self.logger.info(
+            f"Tracking key store refreshed: {rows_read:,} grouping rows read, high-water id {high_water:,}"
+        )
+        return {'rows_read': rows_read, 'high_water': high_water, 'rebuilt': bool(reason), 'reason': reason}
+
+    def entries(self, keys: Iterable[Any]) -> Dict[str, Tuple[Optional[str], int]]:
+        """
+        Look up many keys
+        Args:
+            keys: Values to match (normalized with match_key)
+        Returns:
+            Dictionary of matched key to (tracking_id, mapping)
+        """
+        unique_keys = sorted({key for key in (match_key(value) for value in keys) if key})
+        found: Dict[str, Tuple[Optional[str], int]] = {}
+        with self._lock:
+            for chunk in _chunks(unique_keys, LOOKUP_CHUNK):
+                placeholders = ','.join('?' * len(chunk))
+                for key, tracking_id, mapping in self._db.execute(
+                    f"SELECT key, tracking_id, mapping FROM keys WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = (tracking_id, mapping)
+        return found
+
+    def lookup(self, keys: Iterable[Any]) -> Dict[str, Optional[str]]:
+        """Dictionary of matched key to tracking_id, like GroupingMatchKey.fetch_tracking_ids"""
+        return {key: tracking_id for key, (tracking_id, _) in self.entries(keys).items()}
+
+    def get(self, key: Any) -> Optional[str]:
+        """tracking_id of a single key, or None"""
+        value = match_key(key)
+        if not value:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT tracking_id FROM keys WHERE key = ?", (value,)).fetchone()
+        return row[0] if row else None
+
+    def mark_mapped(self, tracking_ids: Iterable[Any]) -> int:
+        """
+        Record that grouping rows were mapped by an import (mapping = 1)
+        Args:
+            tracking_ids: tracking_id values just updated in the grouping table
+        Returns:
+            Number of stored keys updated
+        """
+        ids = sorted({str(value) for value in tracking_ids if value})
+        updated = 0
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for chunk in _chunks(ids, LOOKUP_CHUNK):
+                    placeholders = ','.join('?' * len(chunk))
+                    updated += self._db.execute(
+                        f"UPDATE keys SET mapping = 1 WHERE tracking_id IN ({placeholders}) AND mapping <> 1", chunk
+                    ).rowcount
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return updated
+
+    def stats(self) -> Dict[str, Any]:
+        """Key counts and refresh state of the store"""
+        with self._lock:
+            keys, mapped = self._db.execute("SELECT COUNT(*), COALESCE(SUM(mapping), 0) FROM keys").fetchone()
+            meta = self._meta()
+        return {
+            'path': str(self.path),
+            'source': meta.get('source'),
+            'keys': keys,
+            'mapped': mapped,
+            'high_water': int(meta.get('high_water') or 0),
+            'refreshed_at': meta.get('refreshed_at')
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_shared_store: Optional[TrackingKeyStore] = None
+_shared_lock = threading.Lock()
+
+
+def shared_key_store() -> Optional[TrackingKeyStore]:
+    """
+    Process-wide store configured by TRACKING_KEY_STORE
+    Returns:
+        The shared store, or None when TRACKING_KEY_STORE is 0/off or the file cannot be opened
+    """
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            path = os.getenv('TRACKING_KEY_STORE', DEFAULT_STORE_PATH)
+            if path.strip().lower() in ('', '0', 'off', 'false'):
+                return None
+            try:
+                _shared_store = TrackingKeyStore(
+                    path,
+                    page_rows=int(os.getenv('TRACKING_KEY_STORE_PAGE_ROWS', DEFAULT_PAGE_ROWS))
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Tracking key store {path} unavailable, using database lookups: {e}")
+                return None
+        return _shared_store
+
+
+def refresh_shared_key_store() -> Optional[Dict[str, Any]]:
+    """Refresh the shared store on its own connection (used to warm it up ahead of imports)"""
+    from database_connection import DatabaseConnection
+
+    store = shared_key_store()
+    if store is None:
+        return None
+    connection = DatabaseConnection().get_connection()
+    if not connection:
+        logger.warning("Tracking key store not refreshed: no database connection")
+        return None
+    try:
+        return store.refresh(connection)
+    except Exception as e:
+        logger.warning(f"Tracking key store refresh failed: {e}")
+        return None
+    finally:
+        connection.close()
+
+
+def main():
+    """Refresh or inspect the tracking key store from the command line"""
+    from database_connection import DatabaseConnection
+
+    parser = argparse.ArgumentParser(description="Local key to tracking_id store for importers")
+    parser.add_argument("--path", default=os.getenv('TRACKING_KEY_STORE') or DEFAULT_STORE_PATH,
+                        help="Store file (default: TRACKING_KEY_STORE or %(default)s)")
+    parser.add_argument("--table", default=GROUPING_TABLE, help="Grouping table (default: %(default)s)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild from the first grouping row")
+    parser.add_argument("--stats", action="store_true", help="Show the store without refreshing it")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = TrackingKeyStore(args.path, args.table)
+    try:
+        if not args.stats:
+            connection = DatabaseConnection().get_connection()
+            if not connection:
+                print("❌ Could not establish database connection")
+                return False
+            try:
+                result = store.refresh(connection, full=args.rebuild)
+            finally:
+                connection.close()
+            action = f"rebuilt ({result['reason']})" if result['rebuilt'] else "refreshed"
+            print(f"✅ Store {action}: {result['rows_read']:,} rows read")
+
+        stats = store.stats()
+        print(f"Store: {stats['path']} ({stats['source']})")
+        print(f"Keys: {stats['keys']:,} ({stats['mapped']:,} mapped)")
+        print(f"High-water id: {stats['high_water']:,}, refreshed {stats['refreshed_at'] or 'never'}")
+        return True
+    except Exception as e:
+        print(f"❌ Tracking key store refresh failed: {e}")
+        return False
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
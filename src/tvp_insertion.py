@@ -0,0 +1,208 @@
+"""
+Table-Valued Parameter Inserts
+Sends a whole batch as one table-valued parameter to a stored procedure that
+inserts it with a single set-based INSERT ... SELECT (pyodbc connections only)
+"""
+
+import os
+import logging
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TvpTarget(NamedTuple):
+    """Table type, loader procedure and column layout for one target table"""
+    table: str
+    type_name: str
+    procedure: str
+    columns: Tuple[Tuple[str, str], ...]
+    # Optional server-side expressions per column, written against the [rows] alias
+    normalize: Dict[str, str] = {}
+
+
+def _trimmed(column: str) -> str:
+    return f"NULLIF(LTRIM(RTRIM([rows].[{column}])), N'')"
+
+
+GROUPING_TVP = TvpTarget(
+    table='[dbo].[grouping]',
+    type_name='[dbo].[GroupingRowType]',
+    procedure='[dbo].[usp_tvp_insert_grouping]',
+    columns=(
+        ('awaiting_fileno', 'NVARCHAR(50)'),
+        ('created_by', 'NVARCHAR(50)'),
+        ('number', 'INT'),
+        ('year', 'INT'),
+        ('landuse', 'NVARCHAR(20)'),
+        ('created_at', 'DATETIME'),
+        ('registry', 'NVARCHAR(20)'),
+        ('mls_fileno', 'NVARCHAR(50)'),
+        ('mapping', 'INT'),
+        ('group', 'INT'),
+        ('sys_batch_no', 'INT'),
+        ('registry_batch_no', 'INT'),
+        ('tracking_id', 'NVARCHAR(20)')
+    )
+)
+
+FILE_NUMBER_TVP = TvpTarget(
+    table='[dbo].[fileNumber]',
+    type_name='[dbo].[FileNumberRowType]',
+    procedure='[dbo].[usp_tvp_insert_fileNumber]',
+    columns=(
+        ('kangisFileNo', 'NVARCHAR(100)'),
+        ('mlsfNo', 'NVARCHAR(100)'),
+        ('NewKANGISFileNo', 'NVARCHAR(100)'),
+        ('FileName', 'NVARCHAR(255)'),
+        ('created_at', 'DATETIME'),
+        ('location', 'NVARCHAR(255)'),
+        ('created_by', 'NVARCHAR(100)'),
+        ('type', 'NVARCHAR(50)'),
+        ('is_deleted', 'BIT'),
+        ('SOURCE', 'NVARCHAR(50)'),
+        ('plot_no', 'NVARCHAR(100)'),
+        ('tp_no', 'NVARCHAR(100)'),
+        ('tracking_id', 'NVARCHAR(50)'),
+        ('date_migrated', 'NVARCHAR(MAX)'),
+        ('migrated_by', 'NVARCHAR(MAX)'),
+        ('migration_source', 'NVARCHAR(MAX)'),
+        ('test_control', 'NVARCHAR(100)')
+    ),
+    normalize={
+        'kangisFileNo': _trimmed('kangisFileNo'),
+        'mlsfNo': _trimmed('mlsfNo'),
+        'NewKANGISFileNo': _trimmed('NewKANGISFileNo'),
+        'plot_no': _trimmed('plot_no'),
+        'tp_no': _trimmed('tp_no')
+    }
+)
+
+RACK_SHELF_TVP = TvpTarget(
+    table='[dbo].[Rack_Shelf_Labels]',
+    type_name='[dbo].[RackShelfLabelRowType]',
+    procedure='[dbo].[usp_tvp_insert_Rack_Shelf_Labels]',
+    columns=(
+        ('rack', 'NVARCHAR(50)'),
+        ('shelf', 'INT'),
+        ('full_label', 'NVARCHAR(100)'),
+        ('is_used', 'BIT'),
+        ('reserved_by', 'NVARCHAR(100)'),
+        ('reserved_at', 'DATETIME'),
+        ('created_at', 'DATETIME'),
+        ('updated_at', 'DATETIME')
+    ),
+    normalize={
+        'rack': "LTRIM(RTRIM([rows].[rack]))",
+        'full_label': "LTRIM(RTRIM([rows].[full_label]))"
+    }
+)
+
+
+def tvp_enabled() -> bool:
+    """Whether importers should use TVP inserts (TVP_INSERTS environment flag)."""
+    return os.getenv('TVP_INSERTS', '0').lower() in ('1', 'true', 'yes')
+
+
+def supports_tvp(connection) -> bool:
+    """TVPs are sent by pyodbc; pymssql has no table-valued parameter support."""
+    return type(connection).__module__.split('.')[0] == 'pyodbc'
+
+
+def _object_name(qualified: str) -> str:
+    return qualified.split('.')[-1].strip('[]')
+
+
+def tvp_object_sql(target: TvpTarget) -> Sequence[str]:
+    """
+    DDL for the table type and loader procedure of a target
+    Args:
+        target: TVP target definition
+    Returns:
+        Statements to execute in order
+    """
+    column_list = ", ".join(f"[{name}]" for name, _ in target.columns)
+    type_columns = ",\n        ".join(f"[{name}] {sql_type} NULL" for name, sql_type in target.columns)
+    select_list = ",\n            ".join(
+        target.normalize.get(name, f"[rows].[{name}]") for name, _ in target.columns
+    )
+    return [
+        f"""
+        IF TYPE_ID(N'{target.type_name}') IS NULL
+        CREATE TYPE {target.type_name} AS TABLE (
+        {type_columns}
+        )
+        """,
+        f"""
+        CREATE OR ALTER PROCEDURE {target.procedure}
+            @rows {target.type_name} READONLY
+        AS
+        BEGIN
+            SET NOCOUNT ON;
+            INSERT INTO {target.table} ({column_list})
+            SELECT
+            {select_list}
+            FROM @rows AS [rows];
+            SELECT @@ROWCOUNT;
+        END
+        """
+    ]
+
+
+_ensured_targets = set()
+
+
+def _setup_connection():
+    """New pyodbc connection for TVP object DDL"""
+    from database_connection import DatabaseConnection
+
+    connection = DatabaseConnection().get_connection('pyodbc')
+    if connection is None:
+        raise RuntimeError("Could not connect to create the TVP objects")
+    return connection
+
+
+def ensure_tvp_objects(target: TvpTarget, connection_factory: Optional[Callable[[], Any]] = None) -> None:
+    """
+    Create the table type and procedure of a target once per process
+    The DDL is committed on its own connection, never on a loading connection
+    whose open transaction holds uncommitted rows.
+    Args:
+        target: TVP target definition
+        connection_factory: Callable returning a new pyodbc connection (default: DatabaseConnection)
+    """
+    if target.procedure in _ensured_targets:
+        return
+    connection = (connection_factory or _setup_connection)()
+    try:
+        cursor = connection.cursor()
+        for statement in tvp_object_sql(target):
+            cursor.execute(statement)
+        connection.commit()
+        cursor.close()
+    finally:
+        connection.close()
+    _ensured_targets.add(target.procedure)
+    logger.info(f"TVP objects ready: {_object_name(target.type_name)}, {_object_name(target.procedure)}")
+
+
+def insert_tvp(connection, target: TvpTarget, rows: Sequence[tuple],
+               connection_factory: Optional[Callable[[], Any]] = None) -> int:
+    """
+    Insert rows through the target's loader procedure in one round trip
+    Args:
+        connection: pyodbc connection (not committed here)
+        target: TVP target definition
+        rows: Row tuples in target.columns order
+        connection_factory: Connection for creating the TVP objects on first use (see ensure_tvp_objects)
+    Returns:
+        Number of rows inserted
+    """
+    if not rows:
+        return 0
+    ensure_tvp_objects(target, connection_factory)
+    cursor = connection.cursor()
+    cursor.execute(f"{{CALL {target.procedure} (?)}}", ([tuple(row) for row in rows],))
+    result = cursor.fetchone()
+    cursor.close()
+    return int(result[0]) if result else len(rows)
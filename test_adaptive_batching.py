@@ -0,0 +1,133 @@
+"""Tests for the adaptive batch and commit size controller."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from adaptive_batching import BatchSizeController, log_usage_percent  # noqa: E402
+
+
+def _batch_seconds(rows, plateau=4000, overhead=0.05, per_row=0.0001):
+    """Simulated server: fixed round-trip overhead, then per-row cost that worsens past the plateau."""
+    penalty = 1.0 + max(0, rows - plateau) / plateau
+    return overhead + rows * per_row * penalty
+
+
+def _run(controller, batches, seconds=_batch_seconds):
+    for _ in range(batches):
+        rows = controller.batch_size
+        controller.record(rows, seconds(rows))
+
+
+def test_fixed_mode_keeps_sizes():
+    controller = BatchSizeController(1000, 10000, adaptive=False)
+    _run(controller, 50)
+    controller.check_log(99.0)
+
+    assert (controller.batch_size, controller.transaction_size) == (1000, 10000)
+    assert controller.decisions == []
+    assert controller.summary()['rows'] == 50000
+
+
+def test_fixed_mode_does_not_clamp_sizes_to_tuning_limits():
+    controller = BatchSizeController(50000, 1000000, max_batch_size=20000, adaptive=False)
+    _run(controller, 10)
+
+    assert (controller.batch_size, controller.transaction_size) == (50000, 1000000)
+    assert controller.decisions == []
+
+    # Turning tuning on (--adaptive) brings the sizes inside the limits, keeping the commit ratio
+    controller.adaptive = True
+    assert (controller.batch_size, controller.transaction_size) == (20000, 400000)
+
+
+def test_grows_towards_plateau_and_keeps_commit_ratio():
+    controller = BatchSizeController(500, 5000, max_batch_size=50000, reprobe_windows=1000)
+    _run(controller, 200)
+
+    assert 2000 <= controller.batch_size <= 8000
+    assert controller.transaction_size == controller.batch_size * 10
+    assert controller.decisions[0]['action'] == 'grow'
+    assert controller.decisions[-1]['action'] in ('hold', 'revert')
+
+
+def test_probes_smaller_sizes_when_first_step_hurts():
+    # Every row costs more in bigger batches: the best size is the minimum
+    controller = BatchSizeController(4000, 4000, min_batch_size=500, reprobe_windows=1000)
+    _run(controller, 200, seconds=lambda rows: rows * rows * 1e-8)
+
+    assert controller.batch_size < 4000
+    assert any(decision['action'] == 'shrink' for decision in controller.decisions)
+
+
+def test_latency_spike_backs_off():
+    controller = BatchSizeController(2000, 20000, window=3)
+    _run(controller, 6)
+    size = controller.batch_size
+    controller.record(size, _batch_seconds(size) * 10)
+
+    assert controller.decisions[-1]['action'] == 'latency_backoff'
+    assert controller.batch_size < size
+
+
+def test_max_batch_latency_backs_off():
+    controller = BatchSizeController(2000, 20000, max_batch_latency=0.5)
+    controller.record(2000, 0.6)
+
+    assert controller.decisions[-1]['action'] == 'latency_backoff'
+    assert controller.batch_size < 2000
+
+
+def test_log_pressure_shortens_commit_interval_then_recovers():
+    controller = BatchSizeController(1000, 8000, log_used_limit=70)
+    controller.check_log(85.0)
+    assert controller.transaction_size == 4000
+    controller.check_log(85.0)
+    controller.check_log(85.0)
+    controller.check_log(85.0)
+    # Commit after every batch, then batches shrink
+    assert controller.transaction_size == controller.batch_size
+    assert controller.batch_size < 1000
+
+    controller.check_log(10.0)
+    assert controller.decisions[-1]['action'] == 'log_recover'
+    assert controller.transaction_size == controller.batch_size * 2
+    assert all(decision['reason'] for decision in controller.decisions)
+
+
+def test_commit_time_counts_towards_throughput():
+    controller = BatchSizeController(1000, 1000, window=1)
+    controller.record(1000, 0.1)
+    controller.record_commit(0.9)
+
+    assert controller.summary()['rows_per_second'] == 1000
+
+
+class _Cursor:
+    def __init__(self, row):
+        self.row = row
+
+    def execute(self, sql):
+        if self.row is None:
+            raise RuntimeError("permission denied")
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class _Connection:
+    def __init__(self, row):
+        self.row = row
+
+    def cursor(self):
+        return _Cursor(self.row)
+
+
+def test_log_usage_percent_reads_both_row_shapes():
+    assert log_usage_percent(_Connection((42.5,))) == 42.5
+    assert log_usage_percent(_Connection({'used_log_space_in_percent': 12})) == 12.0
+    assert log_usage_percent(_Connection(None)) is None
@@ -0,0 +1,103 @@
+"""Tests for set-based batch inserts that bisect failures down to bad rows."""
+
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from batch_bisection import QuarantineFile, bisect_insert, is_row_error  # noqa: E402
+
+
+class IntegrityError(Exception):
+    """Stands in for the driver's constraint violation error."""
+
+
+class OperationalError(Exception):
+    """Stands in for a lost connection."""
+
+
+class StubConnection:
+    """Keeps written rows per transaction; rows named in `bad` fail any batch they are in."""
+
+    def __init__(self, bad=(), error=IntegrityError):
+        self.bad = set(bad)
+        self.error = error
+        self.pending = []
+        self.committed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def write(self, connection, rows):
+        assert connection is self
+        self.pending.extend(rows)
+        failing = [row for row in rows if row['mlsfNo'] in self.bad]
+        if failing:
+            raise self.error(f"Violation of UNIQUE KEY constraint for {failing[0]['mlsfNo']}")
+
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+        self.commits += 1
+
+    def rollback(self):
+        self.pending = []
+        self.rollbacks += 1
+
+
+def _rows(count):
+    return [{'mlsfNo': f"KN {index}", 'FileName': f"Allottee {index}"} for index in range(count)]
+
+
+def test_clean_batch_is_one_write_and_one_commit():
+    connection = StubConnection()
+    written = []
+
+    result = bisect_insert(connection, _rows(500), connection.write, on_written=written.extend)
+
+    assert result.written == 500 and result.failed == []
+    assert result.attempts == 1 and connection.commits == 1
+    assert written == connection.committed == _rows(500)
+
+
+def test_failing_rows_are_isolated_and_the_rest_written_in_order():
+    rows = _rows(64)
+    connection = StubConnection(bad={'KN 5', 'KN 40'})
+
+    result = bisect_insert(connection, rows, connection.write)
+
+    assert [row['mlsfNo'] for row, _ in result.failed] == ['KN 5', 'KN 40']
+    assert 'IntegrityError' in result.failed[0][1] and 'KN 5' in result.failed[0][1]
+    assert connection.committed == [row for row in rows if row['mlsfNo'] not in ('KN 5', 'KN 40')]
+    assert result.written == 62
+    # Two bad rows in 64 take a couple of dozen attempts, not 64 single-row inserts
+    assert result.attempts <= 2 * 2 * 6 + 1
+
+
+def test_non_row_errors_are_raised_without_bisecting():
+    connection = StubConnection(bad={'KN 3'}, error=OperationalError)
+
+    with pytest.raises(OperationalError):
+        bisect_insert(connection, _rows(10), connection.write)
+    assert connection.rollbacks == 1 and connection.committed == []
+    assert is_row_error(ValueError('bad date')) and not is_row_error(OperationalError('gone'))
+
+
+def test_quarantine_file_records_rows_with_reasons(tmp_path):
+    path = tmp_path / 'quarantine' / 'import.csv'
+    connection = StubConnection(bad={'KN 2'})
+    quarantine = QuarantineFile(path)
+
+    result = bisect_insert(connection, _rows(4), connection.write)
+    for row, reason in result.failed:
+        quarantine.add(row, reason)
+    quarantine.close()
+
+    with open(path, newline='', encoding='utf-8') as handle:
+        lines = list(csv.DictReader(handle))
+    assert quarantine.count == 1
+    assert lines[0]['mlsfNo'] == 'KN 2'
+    assert lines[0]['quarantine_reason'].startswith('IntegrityError: Violation of UNIQUE KEY')
+    assert not QuarantineFile(tmp_path / 'unused.csv').path.exists()
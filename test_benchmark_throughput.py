@@ -0,0 +1,38 @@
+"""Tests for the throughput benchmark helpers."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'scripts'))
+
+from benchmark_throughput import BENCHMARKS, compare_results, open_sqlite_standin, run_case  # noqa: E402
+from file_number_generator import FileNumberGenerator, GROUPING_INSERT_SQL, record_rows  # noqa: E402
+
+
+def test_sqlite_standin_accepts_production_insert():
+    records = list(FileNumberGenerator().generate_file_numbers(max_per_category=3))
+    connection = open_sqlite_standin()
+    connection.executemany(GROUPING_INSERT_SQL, record_rows(records))
+    stored = connection.execute(
+        "SELECT [awaiting_fileno], [group], [tracking_id] FROM dbo.[grouping] ORDER BY [number]"
+    ).fetchall()
+    connection.close()
+    assert stored == [(r['awaiting_fileno'], r['group'], r['tracking_id']) for r in records]
+
+
+def test_every_case_reports_rows():
+    for name in BENCHMARKS:
+        result = run_case(name, 1500, trace_allocations=name == 'pack_records')
+        assert result['rows'] == 1500
+        assert result['records_per_second'] > 0
+    assert result['alloc_peak_mb'] is None
+
+
+def test_compare_flags_regressions():
+    baseline = {'results': [{'case': 'a', 'rows': 10, 'records_per_second': 1000},
+                            {'case': 'b', 'rows': 10, 'records_per_second': 1000}]}
+    current = {'results': [{'case': 'a', 'rows': 10, 'records_per_second': 850},
+                           {'case': 'b', 'rows': 10, 'records_per_second': 950},
+                           {'case': 'c', 'rows': 10, 'records_per_second': 1}]}
+    comparison = compare_results(baseline, current, threshold=0.10)
+    assert [(item['case'], item['regression']) for item in comparison] == [('a', True), ('b', False)]
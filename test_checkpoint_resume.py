@@ -0,0 +1,105 @@
+"""Tests for load checkpoints and counter-restoring resume."""
+
+import itertools
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from checkpoint_store import FileCheckpointStore, create_checkpoint_store, plan_signature  # noqa: E402
+
+
+FIELDS = ('awaiting_fileno', 'number', 'registry', 'group', 'sys_batch_no', 'registry_batch_no')
+
+
+def _production_inserter(production, sink_path):
+    inserter = production.ProductionInserter()
+    inserter.sink_name, inserter.sink_path = 'sqlite', str(sink_path)
+    return inserter
+
+
+def _stored(sink_path):
+    connection = sqlite3.connect(str(sink_path))
+    rows = connection.execute(f"SELECT {', '.join(f'[{field}]' for field in FIELDS)} FROM [grouping] ORDER BY [id]").fetchall()
+    connection.close()
+    return rows
+
+
+def test_interrupted_load_resumes_to_the_uninterrupted_rows(tmp_path, monkeypatch):
+    try:
+        import production_insertion as production
+    except ImportError as exc:  # the SQL Server drivers it imports need an ODBC driver manager
+        pytest.skip(f"production_insertion unavailable: {exc}")
+    monkeypatch.chdir(tmp_path)
+    for name, value in (('NUMBERS_PER_YEAR', '5'), ('RECORDS_PER_GROUP', '7'),
+                        ('BATCH_SIZE', '20'), ('TRANSACTION_SIZE', '40')):
+        monkeypatch.setenv(name, value)
+
+    assert _production_inserter(production, tmp_path / 'full.sqlite3').run_production_insertion(checkpoint=None)
+    full = _stored(tmp_path / 'full.sqlite3')
+
+    # Crash between a commit and its checkpoint, partway through the second category
+    saves = itertools.count(1)
+    original_save = FileCheckpointStore.save
+
+    def failing_save(store, state, connection=None):
+        if next(saves) == 9:
+            raise RuntimeError("process killed")
+        original_save(store, state, connection)
+
+    sink_path, checkpoint_path = tmp_path / 'resumed.sqlite3', str(tmp_path / 'load.json')
+    monkeypatch.setattr(FileCheckpointStore, 'save', failing_save)
+    assert not _production_inserter(production, sink_path).run_production_insertion(
+        checkpoint='file', checkpoint_path=checkpoint_path)
+    monkeypatch.setattr(FileCheckpointStore, 'save', original_save)
+
+    checkpoint = FileCheckpointStore(checkpoint_path).load()
+    assert checkpoint['category_index'] == 1 and checkpoint['category_committed'] > 0
+    # The last commit has no checkpoint: its rows are removed by delete_after on resume
+    assert len(_stored(sink_path)) > checkpoint['counters']['global_count']
+
+    inserter = _production_inserter(production, sink_path)
+    assert inserter.run_production_insertion(resume=True, checkpoint='file', checkpoint_path=checkpoint_path)
+    assert inserter.resumed_records == checkpoint['counters']['global_count']
+    assert _stored(sink_path) == full
+    assert FileCheckpointStore(checkpoint_path).load() is None
+
+
+def test_counter_state_round_trip(small_generator):
+    generator = small_generator(4, 5)
+    records = list(itertools.islice(generator.generate_file_numbers(), 30))
+    state = generator.counter_state()
+    assert state['global_count'] == 30
+
+    other = small_generator(4, 5)
+    other.restore_counters(state)
+    assert other.counter_state() == state
+    assert records[-1]['number'] == state['global_count']
+
+
+def test_file_store_round_trip(tmp_path, small_generator):
+    store = create_checkpoint_store('file', path=str(tmp_path / 'nested' / 'load.json'))
+    assert isinstance(store, FileCheckpointStore)
+    assert store.load() is None
+
+    state = {'plan': plan_signature(small_generator(4, 5)), 'category_index': 2, 'category_committed': 10,
+             'counters': {'global_count': 90, 'registry_counts': {'1': 90}}}
+    store.save(state)
+    loaded = store.load()
+    assert {key: loaded[key] for key in state} == state
+    assert 'updated_at' in loaded
+    assert not (tmp_path / 'nested' / 'load.json.tmp').exists()
+
+    store.clear()
+    assert store.load() is None
+
+
+def test_plan_signature_detects_configuration_changes(small_generator):
+    generator = small_generator(4, 5)
+    changed = small_generator(4, 5)
+    changed.numbers_per_year = 5
+    assert plan_signature(generator) == plan_signature(small_generator(4, 5))
+    assert plan_signature(generator) != plan_signature(changed)
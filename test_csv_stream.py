@@ -0,0 +1,78 @@
+"""Tests for the streaming chunked CSV reader."""
+
+import codecs
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from csv_stream import CSVChunkReader, count_rows, detect_encoding  # noqa: E402
+
+HEADER = 'mlsfNo,currentAllottee,lgaName\n'
+
+
+def _write(path, rows, encoding='utf-8', bom=b''):
+    path.write_bytes(bom + (HEADER + ''.join(rows)).encode(encoding))
+    return path
+
+
+def test_detect_encoding_prefers_byte_order_marks():
+    assert detect_encoding(codecs.BOM_UTF8 + b'a,b\n') == 'utf-8-sig'
+    assert detect_encoding(codecs.BOM_UTF16_LE + 'a,b\n'.encode('utf-16-le')) == 'utf-16'
+    assert detect_encoding('Ìbrahim'.encode('utf-8')) == 'utf-8'
+    # A multi-byte character cut off by the sample does not rule out UTF-8
+    assert detect_encoding('Ì'.encode('utf-8')[:1]) == 'utf-8'
+    assert detect_encoding('Ìbrahim “Sani”'.encode('cp1252')) == 'cp1252'
+    assert detect_encoding(b'\x81\x8d') == 'latin-1'
+
+
+def test_reader_yields_fixed_size_chunks(tmp_path):
+    rows = [f"KN {index},Allottee {index},Nassarawa\n" for index in range(1, 24)]
+    reader = CSVChunkReader(_write(tmp_path / 'files.csv', rows), chunk_rows=10)
+
+    chunks = list(reader.chunks())
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 3]
+    assert chunks[0][0] == {'mlsfNo': 'KN 1', 'currentAllottee': 'Allottee 1', 'lgaName': 'Nassarawa'}
+    assert reader.rows_read == 23
+    assert reader.progress == 100.0
+    assert reader.fieldnames == ['mlsfNo', 'currentAllottee', 'lgaName']
+
+
+def test_reader_strips_bom_and_skips_blank_rows(tmp_path):
+    rows = ['KN 1,Ìbrahim,Fagge\n', ',,\n', '\n', 'KN 2,Sani,Dala\n']
+    path = _write(tmp_path / 'bom.csv', rows, bom=codecs.BOM_UTF8)
+    reader = CSVChunkReader(path)
+
+    records = list(reader.rows())
+
+    assert reader.encoding == 'utf-8-sig'
+    assert [record['mlsfNo'] for record in records] == ['KN 1', 'KN 2']
+    assert records[0]['currentAllottee'] == 'Ìbrahim'
+    assert count_rows(path) == 2
+
+
+def test_encoding_is_detected_once_from_the_sample(tmp_path):
+    rows = [f"KN {index},Allottee,Gwale\n" for index in range(50)] + ['KN 99,Ìbrahim “Sani”,Gwale\n']
+    path = _write(tmp_path / 'windows.csv', rows, encoding='cp1252')
+
+    reader = CSVChunkReader(path)
+    assert list(reader.rows())[-1]['currentAllottee'] == 'Ìbrahim “Sani”'
+    assert reader.encoding == 'cp1252'
+
+    # A sample that misses the first non-ASCII byte commits to UTF-8; the error names the row
+    short_sample = CSVChunkReader(path, sample_bytes=64)
+    with pytest.raises(ValueError, match='not valid utf-8'):
+        list(short_sample.rows())
+    assert list(CSVChunkReader(path, encoding='cp1252', sample_bytes=64).rows())[-1]['mlsfNo'] == 'KN 99'
+
+
+def test_count_rows_stops_past_the_limit(tmp_path):
+    path = _write(tmp_path / 'big.csv', [f"KN {index},A,B\n" for index in range(40)])
+
+    assert count_rows(path) == 40
+    assert count_rows(path, limit=25) == 26
+    with pytest.raises(FileNotFoundError):
+        count_rows(tmp_path / 'missing.csv')
@@ -0,0 +1,115 @@
+"""Round-trip tests for the CSV, BCP and part-file exports."""
+
+import csv
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_exporter import FileNumberExporter, shard_part_path, write_bcp_format_file  # noqa: E402
+from file_number_generator import GROUPING_COLUMNS  # noqa: E402
+
+# Regenerated on every run, so checked for shape rather than value
+VOLATILE = ('created_at', 'tracking_id')
+COMPARED = [index for index, column in enumerate(GROUPING_COLUMNS) if column not in VOLATILE]
+TIMESTAMP = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}$')
+
+
+def _read_format_file(path):
+    """(terminator, server column, column name) per host field of a non-XML format file"""
+    escapes = {'\\t': '\t', '\\n': '\n'}
+    version, count, *lines = open(path, encoding='utf-8').read().splitlines()
+    fields = [line.split('\t') for line in lines]
+    assert float(version) > 0 and int(count) == len(fields)
+    return [(escapes[terminator.strip('"')], int(column_id), name)
+            for _, _, _, _, terminator, column_id, name, _ in fields]
+
+
+def _expected_rows(generator):
+    """Text of every generated row, as a delimited export writes it (None as an empty field)"""
+    return [
+        tuple('' if record[GROUPING_COLUMNS[index]] is None else str(record[GROUPING_COLUMNS[index]])
+              for index in COMPARED)
+        for record in generator.generate_file_numbers()
+    ]
+
+
+def _compared(rows):
+    for row in rows:
+        assert len(row) == len(GROUPING_COLUMNS)
+        assert TIMESTAMP.match(row[GROUPING_COLUMNS.index('created_at')])
+        assert row[GROUPING_COLUMNS.index('tracking_id')].startswith('TRK-')
+    return [tuple(row[index] for index in COMPARED) for row in rows]
+
+
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8') as handle:
+        return list(csv.reader(handle))
+
+
+def test_csv_export_round_trips(tmp_path, small_generator):
+    generator = small_generator(2, 7)
+    summary = FileNumberExporter(generator, batch_size=50).export(tmp_path / 'grouping.csv')
+
+    header, *rows = _read_csv(tmp_path / 'grouping.csv')
+    assert tuple(header) == GROUPING_COLUMNS
+    assert summary['rows'] == len(rows) == 1440
+    assert _compared(rows) == _expected_rows(generator)
+    assert len({row[GROUPING_COLUMNS.index('tracking_id')] for row in rows}) == len(rows)
+
+
+def test_bcp_export_round_trips_through_its_format_file(tmp_path, small_generator):
+    generator = small_generator(2, 7)
+    summary = FileNumberExporter(generator, batch_size=50).export(tmp_path / 'grouping.dat', 'bcp')
+
+    fields = _read_format_file(summary['format_file'])
+    terminators = [terminator for terminator, _, _ in fields]
+    assert tuple(name for _, _, name in fields) == GROUPING_COLUMNS
+    assert terminators == ['\t'] * (len(GROUPING_COLUMNS) - 1) + ['\n']
+
+    # Read the data file the way BULK INSERT does: field by field, up to each terminator
+    with open(summary['files'][0], encoding='utf-8', newline='') as handle:
+        text = handle.read()
+    rows, position = [], 0
+    while position < len(text):
+        row = []
+        for terminator in terminators:
+            end = text.index(terminator, position)
+            row.append(text[position:end])
+            position = end + 1
+        rows.append(row)
+
+    assert summary['rows'] == len(rows) == 1440
+    assert _compared(rows) == _expected_rows(generator)
+
+
+def test_bcp_format_file_skips_the_identity_column(tmp_path):
+    # [dbo].[grouping] starts with the id IDENTITY; no host field may load into it
+    fields = _read_format_file(write_bcp_format_file(tmp_path / 'grouping.fmt'))
+    column_ids = [column_id for _, column_id, _ in fields]
+    assert 1 not in column_ids
+    assert column_ids == list(range(2, len(GROUPING_COLUMNS) + 2))
+
+
+def test_part_files_join_back_into_the_sequential_export(tmp_path, small_generator):
+    generator = small_generator(2, 7)
+    exporter = FileNumberExporter(generator, batch_size=13)
+    sequential = _read_csv(exporter.export(tmp_path / 'sequential.csv')['files'][0])
+
+    summary = exporter.export(tmp_path / 'grouping.csv', processes=2, years_per_shard=10)
+    shards = generator.plan_shards(10)
+    assert summary['files'] == [str(shard_part_path(tmp_path / 'grouping.csv', shard['shard_id'])) for shard in shards]
+
+    joined = []
+    for shard, path in zip(shards, summary['files']):
+        rows = _read_csv(path)
+        # Only part 000 carries the header
+        if shard['shard_id'] == 0:
+            assert tuple(rows[0]) == GROUPING_COLUMNS
+            rows = rows[1:]
+        assert len(rows) == shard['count']
+        joined.extend(rows)
+
+    assert summary['rows'] == len(joined) == len(sequential) - 1
+    assert _compared(joined) == _compared(sequential[1:])
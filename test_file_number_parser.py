@@ -0,0 +1,87 @@
+"""Tests for the shared file number parser."""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import FileNumberGenerator  # noqa: E402
+from file_number_parser import (  # noqa: E402
+    category_info, category_of, clean_file_number, parse_file_number, parse_many, land_use_of, is_consolidated
+)
+
+
+def test_clean_file_number_matches_importer_cleanup():
+    cases = {
+        "KN 1660 AND EXTENSION (TEMP)": "KN 1660",
+        "AG-2022-9 AND EXTENSION": "AG-2022-9",
+        "COM-2000-221 (TEMP)": "COM-2000-221",
+        "  EXTRA   SPACES  ": "EXTRA SPACES",
+        "": "",
+        None: None
+    }
+    for value, expected in cases.items():
+        assert clean_file_number(value) == expected
+
+
+def test_parse_file_number():
+    parsed = parse_file_number(' con-res-rc-1999-42 (TEMP)')
+    assert parsed == ('CON-RES-RC', 'Residential', '3', 1999, 42)
+    assert parse_file_number('AG-1985-7') == ('AG', 'Agriculture', '1', 1985, 7)
+    assert parse_file_number('IND-RC-2010-1').registry == '2'
+    assert parse_file_number('KN 1660') is None
+    assert parse_file_number(None) is None
+
+
+def test_land_use_and_consolidated_lookups():
+    assert land_use_of('CON-COM') == 'Commercial'
+    assert land_use_of('IND-RC-2001-5') == 'Industrial'
+    assert land_use_of('OLD RES 12') == 'Residential'
+    assert land_use_of('KN 1660') == 'UNKNOWN'
+    assert is_consolidated('CON-AG-RC')
+    assert not is_consolidated('AG-RC-1990-1')
+
+
+def test_prefix_lookup_of_generated_numbers():
+    assert category_info('CON-RES-RC-1999-42') == ('Residential', True, True)
+    assert category_info('AG') == ('Agriculture', False, False)
+    assert category_info('KN 1660') is None
+    assert category_of('IND-RC-2001-5') == 'IND-RC'
+    # Values that are not clean generated numbers still go through the full parser
+    assert category_of(' com-2000-221 (TEMP)') == 'COM'
+    assert category_of('RES-19999-1') is None
+
+    generator = FileNumberGenerator()
+    assert generator.extract_land_use('CON-IND-2001-7') == 'Industrial'
+    assert generator.assign_registry('CON-IND-2001-7', 2001) == '3'
+    assert generator.assign_registry('IND-RC-1985-7', 1985) == '1'
+    assert generator.extract_land_use('OLD RES 12') == 'Residential'
+
+
+def test_parse_many_matches_single_parser():
+    values = ['CON-RES-RC-1999-42', 'RES-2010-5531 AND EXTENSION', 'KN 1660', None, 'AG-1985-3', 'com-2030-1']
+    frame = parse_many(values)
+    assert list(frame.columns) == ['cleaned', 'category', 'land_use', 'registry', 'year', 'serial']
+
+    for position, value in enumerate(values):
+        parsed = parse_file_number(value)
+        row = frame.iloc[position]
+        if parsed is None:
+            assert pd.isna(row['category']) and pd.isna(row['registry'])
+            continue
+        assert (row['category'], row['land_use'], row['registry'], row['year'], row['serial']) == tuple(parsed)
+
+
+def test_parse_many_over_generated_records():
+    generator = FileNumberGenerator()
+    generator.numbers_per_year = 3
+    records = list(generator.generate_file_numbers())
+    frame = parse_many(pd.Series([record['awaiting_fileno'] for record in records]))
+
+    assert frame['category'].tolist() == [record['category'] for record in records]
+    assert frame['registry'].tolist() == [record['registry'] for record in records]
+    assert frame['land_use'].tolist() == [record['landuse'] for record in records]
+    assert set(frame['serial'].tolist()) == {1, 2, 3}
+    assert frame['year'].tolist() == [record['year'] for record in records]
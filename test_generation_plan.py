@@ -0,0 +1,42 @@
+"""Tests for the analytical generation plan."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import FileNumberGenerator  # noqa: E402
+from generation_plan import GenerationPlan  # noqa: E402
+
+
+def test_plan_matches_generated_statistics():
+    generator = FileNumberGenerator()
+    generator.numbers_per_year = 3
+    generator.records_per_group = 10
+
+    plan = GenerationPlan(generator, years_per_shard=10)
+    records = list(generator.generate_file_numbers())
+
+    assert plan.expected_statistics() == generator.get_category_stats(records)
+    for shard in plan.shards:
+        first = records[shard['global_offset']]
+        last = records[shard['global_offset'] + shard['count'] - 1]
+        assert shard['first_file_number'] == first['awaiting_fileno']
+        assert shard['last_file_number'] == last['awaiting_fileno']
+        assert shard['group_range'] == (first['group'], last['group'])
+
+
+def test_full_plan_totals():
+    generator = FileNumberGenerator()
+    generator.numbers_per_year = 10000
+    generator.records_per_group = 100
+    plan = GenerationPlan(generator)
+
+    assert plan.total_records == 7200000
+    assert plan.registry_totals == {'1': 880000, '2': 2720000, '3': 3600000}
+    boundaries = plan.registry_boundaries()
+    # Registries 1 and 2 interleave category by category
+    assert boundaries['1']['number_range'] == (1, 3260000)
+    assert boundaries['2']['number_range'] == (110001, 3600000)
+    assert boundaries['3']['group_range'] == (36001, 72000)
+    assert boundaries['3']['registry_batch_range'] == (1, 36000)
@@ -0,0 +1,89 @@
+"""Tests for random-access record addressing in the file number generator."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import FileNumberGenerator  # noqa: E402
+
+
+FIELDS = ['awaiting_fileno', 'number', 'year', 'registry', 'landuse',
+          'group', 'sys_batch_no', 'registry_batch_no', 'category']
+
+
+def test_record_at_and_index_of_match_sequential_run(small_generator):
+    generator = small_generator(6, 4)
+    for index, record in enumerate(generator.generate_file_numbers()):
+        addressed = generator.record_at(index)
+        assert {field: addressed[field] for field in FIELDS} == {field: record[field] for field in FIELDS}
+        assert generator.index_of(record['awaiting_fileno']) == index
+
+
+def test_record_at_matches_category_by_category_load(small_generator):
+    # ProductionInserter.process_category generates one category at a time on carried counters
+    generator = small_generator(6, 4)
+    loaded = []
+    generator.reset_counters()
+    for category in generator.categories:
+        loaded.extend(generator.generate_file_numbers([category], reset_counters=False))
+
+    assert [record['awaiting_fileno'] for record in loaded] == [
+        record['awaiting_fileno'] for record in small_generator(6, 4).generate_file_numbers()]
+    for index, record in enumerate(loaded):
+        addressed = generator.record_at(index)
+        assert {field: addressed[field] for field in FIELDS} == {field: record[field] for field in FIELDS}
+
+
+def test_full_plan_boundaries():
+    generator = FileNumberGenerator()
+    generator.numbers_per_year = 10000
+    generator.records_per_group = 100
+
+    assert generator.index_of('RES-1981-1') == 0
+    assert generator.index_of('RES-1992-1') == 110000
+    assert generator.index_of('CON-RES-1981-1') == 3600000
+
+    # Each category runs through 1981-2025 before the next one starts
+    res_rc = generator.record_at(generator.index_of('RES-RC-1981-1'))
+    assert (res_rc['number'], res_rc['group'], res_rc['registry_batch_no']) == (1800001, 18001, 4401)
+
+    last = generator.record_at(7199999)
+    assert last['awaiting_fileno'] == 'CON-AG-RC-2025-10000'
+    assert last['group'] == 72000
+    assert last['registry'] == '3'
+    assert last['registry_batch_no'] == 36000
+
+
+def test_invalid_lookups_raise(small_generator):
+    generator = small_generator(6, 4)
+    for bad_value in ['RES-1981-7', 'RES-2030-1', 'CON-RES-1981', 'KN 1660']:
+        try:
+            generator.index_of(bad_value)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad_value} should not resolve")
+
+    try:
+        generator.record_at(-1)
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("negative index should not resolve")
+
+
+def test_slices_follow_the_write_order(small_generator):
+    generator = small_generator(6, 4)
+    slices = generator.slices()
+    records = list(generator.generate_file_numbers())
+
+    assert [(info['registry'], info['category'], info['year'], info['count']) for info in slices] == list(
+        generator.iter_slices())
+    for info in slices:
+        first = records[info['global_offset']]
+        assert first['category'] == info['category']
+        assert (first['year'], first['registry']) == (info['year'], info['registry'])
+
+    # Callers get copies; the cached offset table stays intact
+    slices[0]['count'] = -1
+    assert generator.slices()[0]['count'] != -1
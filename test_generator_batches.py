@@ -0,0 +1,126 @@
+"""Tests for the columnar batch mode of the file number generator."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import GROUPING_COLUMNS, batch_rows  # noqa: E402
+
+
+COUNTER_COLUMNS = ['awaiting_fileno', 'number', 'year', 'landuse', 'registry',
+                   'group', 'sys_batch_no', 'registry_batch_no', 'category']
+
+
+def _flatten(batches):
+    rows = []
+    for batch in batches:
+        size = len(batch['awaiting_fileno'])
+        for column in GROUPING_COLUMNS:
+            assert len(batch[column]) == size
+        for index in range(size):
+            rows.append({column: batch[column][index] for column in COUNTER_COLUMNS})
+    return rows
+
+
+def test_batches_match_record_generator(small_generator):
+    generator = small_generator(7, 5)
+    expected = [
+        {column: record[column] for column in COUNTER_COLUMNS}
+        for record in generator.generate_file_numbers()
+    ]
+    expected_counters = (generator._global_record_count, dict(generator._registry_counts))
+
+    actual = _flatten(generator.generate_batches(batch_size=64))
+
+    assert actual == expected
+    assert (generator._global_record_count, generator._registry_counts) == expected_counters
+
+
+def test_batches_respect_filters_and_carried_counters(small_generator):
+    generator = small_generator(7, 5)
+    expected = []
+    reset = True
+    for category in ['RES', 'CON-AG-RC']:
+        for record in generator.generate_file_numbers([category], max_per_category=30, reset_counters=reset):
+            expected.append({column: record[column] for column in COUNTER_COLUMNS})
+        reset = False
+
+    actual = []
+    reset = True
+    for category in ['RES', 'CON-AG-RC']:
+        actual.extend(_flatten(generator.generate_batches(9, [category], 30, reset_counters=reset)))
+        reset = False
+
+    assert actual == expected
+
+
+def test_batch_rows_packs_native_tuples(small_generator):
+    generator = small_generator(7, 5)
+    batch = next(generator.generate_batches(batch_size=3, max_per_category=3))
+    rows = batch_rows(batch)
+
+    assert len(rows) == 3
+    assert rows[0][:5] == ('RES-1981-1', 'Generated', 1, 1981, 'Residential')
+    assert all(type(row[2]) is int for row in rows)
+
+
+def _shard_counters(generator, shard, batch_size):
+    return _flatten(generator.generate_shard_batches(shard, batch_size))
+
+
+def test_shards_reproduce_sequential_run(small_generator):
+    from sharded_generation import run_sharded_generation
+
+    generator = small_generator(7, 5)
+    expected = _flatten(generator.generate_batches(batch_size=50))
+
+    for years_per_shard in (None, 4):
+        shards = generator.plan_shards(years_per_shard)
+        assert sum(shard['count'] for shard in shards) == len(expected)
+
+        results = run_sharded_generation(
+            _shard_counters, processes=2, years_per_shard=years_per_shard,
+            batch_size=11, generator=generator
+        )
+        assert [row for rows in results for row in rows] == expected
+
+
+def test_extension_continues_counters_for_open_registries(small_generator):
+    generator = small_generator(7, 5)
+    full = _flatten(generator.generate_batches(batch_size=50))
+    registry_counts = dict(generator._registry_counts)
+
+    extension = _flatten(generator.generate_extension_batches(
+        2027, len(full), registry_counts, batch_size=8, existing_years={('3', 2026)}
+    ))
+
+    assert {row['registry'] for row in extension} == {'2', '3'}
+    assert [row['number'] for row in extension] == list(range(len(full) + 1, len(full) + len(extension) + 1))
+    assert extension[0]['awaiting_fileno'] == 'RES-2026-1'
+    assert extension[0]['registry_batch_no'] == registry_counts['2'] // generator.records_per_group + 1
+    assert not any(row['awaiting_fileno'].startswith('CON-RES-2026') for row in extension)
+    assert any(row['awaiting_fileno'] == 'CON-RES-2027-1' for row in extension)
+    assert len(extension) == (8 * 2 + 8 * 1) * generator.numbers_per_year
+
+
+def _counters(rows):
+    return [(row['awaiting_fileno'], row['number'], row['group'], row['registry_batch_no']) for row in rows]
+
+
+def test_stepwise_extensions_number_rows_like_one_extension(small_generator):
+    generator = small_generator(7, 5)
+    full = _flatten(generator.generate_batches(batch_size=50))
+    registry_counts = dict(generator._registry_counts)
+
+    once = _flatten(generator.generate_extension_batches(2027, len(full), registry_counts, batch_size=9))
+    first = _flatten(generator.generate_extension_batches(2026, len(full), registry_counts, batch_size=9))
+    marks = dict(registry_counts)
+    for row in first:
+        marks[row['registry']] += 1
+    second = _flatten(generator.generate_extension_batches(
+        2027, len(full) + len(first), marks, batch_size=9,
+        existing_years={(row['registry'], 2026) for row in first}
+    ))
+
+    assert _counters(first + second) == _counters(once)
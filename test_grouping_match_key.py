@@ -0,0 +1,106 @@
+"""Tests for the indexed grouping match key and its temp-table prefetch."""
+
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from grouping_match_key import GroupingMatchKey, MATCH_KEY_EXPRESSION, match_key  # noqa: E402
+
+
+class StubCursor:
+    """Answers the metadata queries and keeps rows inserted into #import_keys."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append(sql)
+        if 'COL_LENGTH' in sql:
+            self.rows = [(100,) if self.connection.has_column else (None,)]
+        elif 'FROM sys.indexes' in sql:
+            self.rows = [(1 if self.connection.has_index else 0,)]
+        elif 'INNER JOIN' in sql:
+            keys = {key for (key,) in self.connection.keys}
+            self.rows = [(key, tracking_id) for key, tracking_id in self.connection.grouping if key in keys]
+        elif 'SELECT TOP 1' in sql:
+            self.rows = [(tracking_id,) for key, tracking_id in self.connection.grouping if key == params[0]][:1]
+        else:
+            self.rows = []
+
+    def executemany(self, sql, rows):
+        self.connection.executed.append(sql)
+        self.connection.keys.extend(rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self, grouping=(), has_column=True, has_index=True):
+        self.grouping = list(grouping)
+        self.has_column = has_column
+        self.has_index = has_index
+        self.executed = []
+        self.keys = []
+        self.commits = 0
+
+    def cursor(self):
+        return StubCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def test_match_key_mirrors_the_computed_column():
+    assert match_key('  res-1981-12 ') == 'RES-1981-12'
+    assert match_key('   ') is None and match_key(None) is None
+    assert MATCH_KEY_EXPRESSION == 'UPPER(LTRIM(RTRIM([awaiting_fileno])))'
+
+
+def test_prefetch_loads_keys_once_and_joins_on_the_indexed_column():
+    connection = StubConnection(grouping=[
+        ('RES-1981-1', 'TRK-A'), ('RES-1981-1', 'TRK-DUP'), ('COM-1990-7', 'TRK-B')
+    ])
+
+    matches = GroupingMatchKey(connection).fetch_tracking_ids(['res-1981-1', 'RES-1981-1 ', 'COM-1990-7', 'AG-1985-3', ''])
+
+    assert matches == {'RES-1981-1': 'TRK-A', 'COM-1990-7': 'TRK-B'}
+    assert sorted(key for (key,) in connection.keys) == ['AG-1985-3', 'COM-1990-7', 'RES-1981-1']
+    join = next(sql for sql in connection.executed if 'INNER JOIN' in sql)
+    assert 'g.[match_key] = k.[key]' in join
+    assert not any(' IN (' in sql or 'LTRIM' in sql for sql in connection.executed)
+    assert 'COLLATE DATABASE_DEFAULT' in connection.executed[0]
+
+
+def test_lookups_fall_back_to_the_expression_before_setup():
+    connection = StubConnection(grouping=[('RES-1981-1', 'TRK-A')], has_column=False, has_index=False)
+    keys = GroupingMatchKey(connection)
+
+    assert keys.fetch_tracking_id(' res-1981-1') == 'TRK-A'
+    assert 'WHERE UPPER(LTRIM(RTRIM([awaiting_fileno]))) = ?' in connection.executed[-1]
+    assert keys.key_sql('g') == 'UPPER(LTRIM(RTRIM(g.[awaiting_fileno])))'
+
+
+def test_setup_creates_only_what_is_missing():
+    missing = GroupingMatchKey(StubConnection(has_column=False, has_index=False))
+    statements = missing.setup_sql()
+    assert len(statements) == 2
+    assert re.search(r'ADD \[match_key\] AS UPPER\(LTRIM\(RTRIM\(\[awaiting_fileno\]\)\)\) PERSISTED', statements[0])
+    assert 'INCLUDE ([tracking_id], [mapping])' in statements[1]
+
+    connection = StubConnection(has_column=True, has_index=False)
+    assert GroupingMatchKey(connection).setup() == [GroupingMatchKey(connection).setup_sql()[0]]
+    assert connection.commits == 1
+    assert GroupingMatchKey(StubConnection()).setup_sql() == []
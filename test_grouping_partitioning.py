@@ -0,0 +1,214 @@
+"""Tests for the partitioned grouping table tooling."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import FileNumberGenerator, GROUPING_COLUMNS  # noqa: E402
+from grouping_partitioning import GroupingPartitioner, PartitionLayout, StagingSwitchLoader  # noqa: E402
+
+
+def _generator(start_year, end_year, numbers_per_year=10000):
+    generator = FileNumberGenerator()
+    generator.start_year, generator.end_year = start_year, end_year
+    generator.numbers_per_year = numbers_per_year
+    return generator
+
+
+class StubServer:
+    """Answers the metadata queries of the partitioning tools and records executed statements."""
+
+    def __init__(self, primary_key=(('PK_grouping', 'CLUSTERED', 'id'),), indexes=(), boundaries=(),
+                 partition_rows=0, fail_on=None, identity=None):
+        self.primary_key = list(primary_key)
+        self.identity = identity
+        self.indexes = list(indexes)
+        self.boundaries = list(boundaries)
+        self.partition_rows = partition_rows
+        self.fail_on = fail_on
+        self.executed = []
+        self.commits = 0
+        self.inserted = {}
+
+    def respond(self, sql, params=None):
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError(f"failed: {self.fail_on}")
+        if 'sys.identity_columns' in sql:
+            return [('id', self.identity[0])] if self.identity else []
+        if sql.startswith('SELECT MAX([id])'):
+            return [(self.identity[1],)]
+        if 'sys.foreign_keys' in sql or 'sys.computed_columns' in sql:
+            return []
+        if 'sys.key_constraints' in sql:
+            return self.primary_key
+        if 'i.index_id = 1' in sql:
+            return []
+        if 'i.type = 2' in sql:
+            return [(index_id, name, unique, 0, None) for index_id, name, unique, _ in self.indexes]
+        if 'sys.index_columns' in sql and 'ic.index_id, c.name' in sql:
+            return [(index_id, column, 0, 0) for index_id, _, _, column in self.indexes]
+        if 'sys.partition_range_values' in sql:
+            return [(value,) for value in self.boundaries]
+        if 'sys.dm_db_partition_stats' in sql:
+            return [(self.partition_rows,)]
+        if 'sys.filegroups' in sql or 'sys.destination_data_spaces' in sql:
+            return [('PRIMARY',)]
+        if sql.startswith('INSERT'):
+            self.inserted.setdefault(sql.split()[2], []).extend(params)
+        return []
+
+
+class StubCursor:
+    def __init__(self, server):
+        self.server = server
+        self.rows = []
+        self.fast_executemany = False
+
+    def execute(self, sql, params=None):
+        sql = ' '.join(sql.split())
+        self.server.executed.append(sql)
+        self.rows = self.server.respond(sql)
+
+    def executemany(self, sql, rows):
+        self.server.respond(' '.join(sql.split()), rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self, server):
+        self.server = server
+
+    def cursor(self):
+        return StubCursor(self.server)
+
+    def commit(self):
+        self.server.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_registry_layout_follows_registry_sequences():
+    layout = PartitionLayout(FileNumberGenerator())
+
+    assert layout.boundaries() == ['1', '2', '3']
+    # RANGE RIGHT: partition 1 only holds values below the first registry
+    assert [layout.partition_number(value) for value in ('0', '1', '2', '3')] == [1, 2, 3, 4]
+    assert sorted(layout.shards_by_partition()) == [2, 3, 4]
+    assert layout.check_constraint(3) == "[registry] IS NOT NULL AND [registry] >= N'2' AND [registry] < N'3'"
+    assert layout.check_constraint(4) == "[registry] IS NOT NULL AND [registry] >= N'3'"
+
+
+def test_registry_year_layout_covers_the_plan_once():
+    generator = _generator(2020, 2022)
+    layout = PartitionLayout(generator, scheme='registry_year')
+
+    assert layout.boundaries() == ['2|2020', '2|2021', '2|2022', '3|2020', '3|2021', '3|2022']
+    groups = layout.shards_by_partition()
+    for number, shards in groups.items():
+        assert {layout.key(shard['registry'], shard['start_year']) for shard in shards} == {layout.boundaries()[number - 2]}
+    total = sum(shard['count'] for shards in groups.values() for shard in shards)
+    assert total == sum(shard['count'] for shard in generator.plan_shards())
+
+
+def test_partition_table_aligns_primary_key_and_indexes():
+    server = StubServer(indexes=[(2, 'IX_grouping_awaiting', 1, 'awaiting_fileno'), (3, 'IX_grouping_year', 0, 'year')])
+    partitioner = GroupingPartitioner(StubConnection(server), PartitionLayout())
+    statements = partitioner.partition_table_sql()
+
+    assert statements == [
+        "ALTER TABLE [dbo].[grouping] DROP CONSTRAINT [PK_grouping]",
+        "CREATE CLUSTERED INDEX [CIX_grouping_registry] ON [dbo].[grouping] ([registry], [id]) "
+        "ON [ps_grouping_registry]([registry])",
+        "ALTER TABLE [dbo].[grouping] ADD CONSTRAINT [PK_grouping] PRIMARY KEY NONCLUSTERED ([id], [registry]) "
+        "ON [ps_grouping_registry]([registry])",
+        "CREATE UNIQUE NONCLUSTERED INDEX [IX_grouping_awaiting] ON [dbo].[grouping] "
+        "([awaiting_fileno] ASC, [registry] ASC) WITH (DROP_EXISTING = ON) ON [ps_grouping_registry]([registry])",
+        "CREATE NONCLUSTERED INDEX [IX_grouping_year] ON [dbo].[grouping] ([year] ASC) "
+        "WITH (DROP_EXISTING = ON) ON [ps_grouping_registry]([registry])"
+    ]
+
+
+def test_maintain_splits_only_missing_boundaries():
+    server = StubServer(boundaries=['1', '2'])
+    added = GroupingPartitioner(StubConnection(server), PartitionLayout()).maintain()
+
+    assert added == ['3']
+    assert "ALTER PARTITION SCHEME [ps_grouping_registry] NEXT USED [PRIMARY]" in server.executed
+    assert "ALTER PARTITION FUNCTION [pf_grouping_registry]() SPLIT RANGE (N'3')" in server.executed
+
+
+def test_partition_is_loaded_into_staging_heap_then_switched():
+    server = StubServer()
+    generator = _generator(1991, 1992, numbers_per_year=20)
+    layout = PartitionLayout(generator)
+    loader = StagingSwitchLoader(lambda: StubConnection(server), layout, batch_size=500, insert_engine='executemany')
+    number = layout.partition_number('3')
+    stats = loader.load_partition(number, layout.shards_by_partition()[number])
+
+    assert stats['switched'] and stats['error'] is None
+    assert stats['rows'] == len(server.inserted['[dbo].[grouping_stage_p4]'])
+    assert any(sql.startswith("ALTER TABLE [dbo].[grouping_stage_p4] WITH CHECK ADD CONSTRAINT") and
+               "[registry] >= N'3'" in sql for sql in server.executed)
+    switch = server.executed.index("ALTER TABLE [dbo].[grouping_stage_p4] SWITCH TO [dbo].[grouping] PARTITION 4")
+    assert server.executed[switch + 1] == "DROP TABLE [dbo].[grouping_stage_p4]"
+
+
+def test_non_empty_partition_is_not_loaded():
+    server = StubServer(partition_rows=10)
+    layout = PartitionLayout(_generator(2025, 2025, numbers_per_year=10))
+    summary = StagingSwitchLoader(lambda: StubConnection(server), layout, workers=2, insert_engine='executemany').load()
+
+    assert not summary['success']
+    assert summary['rows'] == 0
+    assert all('reset it before loading' in error for error in summary['errors'])
+    assert not any('SWITCH TO' in sql for sql in server.executed)
+
+
+def test_registry_partitions_hold_the_plan_rows_in_plan_order():
+    server = StubServer()
+    generator = _generator(1990, 1993, numbers_per_year=6)
+    layout = PartitionLayout(generator)
+    loader = StagingSwitchLoader(lambda: StubConnection(server), layout, batch_size=7, insert_engine='executemany')
+    assert loader.load()['success']
+
+    compared = [GROUPING_COLUMNS.index(column) for column in ('awaiting_fileno', 'number', 'group', 'registry_batch_no')]
+    plan = [tuple(record[GROUPING_COLUMNS[index]] for index in compared) for record in generator.generate_file_numbers()]
+    for registry in layout.boundaries():
+        stage = f"[dbo].[grouping_stage_p{layout.partition_number(registry)}]"
+        rows = [tuple(row[index] for index in compared) for row in server.inserted[stage]]
+        expected = [row for row in plan if generator.assign_registry(row[0], int(row[0].split('-')[-2])) == registry]
+        assert rows == expected
+
+
+def test_partitions_get_disjoint_identity_ranges_and_the_table_is_reseeded():
+    server = StubServer(identity=(100, 120))
+    generator = _generator(1991, 1992, numbers_per_year=20)
+    layout = PartitionLayout(generator)
+    loader = StagingSwitchLoader(lambda: StubConnection(server), layout, workers=3, insert_engine='executemany')
+    summary = loader.load()
+    assert summary['success']
+
+    # Each partition starts where the previous one's planned rows end, after the highest id in use
+    next_id = 121
+    for stats in summary['partitions']:
+        stage = f"[dbo].[grouping_stage_p{stats['partition']}]"
+        assert stats['first_id'] == next_id
+        assert f"DBCC CHECKIDENT (N'{stage}', RESEED, {next_id}) WITH NO_INFOMSGS" in server.executed
+        next_id += stats['rows']
+    assert next_id == 121 + sum(count for *_, count in generator.iter_slices())
+
+    reseed = server.executed.index("DBCC CHECKIDENT (N'[dbo].[grouping]', RESEED) WITH NO_INFOMSGS")
+    assert reseed > max(index for index, sql in enumerate(server.executed) if 'SWITCH TO' in sql)
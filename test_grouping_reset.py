@@ -0,0 +1,182 @@
+"""Tests for the grouping reset strategies."""
+
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import grouping_reset  # noqa: E402
+from grouping_reset import GroupingReset  # noqa: E402
+
+
+class StubServer:
+    """Answers the metadata queries GroupingReset issues against a simulated grouping table."""
+
+    def __init__(self, generated=0, other=0, partitioned=False, shared_partition=False,
+                 referenced=False, truncate_error=None, log_usage=(10.0,)):
+        self.generated = generated
+        self.other = other
+        self.partitioned = partitioned
+        self.shared_partition = shared_partition
+        self.referenced = referenced
+        self.truncate_error = truncate_error
+        self.log_usage = list(log_usage)
+        self.executed = []
+        self.commits = 0
+
+    def respond(self, sql):
+        if 'TRUNCATE TABLE' in sql:
+            if self.truncate_error:
+                raise RuntimeError(self.truncate_error)
+            self.generated = self.other = 0
+            return [], -1
+        match = re.search(r"DELETE TOP \((\d+)\)", sql)
+        if match:
+            count = min(int(match.group(1)), self.generated)
+            self.generated -= count
+            return [], count
+        if 'SWITCH PARTITION' in sql:
+            self.generated = 0
+            return [], -1
+        if 'sys.dm_db_log_space_usage' in sql:
+            value = self.log_usage.pop(0) if len(self.log_usage) > 1 else self.log_usage[0]
+            return [(value,)], -1
+        if 'recovery_model_desc' in sql:
+            return [('SIMPLE',)], -1
+        if 'sys.partition_functions' in sql:
+            return ([('pf_source', 'ps_source', 'created_by')] if self.partitioned else []), -1
+        if '$PARTITION' in sql and 'FROM [dbo].[grouping]' in sql:
+            return ([(1,)] if self.shared_partition else []), -1
+        if '$PARTITION' in sql:
+            return [(2,)], -1
+        if 'sys.dm_db_partition_stats' in sql:
+            return [(self.generated + self.other,)], -1
+        if 'sys.foreign_keys' in sql:
+            return ([(1,)] if self.referenced else []), -1
+        if 'COUNT_BIG' in sql:
+            return [(self.generated,)], -1
+        if 'NOT ([created_by]' in sql:
+            return ([(1,)] if self.other else []), -1
+        if 'sys.filegroups' in sql:
+            return [('FG_GENERATED',)], -1
+        return [], -1
+
+
+class StubCursor:
+    def __init__(self, server):
+        self.server = server
+        self.rows = []
+        self.rowcount = -1
+
+    def execute(self, sql, params=None):
+        self.server.executed.append(' '.join(sql.split()))
+        self.rows, self.rowcount = self.server.respond(sql)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self, server):
+        self.server = server
+
+    def cursor(self):
+        return StubCursor(self.server)
+
+    def commit(self):
+        self.server.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def _reset(server, **kwargs):
+    return GroupingReset(StubConnection(server), **kwargs)
+
+
+def test_truncate_when_only_generated_rows_exist():
+    server = StubServer(generated=120000)
+    summary = _reset(server).reset()
+
+    assert summary['strategy'] == 'truncate'
+    assert summary['deleted'] == 120000
+    assert "TRUNCATE TABLE [dbo].[grouping]" in server.executed
+
+
+def test_foreign_keys_rule_out_truncate():
+    server = StubServer(generated=1000, referenced=True)
+    assert _reset(server).choose_strategy()['strategy'] == 'chunked'
+
+
+def test_chunked_delete_with_progress_when_other_rows_exist():
+    server = StubServer(generated=125000, other=50)
+    progress = []
+    summary = _reset(server, chunk_size=50000, progress_callback=lambda done, total: progress.append((done, total))).reset()
+
+    assert summary['strategy'] == 'chunked'
+    assert (summary['deleted'], summary['chunks']) == (125000, 3)
+    assert progress == [(50000, 125000), (100000, 125000), (125000, 125000)]
+    assert server.other == 50
+    # One transaction per chunk
+    assert server.commits == 3
+
+
+def test_chunked_delete_pauses_and_shrinks_chunks_under_log_pressure(monkeypatch):
+    monkeypatch.setattr(grouping_reset.time, 'sleep', lambda seconds: None)
+    server = StubServer(generated=100000, other=1, log_usage=(90.0, 90.0, 20.0))
+    summary = _reset(server, chunk_size=40000, log_used_limit=70).reset('chunked')
+
+    deletes = [int(re.search(r"TOP \((\d+)\)", sql).group(1)) for sql in server.executed if 'DELETE TOP' in sql]
+    assert deletes[:2] == [40000, 20000]
+    assert "CHECKPOINT" in server.executed
+    assert summary['deleted'] == 100000
+
+
+def test_switch_out_when_partitioned_by_source():
+    server = StubServer(generated=80000, other=10, partitioned=True)
+    summary = _reset(server).reset()
+
+    assert summary['strategy'] == 'switch'
+    assert summary['partition'] == 2
+    assert "ALTER TABLE [dbo].[grouping] SWITCH PARTITION 2 TO [dbo].[grouping_switch_out]" in server.executed
+    assert any("INTO [dbo].[grouping_switch_out] ON [FG_GENERATED]" in sql for sql in server.executed)
+    assert "DROP TABLE [dbo].[grouping_switch_out]" in server.executed
+
+
+def test_shared_partition_is_not_switched():
+    server = StubServer(generated=80000, other=10, partitioned=True, shared_partition=True)
+    assert _reset(server).choose_strategy()['strategy'] == 'chunked'
+    with pytest.raises(ValueError):
+        _reset(server).reset('switch')
+
+
+def test_failed_truncate_falls_back_to_chunked_delete():
+    server = StubServer(generated=30000, truncate_error="permission denied")
+    summary = _reset(server, chunk_size=50000).reset()
+
+    assert summary['strategy'] == 'chunked'
+    assert 'truncate failed' in summary['reason']
+    assert summary['deleted'] == 30000
+
+
+def test_requested_truncate_keeps_rows_from_other_sources():
+    server = StubServer(generated=30000, other=5)
+    summary = _reset(server, chunk_size=50000).reset('truncate')
+
+    assert summary['strategy'] == 'chunked'
+    assert 'holds other rows' in summary['reason']
+    assert not any('TRUNCATE' in sql for sql in server.executed)
+    assert (server.generated, server.other) == (0, 5)
+
+    referenced = StubServer(generated=100, referenced=True)
+    assert _reset(referenced).reset('truncate')['strategy'] == 'chunked'
+    assert not any('TRUNCATE' in sql for sql in referenced.executed)
@@ -0,0 +1,156 @@
+"""Tests for disabling and rebuilding nonclustered indexes around a load."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from index_maintenance import IndexMaintenance  # noqa: E402
+
+
+INDEXES = [
+    (2, 'IX_grouping_registry', 0, 0, None),
+    (3, 'IX_grouping_awaiting', 1, 0, "([awaiting_fileno] IS NOT NULL)"),
+    (4, 'IX_grouping_old', 0, 1, None),
+    (5, 'IX_grouping_tracking', 0, 0, None),
+]
+INDEX_COLUMNS = [
+    {'index_id': 2, 'name': 'registry', 'is_descending_key': 0, 'is_included_column': 0},
+    {'index_id': 2, 'name': 'number', 'is_descending_key': 1, 'is_included_column': 0},
+    {'index_id': 2, 'name': 'tracking_id', 'is_descending_key': 0, 'is_included_column': 1},
+    {'index_id': 3, 'name': 'awaiting_fileno', 'is_descending_key': 0, 'is_included_column': 0},
+    {'index_id': 4, 'name': 'year', 'is_descending_key': 0, 'is_included_column': 0},
+    {'index_id': 5, 'name': 'tracking_id', 'is_descending_key': 0, 'is_included_column': 0},
+]
+
+
+class StubCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        if 'REBUILD' in sql and any(name in sql for name in self.connection.failing):
+            raise RuntimeError("rebuild failed")
+        self.connection.executed.append(' '.join(sql.split()))
+        if 'FROM sys.indexes' in sql:
+            self.rows = INDEXES
+        elif 'FROM sys.index_columns' in sql:
+            self.rows = INDEX_COLUMNS
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self, failing=()):
+        self.executed = []
+        self.failing = set(failing)
+        self.commits = 0
+        self.closed = False
+
+    def cursor(self):
+        return StubCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _statements(connection, keyword):
+    return [sql for sql in connection.executed if keyword in sql]
+
+
+def test_read_indexes_builds_create_statements(tmp_path):
+    maintenance = IndexMaintenance(StubConnection(), state_path=str(tmp_path / 'state.json'))
+    indexes = {index['name']: index for index in maintenance.read_indexes()}
+
+    assert indexes['IX_grouping_registry']['definition'] == (
+        "CREATE NONCLUSTERED INDEX [IX_grouping_registry] ON [dbo].[grouping] "
+        "([registry] ASC, [number] DESC) INCLUDE ([tracking_id])"
+    )
+    assert indexes['IX_grouping_awaiting']['definition'].startswith("CREATE UNIQUE NONCLUSTERED INDEX")
+    assert indexes['IX_grouping_awaiting']['definition'].endswith("WHERE ([awaiting_fileno] IS NOT NULL)")
+    assert indexes['IX_grouping_old']['is_disabled']
+
+
+def test_context_manager_disables_and_rebuilds_only_enabled_non_unique_indexes(tmp_path):
+    connection = StubConnection()
+    state_path = tmp_path / 'state.json'
+    with IndexMaintenance(connection, state_path=str(state_path), maxdop=4):
+        assert state_path.exists()
+        # The unique index keeps rejecting duplicates during the load
+        assert _statements(connection, 'DISABLE') == [
+            "ALTER INDEX [IX_grouping_registry] ON [dbo].[grouping] DISABLE",
+            "ALTER INDEX [IX_grouping_tracking] ON [dbo].[grouping] DISABLE",
+        ]
+
+    assert _statements(connection, 'REBUILD') == [
+        "ALTER INDEX [IX_grouping_registry] ON [dbo].[grouping] REBUILD WITH (MAXDOP = 4)",
+        "ALTER INDEX [IX_grouping_tracking] ON [dbo].[grouping] REBUILD WITH (MAXDOP = 4)",
+    ]
+    assert not state_path.exists()
+
+
+def test_indexes_are_rebuilt_after_a_failed_load(tmp_path):
+    connection = StubConnection()
+    try:
+        with IndexMaintenance(connection, state_path=str(tmp_path / 'state.json')):
+            raise ValueError("load failed")
+    except ValueError:
+        pass
+
+    assert len(_statements(connection, 'REBUILD')) == 2
+
+
+def test_failed_rebuild_is_kept_for_recovery(tmp_path):
+    state_path = str(tmp_path / 'state.json')
+    maintenance = IndexMaintenance(StubConnection(failing={'IX_grouping_tracking'}), state_path=state_path)
+    maintenance.disable()
+    results = maintenance.rebuild()
+
+    assert [result['name'] for result in results if result['error']] == ['IX_grouping_tracking']
+    assert [index['name'] for index in IndexMaintenance(StubConnection(), state_path=state_path).pending()] == [
+        'IX_grouping_tracking'
+    ]
+
+    # A later run recovers the leftover index without disabling anything new
+    recovery_connection = StubConnection()
+    assert [result['error'] for result in IndexMaintenance(recovery_connection, state_path=state_path).rebuild()] == [None]
+    assert _statements(recovery_connection, 'DISABLE') == []
+
+
+def test_crashed_run_indexes_are_carried_into_the_next_disable(tmp_path):
+    state_path = str(tmp_path / 'state.json')
+    IndexMaintenance(StubConnection(), state_path=state_path).disable()
+
+    # Both indexes are now disabled on the server; the next run must still rebuild them
+    rerun = IndexMaintenance(StubConnection(), state_path=state_path)
+    assert [index['name'] for index in rerun.disable()] == ['IX_grouping_registry', 'IX_grouping_tracking']
+
+
+def test_parallel_rebuilds_use_their_own_connections(tmp_path):
+    opened = []
+
+    def factory():
+        connection = StubConnection()
+        opened.append(connection)
+        return connection
+
+    maintenance = IndexMaintenance(
+        StubConnection(), state_path=str(tmp_path / 'state.json'), parallel_rebuilds=2, connection_factory=factory
+    )
+    maintenance.disable()
+    results = maintenance.rebuild()
+
+    assert all(result['error'] is None for result in results)
+    assert len(opened) == 2
+    assert all(connection.closed and connection.commits == 1 for connection in opened)
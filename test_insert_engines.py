@@ -0,0 +1,112 @@
+"""Tests for the pluggable grouping insert engines."""
+
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), 'scripts'))
+
+from benchmark_throughput import open_sqlite_standin  # noqa: E402
+from file_number_generator import FileNumberGenerator, GROUPING_COLUMNS, record_rows  # noqa: E402
+from insert_engines import (  # noqa: E402
+    BulkCopyInsertEngine, BulkInsertFileEngine, ExecutemanyInsertEngine, create_insert_engine
+)
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+
+def _rows(count=12):
+    return record_rows(FileNumberGenerator().generate_file_numbers(max_per_category=count // 16 + 1))[:count]
+
+
+class StubCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append(sql)
+        if 'sys.columns' in sql:
+            # Target table has an identity column first
+            self.rows = [('id', 1)] + [(name, index + 2) for index, name in enumerate(GROUPING_COLUMNS)]
+        match = re.search(r"FROM '([^']+)'", sql)
+        if match:
+            with open(match.group(1), encoding='utf-8') as handle:
+                self.connection.loaded.append(handle.read())
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self):
+        self.executed = []
+        self.loaded = []
+        self.copied = []
+
+    def cursor(self):
+        return StubCursor(self)
+
+
+class StubBulkCopyConnection(StubConnection):
+    def bulk_copy(self, table, rows, column_ids=None, batch_size=1000, tablock=False):
+        self.copied.append((table, list(rows), column_ids, tablock))
+
+
+def test_executemany_engine_inserts_rows():
+    connection = open_sqlite_standin()
+    rows = _rows()
+    engine = ExecutemanyInsertEngine()
+    assert engine.insert_rows(connection, rows) == len(rows)
+    assert connection.execute("SELECT COUNT(*) FROM dbo.[grouping]").fetchone()[0] == len(rows)
+
+
+def test_bulk_copy_engine_maps_column_ordinals():
+    connection = StubBulkCopyConnection()
+    rows = _rows()
+    engine = BulkCopyInsertEngine()
+    engine.insert_rows(connection, rows)
+    engine.insert_rows(connection, rows)
+
+    table, copied, column_ids, tablock = connection.copied[0]
+    assert table == '[dbo].[grouping]' and tablock
+    assert copied == rows
+    assert column_ids == list(range(2, len(GROUPING_COLUMNS) + 2))
+    assert sum('sys.columns' in sql for sql in connection.executed) == 1
+
+
+def test_bulk_insert_engine_stages_until_flush(tmp_path):
+    connection = StubConnection()
+    engine = BulkInsertFileEngine(str(tmp_path))
+    rows = _rows()
+    engine.insert_rows(connection, rows[:5])
+    engine.insert_rows(connection, rows[5:])
+    assert connection.executed == []
+
+    assert engine.flush(connection) == len(rows)
+    assert 'TABLOCK' in connection.executed[0]
+    lines = connection.loaded[0].splitlines()
+    assert len(lines) == len(rows)
+    first = lines[0].split('\t')
+    assert first[0] == rows[0][0] and first[-1] == rows[0][-1]
+    assert first[GROUPING_COLUMNS.index('created_at')] == rows[0][5].strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    assert [path.name for path in tmp_path.iterdir()] == ['grouping_format.fmt']
+    assert engine.flush(connection) == 0
+
+
+def test_auto_engine_selection(monkeypatch, tmp_path):
+    monkeypatch.delenv('INSERT_ENGINE', raising=False)
+    monkeypatch.delenv('BULK_STAGING_DIR', raising=False)
+    assert create_insert_engine('auto', StubBulkCopyConnection()).name == 'bulk_copy'
+    assert create_insert_engine('auto', StubConnection()).name == 'executemany'
+
+    monkeypatch.setenv('BULK_STAGING_DIR', str(tmp_path))
+    assert create_insert_engine('auto', StubConnection()).name == 'bulk_insert'
+    monkeypatch.setenv('INSERT_ENGINE', 'executemany')
+    assert create_insert_engine(None, StubBulkCopyConnection()).name == 'executemany'
@@ -0,0 +1,84 @@
+"""Tests for the metrics registry and its Prometheus text exposition."""
+
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from metrics import LoadMetrics, MetricsExporter, MetricsRegistry  # noqa: E402
+
+
+def test_counters_and_gauges_render_in_prometheus_text():
+    registry = MetricsRegistry()
+    rows = registry.counter('rows_total', 'Rows written', ('component',))
+    depth = registry.gauge('queue_depth', 'Queued batches')
+    rows.inc(1000, component='production')
+    rows.inc(500, component='production')
+    depth.set(2)
+
+    text = registry.render()
+    assert '# HELP rows_total Rows written\n# TYPE rows_total counter\nrows_total{component="production"} 1500' in text
+    assert '# TYPE queue_depth gauge\nqueue_depth 2' in text
+    with pytest.raises(ValueError):
+        rows.inc(-1, component='production')
+    with pytest.raises(ValueError):
+        rows.inc(component='production', queue='x')
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('batch_seconds', 'Batch latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value)
+
+    snapshot = latency.snapshot()
+    assert snapshot['count'] == 4
+    assert snapshot['sum'] == pytest.approx(4.25)
+    assert list(snapshot['buckets'].values()) == [1, 3, 4]
+    text = registry.render()
+    assert 'batch_seconds_bucket{le="0.1"} 1' in text
+    assert 'batch_seconds_bucket{le="+Inf"} 4' in text
+    assert 'batch_seconds_count 4' in text
+
+
+def test_registry_returns_existing_metric_and_rejects_conflicts():
+    registry = MetricsRegistry()
+    assert registry.counter('hits_total', 'Hits') is registry.counter('hits_total', 'Hits')
+    with pytest.raises(ValueError):
+        registry.gauge('hits_total', 'Hits')
+
+
+def test_load_metrics_share_names_across_components():
+    registry = MetricsRegistry()
+    loader, importer = LoadMetrics('production', registry), LoadMetrics('csv_import', registry)
+    loader.inserted(10000)
+    importer.inserted(250)
+    importer.cache('grouping_lookup', hit=True, count=3)
+    importer.cache('grouping_lookup', hit=False)
+    importer.round_trip('select', 2)
+
+    text = registry.render()
+    assert 'filenogen_rows_inserted_total{component="csv_import"} 250' in text
+    assert 'filenogen_rows_inserted_total{component="production"} 10000' in text
+    assert 'filenogen_db_round_trips_total{component="csv_import",operation="select"} 2' in text
+    assert importer.cache_hit_ratio('grouping_lookup') == 0.75
+    assert loader.cache_hit_ratio('grouping_lookup') is None
+
+
+def test_exporter_writes_file_and_serves_http(tmp_path):
+    registry = MetricsRegistry()
+    LoadMetrics('production', registry).generated(42)
+    path = tmp_path / 'metrics' / 'filenogen.prom'
+    exporter = MetricsExporter(registry, path=str(path), port=0, interval=60, host='127.0.0.1').start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics", timeout=5) as response:
+            body = response.read().decode('utf-8')
+    finally:
+        exporter.stop()
+
+    assert 'filenogen_rows_generated_total{component="production"} 42' in body
+    # stop() writes the file one last time
+    assert path.read_text(encoding='utf-8') == registry.render()
@@ -0,0 +1,121 @@
+"""Tests for the parallel multi-connection insert pipeline."""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), 'scripts'))
+
+from benchmark_throughput import open_sqlite_standin  # noqa: E402
+from parallel_insertion import ParallelInserter  # noqa: E402
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+COMPARED = "[awaiting_fileno], [number], [registry], [group], [sys_batch_no], [registry_batch_no]"
+
+
+class SqliteFactory:
+    """Open a connection whose dbo schema is the shared test database."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self):
+        connection = sqlite3.connect(":memory:", timeout=30)
+        connection.execute("ATTACH DATABASE ? AS dbo", (self.path,))
+        return connection
+
+
+class FailingFactory:
+    def __call__(self):
+        raise ConnectionError("no database")
+
+
+def _stored_rows(path):
+    connection = SqliteFactory(path)()
+    rows = connection.execute(f"SELECT {COMPARED} FROM dbo.[grouping] ORDER BY [number]").fetchall()
+    connection.close()
+    return rows
+
+
+def _expected_rows(generator):
+    return [
+        (r['awaiting_fileno'], r['number'], r['registry'], r['group'], r['sys_batch_no'], r['registry_batch_no'])
+        for r in generator.generate_file_numbers()
+    ]
+
+
+def _production_rows(tmp_path, monkeypatch):
+    """Rows of a sequential ProductionInserter load of the small configuration (sqlite sink)"""
+    try:
+        import production_insertion as production
+    except ImportError as exc:  # the SQL Server drivers it imports need an ODBC driver manager
+        pytest.skip(f"production_insertion unavailable: {exc}")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('NUMBERS_PER_YEAR', '5')
+    monkeypatch.setenv('RECORDS_PER_GROUP', '7')
+    inserter = production.ProductionInserter()
+    inserter.sink_name, inserter.sink_path = 'sqlite', str(tmp_path / 'sequential.sqlite3')
+    assert inserter.run_production_insertion(checkpoint=None)
+
+    connection = sqlite3.connect(inserter.sink_path)
+    rows = connection.execute(f"SELECT {COMPARED} FROM [grouping] ORDER BY [number]").fetchall()
+    connection.close()
+    return rows
+
+
+def _prepare(tmp_path):
+    path = str(tmp_path / "grouping.db")
+    open_sqlite_standin(path).close()
+    return path
+
+
+def test_threads_mode_inserts_every_row_once(tmp_path, small_generator):
+    path = _prepare(tmp_path)
+    progress = []
+    summary = ParallelInserter(
+        SqliteFactory(path), workers=3, batch_size=40, transaction_size=80, generator=small_generator(5, 7)
+    ).run(progress_callback=lambda rows, category: progress.append(rows))
+
+    expected = _expected_rows(small_generator(5, 7))
+    assert summary['success']
+    assert summary['rows'] == len(expected) == sum(progress)
+    assert len(summary['workers']) == 3
+    assert sum(stats['rows'] for stats in summary['workers']) == len(expected)
+    assert _stored_rows(path) == expected
+
+
+def test_processes_mode_matches_sequential_counters(tmp_path, small_generator):
+    path = _prepare(tmp_path)
+    summary = ParallelInserter(
+        SqliteFactory(path), workers=2, batch_size=50, generator=small_generator(5, 7), mode='processes'
+    ).run()
+
+    assert summary['success']
+    assert len(summary['shards']) == len(small_generator(5, 7).plan_shards())
+    assert _stored_rows(path) == _expected_rows(small_generator(5, 7))
+
+
+def test_parallel_modes_write_what_the_sequential_load_writes(tmp_path, monkeypatch, small_generator):
+    sequential = _production_rows(tmp_path, monkeypatch)
+    assert ('RES-1992-1', 56) in [row[:2] for row in sequential]
+
+    for mode, workers in (('threads', 3), ('processes', 2)):
+        path = str(tmp_path / f"{mode}.db")
+        open_sqlite_standin(path).close()
+        summary = ParallelInserter(
+            SqliteFactory(path), workers=workers, batch_size=40, generator=small_generator(5, 7), mode=mode
+        ).run()
+        assert summary['success']
+        assert _stored_rows(path) == sequential
+
+
+def test_worker_failure_is_reported(small_generator):
+    summary = ParallelInserter(FailingFactory(), workers=2, generator=small_generator(5, 7)).run()
+    assert not summary['success']
+    assert summary['rows'] == 0
+    assert len(summary['errors']) == 2
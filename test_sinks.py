@@ -0,0 +1,92 @@
+"""Tests for the null, file and SQLite load sinks."""
+
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import FileNumberGenerator, GROUPING_COLUMNS, record_rows  # noqa: E402
+from sinks import FileSink, NullSink, SQLiteSink, create_sink  # noqa: E402
+
+
+def _rows(count=30):
+    records = FileNumberGenerator().generate_file_numbers(['RES'], max_per_category=count)
+    return record_rows(list(records))
+
+
+def test_null_sink_counts_committed_rows_only():
+    sink = NullSink()
+    sink.open()
+    sink.insert_rows(_rows(10))
+    sink.commit()
+    sink.insert_rows(_rows(5))
+    sink.rollback()
+
+    assert sink.count() == 10
+    assert sink.clear() == 10
+    assert sink.count() == 0
+
+
+def test_file_sink_rollback_cuts_back_to_last_commit(tmp_path):
+    path = tmp_path / 'grouping.csv'
+    rows = _rows(20)
+    sink = FileSink(str(path))
+    sink.open()
+    sink.insert_rows(rows[:12])
+    sink.commit()
+    sink.insert_rows(rows[12:])
+    sink.rollback()
+    sink.close()
+
+    with open(path, newline='', encoding='utf-8') as handle:
+        written = list(csv.reader(handle))
+    assert written[0] == list(GROUPING_COLUMNS)
+    assert [line[0] for line in written[1:]] == [row[0] for row in rows[:12]]
+    # created_at uses the SQL Server DATETIME text form
+    assert len(written[1][GROUPING_COLUMNS.index('created_at')]) == 23
+
+
+def test_file_sink_writes_bcp_for_dat_path(tmp_path):
+    path = tmp_path / 'grouping.dat'
+    sink = create_sink('file', str(path))
+    sink.open()
+    sink.insert_rows(_rows(3))
+    sink.commit()
+    sink.close()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 3
+    assert len(lines[0].split('\t')) == len(GROUPING_COLUMNS)
+    with pytest.raises(RuntimeError):
+        sink.delete_after(1)
+
+
+def test_sqlite_sink_supports_resume_cleanup(tmp_path):
+    sink = SQLiteSink(str(tmp_path / 'grouping.sqlite3'))
+    sink.open()
+    rows = _rows(25)
+    sink.insert_rows(rows)
+    sink.commit()
+    sink.insert_rows(_rows(5))
+    sink.rollback()
+
+    assert sink.count() == 25
+    # Rows numbered past a checkpoint are removed before resuming
+    assert sink.delete_after(20) == 5
+    assert sink.count() == 20
+    assert sink.clear() == 20
+    sink.close()
+
+
+def test_create_sink_reads_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv('SINK', 'sqlite')
+    monkeypatch.setenv('SINK_PATH', str(tmp_path / 'env.sqlite3'))
+    sink = create_sink()
+
+    assert isinstance(sink, SQLiteSink)
+    assert sink.path == str(tmp_path / 'env.sqlite3')
+    with pytest.raises(ValueError):
+        create_sink('oracle')
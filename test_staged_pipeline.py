@@ -0,0 +1,117 @@
+"""Tests for the staged generate/pack/send pipeline."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import FileNumberGenerator, record_rows  # noqa: E402
+from staged_pipeline import StagedPipeline, combine_stage_stats, format_stage_stats  # noqa: E402
+
+
+def _keys(rows):
+    # awaiting_fileno, number, registry (tracking ids are random)
+    return [(row[0], row[2], row[6]) for row in rows]
+
+
+def _pipeline(generator, threaded=True, batch_size=7, categories=('RES', 'CON-COM')):
+    generator.reset_counters()
+    records = generator.generate_file_numbers(list(categories), max_per_category=30, reset_counters=False)
+    return StagedPipeline(records, record_rows, batch_size, snapshot=generator.counter_state, threaded=threaded)
+
+
+@pytest.mark.parametrize('threaded', [True, False])
+def test_batches_keep_generation_order_and_counter_snapshots(threaded):
+    generator = FileNumberGenerator()
+    expected = _keys(record_rows(generator.generate_file_numbers(['RES', 'CON-COM'], max_per_category=30)))
+
+    sent = []
+    for batch in _pipeline(generator, threaded):
+        sent.extend(batch.rows)
+        # The snapshot describes the counters right after the batch's last record
+        assert batch.state['global_count'] == batch.rows[-1][2]
+        assert sum(batch.state['registry_counts'].values()) == batch.rows[-1][2]
+
+    assert _keys(sent) == expected
+    assert len(sent) == 60
+
+
+def test_batch_size_is_read_before_every_batch():
+    sizes = iter([5, 10, 20, 100, 100])
+    generator = FileNumberGenerator()
+    generator.reset_counters()
+    records = generator.generate_file_numbers(['RES'], max_per_category=40, reset_counters=False)
+    pipeline = StagedPipeline(records, record_rows, lambda: next(sizes), threaded=False)
+
+    assert [len(batch.rows) for batch in pipeline] == [5, 10, 20, 5]
+
+
+def test_slow_sender_applies_backpressure_and_is_the_bottleneck():
+    produced = []
+
+    def records():
+        for number in range(200):
+            produced.append(number)
+            yield {'number': number}
+
+    pipeline = StagedPipeline(records(), lambda batch: [(r['number'],) for r in batch], 10, queue_depth=2)
+    ahead = []
+    for batch in pipeline:
+        time.sleep(0.01)
+        # Generated-but-unsent rows are bounded by the two queues plus the batches in hand
+        ahead.append(len(produced) - batch.rows[-1][0] - 1)
+
+    stats = pipeline.stats()
+    assert max(ahead) <= 10 * (2 * 2 + 3)
+    assert stats['bottleneck'] == 'send'
+    generate = stats['stages'][0]
+    assert generate['blocked_seconds'] > 0
+    assert stats['stages'][2]['rows'] == 200
+
+
+def test_slow_packer_is_reported_as_bottleneck():
+    def pack(batch):
+        time.sleep(0.01)
+        return [(record,) for record in batch]
+
+    pipeline = StagedPipeline(iter(range(100)), pack, 10)
+    assert sum(len(batch.rows) for batch in pipeline) == 100
+    assert pipeline.stats()['bottleneck'] == 'pack'
+    assert 'bottleneck: pack' in format_stage_stats(pipeline.stats())
+
+
+def test_generator_errors_reach_the_sender():
+    def records():
+        yield from range(15)
+        raise ValueError("generation failed")
+
+    pipeline = StagedPipeline(records(), lambda batch: [(r,) for r in batch], 5)
+    with pytest.raises(ValueError):
+        for _ in pipeline:
+            pass
+    assert not any(thread.name.startswith('pipeline-') for thread in threading.enumerate())
+
+
+def test_early_stop_joins_stage_threads():
+    pipeline = StagedPipeline(iter(range(10000)), lambda batch: [(r,) for r in batch], 10)
+    for _ in pipeline:
+        break
+    pipeline.close()
+
+    assert not any(thread.name.startswith('pipeline-') for thread in threading.enumerate())
+
+
+def test_combine_stage_stats_adds_runs():
+    runs = []
+    for _ in range(2):
+        pipeline = StagedPipeline(iter(range(20)), lambda batch: [(r,) for r in batch], 5, threaded=False)
+        list(pipeline)
+        runs.append(pipeline.stats())
+
+    combined = combine_stage_stats(runs)
+    assert [stage['rows'] for stage in combined['stages']] == [40, 40, 40]
+    assert combined['seconds'] == pytest.approx(sum(run['seconds'] for run in runs))
@@ -0,0 +1,63 @@
+"""Tests for the pluggable tracking ID engines."""
+
+import os
+import re
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import FileNumberGenerator  # noqa: E402
+from tracking_ids import (  # noqa: E402
+    KeyedHashTrackingIdEngine, RandomTrackingIdEngine, create_tracking_id_engine, find_duplicates
+)
+
+TRACKING_ID_PATTERN = re.compile(r'^TRK-[A-Z0-9]{8}-[A-Z0-9]{5}$')
+
+
+def test_keyed_ids_are_reproducible_and_vectorized():
+    engine = KeyedHashTrackingIdEngine('grouping-2025')
+    indices = [0, 1, 2, 99, 7199999]
+
+    vectorized = engine.tracking_ids(np.array(indices))
+    scalar = [engine.tracking_id(index) for index in indices]
+
+    assert vectorized == scalar
+    assert vectorized == KeyedHashTrackingIdEngine('grouping-2025').tracking_ids(indices)
+    assert vectorized != KeyedHashTrackingIdEngine('other-seed').tracking_ids(indices)
+    assert all(TRACKING_ID_PATTERN.match(tracking_id) for tracking_id in vectorized)
+    assert engine.verify(99, vectorized[3])
+
+
+def test_keyed_ids_do_not_collide():
+    engine = KeyedHashTrackingIdEngine(42)
+    tracking_ids = engine.tracking_ids(np.arange(1_000_000))
+    assert find_duplicates(tracking_ids) == []
+
+
+def test_random_engine_keeps_format():
+    engine = RandomTrackingIdEngine()
+    assert TRACKING_ID_PATTERN.match(engine.tracking_id(0))
+    assert all(TRACKING_ID_PATTERN.match(tracking_id) for tracking_id in engine.tracking_ids(range(10)))
+
+
+def test_generator_uses_keyed_engine_in_all_modes():
+    generator = FileNumberGenerator()
+    generator.numbers_per_year = 5
+    generator.tracking_id_engine = create_tracking_id_engine('keyed', 'seed')
+
+    records = list(generator.generate_file_numbers(max_per_category=12))
+    batch_ids = [
+        tracking_id
+        for batch in generator.generate_batches(batch_size=7, max_per_category=12)
+        for tracking_id in batch['tracking_id']
+    ]
+    assert [record['tracking_id'] for record in records] == batch_ids
+
+    shard_ids = []
+    for shard in generator.plan_shards():
+        for batch in generator.generate_shard_batches(shard, batch_size=7):
+            shard_ids.extend(batch['tracking_id'])
+    full_ids = [tracking_id for batch in generator.generate_batches(batch_size=7) for tracking_id in batch['tracking_id']]
+    assert shard_ids == full_ids
@@ -0,0 +1,130 @@
+"""Tests for the local key to tracking_id store."""
+
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from grouping_match_key import match_key  # noqa: E402
+from tracking_key_store import TrackingKeyStore  # noqa: E402
+
+
+class StubCursor:
+    """Answers the queries of GroupingMatchKey and TrackingKeyStore from in-memory grouping rows"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.result = []
+
+    def execute(self, sql, params=()):
+        self.connection.executed.append(sql)
+        rows = self.connection.rows
+        if 'COL_LENGTH' in sql:
+            self.result = [(None,)]
+        elif 'SELECT MAX([id])' in sql:
+            anchor = next((tracking_id for row_id, _, tracking_id, _ in rows if row_id == params[0]), None)
+            self.result = [(max((row[0] for row in rows), default=None), anchor)]
+        else:
+            limit = int(re.search(r'TOP \((\d+)\)', sql).group(1))
+            position, max_id = params
+            self.result = [
+                (row_id, match_key(fileno), tracking_id, mapping)
+                for row_id, fileno, tracking_id, mapping in sorted(rows)
+                if position < row_id <= max_id
+            ][:limit]
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return list(self.result)
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def cursor(self):
+        return StubCursor(self)
+
+    def pages(self):
+        return sum(1 for sql in self.executed if 'SELECT TOP' in sql)
+
+
+def _store(tmp_path, **kwargs):
+    return TrackingKeyStore(tmp_path / 'keys.sqlite3', source='test', **kwargs)
+
+
+def test_refresh_copies_keys_in_pages_and_lowest_id_wins(tmp_path):
+    connection = StubConnection([
+        (1, ' res-1991-1 ', 'TRK-1', 0),
+        (2, 'RES-1991-2', 'TRK-2', 1),
+        (3, 'res-1991-1', 'TRK-3', 0),
+        (4, None, 'TRK-4', 0),
+        (5, 'COM-1991-1', 'TRK-5', 0),
+    ])
+    store = _store(tmp_path, page_rows=2)
+
+    result = store.refresh(connection)
+
+    assert result['rows_read'] == 5 and result['high_water'] == 5
+    assert connection.pages() == 3
+    assert store.lookup(['RES-1991-1 ', 'res-1991-2', 'RES-1991-9']) == {'RES-1991-1': 'TRK-1', 'RES-1991-2': 'TRK-2'}
+    assert store.entries(['RES-1991-2'])['RES-1991-2'] == ('TRK-2', 1)
+    assert store.get(' com-1991-1') == 'TRK-5' and store.get('') is None
+    assert store.stats()['keys'] == 3
+
+
+def test_refresh_reads_only_rows_past_the_high_water_mark(tmp_path):
+    rows = [(row_id, f"RES-1991-{row_id}", f"TRK-{row_id}", 0) for row_id in range(1, 11)]
+    connection = StubConnection(rows)
+    store = _store(tmp_path, overlap_ids=2)
+    store.refresh(connection)
+
+    rows.extend((row_id, f"RES-1991-{row_id}", f"TRK-{row_id}", 0) for row_id in range(11, 14))
+    result = store.refresh(connection)
+
+    # Two ids below the mark are re-read, plus the three new rows
+    assert result == {'rows_read': 5, 'high_water': 13, 'rebuilt': False, 'reason': None}
+    assert store.get('RES-1991-13') == 'TRK-13'
+
+    # Reopening the file keeps the keys and the mark
+    store.close()
+    reopened = _store(tmp_path, overlap_ids=0)
+    assert reopened.refresh(connection)['rows_read'] == 0
+    assert reopened.get('RES-1991-1') == 'TRK-1'
+
+
+def test_reset_grouping_table_rebuilds_the_store(tmp_path):
+    rows = [(row_id, f"RES-1991-{row_id}", f"OLD-{row_id}", 0) for row_id in range(1, 6)]
+    connection = StubConnection(rows)
+    store = _store(tmp_path)
+    store.refresh(connection)
+
+    # Reloaded with the same ids but new tracking ids
+    rows[:] = [(row_id, f"RES-1991-{row_id}", f"NEW-{row_id}", 0) for row_id in range(1, 6)]
+    result = store.refresh(connection)
+    assert result['rebuilt'] and 'reset' in result['reason']
+    assert store.get('RES-1991-3') == 'NEW-3'
+
+    # Truncated and partly reloaded: ids below the mark
+    rows[:] = [(1, 'COM-1991-1', 'TRK-1', 0)]
+    result = store.refresh(connection)
+    assert result['rebuilt'] and 'truncated' in result['reason']
+    assert store.lookup(['RES-1991-3', 'COM-1991-1']) == {'COM-1991-1': 'TRK-1'}
+
+
+def test_mark_mapped_updates_mapping_status(tmp_path):
+    connection = StubConnection([(1, 'RES-1991-1', 'TRK-1', 0), (2, 'RES-1991-2', 'TRK-2', 0)])
+    store = _store(tmp_path)
+    store.refresh(connection)
+
+    assert store.mark_mapped(['TRK-2', 'TRK-2', None]) == 1
+    assert store.mark_mapped(['TRK-2']) == 0
+    assert store.entries(['RES-1991-1', 'RES-1991-2']) == {'RES-1991-1': ('TRK-1', 0), 'RES-1991-2': ('TRK-2', 1)}
+    assert store.stats()['mapped'] == 1
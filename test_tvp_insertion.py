@@ -0,0 +1,89 @@
+"""Tests for table-valued parameter inserts."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from file_number_generator import GROUPING_COLUMNS  # noqa: E402
+from insert_engines import create_insert_engine  # noqa: E402
+import tvp_insertion  # noqa: E402
+from tvp_insertion import (  # noqa: E402
+    FILE_NUMBER_TVP, GROUPING_TVP, RACK_SHELF_TVP, insert_tvp, supports_tvp, tvp_object_sql
+)
+
+
+class StubCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append((sql, params))
+
+    def fetchone(self):
+        sql, params = self.connection.executed[-1]
+        return (len(params[0]),) if params else None
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self):
+        return StubCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+
+def test_grouping_type_matches_insert_columns():
+    assert tuple(name for name, _ in GROUPING_TVP.columns) == GROUPING_COLUMNS
+
+
+def test_object_sql_applies_server_side_normalization():
+    type_sql, procedure_sql = tvp_object_sql(FILE_NUMBER_TVP)
+    assert 'CREATE TYPE [dbo].[FileNumberRowType] AS TABLE' in type_sql
+    assert '@rows [dbo].[FileNumberRowType] READONLY' in procedure_sql
+    assert "NULLIF(LTRIM(RTRIM([rows].[mlsfNo])), N'')" in procedure_sql
+    assert '[rows].[FileName]' in procedure_sql
+    assert 'LTRIM(RTRIM([rows].[rack]))' in tvp_object_sql(RACK_SHELF_TVP)[1]
+
+
+def test_insert_tvp_sends_one_call_per_batch(monkeypatch):
+    monkeypatch.setattr(tvp_insertion, '_ensured_targets', set())
+    connection = StubConnection()
+    setup_connections = []
+
+    def connection_factory():
+        setup_connections.append(StubConnection())
+        return setup_connections[-1]
+
+    rows = [('R1', 1, 'R1-1', False, None, None, None, None), ('R1', 2, 'R1-2', False, None, None, None, None)]
+
+    assert insert_tvp(connection, RACK_SHELF_TVP, rows, connection_factory) == 2
+    assert insert_tvp(connection, RACK_SHELF_TVP, rows[:1], connection_factory) == 1
+    assert connection.executed[0] == ('{CALL [dbo].[usp_tvp_insert_Rack_Shelf_Labels] (?)}', (rows,))
+    assert len(connection.executed) == 2
+    assert insert_tvp(connection, RACK_SHELF_TVP, []) == 0
+
+    # Type and procedure are created once, on their own connection; the loading transaction is never committed
+    assert connection.commits == 0
+    assert len(setup_connections) == 1
+    assert [sql for sql, _ in setup_connections[0].executed] == list(tvp_object_sql(RACK_SHELF_TVP))
+    assert setup_connections[0].commits == 1
+
+
+def test_tvp_engine_requires_pyodbc():
+    assert not supports_tvp(StubConnection())
+    with pytest.raises(ValueError):
+        create_insert_engine('tvp', StubConnection())
+    assert create_insert_engine('tvp').name == 'tvp'